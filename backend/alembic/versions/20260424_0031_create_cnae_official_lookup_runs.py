@@ -0,0 +1,58 @@
+"""create cnae official lookup runs table
+
+Revision ID: 20260424_0031
+Revises: 20260423_0030
+Create Date: 2026-04-24 09:00:00
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20260424_0031"
+down_revision: str | None = "20260423_0030"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "cnae_official_lookup_runs",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("org_id", sa.String(length=36), nullable=False),
+        sa.Column("started_by_user_id", sa.String(length=36), nullable=True),
+        sa.Column("status", sa.String(length=24), nullable=False),
+        sa.Column("sources", sa.JSON(), nullable=True),
+        sa.Column("total_codes", sa.Integer(), nullable=False),
+        sa.Column("total", sa.Integer(), nullable=False),
+        sa.Column("processed", sa.Integer(), nullable=False),
+        sa.Column("findings_count", sa.Integer(), nullable=False),
+        sa.Column("created_count", sa.Integer(), nullable=False),
+        sa.Column("skipped_duplicates", sa.Integer(), nullable=False),
+        sa.Column("error_count", sa.Integer(), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("errors", sa.JSON(), nullable=True),
+        sa.ForeignKeyConstraint(["org_id"], ["orgs.id"]),
+        sa.ForeignKeyConstraint(["started_by_user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_cnae_official_lookup_runs_org_id", "cnae_official_lookup_runs", ["org_id"], unique=False)
+    op.create_index("ix_cnae_official_lookup_runs_status", "cnae_official_lookup_runs", ["status"], unique=False)
+    op.create_index(
+        "ix_cnae_official_lookup_runs_started_at",
+        "cnae_official_lookup_runs",
+        ["started_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_cnae_official_lookup_runs_started_at", table_name="cnae_official_lookup_runs")
+    op.drop_index("ix_cnae_official_lookup_runs_status", table_name="cnae_official_lookup_runs")
+    op.drop_index("ix_cnae_official_lookup_runs_org_id", table_name="cnae_official_lookup_runs")
+    op.drop_table("cnae_official_lookup_runs")
@@ -0,0 +1,56 @@
+"""create certhub webhook runs table
+
+Revision ID: 20260425_0032
+Revises: 20260424_0031
+Create Date: 2026-04-25 09:00:00
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20260425_0032"
+down_revision: str | None = "20260424_0031"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "certhub_webhook_runs",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("org_id", sa.String(length=36), nullable=False),
+        sa.Column("mode", sa.String(length=16), nullable=False),
+        sa.Column("status", sa.String(length=24), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=True),
+        sa.Column("total", sa.Integer(), nullable=False),
+        sa.Column("processed", sa.Integer(), nullable=False),
+        sa.Column("result", sa.JSON(), nullable=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_error", sa.String(length=800), nullable=True),
+        sa.ForeignKeyConstraint(["org_id"], ["orgs.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_certhub_webhook_runs_org_id", "certhub_webhook_runs", ["org_id"], unique=False)
+    op.create_index(
+        "ix_certhub_webhook_runs_org_status_started",
+        "certhub_webhook_runs",
+        ["org_id", "status", "started_at"],
+        unique=False,
+    )
+    op.create_index("ix_certhub_webhook_runs_status", "certhub_webhook_runs", ["status"], unique=False)
+    op.create_index("ix_certhub_webhook_runs_started_at", "certhub_webhook_runs", ["started_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_certhub_webhook_runs_started_at", table_name="certhub_webhook_runs")
+    op.drop_index("ix_certhub_webhook_runs_status", table_name="certhub_webhook_runs")
+    op.drop_index("ix_certhub_webhook_runs_org_status_started", table_name="certhub_webhook_runs")
+    op.drop_index("ix_certhub_webhook_runs_org_id", table_name="certhub_webhook_runs")
+    op.drop_table("certhub_webhook_runs")
@@ -0,0 +1,97 @@
+"""notification unread counters and archive table
+
+Revision ID: 20260427_0034
+Revises: 20260426_0033
+Create Date: 2026-04-27 09:00:00
+"""
+
+from __future__ import annotations
+
+import uuid
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20260427_0034"
+down_revision: str | None = "20260426_0033"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    counters = op.create_table(
+        "notification_unread_counters",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("org_id", sa.String(length=36), nullable=False),
+        sa.Column("user_key", sa.String(length=36), nullable=False, server_default=""),
+        sa.Column("unread_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(["org_id"], ["orgs.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("org_id", "user_key", name="uq_notification_unread_counters_org_user"),
+    )
+
+    op.create_table(
+        "notification_events_archive",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("org_id", sa.String(length=36), nullable=False),
+        sa.Column("user_id", sa.String(length=36), nullable=True),
+        sa.Column("event_type", sa.String(length=64), nullable=False),
+        sa.Column("severity", sa.String(length=16), nullable=False),
+        sa.Column("title", sa.String(length=200), nullable=False),
+        sa.Column("message", sa.Text(), nullable=False),
+        sa.Column("entity_type", sa.String(length=64), nullable=True),
+        sa.Column("entity_id", sa.String(length=64), nullable=True),
+        sa.Column("route_path", sa.String(length=255), nullable=True),
+        sa.Column("dedupe_key", sa.String(length=255), nullable=False),
+        sa.Column("metadata_json", sa.JSON(), nullable=True),
+        sa.Column("read_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("archived_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_notification_events_archive_org_dedupe_key",
+        "notification_events_archive",
+        ["org_id", "dedupe_key"],
+    )
+    op.create_index(
+        "ix_notification_events_archive_org_created",
+        "notification_events_archive",
+        ["org_id", "created_at"],
+    )
+
+    # Backfill dos contadores a partir das nao lidas existentes.
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.text(
+            """
+            SELECT org_id, COALESCE(user_id, '') AS user_key, COUNT(*) AS unread_count
+            FROM notification_events
+            WHERE read_at IS NULL
+            GROUP BY org_id, COALESCE(user_id, '')
+            """
+        )
+    ).fetchall()
+    if rows:
+        op.bulk_insert(
+            counters,
+            [
+                {
+                    "id": str(uuid.uuid4()),
+                    "org_id": row.org_id,
+                    "user_key": row.user_key,
+                    "unread_count": int(row.unread_count),
+                }
+                for row in rows
+            ],
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notification_events_archive_org_created", table_name="notification_events_archive")
+    op.drop_index("ix_notification_events_archive_org_dedupe_key", table_name="notification_events_archive")
+    op.drop_table("notification_events_archive")
+    op.drop_table("notification_unread_counters")
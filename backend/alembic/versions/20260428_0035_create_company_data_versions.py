@@ -0,0 +1,36 @@
+"""create company data versions table
+
+Revision ID: 20260428_0035
+Revises: 20260427_0034
+Create Date: 2026-04-28 09:00:00
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20260428_0035"
+down_revision: str | None = "20260427_0034"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "company_data_versions",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("org_id", sa.String(length=36), nullable=False),
+        sa.Column("company_id", sa.String(length=36), nullable=False, server_default=""),
+        sa.Column("version", sa.Integer(), nullable=False, server_default="1"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("org_id", "company_id", name="uq_company_data_versions_org_company"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("company_data_versions")
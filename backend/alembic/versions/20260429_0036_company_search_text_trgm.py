@@ -0,0 +1,56 @@
+"""company search text with trigram index
+
+Revision ID: 20260429_0036
+Revises: 20260428_0035
+Create Date: 2026-04-29 09:00:00
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.normalize import build_company_search_text
+
+
+revision: str = "20260429_0036"
+down_revision: str | None = "20260428_0035"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def _backfill_search_text(bind) -> None:
+    rows = bind.execute(
+        sa.text("SELECT id, razao_social, nome_fantasia, fs_dirname, cnpj, cpf FROM companies")
+    ).fetchall()
+    for row_id, razao_social, nome_fantasia, fs_dirname, cnpj, cpf in rows:
+        bind.execute(
+            sa.text("UPDATE companies SET search_text = :search_text WHERE id = :row_id"),
+            {
+                "search_text": build_company_search_text(razao_social, nome_fantasia, fs_dirname, cnpj, cpf),
+                "row_id": row_id,
+            },
+        )
+
+
+def upgrade() -> None:
+    op.add_column("companies", sa.Column("search_text", sa.Text(), nullable=True))
+    bind = op.get_bind()
+    _backfill_search_text(bind)
+    if bind.dialect.name == "postgresql":
+        op.execute(sa.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        op.execute(
+            sa.text(
+                "CREATE INDEX IF NOT EXISTS ix_companies_search_text_trgm "
+                "ON companies USING gin (search_text gin_trgm_ops)"
+            )
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute(sa.text("DROP INDEX IF EXISTS ix_companies_search_text_trgm"))
+    op.drop_column("companies", "search_text")
@@ -0,0 +1,56 @@
+"""updated_at indexes and tombstones for delta sync
+
+Revision ID: 20260430_0037
+Revises: 20260429_0036
+Create Date: 2026-04-30 09:00:00
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20260430_0037"
+down_revision: str | None = "20260429_0036"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+_UPDATED_INDEXES = (
+    ("ix_companies_org_updated", "companies"),
+    ("ix_company_licences_org_updated", "company_licences"),
+    ("ix_company_taxes_org_updated", "company_taxes"),
+    ("ix_company_processes_org_updated", "company_processes"),
+    ("ix_certificate_mirror_org_updated", "certificate_mirror"),
+)
+
+
+def upgrade() -> None:
+    for index_name, table_name in _UPDATED_INDEXES:
+        op.create_index(index_name, table_name, ["org_id", "updated_at", "id"])
+
+    op.create_table(
+        "sync_tombstones",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("org_id", sa.String(length=36), nullable=False),
+        sa.Column("entity", sa.String(length=32), nullable=False),
+        sa.Column("entity_id", sa.String(length=36), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(["org_id"], ["orgs.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_sync_tombstones_org_entity_deleted",
+        "sync_tombstones",
+        ["org_id", "entity", "deleted_at", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_sync_tombstones_org_entity_deleted", table_name="sync_tombstones")
+    op.drop_table("sync_tombstones")
+    for index_name, table_name in reversed(_UPDATED_INDEXES):
+        op.drop_index(index_name, table_name=table_name)
@@ -0,0 +1,39 @@
+"""company score recalculation queue
+
+Revision ID: 20260501_0038
+Revises: 20260430_0037
+Create Date: 2026-05-01 09:00:00
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20260501_0038"
+down_revision: str | None = "20260430_0037"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "company_score_queue",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("org_id", sa.String(length=36), nullable=False),
+        sa.Column("company_id", sa.String(length=36), nullable=False),
+        sa.Column("enqueued_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column("last_enqueued_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(["org_id"], ["orgs.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("org_id", "company_id", name="uq_company_score_queue_org_company"),
+    )
+    op.create_index("ix_company_score_queue_enqueued", "company_score_queue", ["enqueued_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_company_score_queue_enqueued", table_name="company_score_queue")
+    op.drop_table("company_score_queue")
@@ -0,0 +1,134 @@
+"""append-only table for process observation history
+
+Revision ID: 20260502_0039
+Revises: 20260501_0038
+Create Date: 2026-05-02 09:00:00
+"""
+
+from __future__ import annotations
+
+import json
+import uuid
+from collections.abc import Sequence
+from datetime import datetime, timedelta, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20260502_0039"
+down_revision: str | None = "20260501_0038"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+_HISTORY_CAP = 200
+
+
+def _parse_timestamp(value) -> datetime | None:
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except (TypeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _as_text(value) -> str | None:
+    return None if value is None else str(value)
+
+
+def _backfill_history(bind, history_table: sa.Table) -> None:
+    rows = bind.execute(
+        sa.text("SELECT id, org_id, obs_history FROM company_processes WHERE obs_history IS NOT NULL")
+    ).fetchall()
+    fallback = datetime.now(timezone.utc)
+    for process_id, org_id, raw_history in rows:
+        history = json.loads(raw_history) if isinstance(raw_history, str) else raw_history
+        if not isinstance(history, list):
+            continue
+        entries = []
+        previous: datetime | None = None
+        for item in history:
+            if not isinstance(item, dict):
+                continue
+            changed_at = _parse_timestamp(item.get("timestamp"))
+            if previous is not None and (changed_at is None or changed_at <= previous):
+                # mantem a ordem do array quando o timestamp falta, empata ou regride
+                changed_at = previous + timedelta(microseconds=1)
+            elif changed_at is None:
+                changed_at = fallback
+            previous = changed_at
+            entries.append(
+                {
+                    "id": str(uuid.uuid4()),
+                    "org_id": org_id,
+                    "process_id": process_id,
+                    "changed_at": changed_at,
+                    "actor_id": _as_text(item.get("actor_id")),
+                    "actor_email": _as_text(item.get("actor_email")),
+                    "old_value": _as_text(item.get("old_value")),
+                    "new_value": _as_text(item.get("new_value")),
+                    "action": str(item.get("action") or "updated")[:32],
+                }
+            )
+        if entries:
+            bind.execute(history_table.insert(), entries)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "company_process_obs_history",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("org_id", sa.String(length=36), nullable=False),
+        sa.Column("process_id", sa.String(length=36), nullable=False),
+        sa.Column("changed_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column("actor_id", sa.String(length=36), nullable=True),
+        sa.Column("actor_email", sa.String(length=255), nullable=True),
+        sa.Column("old_value", sa.Text(), nullable=True),
+        sa.Column("new_value", sa.Text(), nullable=True),
+        sa.Column("action", sa.String(length=32), nullable=False, server_default="updated"),
+        sa.ForeignKeyConstraint(["org_id"], ["orgs.id"]),
+        sa.ForeignKeyConstraint(["process_id"], ["company_processes.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_company_process_obs_history_process_changed",
+        "company_process_obs_history",
+        ["process_id", "changed_at", "id"],
+    )
+    bind = op.get_bind()
+    history_table = sa.Table("company_process_obs_history", sa.MetaData(), autoload_with=bind)
+    _backfill_history(bind, history_table)
+    with op.batch_alter_table("company_processes") as batch_op:
+        batch_op.drop_column("obs_history")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("company_processes") as batch_op:
+        batch_op.add_column(sa.Column("obs_history", sa.JSON(), nullable=True))
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.text(
+            "SELECT process_id, changed_at, actor_id, actor_email, old_value, new_value, action "
+            "FROM company_process_obs_history ORDER BY process_id, changed_at, id"
+        )
+    ).fetchall()
+    by_process: dict[str, list[dict]] = {}
+    for process_id, changed_at, actor_id, actor_email, old_value, new_value, action in rows:
+        timestamp = changed_at.isoformat() if isinstance(changed_at, datetime) else str(changed_at)
+        by_process.setdefault(process_id, []).append(
+            {
+                "timestamp": timestamp,
+                "actor_id": actor_id,
+                "actor_email": actor_email,
+                "old_value": old_value,
+                "new_value": new_value,
+                "action": action,
+            }
+        )
+    for process_id, history in by_process.items():
+        bind.execute(
+            sa.text("UPDATE company_processes SET obs_history = :history WHERE id = :process_id"),
+            {"history": json.dumps(history[-_HISTORY_CAP:]), "process_id": process_id},
+        )
+    op.drop_index("ix_company_process_obs_history_process_changed", table_name="company_process_obs_history")
+    op.drop_table("company_process_obs_history")
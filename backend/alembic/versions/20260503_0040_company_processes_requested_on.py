@@ -0,0 +1,45 @@
+"""typed requested_on date for company processes
+
+Revision ID: 20260503_0040
+Revises: 20260502_0039
+Create Date: 2026-05-03 09:00:00
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.normalize import parse_date_br
+
+
+revision: str = "20260503_0040"
+down_revision: str | None = "20260502_0039"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def _backfill_requested_on(bind) -> None:
+    rows = bind.execute(
+        sa.text("SELECT id, data_solicitacao FROM company_processes WHERE data_solicitacao IS NOT NULL")
+    ).fetchall()
+    for row_id, data_solicitacao in rows:
+        requested_on = parse_date_br(data_solicitacao)
+        if requested_on is None:
+            continue
+        bind.execute(
+            sa.text("UPDATE company_processes SET requested_on = :requested_on WHERE id = :row_id"),
+            {"requested_on": requested_on, "row_id": row_id},
+        )
+
+
+def upgrade() -> None:
+    op.add_column("company_processes", sa.Column("requested_on", sa.Date(), nullable=True))
+    _backfill_requested_on(op.get_bind())
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("company_processes") as batch_op:
+        batch_op.drop_column("requested_on")
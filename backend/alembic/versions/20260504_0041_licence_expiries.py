@@ -0,0 +1,99 @@
+"""precomputed licence expiry calendar
+
+Revision ID: 20260504_0041
+Revises: 20260503_0040
+Create Date: 2026-05-04 09:00:00
+"""
+
+from __future__ import annotations
+
+import json
+import uuid
+from collections.abc import Sequence
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.normalize import parse_date_br
+from app.services.licence_expiries import LICENCE_EXPIRY_FIELDS, licence_expiry_entries
+
+
+revision: str = "20260504_0041"
+down_revision: str | None = "20260503_0040"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def _as_date(value) -> date | None:
+    if isinstance(value, date):
+        return value
+    return parse_date_br(value)
+
+
+def _backfill_licence_expiries(bind, table: sa.Table) -> None:
+    fields = [field for field, _label in LICENCE_EXPIRY_FIELDS]
+    columns = ["id", "org_id", "company_id", "alvara_funcionamento_kind", "raw"]
+    columns += fields + [f"{field}_valid_until" for field in fields]
+    rows = bind.execute(sa.text(f"SELECT {', '.join(columns)} FROM company_licences")).mappings().fetchall()
+    now = datetime.now(timezone.utc)
+    for row in rows:
+        values = dict(row)
+        raw = values.get("raw")
+        if isinstance(raw, str):
+            try:
+                raw = json.loads(raw)
+            except ValueError:
+                raw = None
+        values["raw"] = raw if isinstance(raw, dict) else {}
+        for field in fields:
+            values[f"{field}_valid_until"] = _as_date(values.get(f"{field}_valid_until"))
+        licence = SimpleNamespace(**values)
+        inserts = [
+            {
+                "id": str(uuid.uuid4()),
+                "org_id": licence.org_id,
+                "company_id": licence.company_id,
+                "licence_id": licence.id,
+                "licence_type": entry.licence_type,
+                "status": entry.status,
+                "valid_until": entry.valid_until,
+                "source": entry.source,
+                "is_definitive": entry.is_definitive,
+                "updated_at": now,
+            }
+            for entry in licence_expiry_entries(licence)
+        ]
+        if inserts:
+            bind.execute(table.insert(), inserts)
+
+
+def upgrade() -> None:
+    table = op.create_table(
+        "licence_expiries",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("org_id", sa.String(length=36), nullable=False),
+        sa.Column("company_id", sa.String(length=36), nullable=False),
+        sa.Column("licence_id", sa.String(length=36), nullable=False),
+        sa.Column("licence_type", sa.String(length=64), nullable=False),
+        sa.Column("status", sa.String(length=64), nullable=True),
+        sa.Column("valid_until", sa.Date(), nullable=True),
+        sa.Column("source", sa.String(length=32), nullable=True),
+        sa.Column("is_definitive", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(["org_id"], ["orgs.id"]),
+        sa.ForeignKeyConstraint(["company_id"], ["companies.id"]),
+        sa.ForeignKeyConstraint(["licence_id"], ["company_licences.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("licence_id", "licence_type", name="uq_licence_expiries_licence_type"),
+    )
+    _backfill_licence_expiries(op.get_bind(), table)
+    op.create_index("ix_licence_expiries_org_valid_until", "licence_expiries", ["org_id", "valid_until"])
+    op.create_index("ix_licence_expiries_company", "licence_expiries", ["company_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_licence_expiries_company", table_name="licence_expiries")
+    op.drop_index("ix_licence_expiries_org_valid_until", table_name="licence_expiries")
+    op.drop_table("licence_expiries")
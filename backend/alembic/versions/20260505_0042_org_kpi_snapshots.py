@@ -0,0 +1,47 @@
+"""per-org dashboard KPI snapshots and their append-only dirty marks
+
+Revision ID: 20260505_0042
+Revises: 20260504_0041
+Create Date: 2026-05-05 09:00:00
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20260505_0042"
+down_revision: str | None = "20260504_0041"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "org_kpi_snapshots",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("org_id", sa.String(length=36), nullable=False),
+        sa.Column("metrics", sa.JSON(), nullable=True),
+        sa.Column("computed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["org_id"], ["orgs.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("org_id", name="uq_org_kpi_snapshots_org"),
+    )
+    op.create_table(
+        "org_kpi_dirty_marks",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("org_id", sa.String(length=36), nullable=False),
+        sa.Column("marked_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["org_id"], ["orgs.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_org_kpi_dirty_marks_org_marked", "org_kpi_dirty_marks", ["org_id", "marked_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_org_kpi_dirty_marks_org_marked", table_name="org_kpi_dirty_marks")
+    op.drop_table("org_kpi_dirty_marks")
+    op.drop_table("org_kpi_snapshots")
@@ -0,0 +1,34 @@
+"""cnae risk catalog version row
+
+Revision ID: 20260506_0043
+Revises: 20260505_0042
+Create Date: 2026-05-06 09:00:00
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "20260506_0043"
+down_revision: str | None = "20260505_0042"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "cnae_risk_catalog_versions",
+        sa.Column("scope", sa.String(length=32), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint("scope"),
+    )
+    op.execute("INSERT INTO cnae_risk_catalog_versions (scope, version) VALUES ('cnae_risks', 1)")
+
+
+def downgrade() -> None:
+    op.drop_table("cnae_risk_catalog_versions")
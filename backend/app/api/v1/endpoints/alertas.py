@@ -1,26 +1,28 @@
 from __future__ import annotations
 
-from datetime import date, datetime
+from datetime import date
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.core.org_context import get_current_org
 from app.core.security import require_roles
 from app.db.session import get_db
-from app.models.company_licence import CompanyLicence
+from app.models.licence_expiry import LicenceExpiry
 from app.models.org import Org
-
-router = APIRouter()
-
-LICENCE_FIELDS = (
-    "alvara_vig_sanitaria",
-    "cercon",
-    "alvara_funcionamento",
-    "licenca_ambiental",
-    "certidao_uso_solo",
+from app.schemas.alerta import AlertaOut, AlertaPage
+from app.services.alerts_feed import (
+    ALERT_SEVERITIES,
+    ALERT_TYPES,
+    ALERTS_DEFAULT_LIMIT,
+    ALERTS_HORIZON_DAYS,
+    ALERTS_MAX_LIMIT,
+    AlertFilters,
+    list_alerts,
 )
 
+router = APIRouter()
 
 def _first_day_of_month(value: date) -> date:
     return date(value.year, value.month, 1)
@@ -33,25 +35,46 @@ def _add_months(value: date, months: int) -> date:
     return date(year, month, 1)
 
 
-def _parse_validade(raw: object) -> date | None:
-    if not raw:
-        return None
-    text = str(raw).strip()
-    if not text:
-        return None
-    for fmt in ("%Y-%m-%d", "%d/%m/%Y"):
-        try:
-            return datetime.strptime(text[:10], fmt).date()
-        except ValueError:
-            continue
-    return None
+def _parse_choices(values: list[str] | None, allowed: tuple[str, ...], param: str) -> frozenset[str]:
+    selected = {item.strip().lower() for value in values or [] for item in value.split(",") if item.strip()}
+    unknown = selected - set(allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid {param}: {', '.join(sorted(unknown))}",
+        )
+    return frozenset(selected or allowed)
 
 
-@router.get("")
+@router.get("", response_model=AlertaPage)
 def list_alertas(
+    db: Session = Depends(get_db),
+    org: Org = Depends(get_current_org),
     _user=Depends(require_roles("ADMIN", "DEV", "VIEW")),
-):
-    return {"items": [], "total": 0, "page": 1, "size": 0}
+    tipo_alerta: list[str] | None = Query(default=None),
+    severity: list[str] | None = Query(default=None),
+    empresa_id: str | None = Query(default=None),
+    dias: int = Query(default=ALERTS_HORIZON_DAYS, ge=0, le=365),
+    limit: int = Query(default=ALERTS_DEFAULT_LIMIT, ge=1, le=ALERTS_MAX_LIMIT),
+    cursor: str | None = Query(default=None),
+) -> AlertaPage:
+    filters = AlertFilters(
+        tipos=_parse_choices(tipo_alerta, ALERT_TYPES, "tipo_alerta"),
+        severities=_parse_choices(severity, ALERT_SEVERITIES, "severity"),
+        empresa_id=empresa_id,
+        horizon_days=dias,
+    )
+    try:
+        items, total, next_cursor = list_alerts(db, org.id, filters=filters, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return AlertaPage(
+        items=[AlertaOut(**item) for item in items],
+        total=total,
+        page=1,
+        size=len(items),
+        next_cursor=next_cursor,
+    )
 
 
 @router.get("/tendencia")
@@ -66,31 +89,36 @@ def list_alertas_tendencia(
     anchor = _first_day_of_month(today)
     start_month = _add_months(anchor, -months_back)
 
-    licences = db.query(CompanyLicence).filter(CompanyLicence.org_id == org.id).all()
-
-    entries: list[tuple[date | None, str]] = []
-    for licence in licences:
-        raw = licence.raw if isinstance(licence.raw, dict) else {}
-        for field in LICENCE_FIELDS:
-            status = str(getattr(licence, field) or "").strip().lower()
-            if status in {"", "nao_exigido"}:
-                continue
-            validade = _parse_validade(raw.get(f"validade_{field}") or raw.get(f"{field}_validade"))
-            entries.append((validade, status))
+    end_month = _add_months(start_month, months)
+
+    # Licencas com status "nao exigido" (ou sem status) nao geram alerta.
+    status_key = func.lower(func.trim(LicenceExpiry.status))
+    relevant = db.query(LicenceExpiry).filter(
+        LicenceExpiry.org_id == org.id,
+        LicenceExpiry.status.is_not(None),
+        status_key.notin_(("", "nao_exigido")),
+    )
+    expired_before_window = relevant.filter(LicenceExpiry.valid_until < start_month).count()
+    window_dates = [
+        validade
+        for (validade,) in relevant.filter(
+            LicenceExpiry.valid_until >= start_month, LicenceExpiry.valid_until < end_month
+        ).with_entities(LicenceExpiry.valid_until)
+    ]
+    # itens sem validade, mas já marcados como vencidos entram no mês corrente
+    expired_without_date = relevant.filter(
+        LicenceExpiry.valid_until.is_(None), status_key.like("%vencid%")
+    ).count()
 
     items: list[dict[str, object]] = []
     for index in range(months):
         month_start = _add_months(start_month, index)
         next_month = _add_months(month_start, 1)
 
-        alertas_vencendo = sum(
-            1 for validade, _status in entries if validade is not None and month_start <= validade < next_month
-        )
-        alertas_vencidas = sum(1 for validade, _status in entries if validade is not None and validade < month_start)
-
-        # itens sem validade, mas já marcados como vencidos entram no mês corrente
+        alertas_vencendo = sum(1 for validade in window_dates if month_start <= validade < next_month)
+        alertas_vencidas = expired_before_window + sum(1 for validade in window_dates if validade < month_start)
         if month_start == anchor:
-            alertas_vencidas += sum(1 for validade, status in entries if validade is None and "vencid" in status)
+            alertas_vencidas += expired_without_date
 
         items.append(
             {
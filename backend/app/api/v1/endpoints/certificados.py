@@ -1,7 +1,7 @@
 from datetime import datetime, timezone
 
 import httpx
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import func
 
@@ -15,27 +15,51 @@ from app.schemas.certificate import (
     CertificateSyncRequest,
     CertificateSyncResponse,
 )
-from app.services.certhub_client import CertHubClient
+from app.schemas.sync import SyncPage
+from app.services.certhub_client import get_certhub_client
+from app.services.certhub_sync import run_certhub_pull_sync
 from app.services.certificados_mirror import compute_situacao, upsert_mirror
+from app.services.sync_delta import decode_sync_cursor, fetch_sync_delta
 
 router = APIRouter()
 
 
-@router.get("", response_model=list[CertificateOut], dependencies=[Depends(require_roles("ADMIN", "DEV", "VIEW"))])
+@router.get(
+    "",
+    response_model=list[CertificateOut] | SyncPage[CertificateOut],
+    dependencies=[Depends(require_roles("ADMIN", "DEV", "VIEW"))],
+)
 def list_certificados(
     db: Session = Depends(get_db),
     org=Depends(get_current_org),
     limit: int = Query(1000, ge=1, le=5000),
     offset: int = Query(0, ge=0),
     only_cnpj: bool = Query(False),
+    updated_since: str | None = Query(default=None),
 ):
     query = db.query(CertificateMirror).filter(CertificateMirror.org_id == org.id)
 
     if only_cnpj:
         query = query.filter(func.upper(CertificateMirror.document_type) == "CNPJ")
 
+    if updated_since is not None:
+        try:
+            cursor = decode_sync_cursor(updated_since)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid updated_since cursor")
+        delta = fetch_sync_delta(db, org.id, "certificates", query, cursor=cursor, limit=limit)
+        return SyncPage[CertificateOut](
+            items=_certificates_out(delta.rows),
+            deleted=delta.deleted,
+            next_cursor=delta.next_cursor,
+            has_more=delta.has_more,
+        )
+
     rows = query.order_by(CertificateMirror.not_after.asc().nullslast()).offset(offset).limit(limit).all()
+    return _certificates_out(rows)
 
+
+def _certificates_out(rows: list[CertificateMirror]) -> list[CertificateOut]:
     now = datetime.now(timezone.utc).date()
     out: list[CertificateOut] = []
 
@@ -87,6 +111,7 @@ def certificados_health(
 @router.post("/sync", response_model=CertificateSyncResponse, dependencies=[Depends(require_roles("ADMIN", "DEV"))])
 def sync_certificados(
     req: CertificateSyncRequest,
+    full: bool = Query(False),
     db: Session = Depends(get_db),
     org=Depends(get_current_org),
 ):
@@ -100,13 +125,17 @@ def sync_certificados(
         db.commit()
         return CertificateSyncResponse(**result.__dict__)
 
-    # Modo pull (opcional).
+    # Modo pull (opcional): incremental pelo cursor da org; full=true relista tudo.
     try:
-        client = CertHubClient.from_env()
-        certs = client.list_certificates(org_id=str(org.id), org_slug=getattr(org, "slug", None))
-        result = upsert_mirror(db, org.id, certs)
-        db.commit()
-        return CertificateSyncResponse(**result.__dict__)
+        client = get_certhub_client()
+        result = run_certhub_pull_sync(
+            db,
+            str(org.id),
+            client,
+            org_slug=getattr(org, "slug", None),
+            full=full,
+        )
+        return CertificateSyncResponse(**result.as_dict())
     except RuntimeError as error:
         raise HTTPException(status_code=500, detail=str(error))
     except httpx.HTTPError as error:
@@ -1,19 +1,24 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.core.org_context import get_current_org
 from app.core.security import require_roles
 from app.db.session import get_db
+from app.models.cnae_official_lookup_run import CNAEOfficialLookupRun
 from app.models.org import Org
 from app.models.user import User
 from app.schemas.official_sources import (
     OfficialSourceLookupBatchRequest,
     OfficialSourceLookupRequest,
     OfficialSourceLookupResponse,
+    OfficialSourceOrgLookupStartRequest,
+    OfficialSourceOrgLookupStartResponse,
+    OfficialSourceOrgLookupStatusResponse,
 )
 from app.services.cnae_official_suggestions import (
+    run_cnae_official_lookup_job,
     run_official_lookup_and_create_suggestions,
     serialize_created_suggestions,
 )
@@ -78,3 +83,119 @@ def lookup_official_sources_for_cnae_batch(
     except Exception:
         db.rollback()
         raise
+
+
+def _get_run_or_404(db: Session, org_id: str, run_id: str) -> CNAEOfficialLookupRun:
+    run = (
+        db.query(CNAEOfficialLookupRun)
+        .filter(CNAEOfficialLookupRun.id == run_id, CNAEOfficialLookupRun.org_id == org_id)
+        .first()
+    )
+    if not run:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Run not found")
+    return run
+
+
+def _get_active_run(db: Session, org_id: str) -> CNAEOfficialLookupRun | None:
+    return (
+        db.query(CNAEOfficialLookupRun)
+        .filter(
+            CNAEOfficialLookupRun.org_id == org_id,
+            CNAEOfficialLookupRun.status.in_(["queued", "running"]),
+        )
+        .order_by(CNAEOfficialLookupRun.started_at.desc())
+        .first()
+    )
+
+
+def _run_status_response(run: CNAEOfficialLookupRun) -> OfficialSourceOrgLookupStatusResponse:
+    return OfficialSourceOrgLookupStatusResponse(
+        run_id=run.id,
+        org_id=run.org_id,
+        started_by_user_id=run.started_by_user_id,
+        status=run.status,
+        sources=list(run.sources or []),
+        total_codes=run.total_codes,
+        total=run.total,
+        processed=run.processed,
+        findings_count=run.findings_count,
+        created_count=run.created_count,
+        skipped_duplicates=run.skipped_duplicates,
+        error_count=run.error_count,
+        started_at=run.started_at,
+        finished_at=run.finished_at,
+        errors=list(run.errors or [])[-5:],
+    )
+
+
+@router.post("/lookup-org/start", response_model=OfficialSourceOrgLookupStartResponse)
+def start_org_unmapped_cnae_lookup(
+    payload: OfficialSourceOrgLookupStartRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    org: Org = Depends(get_current_org),
+    user: User = Depends(require_roles("ADMIN", "DEV")),
+) -> OfficialSourceOrgLookupStartResponse:
+    active_run = _get_active_run(db, org.id)
+    if active_run:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": "There is already an active run", "run_id": active_run.id},
+        )
+
+    run = CNAEOfficialLookupRun(
+        org_id=org.id,
+        started_by_user_id=user.id,
+        status="queued",
+        sources=list(payload.sources or []),
+        total_codes=0,
+        total=0,
+        processed=0,
+        findings_count=0,
+        created_count=0,
+        skipped_duplicates=0,
+        error_count=0,
+        errors=[],
+    )
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+
+    background_tasks.add_task(run_cnae_official_lookup_job, run.id)
+    return OfficialSourceOrgLookupStartResponse(run_id=run.id, status=run.status)
+
+
+@router.get("/lookup-org/active", response_model=OfficialSourceOrgLookupStartResponse)
+def get_active_org_unmapped_cnae_lookup(
+    db: Session = Depends(get_db),
+    org: Org = Depends(get_current_org),
+    _user: User = Depends(require_roles("ADMIN", "DEV")),
+) -> OfficialSourceOrgLookupStartResponse:
+    active_run = _get_active_run(db, org.id)
+    if not active_run:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No active run")
+    return OfficialSourceOrgLookupStartResponse(run_id=active_run.id, status=active_run.status)
+
+
+@router.get("/lookup-org/{run_id}", response_model=OfficialSourceOrgLookupStatusResponse)
+def get_org_unmapped_cnae_lookup_status(
+    run_id: str,
+    db: Session = Depends(get_db),
+    org: Org = Depends(get_current_org),
+    _user: User = Depends(require_roles("ADMIN", "DEV")),
+) -> OfficialSourceOrgLookupStatusResponse:
+    return _run_status_response(_get_run_or_404(db, org.id, run_id))
+
+
+@router.post("/lookup-org/{run_id}/cancel", response_model=OfficialSourceOrgLookupStartResponse)
+def cancel_org_unmapped_cnae_lookup(
+    run_id: str,
+    db: Session = Depends(get_db),
+    org: Org = Depends(get_current_org),
+    _user: User = Depends(require_roles("ADMIN", "DEV")),
+) -> OfficialSourceOrgLookupStartResponse:
+    run = _get_run_or_404(db, org.id, run_id)
+    if run.status not in {"completed", "failed", "cancelled"}:
+        run.status = "cancelled"
+        db.commit()
+    return OfficialSourceOrgLookupStartResponse(run_id=run.id, status=run.status)
@@ -15,13 +15,16 @@ from app.schemas.cnae_risk_suggestion import (
     CNAERiskSuggestionRejectRequest,
     CNAERiskSuggestionUpdate,
 )
+from app.schemas.score_simulation import ScoreSimulationOut, ScoreSimulationRequest
 from app.services.cnae_risk_suggestions import (
     approve_and_apply_suggestion,
     create_suggestion,
     list_suggestions,
     reject_suggestion,
+    simulate_suggestion_impact,
     update_pending_suggestion,
 )
+from app.services.score_simulation import CatalogChange, LicenceRenewal, simulate_org_scores
 
 
 router = APIRouter()
@@ -66,6 +69,34 @@ def create_cnae_risk_suggestion(
         raise
 
 
+@router.post("/simulate", response_model=ScoreSimulationOut)
+def simulate_cnae_risk_changes(
+    payload: ScoreSimulationRequest,
+    db: Session = Depends(get_db),
+    org: Org = Depends(get_current_org),
+    _user: User = Depends(require_roles("ADMIN", "DEV")),
+) -> ScoreSimulationOut:
+    """Simulacao "e se" (catalogo e/ou renovacoes) sobre o score de toda a org; nao grava."""
+    try:
+        result = simulate_org_scores(
+            db,
+            org.id,
+            catalog_changes=[CatalogChange(**item.model_dump()) for item in payload.catalog_changes],
+            licence_renewals=[
+                LicenceRenewal(
+                    licence_type=item.licence_type,
+                    valid_until=item.valid_until,
+                    company_ids=frozenset(item.company_ids) if item.company_ids is not None else None,
+                )
+                for item in payload.licence_renewals
+            ],
+            top=payload.top,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    return ScoreSimulationOut.model_validate(result)
+
+
 @router.patch("/{suggestion_id}", response_model=CNAERiskSuggestionOut)
 def patch_cnae_risk_suggestion(
     suggestion_id: str,
@@ -123,6 +154,18 @@ def approve_cnae_risk_suggestion(
         raise
 
 
+@router.post("/{suggestion_id}/simulate", response_model=ScoreSimulationOut)
+def simulate_cnae_risk_suggestion(
+    suggestion_id: str,
+    top: int = Query(default=20, ge=0, le=200),
+    db: Session = Depends(get_db),
+    org: Org = Depends(get_current_org),
+    _user: User = Depends(require_roles("ADMIN", "DEV")),
+) -> ScoreSimulationOut:
+    result = simulate_suggestion_impact(db, org_id=org.id, suggestion_id=suggestion_id, top=top)
+    return ScoreSimulationOut.model_validate(result)
+
+
 @router.post("/{suggestion_id}/reject", response_model=CNAERiskSuggestionOut)
 def reject_cnae_risk_suggestion(
     suggestion_id: str,
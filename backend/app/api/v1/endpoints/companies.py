@@ -1,6 +1,7 @@
 import re
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, joinedload
 
@@ -29,10 +30,30 @@ from app.models.licence_file_event import LicenceFileEvent
 from app.models.org import Org
 from app.models.user import User
 from app.schemas.auth import PasswordConfirmRequest
-from app.schemas.company import CompanyCreate, CompanyOut, CompanyUpdate, enrich_company_with_profile
-from app.schemas.company_overview import CompanyOverviewResponse
-from app.services.company_overview import build_company_overview
-from app.services.company_scoring import recalculate_company_score
+from app.schemas.company import (
+    CompanyCreate,
+    CompanyOut,
+    CompanySearchItem,
+    CompanyUpdate,
+    enrich_company_with_profile,
+)
+from app.schemas.company_overview import (
+    CompanyOverviewBatchRequest,
+    CompanyOverviewBatchResponse,
+    CompanyOverviewResponse,
+)
+from app.schemas.sync import SyncPage
+from app.services.company_overview import (
+    company_overview_etag,
+    current_company_overview_version,
+    get_company_overview_cached,
+    get_company_overviews_cached,
+)
+from app.services.company_score_queue import enqueue_company_scores
+from app.services.company_search import SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT, search_companies
+from app.services.licence_expiries import delete_licence_expiries_for_companies
+from app.services.process_obs_history import delete_obs_history_for_processes
+from app.services.sync_delta import decode_sync_cursor, delete_with_tombstones, fetch_sync_delta
 
 router = APIRouter()
 
@@ -133,47 +154,11 @@ def create_company(
     return CompanyOut.model_validate(company)
 
 
-@router.get("", response_model=list[CompanyOut])
-def list_companies(
-    db: Session = Depends(get_db),
-    org: Org = Depends(get_current_org),
-    user: User = Depends(require_roles("ADMIN", "DEV", "VIEW")),
-    cnpj: str | None = Query(default=None),
-    cpf: str | None = Query(default=None),
-    razao_social: str | None = Query(default=None),
-    is_active: bool | None = Query(default=None),
-    include_inactive: bool = Query(default=False),
-    limit: int = Query(default=1000, ge=1, le=1000),
-    offset: int = Query(default=0, ge=0),
-) -> list[CompanyOut]:
-    query = (
-        db.query(Company)
-        .options(joinedload(Company.profile))
-        .filter(Company.org_id == org.id)
-        .outerjoin(CompanyProfile, (Company.id == CompanyProfile.company_id) & (Company.org_id == CompanyProfile.org_id))
-    )
-    if cnpj:
-        query = query.filter(Company.cnpj == _normalize_cnpj(cnpj))
-    if cpf:
-        query = query.filter(Company.cpf == _normalize_cpf(cpf))
-    if razao_social:
-        query = query.filter(Company.razao_social.ilike(f"%{razao_social}%"))
-    if is_active is not None:
-        query = query.filter(Company.is_active == is_active)
-    elif not include_inactive:
-        query = query.filter(Company.is_active.is_(True))
-
-    if include_inactive:
-        role_names = {role.name for role in user.roles}
-        if "ADMIN" not in role_names and "DEV" not in role_names:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions")
-    companies = (
-        query.order_by(Company.created_at.desc()).offset(offset).limit(limit).all()
-    )
+def _companies_out(db: Session, org_id: str, companies: list[Company]) -> list[CompanyOut]:
     company_ids = [company.id for company in companies]
     taxa_rows = (
         db.query(CompanyTax)
-        .filter(CompanyTax.org_id == org.id, CompanyTax.company_id.in_(company_ids))
+        .filter(CompanyTax.org_id == org_id, CompanyTax.company_id.in_(company_ids))
         .all()
         if company_ids
         else []
@@ -206,6 +191,69 @@ def list_companies(
     return result
 
 
+@router.get("", response_model=list[CompanyOut] | SyncPage[CompanyOut])
+def list_companies(
+    db: Session = Depends(get_db),
+    org: Org = Depends(get_current_org),
+    user: User = Depends(require_roles("ADMIN", "DEV", "VIEW")),
+    cnpj: str | None = Query(default=None),
+    cpf: str | None = Query(default=None),
+    razao_social: str | None = Query(default=None),
+    is_active: bool | None = Query(default=None),
+    include_inactive: bool = Query(default=False),
+    limit: int = Query(default=1000, ge=1, le=1000),
+    offset: int = Query(default=0, ge=0),
+    updated_since: str | None = Query(default=None),
+) -> list[CompanyOut] | SyncPage[CompanyOut]:
+    query = (
+        db.query(Company)
+        .options(joinedload(Company.profile))
+        .filter(Company.org_id == org.id)
+        .outerjoin(CompanyProfile, (Company.id == CompanyProfile.company_id) & (Company.org_id == CompanyProfile.org_id))
+    )
+    if cnpj:
+        query = query.filter(Company.cnpj == _normalize_cnpj(cnpj))
+    if cpf:
+        query = query.filter(Company.cpf == _normalize_cpf(cpf))
+    if razao_social:
+        query = query.filter(Company.razao_social.ilike(f"%{razao_social}%"))
+
+    if include_inactive:
+        role_names = {role.name for role in user.roles}
+        if "ADMIN" not in role_names and "DEV" not in role_names:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions")
+
+    if updated_since is not None:
+        try:
+            cursor = decode_sync_cursor(updated_since)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid updated_since cursor")
+        delta = fetch_sync_delta(db, org.id, "companies", query, cursor=cursor, limit=limit)
+        # Empresa que saiu do filtro de ativas vai para ``deleted`` na copia do cliente.
+        visible = [
+            company
+            for company in delta.rows
+            if (company.is_active == is_active if is_active is not None else include_inactive or company.is_active)
+        ]
+        visible_ids = {company.id for company in visible}
+        hidden = [company.id for company in delta.rows if company.id not in visible_ids]
+        return SyncPage[CompanyOut](
+            items=_companies_out(db, org.id, visible),
+            deleted=[*delta.deleted, *hidden],
+            next_cursor=delta.next_cursor,
+            has_more=delta.has_more,
+        )
+
+    if is_active is not None:
+        query = query.filter(Company.is_active == is_active)
+    elif not include_inactive:
+        query = query.filter(Company.is_active.is_(True))
+    companies = (
+        query.order_by(Company.created_at.desc()).offset(offset).limit(limit).all()
+    )
+    return _companies_out(db, org.id, companies)
+
+
 @router.get("/municipios", response_model=list[str])
 def list_companies_municipios(
     db: Session = Depends(get_db),
@@ -226,19 +274,89 @@ def list_companies_municipios(
     return normalized
 
 
+@router.get("/search", response_model=list[CompanySearchItem])
+def search_companies_endpoint(
+    db: Session = Depends(get_db),
+    org: Org = Depends(get_current_org),
+    user: User = Depends(require_roles("ADMIN", "DEV", "VIEW")),
+    q: str = Query(min_length=1, max_length=120),
+    limit: int = Query(default=SEARCH_DEFAULT_LIMIT, ge=1, le=SEARCH_MAX_LIMIT),
+    include_inactive: bool = Query(default=False),
+) -> list[CompanySearchItem]:
+    if include_inactive:
+        role_names = {role.name for role in user.roles}
+        if "ADMIN" not in role_names and "DEV" not in role_names:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions")
+    hits = search_companies(db, org.id, q, limit=limit, include_inactive=include_inactive)
+    if not hits:
+        return []
+    rows = (
+        db.query(
+            Company.id,
+            Company.cnpj,
+            Company.cpf,
+            Company.razao_social,
+            Company.nome_fantasia,
+            Company.municipio,
+            Company.is_active,
+        )
+        .filter(Company.org_id == org.id, Company.id.in_([hit.company_id for hit in hits]))
+        .all()
+    )
+    by_id = {row.id: row for row in rows}
+    return [
+        CompanySearchItem(
+            id=row.id,
+            cnpj=row.cnpj,
+            company_cpf=row.cpf,
+            razao_social=row.razao_social,
+            nome_fantasia=row.nome_fantasia,
+            municipio=row.municipio,
+            is_active=row.is_active,
+            score=hit.score,
+        )
+        for hit in hits
+        if (row := by_id.get(hit.company_id)) is not None
+    ]
+
+
+@router.post("/overview/batch", response_model=CompanyOverviewBatchResponse)
+def get_company_overviews_batch(
+    payload: CompanyOverviewBatchRequest,
+    db: Session = Depends(get_db),
+    org: Org = Depends(get_current_org),
+    _user=Depends(require_roles("ADMIN", "DEV", "VIEW")),
+) -> CompanyOverviewBatchResponse:
+    company_ids = list(dict.fromkeys(payload.company_ids))
+    overviews = get_company_overviews_cached(db, org.id, company_ids)
+    return CompanyOverviewBatchResponse(
+        items=[overviews[company_id] for company_id in company_ids if company_id in overviews],
+        missing=[company_id for company_id in company_ids if company_id not in overviews],
+    )
+
+
 @router.get("/{company_id}/overview", response_model=CompanyOverviewResponse)
 def get_company_overview(
     company_id: str,
+    response: Response,
     db: Session = Depends(get_db),
     org: Org = Depends(get_current_org),
     _user=Depends(require_roles("ADMIN", "DEV", "VIEW")),
-) -> CompanyOverviewResponse:
-    overview = build_company_overview(db, org.id, company_id)
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
+):
+    version = current_company_overview_version(db, org.id, company_id)
+    etag = company_overview_etag(version)
+    cache_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match and etag in {tag.strip() for tag in if_none_match.split(",")}:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
+
+    overview, _ = get_company_overview_cached(db, org.id, company_id, version=version)
     if not overview:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Company not found",
         )
+    response.headers.update(cache_headers)
     return overview
 
 
@@ -376,7 +494,7 @@ def update_company(
             address_location_type=address_location_type,
         )
         db.flush()
-        recalculate_company_score(db, org.id, company.id)
+        enqueue_company_scores(db, org.id, [company.id])
     try:
         db.commit()
     except IntegrityError:
@@ -436,15 +554,15 @@ def delete_company(
             .filter(CertificateMirror.org_id == org.id, CertificateMirror.company_id == company.id)
             .update({CertificateMirror.company_id: None}, synchronize_session=False)
         )
-        db.query(CompanyProcess).filter(CompanyProcess.org_id == org.id, CompanyProcess.company_id == company.id).delete(
-            synchronize_session=False
-        )
-        db.query(CompanyTax).filter(CompanyTax.org_id == org.id, CompanyTax.company_id == company.id).delete(
-            synchronize_session=False
-        )
-        db.query(CompanyLicence).filter(CompanyLicence.org_id == org.id, CompanyLicence.company_id == company.id).delete(
-            synchronize_session=False
+        delete_obs_history_for_processes(
+            db,
+            org.id,
+            select(CompanyProcess.id).where(CompanyProcess.org_id == org.id, CompanyProcess.company_id == company.id),
         )
+        delete_with_tombstones(db, CompanyProcess, org.id, CompanyProcess.company_id == company.id)
+        delete_with_tombstones(db, CompanyTax, org.id, CompanyTax.company_id == company.id)
+        delete_licence_expiries_for_companies(db, org.id, [company.id])
+        delete_with_tombstones(db, CompanyLicence, org.id, CompanyLicence.company_id == company.id)
         db.query(CompanyProfile).filter(CompanyProfile.org_id == org.id, CompanyProfile.company_id == company.id).delete(
             synchronize_session=False
         )
@@ -26,7 +26,9 @@ from app.schemas.company_licence import (
 from app.core.regulatory import (
     DEFAULT_ALVARA_FUNCIONAMENTO_KIND,
 )
-from app.services.licence_detection import parse_filename_to_suggestion
+from app.schemas.sync import SyncPage
+from app.services.licence_detection import parse_many
+from app.services.sync_delta import decode_sync_cursor, fetch_sync_delta
 from app.services.licence_fs_paths import resolve_target_dir
 from app.services.licence_files import (
     SUPPORTED_EXTENSIONS,
@@ -36,7 +38,7 @@ from app.services.licence_files import (
     resolve_licence_name_spec,
 )
 from app.services.licence_scan_full import run_licence_scan_full_job
-from app.services.company_scoring import recalculate_company_score
+from app.services.company_score_queue import enqueue_company_scores
 from app.worker.watchers import process_company_licence_dir
 
 router = APIRouter()
@@ -73,22 +75,39 @@ def _to_company_licence_out(licence: CompanyLicence, company: Company | None) ->
     return CompanyLicenceOut.model_validate(payload)
 
 
-@router.get("", response_model=list[CompanyLicenceOut])
+@router.get("", response_model=list[CompanyLicenceOut] | SyncPage[CompanyLicenceOut])
 def list_company_licences(
     db: Session = Depends(get_db),
     org: Org = Depends(get_current_org),
     _user=Depends(require_roles("ADMIN", "DEV", "VIEW")),
     limit: int = Query(default=1000, ge=1, le=1000),
     offset: int = Query(default=0, ge=0),
-) -> list[CompanyLicenceOut]:
-    rows = (
+    updated_since: str | None = Query(default=None),
+) -> list[CompanyLicenceOut] | SyncPage[CompanyLicenceOut]:
+    query = (
         db.query(CompanyLicence, Company)
         .outerjoin(
             Company,
             (Company.id == CompanyLicence.company_id) & (Company.org_id == CompanyLicence.org_id),
         )
         .filter(CompanyLicence.org_id == org.id)
-        .order_by(CompanyLicence.created_at.desc())
+    )
+    if updated_since is not None:
+        try:
+            cursor = decode_sync_cursor(updated_since)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid updated_since cursor")
+        delta = fetch_sync_delta(
+            db, org.id, "licences", query, cursor=cursor, limit=limit, primary=lambda row: row[0]
+        )
+        return SyncPage[CompanyLicenceOut](
+            items=[_to_company_licence_out(licence, company) for licence, company in delta.rows],
+            deleted=delta.deleted,
+            next_cursor=delta.next_cursor,
+            has_more=delta.has_more,
+        )
+    rows = (
+        query.order_by(CompanyLicence.created_at.desc())
         .offset(offset)
         .limit(limit)
         .all()
@@ -155,7 +174,7 @@ def patch_company_licence_item(
     licence.raw = raw
 
     db.flush()
-    recalculate_company_score(db, org.id, licence.company_id)
+    enqueue_company_scores(db, org.id, [licence.company_id])
     db.commit()
     db.refresh(licence)
 
@@ -201,8 +220,8 @@ async def detect_company_licences(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No files provided")
 
     results: list[LicenceDetectItemOut] = []
-    for upload in items:
-        suggestion = parse_filename_to_suggestion(upload.filename or "")
+    suggestions = parse_many(upload.filename or "" for upload in items)
+    for upload, suggestion in zip(items, suggestions):
         results.append(
             LicenceDetectItemOut(
                 original_filename=suggestion.original_filename,
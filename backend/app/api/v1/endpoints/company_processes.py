@@ -7,6 +7,8 @@ from app.db.session import get_db
 from app.models.org import Org
 from app.models.company_process import CompanyProcess
 from app.schemas.company_process import CompanyProcessOut, PROCESS_SITUACOES
+from app.schemas.sync import SyncPage
+from app.services.sync_delta import decode_sync_cursor, fetch_sync_delta
 
 router = APIRouter()
 
@@ -18,18 +20,30 @@ def list_process_situacoes(
     return list(PROCESS_SITUACOES)
 
 
-@router.get("", response_model=list[CompanyProcessOut])
+@router.get("", response_model=list[CompanyProcessOut] | SyncPage[CompanyProcessOut])
 def list_company_processes(
     db: Session = Depends(get_db),
     org: Org = Depends(get_current_org),
     _user=Depends(require_roles("ADMIN", "DEV", "VIEW")),
     limit: int = Query(default=1000, ge=1, le=1000),
     offset: int = Query(default=0, ge=0),
-) -> list[CompanyProcessOut]:
+    updated_since: str | None = Query(default=None),
+) -> list[CompanyProcessOut] | SyncPage[CompanyProcessOut]:
+    query = db.query(CompanyProcess).filter(CompanyProcess.org_id == org.id)
+    if updated_since is not None:
+        try:
+            cursor = decode_sync_cursor(updated_since)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid updated_since cursor")
+        delta = fetch_sync_delta(db, org.id, "processes", query, cursor=cursor, limit=limit)
+        return SyncPage[CompanyProcessOut](
+            items=[CompanyProcessOut.model_validate(process) for process in delta.rows],
+            deleted=delta.deleted,
+            next_cursor=delta.next_cursor,
+            has_more=delta.has_more,
+        )
     processes = (
-        db.query(CompanyProcess)
-        .filter(CompanyProcess.org_id == org.id)
-        .order_by(CompanyProcess.created_at.desc())
+        query.order_by(CompanyProcess.created_at.desc())
         .offset(offset)
         .limit(limit)
         .all()
@@ -1,6 +1,6 @@
-from datetime import datetime
+from datetime import timezone
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
@@ -10,6 +10,7 @@ from app.core.security import get_current_user, require_roles, verify_password
 from app.db.session import get_db
 from app.models.company import Company
 from app.models.company_process import CompanyProcess
+from app.models.company_process_obs_history import CompanyProcessObsHistory
 from app.models.org import Org
 from app.models.user import User
 from app.schemas.auth import PasswordConfirmRequest
@@ -20,6 +21,14 @@ from app.schemas.company_process import (
     CompanyProcessOut,
     CompanyProcessUpdate,
 )
+from app.services.company_score_queue import enqueue_company_scores
+from app.services.process_obs_history import (
+    OBS_HISTORY_DEFAULT_LIMIT,
+    OBS_HISTORY_MAX_LIMIT,
+    delete_obs_history_for_processes,
+    list_process_obs_history,
+    record_process_obs_change,
+)
 
 
 router = APIRouter()
@@ -36,6 +45,19 @@ def _get_process_or_404(db: Session, org_id: str, process_id: str) -> CompanyPro
     return proc
 
 
+def _obs_history_item(entry: CompanyProcessObsHistory) -> CompanyProcessObsHistoryItem:
+    changed_at = entry.changed_at if entry.changed_at.tzinfo else entry.changed_at.replace(tzinfo=timezone.utc)
+    return CompanyProcessObsHistoryItem(
+        id=entry.id,
+        timestamp=changed_at.astimezone(timezone.utc).isoformat().replace("+00:00", "Z"),
+        actor_id=entry.actor_id,
+        actor_email=entry.actor_email,
+        old_value=entry.old_value,
+        new_value=entry.new_value,
+        action=entry.action,
+    )
+
+
 @router.post("", response_model=CompanyProcessOut)
 def create_process(
     payload: CompanyProcessCreate,
@@ -87,6 +109,8 @@ def create_process(
         data["municipio"] = normalize_municipio(data.get("municipio"))
     proc = CompanyProcess(org_id=org.id, **data)
     db.add(proc)
+    # processos entram na avaliacao regulatoria do alvara definitivo (score)
+    enqueue_company_scores(db, org.id, [proc.company_id])
     try:
         db.commit()
     except IntegrityError:
@@ -124,6 +148,7 @@ def update_process(
         data["municipio"] = normalize_municipio(data.get("municipio"))
     for key, value in data.items():
         setattr(proc, key, value)
+    enqueue_company_scores(db, org.id, [proc.company_id])
     try:
         db.commit()
     except IntegrityError:
@@ -146,24 +171,8 @@ def update_process_obs(
     _user=Depends(require_roles("ADMIN", "DEV")),
 ) -> CompanyProcessOut:
     proc = _get_process_or_404(db, org.id, process_id)
-
-    new_obs = payload.obs
-    old_obs = proc.obs
-
-    history = proc.obs_history or []
-    history.append(
-        {
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-            "actor_id": getattr(user, "id", None),
-            "actor_email": getattr(user, "email", None),
-            "old_value": old_obs,
-            "new_value": new_obs,
-            "action": "updated",
-        }
-    )
-    # safety cap
-    proc.obs_history = history[-200:]
-    proc.obs = new_obs
+    record_process_obs_change(db, proc, payload.obs, actor=user)
+    enqueue_company_scores(db, org.id, [proc.company_id])
 
     db.commit()
     db.refresh(proc)
@@ -173,14 +182,22 @@ def update_process_obs(
 @router.get("/{process_id}/obs-history", response_model=list[CompanyProcessObsHistoryItem])
 def get_process_obs_history(
     process_id: str,
+    response: Response,
     db: Session = Depends(get_db),
     org: Org = Depends(get_current_org),
     _user=Depends(require_roles("ADMIN", "DEV", "VIEW")),
+    limit: int = Query(default=OBS_HISTORY_DEFAULT_LIMIT, ge=1, le=OBS_HISTORY_MAX_LIMIT),
+    cursor: str | None = Query(default=None),
 ) -> list[CompanyProcessObsHistoryItem]:
+    # Cada pagina traz as alteracoes mais recentes antes do cursor; X-Next-Cursor busca as anteriores.
     proc = _get_process_or_404(db, org.id, process_id)
-    hist = proc.obs_history or []
-    # garante formato previsível
-    return [CompanyProcessObsHistoryItem(**item) for item in hist]
+    try:
+        rows, next_cursor = list_process_obs_history(db, proc.id, limit=limit, cursor=cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [_obs_history_item(row) for row in rows]
 
 
 @router.delete("/{process_id}")
@@ -195,6 +212,8 @@ def delete_process(
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid password")
 
     proc = _get_process_or_404(db, org.id, process_id)
+    enqueue_company_scores(db, org.id, [proc.company_id])
+    delete_obs_history_for_processes(db, org.id, [proc.id])
     db.delete(proc)
     db.commit()
     return {"status": "ok"}
@@ -7,22 +7,36 @@ from app.db.session import get_db
 from app.models.org import Org
 from app.models.company_tax import CompanyTax
 from app.schemas.company_tax import CompanyTaxOut
+from app.schemas.sync import SyncPage
+from app.services.sync_delta import decode_sync_cursor, fetch_sync_delta
 
 router = APIRouter()
 
 
-@router.get("", response_model=list[CompanyTaxOut])
+@router.get("", response_model=list[CompanyTaxOut] | SyncPage[CompanyTaxOut])
 def list_company_taxes(
     db: Session = Depends(get_db),
     org: Org = Depends(get_current_org),
     _user=Depends(require_roles("ADMIN", "DEV", "VIEW")),
     limit: int = Query(default=1000, ge=1, le=1000),
     offset: int = Query(default=0, ge=0),
-) -> list[CompanyTaxOut]:
+    updated_since: str | None = Query(default=None),
+) -> list[CompanyTaxOut] | SyncPage[CompanyTaxOut]:
+    query = db.query(CompanyTax).filter(CompanyTax.org_id == org.id)
+    if updated_since is not None:
+        try:
+            cursor = decode_sync_cursor(updated_since)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid updated_since cursor")
+        delta = fetch_sync_delta(db, org.id, "taxes", query, cursor=cursor, limit=limit)
+        return SyncPage[CompanyTaxOut](
+            items=[CompanyTaxOut.model_validate(tax) for tax in delta.rows],
+            deleted=delta.deleted,
+            next_cursor=delta.next_cursor,
+            has_more=delta.has_more,
+        )
     taxes = (
-        db.query(CompanyTax)
-        .filter(CompanyTax.org_id == org.id)
-        .order_by(CompanyTax.created_at.desc())
+        query.order_by(CompanyTax.created_at.desc())
         .offset(offset)
         .limit(limit)
         .all()
@@ -1,12 +1,32 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
 
+from app.core.org_context import get_current_org
 from app.core.security import require_roles
+from app.db.session import get_db
+from app.models.org import Org
+from app.schemas.kpi import KpiItemOut, KpiSnapshotOut
+from app.services.org_kpi_snapshot import get_org_kpi_snapshot, has_pending_kpi_marks
 
 router = APIRouter()
 
 
-@router.get("/kpis")
-def get_kpi_groups(_user=Depends(require_roles("ADMIN", "DEV", "VIEW"))):
-    # Implementacao minima para remover 404 do frontend.
-    # Estrutura de KPIs sera definida numa stage futura.
-    return []
+@router.get("/kpis", response_model=KpiSnapshotOut)
+def get_kpi_groups(
+    db: Session = Depends(get_db),
+    org: Org = Depends(get_current_org),
+    _user=Depends(require_roles("ADMIN", "DEV", "VIEW")),
+    grupo: str | None = Query(default=None),
+) -> KpiSnapshotOut:
+    # Le uma linha de org_kpi_snapshots (e checa se ha marcas pendentes); o recalculo fica com o consumidor em background.
+    snapshot = get_org_kpi_snapshot(db, org.id)
+    metrics = snapshot.metrics if isinstance(snapshot.metrics, dict) else {}
+    items = [
+        KpiItemOut(chave=chave, grupo=group, valor=int(valor))
+        for group, values in metrics.items()
+        if not grupo or group == grupo
+        for chave, valor in (values or {}).items()
+    ]
+    return KpiSnapshotOut(
+        items=items, computed_at=snapshot.computed_at, stale=has_pending_kpi_marks(db, org.id)
+    )
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
-from sqlalchemy import func
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.org_context import get_current_org
-from app.core.security import require_roles
-from app.db.session import get_db
+from app.core.security import create_stream_ticket, get_current_user_for_stream, require_roles
+from app.db.session import SessionLocal, get_db
 from app.models.notification_event import NotificationEvent
 from app.models.notification_operational_scan_run import NotificationOperationalScanRun
 from app.models.org import Org
@@ -16,10 +17,17 @@ from app.schemas.notification import (
     NotificationListResponse,
     NotificationOperationalScanStartResponse,
     NotificationReadResponse,
+    NotificationStreamTicketResponse,
     NotificationUnreadCountResponse,
 )
+from app.services.notification_bus import get_notification_bus, stream_notifications
 from app.services.notification_operational_scan import run_notification_operational_scan_job
-from app.services.notifications import mark_notification_as_read
+from app.services.notifications import (
+    count_unread_notifications,
+    list_notifications_page,
+    mark_notification_as_read,
+    visible_to_user,
+)
 
 
 router = APIRouter()
@@ -29,23 +37,31 @@ router = APIRouter()
 def list_notifications(
     db: Session = Depends(get_db),
     org: Org = Depends(get_current_org),
-    _user=Depends(require_roles("ADMIN", "DEV", "VIEW")),
+    user: User = Depends(require_roles("ADMIN", "DEV", "VIEW")),
     limit: int = Query(default=20, ge=1, le=200),
     offset: int = Query(default=0, ge=0),
+    cursor: str | None = Query(default=None),
+    include_total: bool = Query(default=True),
 ) -> NotificationListResponse:
-    base_query = db.query(NotificationEvent).filter(NotificationEvent.org_id == org.id)
-    total = int(base_query.count())
-    rows = (
-        base_query.order_by(NotificationEvent.created_at.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
-    )
+    # Com cursor a paginacao e por keyset e o offset e ignorado.
+    try:
+        rows, next_cursor, total = list_notifications_page(
+            db,
+            org.id,
+            user_id=user.id,
+            limit=limit,
+            cursor=cursor,
+            offset=0 if cursor else offset,
+            include_total=include_total,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
     return NotificationListResponse(
         items=[NotificationEventOut.model_validate(row) for row in rows],
         total=total,
         limit=limit,
-        offset=offset,
+        offset=0 if cursor else offset,
+        next_cursor=next_cursor,
     )
 
 
@@ -53,18 +69,57 @@ def list_notifications(
 def get_unread_count(
     db: Session = Depends(get_db),
     org: Org = Depends(get_current_org),
-    _user=Depends(require_roles("ADMIN", "DEV", "VIEW")),
+    user: User = Depends(require_roles("ADMIN", "DEV", "VIEW")),
 ) -> NotificationUnreadCountResponse:
-    unread_count = (
-        db.query(func.count(NotificationEvent.id))
-        .filter(
-            NotificationEvent.org_id == org.id,
-            NotificationEvent.read_at.is_(None),
-        )
-        .scalar()
-        or 0
+    return NotificationUnreadCountResponse(unread_count=count_unread_notifications(db, org.id, user.id))
+
+
+@router.post("/stream-ticket", response_model=NotificationStreamTicketResponse)
+def create_notification_stream_ticket(
+    user: User = Depends(require_roles("ADMIN", "DEV", "VIEW")),
+) -> NotificationStreamTicketResponse:
+    return NotificationStreamTicketResponse(
+        ticket=create_stream_ticket(user.id),
+        expires_in=settings.NOTIFICATIONS_STREAM_TICKET_SECONDS,
+    )
+
+
+@router.get("/stream")
+def stream_notification_events(
+    request: Request,
+    user: User = Depends(get_current_user_for_stream),
+) -> StreamingResponse:
+    user_roles = {role.name for role in user.roles}
+    if not user_roles.intersection({"ADMIN", "DEV", "VIEW"}):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions")
+
+    org_id = user.org_id
+    user_id = user.id
+    # Sessao curta: um Depends(get_db) so fecharia quando o stream terminasse, prendendo
+    # uma conexao do pool por aba aberta.
+    db = SessionLocal()
+    try:
+        unread_count = count_unread_notifications(db, org_id, user_id)
+    finally:
+        db.close()
+    bus = get_notification_bus()
+
+    async def _events():
+        subscription = bus.subscribe(org_id, user_id)
+        async for chunk in stream_notifications(
+            bus,
+            subscription,
+            unread_count=unread_count,
+            is_disconnected=request.is_disconnected,
+            heartbeat_seconds=settings.NOTIFICATIONS_SSE_HEARTBEAT_SECONDS,
+        ):
+            yield chunk
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    return NotificationUnreadCountResponse(unread_count=int(unread_count))
 
 
 @router.post("/{notification_id}/read", response_model=NotificationReadResponse)
@@ -72,13 +127,14 @@ def read_notification(
     notification_id: str,
     db: Session = Depends(get_db),
     org: Org = Depends(get_current_org),
-    _user=Depends(require_roles("ADMIN", "DEV", "VIEW")),
+    user: User = Depends(require_roles("ADMIN", "DEV", "VIEW")),
 ) -> NotificationReadResponse:
     event = (
         db.query(NotificationEvent)
         .filter(
             NotificationEvent.id == notification_id,
             NotificationEvent.org_id == org.id,
+            visible_to_user(user.id),
         )
         .first()
     )
@@ -1,32 +1,22 @@
-import inspect
 import logging
 import secrets
 from typing import Any
 
-from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.db.session import get_db
+from app.models.certhub_webhook_run import CertHubWebhookRun
 from app.models.org import Org
 from app.schemas.webhook_certhub import CertHubWebhookPayload, WebhookMode
-from app.services.certificados_mirror import (
-    delete_certificates_by_cert_ids,
-    ingest_certificates_from_payload,
-    reconcile_full,
-)
+from app.services.certificados_mirror import run_certhub_webhook_job
 
 router = APIRouter(prefix="/integracoes/certhub", tags=["integracoes"])
 logger = logging.getLogger("econtrole.webhook_certhub")
 
 
-async def _maybe_await(value: Any) -> Any:
-    if inspect.isawaitable(value):
-        return await value
-    return value
-
-
 def _extract_bearer_token(authorization: str | None) -> str:
     if not authorization:
         return ""
@@ -36,46 +26,93 @@ def _extract_bearer_token(authorization: str | None) -> str:
     return token.strip()
 
 
-async def _resolve_org_by_slug(db: Session, org_slug: str) -> Org | None:
-    stmt = select(Org).where(Org.slug == org_slug)
-    result = await _maybe_await(db.execute(stmt))
-    return result.scalar_one_or_none()
+def _require_webhook_token(authorization: str | None) -> None:
+    expected_token = str(getattr(settings, "CERTHUB_WEBHOOK_TOKEN", "") or "").strip()
+    received_token = _extract_bearer_token(authorization)
+
+    if not expected_token or not received_token or not secrets.compare_digest(received_token, expected_token):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or missing webhook token")
 
 
-@router.post("/webhook")
-async def webhook_certhub(
+def _resolve_org_by_slug(db: Session, org_slug: str) -> Org | None:
+    stmt = select(Org).where(Org.slug == org_slug)
+    return db.execute(stmt).scalar_one_or_none()
+
+
+def _run_payload(run: CertHubWebhookRun) -> dict[str, Any]:
+    return {
+        "run_id": run.id,
+        "mode": run.mode,
+        "status": run.status,
+        "total": int(run.total or 0),
+        "processed": int(run.processed or 0),
+        "result": run.result,
+        "started_at": run.started_at,
+        "finished_at": run.finished_at,
+        "last_error": run.last_error,
+    }
+
+
+# Endpoints sincronos: o FastAPI os executa no threadpool, sem bloquear o event loop.
+@router.post("/webhook", status_code=status.HTTP_202_ACCEPTED)
+def webhook_certhub(
     payload: CertHubWebhookPayload,
+    background_tasks: BackgroundTasks,
     authorization: str | None = Header(default=None, alias="Authorization"),
     db: Session = Depends(get_db),
 ) -> dict[str, Any]:
-    expected_token = str(getattr(settings, "CERTHUB_WEBHOOK_TOKEN", "") or "").strip()
-    received_token = _extract_bearer_token(authorization)
+    _require_webhook_token(authorization)
 
-    if not expected_token or not received_token or not secrets.compare_digest(received_token, expected_token):
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or missing webhook token")
-
-    org = await _resolve_org_by_slug(db, payload.org_slug)
+    org = _resolve_org_by_slug(db, payload.org_slug)
     if org is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Organization not found for slug '{payload.org_slug}'",
         )
 
+    certificates = list(payload.certificates or [])
+    deleted_cert_ids = list(payload.deleted_cert_ids or [])
     logger.info(
         "CertHub webhook received",
         extra={
             "mode": payload.mode.value,
             "org_slug": payload.org_slug,
-            "certificates_count": len(payload.certificates or []),
-            "deleted_cert_ids_count": len(payload.deleted_cert_ids or []),
+            "certificates_count": len(certificates),
+            "deleted_cert_ids_count": len(deleted_cert_ids),
         },
     )
 
-    if payload.mode == WebhookMode.upsert:
-        result = await ingest_certificates_from_payload(db, org, payload.certificates or [])
-    elif payload.mode == WebhookMode.delete:
-        result = await delete_certificates_by_cert_ids(db, org, payload.deleted_cert_ids or [])
-    else:  # payload.mode == WebhookMode.full
-        result = await reconcile_full(db, org, payload.certificates or [])
+    if payload.mode == WebhookMode.delete:
+        queued = {"deleted_cert_ids": deleted_cert_ids}
+        total = len(deleted_cert_ids)
+    else:
+        queued = {"certificates": certificates}
+        total = len(certificates)
+
+    run = CertHubWebhookRun(
+        org_id=org.id,
+        mode=payload.mode.value,
+        status="queued",
+        payload=queued,
+        total=total,
+        processed=0,
+    )
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+
+    background_tasks.add_task(run_certhub_webhook_job, run.id)
+    return {"status": "accepted", "mode": payload.mode.value, "run_id": run.id, "received": total}
+
 
-    return {"status": "ok", "mode": payload.mode.value, **result}
+@router.get("/webhook/runs/{run_id}")
+def webhook_certhub_run_status(
+    run_id: str,
+    authorization: str | None = Header(default=None, alias="Authorization"),
+    db: Session = Depends(get_db),
+) -> dict[str, Any]:
+    _require_webhook_token(authorization)
+    run = db.query(CertHubWebhookRun).filter(CertHubWebhookRun.id == run_id).first()
+    if not run:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Webhook run not found")
+    return _run_payload(run)
@@ -54,6 +54,52 @@ class Settings(BaseSettings):
     
     DATABASE_URL: str = Field(default_factory=_build_default_database_url)
     CERTHUB_WEBHOOK_TOKEN: str = ""
+    # Runs do webhook CertHub perdidos depois do 202 (reinicio/queda): a API retoma os
+    # ``queued`` e os ``running`` sem heartbeat ha mais de CERTHUB_WEBHOOK_STALE_SECONDS.
+    CERTHUB_WEBHOOK_RECOVERY_ENABLED: bool = True
+    CERTHUB_WEBHOOK_RECOVERY_SECONDS: float = 60.0
+    CERTHUB_WEBHOOK_STALE_SECONDS: float = 300.0
+
+    # Notificacoes em tempo real (SSE). Sem Redis o barramento e apenas em processo.
+    NOTIFICATIONS_REDIS_URL: str = ""
+    NOTIFICATIONS_SSE_HEARTBEAT_SECONDS: int = 15
+    # Validade do ticket de /notificacoes/stream-ticket (so e conferido ao conectar).
+    NOTIFICATIONS_STREAM_TICKET_SECONDS: int = 60
+    # Lidas ha mais que isso saem de notification_events (scripts/archive_notifications.py).
+    NOTIFICATIONS_ARCHIVE_AFTER_DAYS: int = 90
+
+    # Contagem de consultas SQL por requisicao (Server-Timing + /metrics).
+    QUERY_METRICS_ENABLED: bool = True
+    # /metrics so responde a clientes locais (loopback) a menos que isto esteja ligado.
+    METRICS_ALLOW_REMOTE: bool = False
+
+    # Sync incremental (updated_since): linhas/exclusoes mais novas que isso esperam a
+    # proxima chamada, para nao pular transacoes que fizeram flush antes e commit depois.
+    SYNC_SAFETY_LAG_SECONDS: float = 5.0
+
+    # Fila de recalculo de score: escritas marcam a empresa e a API recalcula em lote
+    # depois da janela de coalescencia (atraso maximo ~2x a janela).
+    SCORE_QUEUE_WORKER_ENABLED: bool = True
+    SCORE_QUEUE_DEBOUNCE_SECONDS: float = 2.0
+    SCORE_QUEUE_BATCH_SIZE: int = 200
+
+    # Snapshot de KPIs do painel (/grupos/kpis): escritas marcam a org e a API recalcula
+    # depois da janela; a reconciliacao refaz snapshots antigos ou de outro dia.
+    KPI_SNAPSHOT_WORKER_ENABLED: bool = True
+    KPI_SNAPSHOT_DEBOUNCE_SECONDS: float = 5.0
+    KPI_SNAPSHOT_RECONCILE_SECONDS: float = 3600.0
+
+    # Catalogo de risco CNAE em memoria: so recarrega quando a versao do catalogo muda.
+    # A versao e conferida no banco no maximo a cada intervalo; com Redis (vazio = usa
+    # NOTIFICATIONS_REDIS_URL) a troca e avisada na hora aos demais processos.
+    CNAE_CATALOG_CHECK_SECONDS: float = 5.0
+    CNAE_CATALOG_REDIS_URL: str = ""
+
+    # Fontes oficiais de CNAE (cache HTTP compartilhado)
+    OFFICIAL_SOURCES_CACHE_DIR: str = ".cache/official_sources"
+    OFFICIAL_SOURCES_CACHE_TTL_SECONDS: int = 21600
+    # Erros (ou copia vencida servida em falha passageira) voltam a rede depois disso.
+    OFFICIAL_SOURCES_ERROR_TTL_SECONDS: int = 60
     CORS_ORIGINS: List[str] = Field(
         default_factory=lambda: [
             "http://localhost:5174",
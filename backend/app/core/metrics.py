@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+
+from app.db.query_metrics import QueryStats, track_queries
+
+QUERY_COUNT_BUCKETS = (1, 5, 10, 25, 50, 100, 250)
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+@dataclass
+class _RouteMetrics:
+    requests_by_status: dict[str, int] = field(default_factory=dict)
+    request_seconds: float = 0.0
+    queries: int = 0
+    db_seconds: float = 0.0
+    max_queries: int = 0
+    query_buckets: list[int] = field(default_factory=lambda: [0] * len(QUERY_COUNT_BUCKETS))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    """Agregado em processo por (metodo, rota): requisicoes, tempo, consultas e tempo de banco."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._routes: dict[tuple[str, str], _RouteMetrics] = {}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+    def observe(self, method: str, route: str, status: int, elapsed: float, stats: QueryStats) -> None:
+        with self._lock:
+            metrics = self._routes.setdefault((method, route), _RouteMetrics())
+            key = str(status)
+            metrics.requests_by_status[key] = metrics.requests_by_status.get(key, 0) + 1
+            metrics.request_seconds += elapsed
+            metrics.queries += stats.count
+            metrics.db_seconds += stats.duration
+            metrics.max_queries = max(metrics.max_queries, stats.count)
+            for position, bound in enumerate(QUERY_COUNT_BUCKETS):
+                if stats.count <= bound:
+                    metrics.query_buckets[position] += 1
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            routes = {
+                key: _RouteMetrics(
+                    requests_by_status=dict(value.requests_by_status),
+                    request_seconds=value.request_seconds,
+                    queries=value.queries,
+                    db_seconds=value.db_seconds,
+                    max_queries=value.max_queries,
+                    query_buckets=list(value.query_buckets),
+                )
+                for key, value in sorted(self._routes.items())
+            }
+        lines = [
+            "# HELP econtrole_http_requests_total Requisicoes HTTP por rota e status.",
+            "# TYPE econtrole_http_requests_total counter",
+        ]
+        for (method, route), metrics in routes.items():
+            labels = f'method="{_escape_label(method)}",route="{_escape_label(route)}"'
+            for status, count in sorted(metrics.requests_by_status.items()):
+                lines.append(f'econtrole_http_requests_total{{{labels},status="{status}"}} {count}')
+        lines += [
+            "# HELP econtrole_http_request_duration_seconds_total Tempo total gasto nas requisicoes.",
+            "# TYPE econtrole_http_request_duration_seconds_total counter",
+        ]
+        for (method, route), metrics in routes.items():
+            labels = f'method="{_escape_label(method)}",route="{_escape_label(route)}"'
+            lines.append(f"econtrole_http_request_duration_seconds_total{{{labels}}} {metrics.request_seconds:.6f}")
+        lines += [
+            "# HELP econtrole_db_query_duration_seconds_total Tempo total no banco por rota.",
+            "# TYPE econtrole_db_query_duration_seconds_total counter",
+        ]
+        for (method, route), metrics in routes.items():
+            labels = f'method="{_escape_label(method)}",route="{_escape_label(route)}"'
+            lines.append(f"econtrole_db_query_duration_seconds_total{{{labels}}} {metrics.db_seconds:.6f}")
+        lines += [
+            "# HELP econtrole_db_queries_per_request Consultas SQL por requisicao.",
+            "# TYPE econtrole_db_queries_per_request histogram",
+        ]
+        for (method, route), metrics in routes.items():
+            labels = f'method="{_escape_label(method)}",route="{_escape_label(route)}"'
+            total = sum(metrics.requests_by_status.values())
+            for bound, count in zip(QUERY_COUNT_BUCKETS, metrics.query_buckets):
+                lines.append(f'econtrole_db_queries_per_request_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'econtrole_db_queries_per_request_bucket{{{labels},le="+Inf"}} {total}')
+            lines.append(f"econtrole_db_queries_per_request_sum{{{labels}}} {metrics.queries}")
+            lines.append(f"econtrole_db_queries_per_request_count{{{labels}}} {total}")
+        lines += [
+            "# HELP econtrole_db_queries_per_request_max Maior numero de consultas numa requisicao da rota.",
+            "# TYPE econtrole_db_queries_per_request_max gauge",
+        ]
+        for (method, route), metrics in routes.items():
+            labels = f'method="{_escape_label(method)}",route="{_escape_label(route)}"'
+            lines.append(f"econtrole_db_queries_per_request_max{{{labels}}} {metrics.max_queries}")
+        return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+
+def server_timing_header(stats: QueryStats, elapsed: float) -> str:
+    return (
+        f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries", '
+        f"app;dur={elapsed * 1000:.2f}"
+    )
+
+
+class QueryMetricsMiddleware:
+    """
+    Middleware ASGI: conta consultas e tempo de banco de cada requisicao HTTP, devolve
+    ``Server-Timing``/``X-DB-Query-Count`` na resposta e agrega por rota para ``/metrics``.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = metrics_registry) -> None:
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        with track_queries() as stats:
+
+            async def send_with_timing(message) -> None:
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = int(message["status"])
+                    elapsed = time.perf_counter() - started
+                    headers = list(message.get("headers") or [])
+                    headers.append((b"server-timing", server_timing_header(stats, elapsed).encode("latin-1")))
+                    headers.append((b"x-db-query-count", str(stats.count).encode("latin-1")))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                route = scope.get("route")
+                route_path = getattr(route, "path", None) or UNMATCHED_ROUTE
+                self.registry.observe(
+                    scope.get("method", ""), route_path, status_code, time.perf_counter() - started, stats
+                )
@@ -19,6 +19,7 @@ from app.core.normalize import (  # noqa: F401
     normalize_status,
     normalize_title_case,
     normalize_whitespace,
+    parse_date_br,
     strip_accents,
 )
 
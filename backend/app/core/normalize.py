@@ -80,6 +80,23 @@ def normalize_document_digits(value: str | None) -> str:
     return re.sub(r"\D", "", str(value or ""))
 
 
+def normalize_search_text(value: str | None) -> str:
+    """Minusculas, sem acentos e so com letras/digitos separados por espaco."""
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", strip_accents(str(value or "")).lower()).split())
+
+
+def build_company_search_text(
+    razao_social: str | None,
+    nome_fantasia: str | None = None,
+    fs_dirname: str | None = None,
+    cnpj: str | None = None,
+    cpf: str | None = None,
+) -> str:
+    parts = [normalize_search_text(razao_social), normalize_search_text(nome_fantasia), normalize_search_text(fs_dirname)]
+    parts.extend(normalize_document_digits(document) for document in (cnpj, cpf))
+    return " ".join(dict.fromkeys(part for part in parts if part))
+
+
 def normalize_title_case(value: str | None) -> str | None:
     text = normalize_whitespace(value)
     if not text:
@@ -287,3 +304,21 @@ def normalize_date_br(value: str | None, *, strict: bool = True) -> str | None:
     if strict:
         raise ValueError("date must be in dd/mm/aaaa or yyyy-mm-dd format")
     return None
+
+
+def parse_date_br(value: str | None) -> date | None:
+    """Data de texto livre (ISO, com ou sem hora, ou d/m/aaaa); ``None`` quando nao reconhece."""
+    raw = normalize_whitespace(value)
+    if not raw:
+        return None
+    try:
+        return date.fromisoformat(raw[:10])
+    except ValueError:
+        pass
+    parts = raw.split("/")
+    if len(parts) == 3:
+        try:
+            return date(int(parts[2]), int(parts[1]), int(parts[0]))
+        except ValueError:
+            return None
+    return None
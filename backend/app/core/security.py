@@ -2,19 +2,21 @@ from datetime import datetime, timedelta
 from typing import Any, Dict, Optional
 from uuid import uuid4
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.db.session import get_db
+from app.db.session import SessionLocal, get_db
 from app.models.user import User
 
 ALGORITHM = "HS256"
+STREAM_TICKET_TYPE = "stream_ticket"
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login", auto_error=False)
 
 
 def hash_password(password: str) -> str:
@@ -55,6 +57,18 @@ def create_refresh_token(payload: Dict[str, Any]) -> str:
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
 
 
+def create_stream_ticket(user_id: str) -> str:
+    """Ticket curto, so para abrir o SSE: pode ir na URL sem expor o access token."""
+    now = datetime.utcnow()
+    to_encode = {
+        "sub": user_id,
+        "type": STREAM_TICKET_TYPE,
+        "iat": now,
+        "exp": now + timedelta(seconds=settings.NOTIFICATIONS_STREAM_TICKET_SECONDS),
+    }
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
+
+
 def generate_jti() -> str:
     return uuid4().hex
 
@@ -79,11 +93,8 @@ def get_subject(payload: Dict[str, Any]) -> Optional[str]:
     return payload.get("sub")
 
 
-def get_current_user(
-    db: Session = Depends(get_db),
-    token: str = Depends(oauth2_scheme),
-) -> User:
-    payload = verify_token(token, "access")
+def _user_from_token(db: Session, token: str, token_type: str = "access") -> User:
+    payload = verify_token(token, token_type)
     user_id = get_subject(payload)
     if not user_id:
         raise HTTPException(
@@ -99,6 +110,41 @@ def get_current_user(
     return user
 
 
+def get_current_user(
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2_scheme),
+) -> User:
+    return _user_from_token(db, token)
+
+
+def get_current_user_for_stream(
+    token: Optional[str] = Depends(oauth2_scheme_optional),
+    ticket: Optional[str] = Query(default=None),
+) -> User:
+    """
+    EventSource nao envia cabecalhos: na URL so vale o ``?ticket=`` de
+    POST /notificacoes/stream-ticket; access token apenas no ``Authorization``.
+    Usa sessao propria, fechada antes de o stream comecar (o usuario volta desanexado,
+    com os papeis ja carregados).
+    """
+    if token:
+        raw_token, token_type = token, "access"
+    else:
+        raw_token, token_type = (ticket or "").strip(), STREAM_TICKET_TYPE
+        if not raw_token:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Not authenticated",
+            )
+    db = SessionLocal()
+    try:
+        user = _user_from_token(db, raw_token, token_type)
+        user.roles  # carrega antes de fechar a sessao
+        return user
+    finally:
+        db.close()
+
+
 def require_roles(*roles: str):
     def _dependency(user: User = Depends(get_current_user)) -> User:
         user_roles = {role.name for role in user.roles}
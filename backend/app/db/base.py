@@ -1,5 +1,12 @@
+from datetime import datetime, timezone
+
 from sqlalchemy.orm import DeclarativeBase
 
 
 class Base(DeclarativeBase):
     pass
+
+
+def utcnow() -> datetime:
+    """Default/onupdate em Python: precisao de microssegundos e relogio da escrita, nao da transacao."""
+    return datetime.now(timezone.utc)
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import threading
+from typing import Callable, Iterable
+
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Session
+
+_registered = False
+_register_lock = threading.Lock()
+_flush_handlers: list[Callable[[Session, "FlushChanges"], None]] = []
+
+
+class FlushChanges:
+    """
+    Objetos do flush agrupados por classe numa unica passada; ``dirty`` so traz quem tem
+    alteracao real de coluna (``is_modified`` roda uma vez por objeto, nao uma por listener).
+    """
+
+    def __init__(self, session: Session) -> None:
+        self.new = _group(session.new)
+        self.deleted = _group(session.deleted)
+        self.dirty = _group(obj for obj in session.dirty if session.is_modified(obj, include_collections=False))
+
+    def __bool__(self) -> bool:
+        return bool(self.new or self.deleted or self.dirty)
+
+    def new_of(self, *models: type) -> list:
+        return _select(self.new, models)
+
+    def dirty_of(self, *models: type) -> list:
+        return _select(self.dirty, models)
+
+    def deleted_of(self, *models: type) -> list:
+        return _select(self.deleted, models)
+
+    def changed_of(self, *models: type) -> list:
+        return [*self.new_of(*models), *self.dirty_of(*models), *self.deleted_of(*models)]
+
+
+def _group(objects: Iterable[object]) -> dict[type, list]:
+    grouped: dict[type, list] = {}
+    for obj in objects:
+        grouped.setdefault(type(obj), []).append(obj)
+    return grouped
+
+
+def _select(grouped: dict[type, list], models: tuple[type, ...]) -> list:
+    return [obj for cls, objects in grouped.items() if issubclass(cls, models) for obj in objects]
+
+
+def _after_flush(session: Session, flush_context) -> None:
+    changes = FlushChanges(session)
+    for handler in _flush_handlers:
+        handler(session, changes)
+
+
+def register_session_listeners() -> None:
+    """
+    Liga os listeners globais de Session/mapper/engine dos servicos. Idempotente; chamada
+    pelo lifespan da API, pelo worker e pelos scripts antes de abrir sessoes.
+    """
+    global _registered
+    with _register_lock:
+        if _registered:
+            return
+
+        from app.db import query_metrics
+        from app.models.cnae_risk import CNAERisk
+        from app.models.company import Company
+        from app.models.company_licence import CompanyLicence
+        from app.services import (
+            cnae_risk_catalog,
+            company_data_version,
+            company_search,
+            licence_expiries,
+            notifications,
+            org_kpi_snapshot,
+            sync_delta,
+        )
+
+        query_metrics.register_engine_listeners()
+
+        sa_event.listen(Company, "before_insert", company_search.refresh_search_text)
+        sa_event.listen(Company, "before_update", company_search.refresh_search_text)
+        sa_event.listen(CompanyLicence, "after_insert", licence_expiries.sync_expiries_after_write)
+        sa_event.listen(CompanyLicence, "after_update", licence_expiries.sync_expiries_after_write)
+        sa_event.listen(CompanyLicence, "after_delete", licence_expiries.delete_expiries_after_delete)
+        for column in cnae_risk_catalog.CATALOG_COLUMNS:
+            sa_event.listen(getattr(CNAERisk, column), "set", cnae_risk_catalog.mark_catalog_unflushed)
+
+        _flush_handlers.extend(
+            [
+                cnae_risk_catalog.bump_catalog_after_flush,
+                company_data_version.bump_versions_after_flush,
+                company_search.collect_search_updates,
+                org_kpi_snapshot.mark_kpis_after_flush,
+                sync_delta.record_sync_changes_after_flush,
+            ]
+        )
+        sa_event.listen(Session, "after_flush", _after_flush)
+
+        for after_commit, after_rollback in (
+            (cnae_risk_catalog.invalidate_after_commit, cnae_risk_catalog.discard_after_rollback),
+            (company_search.apply_search_updates, company_search.discard_search_updates),
+            (notifications.publish_after_commit, notifications.discard_after_rollback),
+        ):
+            sa_event.listen(Session, "after_commit", after_commit)
+            sa_event.listen(Session, "after_rollback", after_rollback)
+
+        _registered = True
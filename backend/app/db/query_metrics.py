@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_QUERY_STARTS_KEY = "query_metrics_started_at"
+
+
+@dataclass
+class QueryStats:
+    """Consultas executadas num escopo (requisicao, job): quantidade e tempo no banco."""
+
+    count: int = 0
+    duration: float = 0.0
+
+    def add(self, elapsed: float) -> None:
+        self.count += 1
+        self.duration += elapsed
+
+
+@dataclass
+class QueryRecorder(QueryStats):
+    """Como ``QueryStats``, mas guarda o SQL; usado por testes de orcamento de consultas."""
+
+    statements: list[str] = field(default_factory=list)
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar("query_metrics_current_stats", default=None)
+_recorders: dict[int, QueryRecorder] = {}
+_recorders_lock = threading.Lock()
+
+
+def current_query_stats() -> QueryStats | None:
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    Conta as consultas do contexto atual. O objeto e compartilhado pelas copias do
+    contexto, entao tambem soma as consultas de endpoints/dependencias sincronos que o
+    FastAPI roda no threadpool.
+    """
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@contextmanager
+def record_queries() -> Iterator[QueryRecorder]:
+    """Registra toda consulta do processo (qualquer thread) enquanto o bloco estiver aberto."""
+    recorder = QueryRecorder()
+    with _recorders_lock:
+        _recorders[id(recorder)] = recorder
+    try:
+        yield recorder
+    finally:
+        with _recorders_lock:
+            _recorders.pop(id(recorder), None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault(_QUERY_STARTS_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    starts = conn.info.get(_QUERY_STARTS_KEY)
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.add(elapsed)
+    if _recorders:
+        with _recorders_lock:
+            recorders = list(_recorders.values())
+        for recorder in recorders:
+            recorder.add(elapsed)
+            recorder.statements.append(statement)
+
+
+def _handle_error(exception_context) -> None:
+    connection = exception_context.connection
+    starts = connection.info.get(_QUERY_STARTS_KEY) if connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def register_engine_listeners() -> None:
+    """Chamada uma vez por ``app.db.listeners.register_session_listeners``."""
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
@@ -57,3 +57,4 @@ def get_db():
         yield db
     finally:
         db.close()
+
@@ -1,21 +1,33 @@
 from app.db.base import Base
 from app.models.cnae_risk import CNAERisk
+from app.models.cnae_risk_catalog_version import CNAERiskCatalogVersion
 from app.models.cnae_risk_suggestion import CNAERiskSuggestion
+from app.models.cnae_official_lookup_run import CNAEOfficialLookupRun
 from app.models.certificate_mirror import CertificateMirror
+from app.models.certhub_sync_cursor import CertHubSyncCursor
+from app.models.certhub_webhook_run import CertHubWebhookRun
 from app.models.dashboard_saved_view import DashboardSavedView
 from app.models.company import Company
+from app.models.company_data_version import CompanyDataVersion
 from app.models.company_licence import CompanyLicence
 from app.models.company_process import CompanyProcess
+from app.models.company_process_obs_history import CompanyProcessObsHistory
 from app.models.company_profile import CompanyProfile
+from app.models.company_score_queue import CompanyScoreQueueEntry
 from app.models.company_tax import CompanyTax
 from app.models.ingest_run import IngestRun
 from app.models.licence_scan_run import LicenceScanRun
+from app.models.licence_expiry import LicenceExpiry
 from app.models.licence_file_event import LicenceFileEvent
 from app.models.notification_event import NotificationEvent
+from app.models.notification_event_archive import NotificationEventArchive
 from app.models.notification_operational_scan_run import NotificationOperationalScanRun
+from app.models.notification_unread_counter import NotificationUnreadCounter
 from app.models.org import Org
+from app.models.org_kpi_snapshot import OrgKpiDirtyMark, OrgKpiSnapshot
 from app.models.refresh_token import RefreshToken
 from app.models.receitaws_bulk_sync_run import ReceitaWSBulkSyncRun
+from app.models.sync_tombstone import SyncTombstone
 from app.models.tax_portal_sync_run import TaxPortalSyncRun
 from app.models.role import Role
 from app.models.user import User, user_roles
@@ -23,24 +35,37 @@ from app.models.user import User, user_roles
 __all__ = [
     "Base",
     "CNAERisk",
+    "CNAERiskCatalogVersion",
     "CNAERiskSuggestion",
+    "CNAEOfficialLookupRun",
     "CertificateMirror",
+    "CertHubSyncCursor",
+    "CertHubWebhookRun",
     "DashboardSavedView",
     "Company",
+    "CompanyDataVersion",
     "CompanyProfile",
     "CompanyLicence",
     "CompanyTax",
     "CompanyProcess",
+    "CompanyProcessObsHistory",
+    "CompanyScoreQueueEntry",
     "IngestRun",
     "LicenceScanRun",
+    "LicenceExpiry",
     "LicenceFileEvent",
     "NotificationEvent",
+    "NotificationEventArchive",
     "NotificationOperationalScanRun",
+    "NotificationUnreadCounter",
     "Org",
+    "OrgKpiDirtyMark",
+    "OrgKpiSnapshot",
     "Role",
     "User",
     "RefreshToken",
     "ReceitaWSBulkSyncRun",
+    "SyncTombstone",
     "TaxPortalSyncRun",
     "user_roles",
 ]
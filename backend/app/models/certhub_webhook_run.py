@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import JSON, DateTime, ForeignKey, Index, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base, utcnow
+
+
+class CertHubWebhookRun(Base):
+    __tablename__ = "certhub_webhook_runs"
+
+    __table_args__ = (
+        Index("ix_certhub_webhook_runs_org_id", "org_id"),
+        Index("ix_certhub_webhook_runs_org_status_started", "org_id", "status", "started_at"),
+        Index("ix_certhub_webhook_runs_status", "status"),
+        Index("ix_certhub_webhook_runs_started_at", "started_at"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    org_id: Mapped[str] = mapped_column(String(36), ForeignKey("orgs.id"), nullable=False)
+    mode: Mapped[str] = mapped_column(String(16), nullable=False)
+
+    status: Mapped[str] = mapped_column(String(24), nullable=False, default="queued")
+    # Payload enfileirado; limpo ao concluir para nao reter a lista completa de certificados.
+    payload: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    processed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    result: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+
+    # Ordem de chegada dos runs de uma org (processados em serie, do mais antigo ao mais novo).
+    started_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=utcnow, server_default=func.now()
+    )
+    # Atualizado a cada lote; ``running`` sem heartbeat recente e retomado pela recuperacao.
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_error: Mapped[str | None] = mapped_column(String(800), nullable=True)
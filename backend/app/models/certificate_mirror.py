@@ -3,7 +3,7 @@ import uuid
 from sqlalchemy import JSON, Boolean, Column, DateTime, ForeignKey, Index, String, UniqueConstraint
 from sqlalchemy.sql import func
 
-from app.db.base import Base
+from app.db.base import Base, utcnow
 
 
 class CertificateMirror(Base):
@@ -39,11 +39,14 @@ class CertificateMirror(Base):
     raw = Column(JSON, nullable=True)
 
     created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+    updated_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), default=utcnow, onupdate=utcnow
+    )
 
     __table_args__ = (
         UniqueConstraint("org_id", "sha1_fingerprint", name="uq_certificate_mirror_org_sha1"),
         Index("ix_certificate_mirror_org_not_after", "org_id", "not_after"),
         Index("ix_certificate_mirror_org_document_digits", "org_id", "document_digits"),
         Index("ix_certificate_mirror_org_company_id", "org_id", "company_id"),
+        Index("ix_certificate_mirror_org_updated", "org_id", "updated_at", "id"),
     )
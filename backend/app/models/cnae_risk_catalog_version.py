@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class CNAERiskCatalogVersion(Base):
+    """
+    Versao do catalogo ``cnae_risks`` (linha unica), incrementada a cada escrita no
+    catalogo. Os processos guardam o catalogo em memoria e so recarregam quando ela muda.
+    """
+
+    __tablename__ = "cnae_risk_catalog_versions"
+
+    scope: Mapped[str] = mapped_column(String(32), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
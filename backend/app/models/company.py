@@ -1,10 +1,10 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, CheckConstraint, DateTime, ForeignKey, Index, String, UniqueConstraint, func, text
+from sqlalchemy import Boolean, CheckConstraint, DateTime, ForeignKey, Index, String, Text, UniqueConstraint, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 
-from app.db.base import Base
+from app.db.base import Base, utcnow
 from app.core.normalization import normalize_municipio
 
 
@@ -21,6 +21,7 @@ class Company(Base):
         Index("ix_companies_org_id", "org_id"),
         Index("ix_companies_org_id_cnpj", "org_id", "cnpj"),
         Index("ix_companies_org_id_cpf", "org_id", "cpf"),
+        Index("ix_companies_org_updated", "org_id", "updated_at", "id"),
     )
 
     id: Mapped[str] = mapped_column(
@@ -36,6 +37,9 @@ class Company(Base):
     fs_dirname: Mapped[str | None] = mapped_column(String(255), nullable=True)
     municipio: Mapped[str | None] = mapped_column(String(128), nullable=True)
     uf: Mapped[str | None] = mapped_column(String(2), nullable=True)
+    # Texto normalizado para busca (app.services.company_search); no Postgres tem
+    # indice GIN gin_trgm_ops criado pela migration 20260429_0036.
+    search_text: Mapped[str | None] = mapped_column(Text, nullable=True)
     is_active: Mapped[bool] = mapped_column(
         Boolean, nullable=False, server_default=text("true"), default=True
     )
@@ -45,7 +49,8 @@ class Company(Base):
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         server_default=func.now(),
-        onupdate=func.now(),
+        default=utcnow,
+        onupdate=utcnow,
         nullable=False,
     )
     
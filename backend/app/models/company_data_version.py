@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class CompanyDataVersion(Base):
+    """
+    Versao dos dados de uma empresa (empresa, perfil, licencas, taxas, processos e
+    certificados), incrementada a cada escrita. ``company_id`` vazio guarda a versao da
+    org inteira, usada por escritas em lote que nao sabem quais empresas tocaram.
+    """
+
+    __tablename__ = "company_data_versions"
+
+    __table_args__ = (
+        UniqueConstraint("org_id", "company_id", name="uq_company_data_versions_org_company"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    org_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    company_id: Mapped[str] = mapped_column(String(36), nullable=False, default="")
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -6,7 +6,7 @@ from datetime import date, datetime
 from sqlalchemy import Date, DateTime, ForeignKey, String, UniqueConstraint, Index, func, JSON
 from sqlalchemy.orm import Mapped, mapped_column, validates
 
-from app.db.base import Base
+from app.db.base import Base, utcnow
 from app.core.normalization import normalize_municipio
 from app.core.regulatory import DEFAULT_ALVARA_FUNCIONAMENTO_KIND
 
@@ -18,6 +18,7 @@ class CompanyLicence(Base):
         UniqueConstraint("org_id", "company_id", name="uq_company_licences_org_company"),
         Index("ix_company_licences_org_id", "org_id"),
         Index("ix_company_licences_company_id", "company_id"),
+        Index("ix_company_licences_org_updated", "org_id", "updated_at", "id"),
     )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -44,7 +45,7 @@ class CompanyLicence(Base):
     raw: Mapped[dict | None] = mapped_column(JSON, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+        DateTime(timezone=True), server_default=func.now(), default=utcnow, onupdate=utcnow, nullable=False
     )
 
     @validates("municipio")
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 import uuid
-from datetime import datetime
+from datetime import date, datetime
 
 from sqlalchemy import (
+    Date,
     DateTime,
     ForeignKey,
     Index,
@@ -15,8 +16,8 @@ from sqlalchemy import (
 )
 from sqlalchemy.orm import Mapped, mapped_column, validates
 
-from app.db.base import Base
-from app.core.normalization import normalize_municipio
+from app.db.base import Base, utcnow
+from app.core.normalization import normalize_municipio, parse_date_br
 
 
 class CompanyProcess(Base):
@@ -33,6 +34,7 @@ class CompanyProcess(Base):
         Index("ix_company_processes_company_id", "company_id"),
         Index("ix_company_processes_type", "process_type"),
         Index("ix_company_processes_protocolo", "protocolo"),
+        Index("ix_company_processes_org_updated", "org_id", "updated_at", "id"),
     )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -46,10 +48,11 @@ class CompanyProcess(Base):
     orgao: Mapped[str | None] = mapped_column(String(128), nullable=True)
     operacao: Mapped[str | None] = mapped_column(String(255), nullable=True)
     data_solicitacao: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    # data_solicitacao tipada, mantida pelo validator abaixo (ingest, CRUD e scripts)
+    requested_on: Mapped[date | None] = mapped_column(Date, nullable=True)
     situacao: Mapped[str | None] = mapped_column(String(64), nullable=True)
 
     obs: Mapped[str | None] = mapped_column(Text, nullable=True)
-    obs_history: Mapped[list[dict] | None] = mapped_column(JSON, nullable=True)
 
     extra: Mapped[dict | None] = mapped_column(JSON, nullable=True)
     raw: Mapped[dict | None] = mapped_column(JSON, nullable=True)
@@ -58,10 +61,16 @@ class CompanyProcess(Base):
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         server_default=func.now(),
-        onupdate=func.now(),
+        default=utcnow,
+        onupdate=utcnow,
         nullable=False,
     )
 
     @validates("municipio")
     def _normalize_municipio_value(self, _key: str, value: str | None) -> str | None:
         return normalize_municipio(value)
+
+    @validates("data_solicitacao")
+    def _sync_requested_on(self, _key: str, value: str | None) -> str | None:
+        self.requested_on = parse_date_br(value)
+        return value
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base, utcnow
+
+
+class CompanyProcessObsHistory(Base):
+    """Historico append-only das observacoes de um processo: uma linha por alteracao."""
+
+    __tablename__ = "company_process_obs_history"
+
+    __table_args__ = (
+        Index("ix_company_process_obs_history_process_changed", "process_id", "changed_at", "id"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    org_id: Mapped[str] = mapped_column(String(36), ForeignKey("orgs.id"), nullable=False)
+    process_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("company_processes.id", ondelete="CASCADE"), nullable=False
+    )
+    changed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utcnow)
+    actor_id: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    actor_email: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    old_value: Mapped[str | None] = mapped_column(Text, nullable=True)
+    new_value: Mapped[str | None] = mapped_column(Text, nullable=True)
+    action: Mapped[str] = mapped_column(String(32), nullable=False, default="updated")
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base, utcnow
+
+
+class CompanyScoreQueueEntry(Base):
+    """
+    Empresa com score pendente de recalculo. Uma linha por empresa: novas marcacoes so
+    avancam ``last_enqueued_at``, e o consumidor recalcula em lote as entradas cuja
+    primeira marcacao (``enqueued_at``) ja passou da janela de coalescencia.
+    """
+
+    __tablename__ = "company_score_queue"
+
+    __table_args__ = (
+        UniqueConstraint("org_id", "company_id", name="uq_company_score_queue_org_company"),
+        Index("ix_company_score_queue_enqueued", "enqueued_at"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    org_id: Mapped[str] = mapped_column(String(36), ForeignKey("orgs.id", ondelete="CASCADE"), nullable=False)
+    company_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    enqueued_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utcnow)
+    last_enqueued_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utcnow)
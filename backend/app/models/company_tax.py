@@ -6,7 +6,7 @@ from datetime import datetime
 from sqlalchemy import DateTime, ForeignKey, String, UniqueConstraint, Index, func, JSON
 from sqlalchemy.orm import Mapped, mapped_column
 
-from app.db.base import Base
+from app.db.base import Base, utcnow
 
 
 class CompanyTax(Base):
@@ -16,6 +16,7 @@ class CompanyTax(Base):
         UniqueConstraint("org_id", "company_id", name="uq_company_taxes_org_company"),
         Index("ix_company_taxes_org_id", "org_id"),
         Index("ix_company_taxes_company_id", "company_id"),
+        Index("ix_company_taxes_org_updated", "org_id", "updated_at", "id"),
     )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -37,6 +38,6 @@ class CompanyTax(Base):
     raw: Mapped[dict | None] = mapped_column(JSON, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+        DateTime(timezone=True), server_default=func.now(), default=utcnow, onupdate=utcnow, nullable=False
     )
 
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import uuid
+from datetime import date, datetime
+
+from sqlalchemy import Boolean, Date, DateTime, ForeignKey, Index, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base, utcnow
+
+
+class LicenceExpiry(Base):
+    """
+    Calendario de vencimentos derivado de ``company_licences``: uma linha por empresa e
+    tipo de licenca, regravada a cada flush da licenca. Consultas de carteira ("o que
+    vence nos proximos 30 dias") viram range scan em ``(org_id, valid_until)``.
+    """
+
+    __tablename__ = "licence_expiries"
+
+    __table_args__ = (
+        UniqueConstraint("licence_id", "licence_type", name="uq_licence_expiries_licence_type"),
+        Index("ix_licence_expiries_org_valid_until", "org_id", "valid_until"),
+        Index("ix_licence_expiries_company", "company_id"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    org_id: Mapped[str] = mapped_column(String(36), ForeignKey("orgs.id"), nullable=False)
+    company_id: Mapped[str] = mapped_column(String(36), ForeignKey("companies.id"), nullable=False)
+    licence_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("company_licences.id", ondelete="CASCADE"), nullable=False
+    )
+    licence_type: Mapped[str] = mapped_column(String(64), nullable=False)
+    status: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    valid_until: Mapped[date | None] = mapped_column(Date, nullable=True)
+    source: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    is_definitive: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utcnow)
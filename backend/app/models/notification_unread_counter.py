@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Integer, String, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class NotificationUnreadCounter(Base):
+    """
+    Contador de nao lidas mantido na emissao/leitura. ``user_key`` vazio guarda os eventos
+    da org inteira; os demais guardam eventos direcionados a um usuario. O total de um
+    usuario e a soma das duas linhas.
+    """
+
+    __tablename__ = "notification_unread_counters"
+
+    __table_args__ = (
+        UniqueConstraint("org_id", "user_key", name="uq_notification_unread_counters_org_user"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    org_id: Mapped[str] = mapped_column(String(36), ForeignKey("orgs.id", ondelete="CASCADE"), nullable=False)
+    user_key: Mapped[str] = mapped_column(String(36), nullable=False, default="")
+    unread_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
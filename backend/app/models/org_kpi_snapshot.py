@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import JSON, DateTime, ForeignKey, Index, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base, utcnow
+
+
+class OrgKpiSnapshot(Base):
+    """
+    KPIs do painel ja agregados por org. Escritas nas entidades so gravam uma marca em
+    ``org_kpi_dirty_marks``; o consumidor recalcula as orgs marcadas depois da janela de
+    coalescencia e a reconciliacao periodica refaz as antigas (prazos mudam com a data, sem escrita).
+    """
+
+    __tablename__ = "org_kpi_snapshots"
+
+    __table_args__ = (UniqueConstraint("org_id", name="uq_org_kpi_snapshots_org"),)
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    org_id: Mapped[str] = mapped_column(String(36), ForeignKey("orgs.id", ondelete="CASCADE"), nullable=False)
+    metrics: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    computed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class OrgKpiDirtyMark(Base):
+    """
+    Marca de recalculo pendente: so INSERT (sem ON CONFLICT), entao escritas concorrentes da
+    mesma org nao disputam a linha do snapshot. O consumidor agrupa as marcas por org e apaga
+    as que viu depois de recalcular.
+    """
+
+    __tablename__ = "org_kpi_dirty_marks"
+
+    __table_args__ = (Index("ix_org_kpi_dirty_marks_org_marked", "org_id", "marked_at"),)
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    org_id: Mapped[str] = mapped_column(String(36), ForeignKey("orgs.id", ondelete="CASCADE"), nullable=False)
+    marked_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utcnow)
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base, utcnow
+
+
+class SyncTombstone(Base):
+    """
+    Registro de exclusao para o sync incremental (``updated_since``): guarda o id removido
+    de empresas, licencas, taxas, processos e certificados para os clientes apagarem da
+    copia local.
+    """
+
+    __tablename__ = "sync_tombstones"
+
+    __table_args__ = (
+        Index("ix_sync_tombstones_org_entity_deleted", "org_id", "entity", "deleted_at", "id"),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    org_id: Mapped[str] = mapped_column(String(36), ForeignKey("orgs.id"), nullable=False)
+    entity: Mapped[str] = mapped_column(String(32), nullable=False)
+    entity_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=utcnow)
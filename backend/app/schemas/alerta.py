@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class AlertaOut(BaseModel):
+    id: str
+    org_id: str
+    tipo_alerta: str
+    severity: str
+    empresa_id: Optional[str] = None
+    empresa: Optional[str] = None
+    titulo: str
+    descricao: str
+    data_referencia: date
+    dias_restantes: int
+    entity_type: str
+    entity_id: str
+    route_path: str
+
+
+class AlertaPage(BaseModel):
+    """Pagina do feed de alertas; ``next_cursor`` vai em ``cursor`` para a pagina seguinte."""
+
+    items: list[AlertaOut] = Field(default_factory=list)
+    total: int = 0
+    page: int = 1
+    size: int = 0
+    next_cursor: Optional[str] = None
@@ -56,6 +56,12 @@ class CertificateSyncResponse(BaseModel):
     mapped_companies: int
     unmapped_cnpjs: int
     updated_company_profiles: int
+    # Apenas no modo pull.
+    mode: Optional[str] = None
+    pages: int = 0
+    deleted: int = 0
+    not_modified: bool = False
+    cursor: Optional[str] = None
 
 
 class CertificateHealthResponse(BaseModel):
@@ -165,3 +165,13 @@ def enrich_company_with_profile(company):
             company.endereco_fiscal = bool(raw.get("endereco_fiscal")) if "endereco_fiscal" in raw else None
     return company
 
+
+class CompanySearchItem(BaseModel):
+    id: str
+    cnpj: Optional[str] = None
+    company_cpf: Optional[str] = None
+    razao_social: str
+    nome_fantasia: Optional[str] = None
+    municipio: Optional[str] = None
+    is_active: bool
+    score: float
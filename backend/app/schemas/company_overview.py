@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import date, datetime
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 from app.schemas.company import CompanyOut
 
@@ -126,3 +126,12 @@ class CompanyOverviewResponse(BaseModel):
     licences: list[CompanyOverviewLicenceItem]
     processes: list[CompanyOverviewProcessItem]
     timeline: list[CompanyOverviewTimelineItem]
+
+
+class CompanyOverviewBatchRequest(BaseModel):
+    company_ids: list[str] = Field(min_length=1, max_length=500)
+
+
+class CompanyOverviewBatchResponse(BaseModel):
+    items: list[CompanyOverviewResponse] = Field(default_factory=list)
+    missing: list[str] = Field(default_factory=list)
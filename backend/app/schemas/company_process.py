@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
 from pydantic import BaseModel, ConfigDict, field_validator
@@ -27,6 +27,7 @@ class CompanyProcessOut(BaseModel):
     orgao: Optional[str] = None
     operacao: Optional[str] = None
     data_solicitacao: Optional[str] = None
+    requested_on: Optional[date] = None
     situacao: Optional[str] = None
     obs: Optional[str] = None
 
@@ -128,6 +129,7 @@ class CompanyProcessObsUpdate(BaseModel):
 class CompanyProcessObsHistoryItem(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
+    id: Optional[str] = None
     timestamp: str
     actor_id: Optional[str] = None
     actor_email: Optional[str] = None
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class KpiItemOut(BaseModel):
+    chave: str
+    grupo: str
+    valor: int
+
+
+class KpiSnapshotOut(BaseModel):
+    """KPIs do painel lidos do snapshot da org; ``stale`` indica recalculo pendente."""
+
+    items: list[KpiItemOut] = Field(default_factory=list)
+    computed_at: Optional[datetime] = None
+    stale: bool = False
@@ -26,15 +26,21 @@ class NotificationEventOut(BaseModel):
 
 class NotificationListResponse(BaseModel):
     items: list[NotificationEventOut] = Field(default_factory=list)
-    total: int
+    total: int | None = None
     limit: int
     offset: int
+    next_cursor: str | None = None
 
 
 class NotificationUnreadCountResponse(BaseModel):
     unread_count: int = 0
 
 
+class NotificationStreamTicketResponse(BaseModel):
+    ticket: str
+    expires_in: int
+
+
 class NotificationReadResponse(BaseModel):
     id: str
     read_at: datetime
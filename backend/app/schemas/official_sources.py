@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from datetime import datetime
 from typing import Literal
 
 from pydantic import BaseModel, ConfigDict, Field, field_validator
@@ -85,3 +86,30 @@ class OfficialSourceLookupResponse(BaseModel):
     suggestions_created: list[CNAERiskSuggestionOut]
     skipped_duplicates: int
     source_errors: list[OfficialSourceError]
+
+
+class OfficialSourceOrgLookupStartRequest(BaseModel):
+    sources: list[OfficialSourceName] | None = None
+
+
+class OfficialSourceOrgLookupStartResponse(BaseModel):
+    run_id: str
+    status: str
+
+
+class OfficialSourceOrgLookupStatusResponse(BaseModel):
+    run_id: str
+    org_id: str
+    started_by_user_id: str | None = None
+    status: str
+    sources: list[str] = Field(default_factory=list)
+    total_codes: int
+    total: int
+    processed: int
+    findings_count: int
+    created_count: int
+    skipped_duplicates: int
+    error_count: int
+    started_at: datetime
+    finished_at: datetime | None = None
+    errors: list[dict] = Field(default_factory=list)
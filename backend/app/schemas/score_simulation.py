@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Literal
+
+from pydantic import BaseModel, Field, field_validator
+
+from app.core.cnae import normalize_cnae_code
+
+
+LicenceType = Literal[
+    "alvara_vig_sanitaria",
+    "cercon",
+    "alvara_funcionamento",
+    "licenca_ambiental",
+    "certidao_uso_solo",
+]
+
+
+class CatalogChangeIn(BaseModel):
+    """Alteracao proposta numa linha do catalogo; campos ausentes mantem o valor atual."""
+
+    cnae_code: str
+    risk_tier: str | None = None
+    base_weight: int | None = Field(default=None, ge=0, le=1000)
+    is_active: bool | None = None
+
+    @field_validator("cnae_code")
+    @classmethod
+    def validate_cnae_code(cls, value: str) -> str:
+        normalized = normalize_cnae_code(value)
+        if not normalized:
+            raise ValueError("Invalid cnae_code")
+        return normalized
+
+    @field_validator("risk_tier", mode="before")
+    @classmethod
+    def normalize_risk_tier(cls, value: str | None) -> str | None:
+        if value is None:
+            return None
+        return str(value).strip().upper() or None
+
+
+class LicenceRenewalIn(BaseModel):
+    """Renovacao hipotetica: ``valid_until`` vazio = hoje + 365 dias; sem empresas = todas."""
+
+    licence_type: LicenceType
+    valid_until: date | None = None
+    company_ids: list[str] | None = None
+
+
+class ScoreSimulationRequest(BaseModel):
+    catalog_changes: list[CatalogChangeIn] = Field(default_factory=list, max_length=500)
+    licence_renewals: list[LicenceRenewalIn] = Field(default_factory=list, max_length=20)
+    top: int = Field(default=20, ge=0, le=200)
+
+
+class ScoreDistributionOut(BaseModel):
+    total: int
+    avg_score_urgencia: float
+    score_buckets: dict[str, int]
+    score_status: dict[str, int]
+    risco_consolidado: dict[str, int]
+
+
+class ScoreTransitionOut(BaseModel):
+    from_status: str
+    to_status: str
+    count: int
+
+
+class ScoreSimulationCompanyOut(BaseModel):
+    company_id: str
+    razao_social: str | None
+    score_before: int
+    score_after: int
+    delta: int
+    status_before: str
+    status_after: str
+    risk_before: str | None
+    risk_after: str | None
+
+
+class ScoreSimulationOut(BaseModel):
+    total_companies: int
+    affected_companies: int
+    changed_companies: int
+    before: ScoreDistributionOut
+    after: ScoreDistributionOut
+    status_transitions: list[ScoreTransitionOut]
+    top_changes: list[ScoreSimulationCompanyOut]
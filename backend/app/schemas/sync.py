@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from typing import Generic, TypeVar
+
+from pydantic import BaseModel, Field
+
+T = TypeVar("T")
+
+
+class SyncPage(BaseModel, Generic[T]):
+    """Resposta das listas com ``updated_since``: alteradas, excluidas e o cursor seguinte."""
+
+    items: list[T] = Field(default_factory=list)
+    deleted: list[str] = Field(default_factory=list)
+    next_cursor: str
+    has_more: bool = False
@@ -0,0 +1,475 @@
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Callable, Iterable
+
+from sqlalchemy import and_, exists, false, func, or_, true
+from sqlalchemy.orm import Session, aliased
+
+from app.core.normalize import parse_date_br
+from app.models.certificate_mirror import CertificateMirror
+from app.models.company import Company
+from app.models.company_tax import CompanyTax
+from app.models.licence_expiry import LicenceExpiry
+from app.schemas.company_tax import _requires_envio
+from app.services.business_days import add_business_days, business_days_between
+from app.services.company_overview import TAX_FIELD_META
+from app.services.licence_expiries import LICENCE_EXPIRY_LABELS
+from app.services.notification_operational_scan import (
+    PROCESS_RULES,
+    _process_reference_date,
+    _stale_process_rows,
+)
+
+# Tipos na ordem de desempate do keyset: alertas do mesmo dia saem por tipo e referencia.
+ALERT_TYPES = ("certificado", "licenca", "processo", "taxa")
+ALERT_SEVERITIES = ("critical", "warning", "info")
+ALERTS_DEFAULT_LIMIT = 50
+ALERTS_MAX_LIMIT = 200
+ALERTS_HORIZON_DAYS = 30
+ALERTS_WARNING_DAYS = 7
+
+_PROCESS_STALE_DAYS = min(int(rule["window"]) for rule in PROCESS_RULES)
+_PROCESS_CRITICAL_DAYS = max(int(rule["window"]) for rule in PROCESS_RULES)
+
+AlertKey = tuple[date, str, str]
+
+
+@dataclass(frozen=True)
+class AlertFilters:
+    tipos: frozenset[str]
+    severities: frozenset[str]
+    empresa_id: str | None = None
+    horizon_days: int = ALERTS_HORIZON_DAYS
+
+
+def encode_alerts_cursor(key: AlertKey) -> str:
+    raw = json.dumps({"d": key[0].isoformat(), "t": key[1], "r": key[2]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_alerts_cursor(cursor: str) -> AlertKey:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        tipo = str(payload["t"])
+        if tipo not in ALERT_TYPES:
+            raise ValueError(tipo)
+        return date.fromisoformat(payload["d"]), tipo, str(payload["r"])
+    except (ValueError, KeyError, TypeError) as exc:
+        raise ValueError("invalid alerts cursor") from exc
+
+
+def _severity_for_days(days: int) -> str:
+    if days < 0:
+        return "critical"
+    if days <= ALERTS_WARNING_DAYS:
+        return "warning"
+    return "info"
+
+
+def _severity_ranges(filters: AlertFilters, today: date) -> list[tuple[date | None, date]]:
+    """Faixas de vencimento (inclusivas) equivalentes as severidades pedidas."""
+    ranges: list[tuple[date | None, date]] = []
+    if "critical" in filters.severities:
+        ranges.append((None, today - timedelta(days=1)))
+    if "warning" in filters.severities:
+        ranges.append((today, today + timedelta(days=ALERTS_WARNING_DAYS)))
+    if "info" in filters.severities and filters.horizon_days > ALERTS_WARNING_DAYS:
+        ranges.append((today + timedelta(days=ALERTS_WARNING_DAYS + 1), today + timedelta(days=filters.horizon_days)))
+    return ranges
+
+
+def _after_cursor(
+    cursor: AlertKey | None,
+    tipo: str,
+    *,
+    day_gt: Callable[[date], Any],
+    day_ge: Callable[[date], Any],
+    day_eq: Callable[[date], Any],
+    ref_gt: Callable[[str], Any],
+):
+    """Condicao SQL de ``(dia, tipo, ref) > cursor`` para uma fonte de tipo fixo."""
+    if cursor is None:
+        return true()
+    day, cursor_tipo, ref = cursor
+    if tipo < cursor_tipo:
+        return day_gt(day)
+    if tipo > cursor_tipo:
+        return day_ge(day)
+    return or_(day_gt(day), and_(day_eq(day), ref_gt(ref)))
+
+
+def _alert(
+    key: AlertKey,
+    *,
+    org_id: str,
+    today: date,
+    severity: str,
+    company_id: str | None,
+    company_name: str | None,
+    titulo: str,
+    descricao: str,
+    entity_type: str,
+    entity_id: str,
+    route_path: str,
+    alert_id: str | None = None,
+) -> tuple[AlertKey, dict[str, Any]]:
+    day, tipo, ref = key
+    return key, {
+        "id": alert_id or f"{tipo}:{ref}",
+        "org_id": org_id,
+        "tipo_alerta": tipo,
+        "severity": severity,
+        "empresa_id": company_id,
+        "empresa": company_name,
+        "titulo": titulo,
+        "descricao": descricao,
+        "data_referencia": day,
+        "dias_restantes": (day - today).days,
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "route_path": route_path,
+    }
+
+
+def _due_label(label: str, days: int) -> str:
+    if days < 0:
+        return f"{label} vencido ha {-days} dia(s)"
+    if days == 0:
+        return f"{label} vence hoje"
+    return f"{label} vence em {days} dia(s)"
+
+
+def _licence_alert_query(db: Session, org_id: str, filters: AlertFilters):
+    status_key = func.lower(func.trim(LicenceExpiry.status))
+    query = (
+        db.query(LicenceExpiry, Company.razao_social)
+        .join(Company, (Company.id == LicenceExpiry.company_id) & (Company.org_id == LicenceExpiry.org_id))
+        .filter(
+            LicenceExpiry.org_id == org_id,
+            Company.is_active.is_(True),
+            LicenceExpiry.status.is_not(None),
+            status_key.notin_(("", "nao_exigido")),
+            # alvara definitivo nao vence periodicamente
+            or_(LicenceExpiry.licence_type != "alvara_funcionamento", LicenceExpiry.is_definitive.is_(False)),
+        )
+    )
+    if filters.empresa_id:
+        query = query.filter(LicenceExpiry.company_id == filters.empresa_id)
+    return query, status_key
+
+
+def _licence_window(filters: AlertFilters, today: date, status_key):
+    """Datadas: faixas por severidade no indice ``(org_id, valid_until)``; sem data e 'vencido': criticas de hoje."""
+    dated = [
+        and_(LicenceExpiry.valid_until >= low, LicenceExpiry.valid_until <= high)
+        if low is not None
+        else LicenceExpiry.valid_until <= high
+        for low, high in _severity_ranges(filters, today)
+    ]
+    undated = (
+        and_(LicenceExpiry.valid_until.is_(None), status_key.like("%vencid%"))
+        if "critical" in filters.severities
+        else false()
+    )
+    return dated, undated
+
+
+def _licence_alerts(
+    db: Session, org_id: str, today: date, filters: AlertFilters, cursor: AlertKey | None, limit: int
+) -> tuple[list[tuple[AlertKey, dict[str, Any]]], int]:
+    query, status_key = _licence_alert_query(db, org_id, filters)
+    dated, undated = _licence_window(filters, today, status_key)
+    ref_expr = LicenceExpiry.licence_id + ":" + LicenceExpiry.licence_type
+    total = query.filter(or_(*dated, undated)).count()
+
+    dated_rows = []
+    if dated:
+        dated_rows = (
+            query.filter(
+                or_(*dated),
+                _after_cursor(
+                    cursor,
+                    "licenca",
+                    day_gt=lambda day: LicenceExpiry.valid_until > day,
+                    day_ge=lambda day: LicenceExpiry.valid_until >= day,
+                    day_eq=lambda day: LicenceExpiry.valid_until == day,
+                    ref_gt=lambda ref: ref_expr > ref,
+                ),
+            )
+            .order_by(LicenceExpiry.valid_until.asc(), LicenceExpiry.licence_id.asc(), LicenceExpiry.licence_type.asc())
+            .limit(limit + 1)
+            .all()
+        )
+    undated_rows = (
+        query.filter(
+            undated,
+            _after_cursor(
+                cursor,
+                "licenca",
+                day_gt=lambda day: true() if today > day else false(),
+                day_ge=lambda day: true() if today >= day else false(),
+                day_eq=lambda day: true() if today == day else false(),
+                ref_gt=lambda ref: ref_expr > ref,
+            ),
+        )
+        .order_by(LicenceExpiry.licence_id.asc(), LicenceExpiry.licence_type.asc())
+        .limit(limit + 1)
+        .all()
+    )
+
+    alerts = []
+    for expiry, company_name in [*dated_rows, *undated_rows]:
+        day = expiry.valid_until or today
+        days = (day - today).days
+        label = LICENCE_EXPIRY_LABELS.get(expiry.licence_type, expiry.licence_type)
+        alerts.append(
+            _alert(
+                (day, "licenca", f"{expiry.licence_id}:{expiry.licence_type}"),
+                org_id=org_id,
+                today=today,
+                severity="critical" if expiry.valid_until is None else _severity_for_days(days),
+                company_id=expiry.company_id,
+                company_name=company_name,
+                titulo=f"{label} vencido" if expiry.valid_until is None else _due_label(label, days),
+                descricao=(
+                    f"{label} marcado como vencido, sem data de validade."
+                    if expiry.valid_until is None
+                    else f"Validade em {day.isoformat()}."
+                ),
+                entity_type="company_licence",
+                entity_id=expiry.licence_id,
+                route_path="/painel?tab=licencas",
+            )
+        )
+    return alerts, total
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def _certificate_ref(not_after: datetime, cert_id: str) -> str:
+    # Instante UTC de largura fixa antes do id: a ordem textual da referencia e a de (not_after, id).
+    return f"{not_after.strftime('%Y-%m-%dT%H:%M:%S.%f')}|{cert_id}"
+
+
+def _certificate_ref_gt(ref: str):
+    instant, _sep, cert_id = ref.partition("|")
+    try:
+        not_after = datetime.fromisoformat(instant).replace(tzinfo=timezone.utc)
+    except ValueError as exc:
+        raise ValueError("invalid alerts cursor") from exc
+    return or_(
+        CertificateMirror.not_after > not_after,
+        and_(CertificateMirror.not_after == not_after, CertificateMirror.id > cert_id),
+    )
+
+
+def _certificate_superseded():
+    """Ha certificado mais novo da mesma empresa e documento (renovado): o antigo nao alerta."""
+    newer = aliased(CertificateMirror)
+    return exists().where(
+        newer.org_id == CertificateMirror.org_id,
+        newer.company_id == CertificateMirror.company_id,
+        func.coalesce(newer.document_digits, "") == func.coalesce(CertificateMirror.document_digits, ""),
+        newer.not_after > CertificateMirror.not_after,
+    )
+
+
+def _certificate_alerts(
+    db: Session, org_id: str, today: date, filters: AlertFilters, cursor: AlertKey | None, limit: int
+) -> tuple[list[tuple[AlertKey, dict[str, Any]]], int]:
+    """Certificados de empresas ativas; de cada empresa/documento so o mais novo conta."""
+    ranges = [
+        and_(CertificateMirror.not_after >= _day_start(low), CertificateMirror.not_after < _day_start(high + timedelta(days=1)))
+        if low is not None
+        else CertificateMirror.not_after < _day_start(high + timedelta(days=1))
+        for low, high in _severity_ranges(filters, today)
+    ]
+    if not ranges:
+        return [], 0
+    query = (
+        db.query(CertificateMirror, Company.razao_social)
+        .join(Company, (Company.id == CertificateMirror.company_id) & (Company.org_id == CertificateMirror.org_id))
+        .filter(
+            CertificateMirror.org_id == org_id,
+            Company.is_active.is_(True),
+            or_(*ranges),
+            ~_certificate_superseded(),
+        )
+    )
+    if filters.empresa_id:
+        query = query.filter(CertificateMirror.company_id == filters.empresa_id)
+    total = query.count()
+    rows = (
+        query.filter(
+            _after_cursor(
+                cursor,
+                "certificado",
+                day_gt=lambda day: CertificateMirror.not_after >= _day_start(day + timedelta(days=1)),
+                day_ge=lambda day: CertificateMirror.not_after >= _day_start(day),
+                day_eq=lambda day: and_(
+                    CertificateMirror.not_after >= _day_start(day),
+                    CertificateMirror.not_after < _day_start(day + timedelta(days=1)),
+                ),
+                ref_gt=_certificate_ref_gt,
+            )
+        )
+        .order_by(CertificateMirror.not_after.asc(), CertificateMirror.id.asc())
+        .limit(limit + 1)
+        .all()
+    )
+
+    alerts = []
+    for cert, company_name in rows:
+        not_after = cert.not_after if cert.not_after.tzinfo else cert.not_after.replace(tzinfo=timezone.utc)
+        not_after = not_after.astimezone(timezone.utc)
+        day = not_after.date()
+        days = (day - today).days
+        alerts.append(
+            _alert(
+                (day, "certificado", _certificate_ref(not_after, str(cert.id))),
+                org_id=org_id,
+                today=today,
+                severity=_severity_for_days(days),
+                company_id=cert.company_id,
+                company_name=company_name or cert.name or cert.cn,
+                titulo=_due_label("Certificado digital", days),
+                descricao=f"Certificado de {cert.name or cert.cn or cert.document_masked or 'titular desconhecido'}.",
+                entity_type="certificate",
+                entity_id=str(cert.id),
+                route_path="/certificados",
+                alert_id=f"certificado:{cert.id}",
+            )
+        )
+    return alerts, total
+
+
+def _process_alerts(db: Session, org_id: str, today: date, filters: AlertFilters) -> list[tuple[AlertKey, dict[str, Any]]]:
+    """Processos parados: a data do alerta e o dia em que passaram da menor janela de ``PROCESS_RULES``."""
+    alerts = []
+    for process, company in _stale_process_rows(db, org_id, today):
+        if company is not None and not company.is_active:
+            continue
+        if filters.empresa_id and process.company_id != filters.empresa_id:
+            continue
+        reference = _process_reference_date(process)
+        stale_days = business_days_between(reference, today)
+        if stale_days < _PROCESS_STALE_DAYS:
+            continue
+        severity = "critical" if stale_days >= _PROCESS_CRITICAL_DAYS else "warning"
+        if severity not in filters.severities:
+            continue
+        alerts.append(
+            _alert(
+                (add_business_days(reference, _PROCESS_STALE_DAYS), "processo", str(process.id)),
+                org_id=org_id,
+                today=today,
+                severity=severity,
+                company_id=process.company_id,
+                company_name=company.razao_social if company else None,
+                titulo=f"Processo sem atualizacao ha {stale_days} dias uteis",
+                descricao=f"{process.process_type} / protocolo {process.protocolo}; ultima atualizacao em {reference.isoformat()}.",
+                entity_type="company_process",
+                entity_id=str(process.id),
+                route_path="/painel?tab=processos",
+            )
+        )
+    return alerts
+
+
+def _tax_alerts(db: Session, org_id: str, today: date, filters: AlertFilters) -> list[tuple[AlertKey, dict[str, Any]]]:
+    """Empresas com taxas em aberto (``status_taxas`` irregular); a data e o vencimento da TPI, se houver."""
+    query = (
+        db.query(CompanyTax, Company.razao_social)
+        .join(Company, (Company.id == CompanyTax.company_id) & (Company.org_id == CompanyTax.org_id))
+        .filter(
+            CompanyTax.org_id == org_id,
+            Company.is_active.is_(True),
+            func.lower(func.trim(CompanyTax.status_taxas)) == "irregular",
+        )
+    )
+    if filters.empresa_id:
+        query = query.filter(CompanyTax.company_id == filters.empresa_id)
+
+    alerts = []
+    for tax, company_name in query:
+        pending = [label for field, label in TAX_FIELD_META if _requires_envio(getattr(tax, field, None))]
+        due = parse_date_br(tax.vencimento_tpi)
+        day = due or today
+        severity = "critical" if due is not None and due < today else "warning"
+        if severity not in filters.severities:
+            continue
+        alerts.append(
+            _alert(
+                (day, "taxa", str(tax.id)),
+                org_id=org_id,
+                today=today,
+                severity=severity,
+                company_id=tax.company_id,
+                company_name=company_name,
+                titulo="Taxas em aberto",
+                descricao=(", ".join(pending) if pending else "Situacao das taxas irregular") + ".",
+                entity_type="company_tax",
+                entity_id=str(tax.id),
+                route_path="/painel?tab=taxas",
+            )
+        )
+    return alerts
+
+
+def _page_python_source(
+    alerts: Iterable[tuple[AlertKey, dict[str, Any]]], cursor: AlertKey | None, limit: int
+) -> tuple[list[tuple[AlertKey, dict[str, Any]]], int]:
+    alerts = sorted(alerts, key=lambda item: item[0])
+    total = len(alerts)
+    if cursor is not None:
+        alerts = [item for item in alerts if item[0] > cursor]
+    return alerts[: limit + 1], total
+
+
+def list_alerts(
+    db: Session,
+    org_id: str,
+    *,
+    filters: AlertFilters,
+    limit: int = ALERTS_DEFAULT_LIMIT,
+    cursor: str | None = None,
+    today: date | None = None,
+) -> tuple[list[dict[str, Any]], int, str | None]:
+    """
+    Feed unico de alertas por keyset em ``(data, tipo, referencia)``: cada fonte devolve ate
+    ``limit + 1`` itens apos o cursor (licencas e certificados por faixa de vencimento
+    indexada) e a pagina sai da intercalacao. Retorna ``(itens, total, next_cursor)``.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    after = decode_alerts_cursor(cursor) if cursor else None
+
+    merged: list[tuple[AlertKey, dict[str, Any]]] = []
+    total = 0
+    if "licenca" in filters.tipos:
+        alerts, count = _licence_alerts(db, org_id, today, filters, after, limit)
+        merged.extend(alerts)
+        total += count
+    if "certificado" in filters.tipos:
+        alerts, count = _certificate_alerts(db, org_id, today, filters, after, limit)
+        merged.extend(alerts)
+        total += count
+    if "processo" in filters.tipos:
+        alerts, count = _page_python_source(_process_alerts(db, org_id, today, filters), after, limit)
+        merged.extend(alerts)
+        total += count
+    if "taxa" in filters.tipos:
+        alerts, count = _page_python_source(_tax_alerts(db, org_id, today, filters), after, limit)
+        merged.extend(alerts)
+        total += count
+
+    merged.sort(key=lambda item: item[0])
+    page = merged[:limit]
+    next_cursor = encode_alerts_cursor(page[-1][0]) if len(merged) > limit and page else None
+    return [payload for _key, payload in page], total, next_cursor
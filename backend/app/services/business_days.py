@@ -41,3 +41,14 @@ def business_days_between(start_date: date, end_date: date) -> int:
         if is_business_day(current):
             count -= 1
     return count
+
+
+def business_days_cutoff(end_date: date, amount: int) -> date:
+    """Maior data ``start`` com ``business_days_between(start, end_date) >= amount``."""
+    current = end_date
+    counted = 0
+    while counted < amount:
+        if is_business_day(current):
+            counted += 1
+        current = current - timedelta(days=1)
+    return current
@@ -1,9 +1,18 @@
 import os
-from typing import Any, Optional
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional
 
 import httpx
 
 
+@dataclass
+class CertHubPage:
+    items: list[dict[str, Any]] = field(default_factory=list)
+    etag: Optional[str] = None
+    not_modified: bool = False
+
+
 class CertHubClient:
     """
     Client flexivel porque o contrato ainda nao fixou o path exato no CertHub.
@@ -20,6 +29,8 @@ class CertHubClient:
         login_url: Optional[str] = None,
         email: Optional[str] = None,
         password: Optional[str] = None,
+        page_size: int = 500,
+        transport: httpx.BaseTransport | None = None,
     ):
         self.base_url = base_url.rstrip("/")
         self.api_token = api_token
@@ -30,6 +41,22 @@ class CertHubClient:
         self.email = email
         self.password = password
         self._cached_token: Optional[str] = None
+        self.page_size = max(1, int(page_size))
+        self._transport = transport
+        self._client: httpx.Client | None = None
+        self._client_lock = threading.Lock()
+
+    def _config_key(self) -> tuple:
+        return (
+            self.base_url,
+            self.api_token,
+            self.list_url_template,
+            self.verify,
+            self.login_url,
+            self.email,
+            self.password,
+            self.page_size,
+        )
 
     @staticmethod
     def _env_bool(name: str, default: bool = True) -> bool:
@@ -48,6 +75,7 @@ class CertHubClient:
         login_url = os.getenv("CERTHUB_AUTH_LOGIN_URL", "").strip() or None
         email = os.getenv("CERTHUB_EMAIL", "").strip() or None
         password = os.getenv("CERTHUB_PASSWORD", "").strip() or None
+        page_size = int(os.getenv("CERTHUB_PAGE_SIZE", "").strip() or 500)
 
         verify: bool | str = verify_tls
         if ca_bundle:
@@ -70,8 +98,25 @@ class CertHubClient:
             login_url=login_url,
             email=email,
             password=password,
+            page_size=page_size,
         )
 
+    def _get_client(self) -> httpx.Client:
+        with self._client_lock:
+            if self._client is None:
+                self._client = httpx.Client(
+                    timeout=self.timeout_seconds,
+                    verify=self.verify,
+                    transport=self._transport,
+                )
+            return self._client
+
+    def close(self) -> None:
+        with self._client_lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
     def _ensure_token(self) -> Optional[str]:
         # 1) token fixo
         if self.api_token:
@@ -82,16 +127,52 @@ class CertHubClient:
         # 3) login automatico
         if not (self.login_url and self.email and self.password):
             return None
-        with httpx.Client(timeout=self.timeout_seconds, verify=self.verify) as client:
-            response = client.post(self.login_url, json={"email": self.email, "password": self.password})
-            response.raise_for_status()
-            token = response.json().get("access_token")
-            if not token:
-                raise RuntimeError("CertHub login sem access_token")
-            self._cached_token = token
-            return token
+        response = self._get_client().post(self.login_url, json={"email": self.email, "password": self.password})
+        response.raise_for_status()
+        token = response.json().get("access_token")
+        if not token:
+            raise RuntimeError("CertHub login sem access_token")
+        self._cached_token = token
+        return token
 
-    def list_certificates(self, org_id: str, org_slug: Optional[str] = None) -> list[dict[str, Any]]:
+    def _get(self, url: str, headers: dict[str, str], params: dict[str, Any] | None) -> httpx.Response:
+        client = self._get_client()
+        response = client.get(url, headers=headers, params=params)
+        # Se der 401 e estiver em modo de login automatico, reloga 1x.
+        if response.status_code == 401 and (not self.api_token) and self.login_url:
+            self._cached_token = None
+            token = self._ensure_token()
+            if token:
+                headers["Authorization"] = f"Bearer {token}"
+                response = client.get(url, headers=headers, params=params)
+        return response
+
+    @staticmethod
+    def _page_items(data: Any, url: str) -> list[dict[str, Any]]:
+        # Tolera formatos comuns.
+        if isinstance(data, list):
+            return data
+        if isinstance(data, dict):
+            if "items" in data and isinstance(data["items"], list):
+                return data["items"]
+            if "certificates" in data and isinstance(data["certificates"], list):
+                return data["certificates"]
+        raise ValueError(f"Resposta inesperada do CertHub em {url}: {type(data)}")
+
+    def iter_certificate_pages(
+        self,
+        org_id: str,
+        org_slug: Optional[str] = None,
+        *,
+        updated_since: Optional[str] = None,
+        etag: Optional[str] = None,
+    ) -> Iterator[CertHubPage]:
+        """
+        Percorre a listagem paginada do CertHub, uma pagina por vez.
+        Paginacao aceita: ``next`` (URL absoluta), ``next_cursor`` (reenviado como ``cursor``)
+        ou ``has_more`` + ``page``. Com ``etag`` envia If-None-Match; 304 gera uma pagina vazia
+        com ``not_modified=True``.
+        """
         url = self.list_url_template.format(org_id=org_id, org_slug=(org_slug or ""))
         headers: dict[str, str] = {}
         token = self._ensure_token()
@@ -100,24 +181,61 @@ class CertHubClient:
         if org_slug:
             headers["X-Org-Slug"] = org_slug
 
-        with httpx.Client(timeout=self.timeout_seconds, verify=self.verify) as client:
-            response = client.get(url, headers=headers)
-            # Se der 401 e estiver em modo de login automatico, reloga 1x.
-            if response.status_code == 401 and (not self.api_token) and self.login_url:
-                self._cached_token = None
-                token = self._ensure_token()
-                if token:
-                    headers["Authorization"] = f"Bearer {token}"
-                    response = client.get(url, headers=headers)
+        params: dict[str, Any] | None = {"page_size": self.page_size}
+        if updated_since:
+            params["updated_since"] = updated_since
+        page_number = 1
+        first = True
+        while True:
+            request_headers = dict(headers)
+            if first and etag:
+                request_headers["If-None-Match"] = etag
+            response = self._get(url, request_headers, params)
+            if first and response.status_code == 304:
+                yield CertHubPage(items=[], etag=etag, not_modified=True)
+                return
             response.raise_for_status()
             data = response.json()
+            yield CertHubPage(items=self._page_items(data, url), etag=response.headers.get("etag") if first else None)
+            first = False
 
-        # Tolera formatos comuns.
-        if isinstance(data, list):
-            return data
-        if isinstance(data, dict):
-            if "items" in data and isinstance(data["items"], list):
-                return data["items"]
-            if "certificates" in data and isinstance(data["certificates"], list):
-                return data["certificates"]
-        raise ValueError(f"Resposta inesperada do CertHub em {url}: {type(data)}")
+            if not isinstance(data, dict):
+                return
+            next_url = data.get("next")
+            next_cursor = data.get("next_cursor")
+            if next_url:
+                # A URL "next" ja carrega todos os parametros da proxima pagina.
+                url, params = str(next_url), None
+            elif next_cursor:
+                params = {**(params or {}), "cursor": next_cursor}
+            elif data.get("has_more"):
+                page_number += 1
+                params = {**(params or {}), "page": page_number}
+            else:
+                return
+
+    def list_certificates(self, org_id: str, org_slug: Optional[str] = None) -> list[dict[str, Any]]:
+        certificates: list[dict[str, Any]] = []
+        for page in self.iter_certificate_pages(org_id, org_slug):
+            certificates.extend(page.items)
+        return certificates
+
+
+_shared_client: CertHubClient | None = None
+_shared_client_key: tuple | None = None
+_shared_client_lock = threading.Lock()
+
+
+def get_certhub_client() -> CertHubClient:
+    """CertHubClient compartilhado (pool de conexoes); recriado se a configuracao do env mudar."""
+    global _shared_client, _shared_client_key
+    candidate = CertHubClient.from_env()
+    key = candidate._config_key()
+    with _shared_client_lock:
+        if _shared_client is not None and _shared_client_key == key:
+            return _shared_client
+        previous = _shared_client
+        _shared_client, _shared_client_key = candidate, key
+    if previous is not None:
+        previous.close()
+    return candidate
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.models.certhub_sync_cursor import CertHubSyncCursor
+from app.models.certificate_mirror import CertificateMirror
+from app.services.certhub_client import CertHubClient
+from app.services.company_data_version import bump_org_data_version
+from app.services.org_kpi_snapshot import mark_org_kpis_dirty
+from app.services.sync_delta import delete_with_tombstones
+from app.services.certificados_mirror import (
+    company_profiles_refresh_enabled,
+    parse_dt,
+    refresh_company_profiles_certificado_digital,
+    upsert_mirror,
+)
+
+logger = logging.getLogger("econtrole.certhub_sync")
+
+_CURSOR_FIELDS = ("updated_at", "last_ingested_at")
+# O cursor salvo recua esta janela: itens gravados no CertHub com updated_at anterior ao
+# maximo ja visto (commit atrasado do lado de la) voltam no proximo pull. O upsert e idempotente.
+CURSOR_OVERLAP = timedelta(minutes=5)
+
+
+@dataclass
+class PullSyncResult:
+    received: int = 0
+    inserted: int = 0
+    updated: int = 0
+    mapped_companies: int = 0
+    unmapped_cnpjs: int = 0
+    updated_company_profiles: int = 0
+    deleted: int = 0
+    pages: int = 0
+    mode: str = "incremental"
+    not_modified: bool = False
+    cursor: str | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def _now_utc() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(value: datetime | None) -> datetime | None:
+    if value is None:
+        return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _is_tombstone(cert: dict[str, Any]) -> bool:
+    return bool(cert.get("deleted") or cert.get("is_deleted") or cert.get("deleted_at"))
+
+
+def _item_cursor(cert: dict[str, Any]) -> datetime | None:
+    for field in _CURSOR_FIELDS:
+        parsed = _as_utc(parse_dt(cert.get(field)))
+        if parsed is not None:
+            return parsed
+    return None
+
+
+def _next_cursor(current: str | None, max_seen: datetime | None) -> str | None:
+    if max_seen is None:
+        return current
+    candidate = max_seen - CURSOR_OVERLAP
+    previous = _as_utc(parse_dt(current)) if current else None
+    if previous is not None and previous >= candidate:
+        return current
+    return candidate.isoformat()
+
+
+def get_sync_cursor(db: Session, org_id: str) -> CertHubSyncCursor | None:
+    return db.query(CertHubSyncCursor).filter(CertHubSyncCursor.org_id == org_id).first()
+
+
+def _delete_tombstones(db: Session, org_id: str, tombstones: list[dict[str, Any]]) -> int:
+    cert_ids = sorted({str(c.get("cert_id") or c.get("id") or "").strip() for c in tombstones} - {""})
+    sha1s = sorted({str(c.get("sha1_fingerprint") or c.get("sha1") or "").strip() for c in tombstones} - {""})
+    if not cert_ids and not sha1s:
+        return 0
+    conditions = []
+    if cert_ids:
+        conditions.append(CertificateMirror.cert_id.in_(cert_ids))
+    if sha1s:
+        conditions.append(CertificateMirror.sha1_fingerprint.in_(sha1s))
+    deleted = delete_with_tombstones(db, CertificateMirror, org_id, or_(*conditions))
+    if deleted:
+        bump_org_data_version(db, org_id)
+        mark_org_kpis_dirty(db, [org_id])
+    return deleted
+
+
+def run_certhub_pull_sync(
+    db: Session,
+    org_id: str,
+    client: CertHubClient,
+    *,
+    org_slug: str | None = None,
+    full: bool = False,
+) -> PullSyncResult:
+    """
+    Pull do CertHub em modo incremental: envia o cursor ``updated_since``/ETag salvo por org,
+    grava cada pagina no mirror via upsert em lote (commit por pagina) e so avanca o cursor
+    quando todas as paginas foram processadas. O cursor fica ``CURSOR_OVERLAP`` atras do maior
+    updated_at visto, e o ETag so e guardado quando o proximo pull repete o mesmo
+    ``updated_since`` (senao ele descreveria outra listagem). ``full=True`` ignora o cursor.
+    Itens marcados como removidos (``deleted``/``is_deleted``/``deleted_at``) saem do mirror.
+    """
+    cursor = get_sync_cursor(db, org_id)
+    result = PullSyncResult(mode="full" if full else "incremental")
+    updated_since = None if full or cursor is None else cursor.updated_since
+    etag = None if full or cursor is None else cursor.etag
+    result.cursor = updated_since
+
+    max_seen: datetime | None = None
+    first_etag: str | None = None
+    for page in client.iter_certificate_pages(
+        org_id, org_slug, updated_since=updated_since, etag=etag
+    ):
+        if page.not_modified:
+            result.not_modified = True
+            break
+        result.pages += 1
+        if result.pages == 1:
+            first_etag = page.etag
+
+        live = [cert for cert in page.items if isinstance(cert, dict) and not _is_tombstone(cert)]
+        tombstones = [cert for cert in page.items if isinstance(cert, dict) and _is_tombstone(cert)]
+        for cert in page.items:
+            if isinstance(cert, dict):
+                seen = _item_cursor(cert)
+                if seen is not None and (max_seen is None or seen > max_seen):
+                    max_seen = seen
+
+        if live:
+            batch = upsert_mirror(db, org_id, live, refresh_profiles=False)
+            result.received += batch.received
+            result.inserted += batch.inserted
+            result.updated += batch.updated
+            result.mapped_companies += batch.mapped_companies
+            result.unmapped_cnpjs += batch.unmapped_cnpjs
+        result.deleted += _delete_tombstones(db, org_id, tombstones)
+        db.commit()
+
+    if result.pages and company_profiles_refresh_enabled():
+        result.updated_company_profiles = refresh_company_profiles_certificado_digital(db, org_id)
+
+    now = _now_utc()
+    if cursor is None:
+        cursor = CertHubSyncCursor(org_id=org_id)
+        db.add(cursor)
+    if not result.not_modified:
+        next_cursor = _next_cursor(cursor.updated_since, max_seen)
+        cursor.etag = first_etag if next_cursor == updated_since else None
+        cursor.updated_since = next_cursor
+    cursor.last_synced_at = now
+    if full:
+        cursor.last_full_sync_at = now
+    db.commit()
+
+    result.cursor = cursor.updated_since
+    logger.info(
+        "certhub_pull_sync org_id=%s mode=%s pages=%s received=%s deleted=%s not_modified=%s",
+        org_id,
+        result.mode,
+        result.pages,
+        result.received,
+        result.deleted,
+        result.not_modified,
+    )
+    return result
@@ -1,21 +1,26 @@
 import os
-import inspect
 import logging
+import threading
 import uuid
 from dataclasses import dataclass
-from datetime import date, datetime, timezone
-from typing import Any, Iterable, Optional
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Iterable, Optional
 
-from sqlalchemy import delete
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, case, exists, func, insert, literal, select, update
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.db.base import utcnow
+from app.db.session import SessionLocal
+from app.models.certhub_webhook_run import CertHubWebhookRun
 from app.models.certificate_mirror import CertificateMirror
 from app.models.company import Company
 from app.models.company_profile import CompanyProfile
+from app.services.company_data_version import bump_company_data_versions, bump_org_data_version
+from app.services.org_kpi_snapshot import mark_org_kpis_dirty
+from app.services.sync_delta import delete_with_tombstones, touch_companies_where
 
 logger = logging.getLogger("econtrole.webhook_certhub")
-from app.models.org import Org as Organization
 
 
 def only_digits(value: Optional[str]) -> Optional[str]:
@@ -91,104 +96,202 @@ def build_company_cnpj_map(db: Session, org_id) -> dict[str, Any]:
     return out
 
 
+MIRROR_BATCH_SIZE = 500
+_MIRROR_UPDATE_FIELDS = (
+    "company_id",
+    "cert_id",
+    "sha1_fingerprint",
+    "serial_number",
+    "name",
+    "cn",
+    "issuer_cn",
+    "document_type",
+    "document_digits",
+    "document_masked",
+    "parse_ok",
+    "not_before",
+    "not_after",
+    "last_ingested_at",
+    "raw",
+)
+
+
+def _chunks(items: list, size: int) -> Iterable[list]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def company_profiles_refresh_enabled() -> bool:
+    return os.getenv("CERT_MIRROR_UPDATE_COMPANY_PROFILES", "true").lower() in ("1", "true", "yes", "y")
+
+
+def _mirror_values(cert: dict[str, Any], cnpj_map: dict[str, Any]) -> tuple[dict[str, Any], Optional[bool]]:
+    """Converte um certificado do CertHub nas colunas do mirror. Retorna (valores, mapeado?)."""
+    sha1 = (cert.get("sha1_fingerprint") or cert.get("sha1") or "").strip() or None
+    cert_id = (cert.get("cert_id") or cert.get("id") or "").strip() or None
+
+    doc_type = (cert.get("document_type") or "").strip() or None
+    doc_masked = (cert.get("document_masked") or cert.get("document") or "").strip() or None
+    doc_unmasked = (cert.get("document_unmasked") or "").strip() or None
+    # Para matching, sempre preferir unmasked (masked pode conter asteriscos).
+    doc_digits = only_digits(doc_unmasked or doc_masked)
+
+    # Matching company: apenas CNPJ (14 digitos).
+    company_id = None
+    mapped: Optional[bool] = None
+    if doc_type and doc_type.upper() == "CNPJ" and doc_digits and len(doc_digits) == 14:
+        company_id = cnpj_map.get(doc_digits)
+        mapped = bool(company_id)
+
+    # Raw deve ser JSON-serializavel (JSON/JSONB nao aceita datetime direto).
+    raw_in = cert.get("raw")
+    payload = _json_safe(raw_in) if isinstance(raw_in, dict) else _json_safe(dict(cert))
+
+    values = {
+        "company_id": company_id,
+        "cert_id": cert_id,
+        "sha1_fingerprint": sha1,
+        "serial_number": cert.get("serial_number"),
+        "name": cert.get("name"),
+        "cn": cert.get("cn"),
+        "issuer_cn": cert.get("issuer_cn"),
+        "document_type": doc_type,
+        "document_digits": doc_digits,
+        "document_masked": doc_masked,
+        "parse_ok": bool(cert.get("parse_ok", True)),
+        "not_before": parse_dt(cert.get("not_before")),
+        "not_after": parse_dt(cert.get("not_after")),
+        "last_ingested_at": parse_dt(cert.get("last_ingested_at")),
+        "raw": payload,
+    }
+    return values, mapped
+
+
+def _prefetch_existing(
+    db: Session, org_id, sha1s: list[str], cert_ids: list[str]
+) -> tuple[dict[str, str], dict[str, str]]:
+    """Carrega ids existentes do mirror por sha1 e por cert_id em poucas consultas IN."""
+    by_sha1: dict[str, str] = {}
+    by_cert_id: dict[str, str] = {}
+    for chunk in _chunks(sha1s, MIRROR_BATCH_SIZE):
+        rows = db.execute(
+            select(CertificateMirror.id, CertificateMirror.sha1_fingerprint).where(
+                CertificateMirror.org_id == org_id,
+                CertificateMirror.sha1_fingerprint.in_(chunk),
+            )
+        ).all()
+        for row_id, sha1 in rows:
+            by_sha1[sha1] = row_id
+    for chunk in _chunks(cert_ids, MIRROR_BATCH_SIZE):
+        rows = db.execute(
+            select(CertificateMirror.id, CertificateMirror.cert_id)
+            .where(CertificateMirror.org_id == org_id, CertificateMirror.cert_id.in_(chunk))
+            .order_by(CertificateMirror.created_at.asc())
+        ).all()
+        for row_id, cert_id in rows:
+            by_cert_id.setdefault(cert_id, row_id)
+    return by_sha1, by_cert_id
+
+
+def _insert_on_conflict_postgres(db: Session, rows: list[dict[str, Any]]) -> None:
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+    for chunk in _chunks(rows, MIRROR_BATCH_SIZE):
+        stmt = pg_insert(CertificateMirror).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_certificate_mirror_org_sha1",
+            set_={
+                **{field: getattr(stmt.excluded, field) for field in _MIRROR_UPDATE_FIELDS},
+                "updated_at": utcnow(),
+            },
+        )
+        db.execute(stmt)
+
+
 def upsert_mirror(
     db: Session,
     org_id,
     certificates: Iterable[dict[str, Any]],
+    *,
+    refresh_profiles: bool = True,
 ) -> SyncResult:
+    """
+    Upsert em lote do mirror: resolve existentes (sha1, senao cert_id) com consultas IN,
+    grava insercoes/atualizacoes em lotes de ``MIRROR_BATCH_SIZE`` e, no Postgres, insere
+    com ON CONFLICT (org_id, sha1_fingerprint) para tolerar syncs concorrentes.
+    """
     cert_list = list(certificates)
     cnpj_map = build_company_cnpj_map(db, org_id)
 
-    inserted = updated = mapped = unmapped = 0
-
-    for cert in cert_list:
-        sha1 = (cert.get("sha1_fingerprint") or cert.get("sha1") or "").strip() or None
-        cert_id = (cert.get("cert_id") or cert.get("id") or "").strip() or None
-
-        doc_type = (cert.get("document_type") or "").strip() or None
-        doc_masked = (cert.get("document_masked") or cert.get("document") or "").strip() or None
-        doc_unmasked = (cert.get("document_unmasked") or "").strip() or None
-        # Para matching, sempre preferir unmasked (masked pode conter asteriscos).
-        doc_digits = only_digits(doc_unmasked or doc_masked)
-
-        # Matching company: apenas CNPJ (14 digitos).
-        company_id = None
-        if doc_type and doc_type.upper() == "CNPJ" and doc_digits and len(doc_digits) == 14:
-            company_id = cnpj_map.get(doc_digits)
-            if company_id:
-                mapped += 1
-            else:
-                unmapped += 1
-
-        # Localizar existente (prefer sha1).
-        query = db.query(CertificateMirror).filter(CertificateMirror.org_id == org_id)
-        existing = None
-        if sha1:
-            existing = query.filter(CertificateMirror.sha1_fingerprint == sha1).one_or_none()
-        elif cert_id:
-            existing = query.filter(CertificateMirror.cert_id == cert_id).one_or_none()
-
-        # Raw deve ser JSON-serializavel (JSON/JSONB nao aceita datetime direto).
-        raw_in = cert.get("raw")
-        if isinstance(raw_in, dict):
-            payload = _json_safe(raw_in)
+    mapped = unmapped = 0
+    # Chave de identidade -> valores; o ultimo certificado repetido no payload prevalece.
+    pending: dict[Any, dict[str, Any]] = {}
+    for position, cert in enumerate(cert_list):
+        values, is_mapped = _mirror_values(cert, cnpj_map)
+        if is_mapped is True:
+            mapped += 1
+        elif is_mapped is False:
+            unmapped += 1
+        if values["sha1_fingerprint"]:
+            key: Any = ("sha1", values["sha1_fingerprint"])
+        elif values["cert_id"]:
+            key = ("cert_id", values["cert_id"])
         else:
-            payload = _json_safe(dict(cert))
-        parse_ok = bool(cert.get("parse_ok", True))
-        not_before = parse_dt(cert.get("not_before"))
-        not_after = parse_dt(cert.get("not_after"))
-        last_ingested_at = parse_dt(cert.get("last_ingested_at"))
-
-        if existing:
-            existing.company_id = company_id
-            existing.cert_id = cert_id
-            existing.sha1_fingerprint = sha1
-            existing.serial_number = cert.get("serial_number")
-            existing.name = cert.get("name")
-            existing.cn = cert.get("cn")
-            existing.issuer_cn = cert.get("issuer_cn")
-            existing.document_type = doc_type
-            existing.document_digits = doc_digits
-            existing.document_masked = doc_masked
-            existing.parse_ok = parse_ok
-            existing.not_before = not_before
-            existing.not_after = not_after
-            existing.last_ingested_at = last_ingested_at
-            existing.raw = payload
-            updated += 1
+            key = ("row", position)
+        pending[key] = values
+
+    by_sha1, by_cert_id = _prefetch_existing(
+        db,
+        org_id,
+        sorted({key[1] for key in pending if key[0] == "sha1"}),
+        sorted({key[1] for key in pending if key[0] == "cert_id"}),
+    )
+
+    to_insert: list[dict[str, Any]] = []
+    to_update: list[dict[str, Any]] = []
+    for (kind, ident), values in pending.items():
+        existing_id = by_sha1.get(ident) if kind == "sha1" else by_cert_id.get(ident) if kind == "cert_id" else None
+        if existing_id:
+            to_update.append({"id": existing_id, **values})
         else:
-            db.add(
-                CertificateMirror(
-                    org_id=org_id,
-                    company_id=company_id,
-                    cert_id=cert_id,
-                    sha1_fingerprint=sha1,
-                    serial_number=cert.get("serial_number"),
-                    name=cert.get("name"),
-                    cn=cert.get("cn"),
-                    issuer_cn=cert.get("issuer_cn"),
-                    document_type=doc_type,
-                    document_digits=doc_digits,
-                    document_masked=doc_masked,
-                    parse_ok=parse_ok,
-                    not_before=not_before,
-                    not_after=not_after,
-                    last_ingested_at=last_ingested_at,
-                    raw=payload,
+            to_insert.append({"id": str(uuid.uuid4()), "org_id": org_id, **values})
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        with_sha1 = [row for row in to_insert if row["sha1_fingerprint"]]
+        without_sha1 = [row for row in to_insert if not row["sha1_fingerprint"]]
+        if with_sha1:
+            _insert_on_conflict_postgres(db, with_sha1)
+    else:
+        without_sha1 = to_insert
+    for chunk in _chunks(without_sha1, MIRROR_BATCH_SIZE):
+        db.execute(insert(CertificateMirror), chunk)
+    # Escritas em lote nao passam pelo flush do ORM: versiona as empresas tocadas aqui,
+    # incluindo a empresa anterior de certificados religados.
+    touched_companies = {row["company_id"] for row in to_insert} | {row["company_id"] for row in to_update}
+    for chunk in _chunks(to_update, MIRROR_BATCH_SIZE):
+        touched_companies.update(
+            db.execute(
+                select(CertificateMirror.company_id).where(
+                    CertificateMirror.id.in_([row["id"] for row in chunk])
                 )
-            )
-            inserted += 1
+            ).scalars()
+        )
+        db.execute(update(CertificateMirror), chunk)
+    bump_company_data_versions(db, org_id, touched_companies)
+    if to_insert or to_update:
+        mark_org_kpis_dirty(db, [org_id])
 
     db.flush()
 
     updated_profiles = 0
-    if os.getenv("CERT_MIRROR_UPDATE_COMPANY_PROFILES", "true").lower() in ("1", "true", "yes", "y"):
+    if refresh_profiles and company_profiles_refresh_enabled():
         updated_profiles = refresh_company_profiles_certificado_digital(db, org_id)
 
     return SyncResult(
         received=len(cert_list),
-        inserted=inserted,
-        updated=updated,
+        inserted=len(to_insert),
+        updated=len(to_update),
         mapped_companies=mapped,
         unmapped_cnpjs=unmapped,
         updated_company_profiles=updated_profiles,
@@ -199,89 +302,107 @@ def refresh_company_profiles_certificado_digital(db: Session, org_id) -> int:
     """
     Atualiza company_profiles.certificado_digital = SIM/NÃO com base em certificados ativos mapeados.
     (Ativo = parse_ok && not_after >= hoje)
+    Um unico UPDATE ... FROM companies; so toca perfis cujo valor muda.
     """
     now = datetime.now(timezone.utc)
 
-    active_company_ids = {
-        row[0]
-        for row in (
-            db.query(CertificateMirror.company_id)
-            .filter(
-                CertificateMirror.org_id == org_id,
-                CertificateMirror.company_id.isnot(None),
-                CertificateMirror.parse_ok.is_(True),
-                CertificateMirror.not_after.isnot(None),
-                CertificateMirror.not_after >= now,
-            )
-            .distinct()
-            .all()
-        )
-    }
-
-    # Perfis pertencentes ao org via join com companies.
-    profiles = (
-        db.query(CompanyProfile)
-        .join(Company, CompanyProfile.company_id == Company.id)
-        .filter(Company.org_id == org_id)
-        .all()
+    has_active_certificate = exists().where(
+        CertificateMirror.org_id == org_id,
+        CertificateMirror.company_id == CompanyProfile.company_id,
+        CertificateMirror.parse_ok.is_(True),
+        CertificateMirror.not_after.isnot(None),
+        CertificateMirror.not_after >= now,
+    )
+    desired = case((has_active_certificate, literal("SIM")), else_=literal("NÃO"))
+    current = func.upper(func.trim(func.coalesce(CompanyProfile.certificado_digital, "")))
+
+    # Perfis mudam em lote (fora do flush): marca as empresas afetadas para o sync.
+    touch_companies_where(
+        db,
+        org_id,
+        select(CompanyProfile.company_id).where(CompanyProfile.org_id == org_id, current != desired),
+    )
+    stmt = (
+        update(CompanyProfile)
+        .where(CompanyProfile.company_id == Company.id, Company.org_id == org_id)
+        .where(current != desired)
+        .values(certificado_digital=desired)
+        .execution_options(synchronize_session=False)
     )
+    result = db.execute(stmt)
+    changed = int(result.rowcount or 0)
+    if changed:
+        bump_org_data_version(db, org_id)
+        mark_org_kpis_dirty(db, [org_id])
+    return changed
 
-    changed = 0
-    for profile in profiles:
-        desired = "SIM" if profile.company_id in active_company_ids else "NÃO"
-        if (profile.certificado_digital or "").strip().upper() != desired:
-            profile.certificado_digital = desired
-            changed += 1
 
-    db.flush()
-    return changed
+WEBHOOK_BATCH_SIZE = 500
+_PENDING_STATUSES = ("queued", "running")
 
 
-async def _maybe_await(value: Any) -> Any:
-    if inspect.isawaitable(value):
-        return await value
-    return value
+def _now_utc() -> datetime:
+    return datetime.now(timezone.utc)
 
 
-async def ingest_certificates_from_payload(
-    db: AsyncSession, org: Organization, certificates: list[dict]
+def ingest_certificates_from_payload(
+    db: Session,
+    org_id,
+    certificates: list[dict],
+    *,
+    on_batch: Callable[[int], None] | None = None,
 ) -> dict:
     """
-    Faz upsert dos certificados recebidos e retorna resumo util para webhook.
+    Faz upsert dos certificados recebidos em lotes de ``WEBHOOK_BATCH_SIZE`` (commit por lote)
+    e retorna resumo util para webhook. O certificado_digital dos perfis e recalculado uma vez no fim.
     """
-    result = upsert_mirror(db, org.id, certificates)
-    await _maybe_await(db.commit())
+    inserted = updated = mapped = unmapped = processed = 0
+    for chunk in _chunks(list(certificates or []), WEBHOOK_BATCH_SIZE):
+        result = upsert_mirror(db, org_id, chunk, refresh_profiles=False)
+        db.commit()
+        inserted += result.inserted
+        updated += result.updated
+        mapped += result.mapped_companies
+        unmapped += result.unmapped_cnpjs
+        processed += result.received
+        if on_batch:
+            on_batch(processed)
+
+    updated_profiles = 0
+    if company_profiles_refresh_enabled():
+        updated_profiles = refresh_company_profiles_certificado_digital(db, org_id)
+        db.commit()
     return {
-        "received": result.received,
-        "inserted": result.inserted,
-        "updated": result.updated,
-        "upserted": result.inserted + result.updated,
-        "mapped_companies": result.mapped_companies,
-        "unmapped_cnpjs": result.unmapped_cnpjs,
-        "updated_company_profiles": result.updated_company_profiles,
+        "received": processed,
+        "inserted": inserted,
+        "updated": updated,
+        "upserted": inserted + updated,
+        "mapped_companies": mapped,
+        "unmapped_cnpjs": unmapped,
+        "updated_company_profiles": updated_profiles,
     }
 
 
-async def delete_certificates_by_cert_ids(
-    db: AsyncSession, org: Organization, cert_ids: list[str]
-) -> dict:
+def delete_certificates_by_cert_ids(db: Session, org_id, cert_ids: list[str]) -> dict:
     """Remove entradas do mirror por cert_id."""
     normalized_ids = sorted({(value or "").strip() for value in cert_ids if (value or "").strip()})
     if not normalized_ids:
         return {"deleted": 0}
 
-    stmt = delete(CertificateMirror).where(
-        CertificateMirror.org_id == org.id,
-        CertificateMirror.cert_id.in_(normalized_ids),
-    )
-    result = await _maybe_await(db.execute(stmt))
-    await _maybe_await(db.commit())
-    deleted = int(result.rowcount or 0)
+    deleted = delete_with_tombstones(db, CertificateMirror, org_id, CertificateMirror.cert_id.in_(normalized_ids))
+    if deleted:
+        bump_org_data_version(db, org_id)
+        mark_org_kpis_dirty(db, [org_id])
+    db.commit()
     return {"deleted": deleted}
 
 
-async def reconcile_full(
-    db: AsyncSession, org: Organization, certificates: list[dict]
+def reconcile_full(
+    db: Session,
+    org_id,
+    certificates: list[dict],
+    *,
+    on_batch: Callable[[int], None] | None = None,
 ) -> dict:
     """
     1. Faz upsert de todos os certs recebidos (chama ingest_certificates_from_payload)
@@ -290,10 +411,10 @@ async def reconcile_full(
     Retorna {"upserted": N, "deleted": M}
     """
     if not certificates:
-        logger.warning("reconcile_full ignorado: payload vazio para org_id=%s", org.id)
+        logger.warning("reconcile_full ignorado: payload vazio para org_id=%s", org_id)
         return {"upserted": 0, "deleted": 0, "skipped": True}
 
-    ingest_result = await ingest_certificates_from_payload(db, org, certificates)
+    ingest_result = ingest_certificates_from_payload(db, org_id, certificates, on_batch=on_batch)
     fingerprints = sorted(
         {
             (cert.get("sha1_fingerprint") or cert.get("sha1") or "").strip()
@@ -303,14 +424,183 @@ async def reconcile_full(
         }
     )
 
-    delete_stmt = delete(CertificateMirror).where(CertificateMirror.org_id == org.id)
+    criteria = []
     if fingerprints:
-        delete_stmt = delete_stmt.where(
+        criteria.append(
             (CertificateMirror.sha1_fingerprint.is_(None))
             | (~CertificateMirror.sha1_fingerprint.in_(fingerprints))
         )
 
-    delete_result = await _maybe_await(db.execute(delete_stmt))
-    await _maybe_await(db.commit())
-    deleted = int(delete_result.rowcount or 0)
+    deleted = delete_with_tombstones(db, CertificateMirror, org_id, *criteria)
+    if deleted:
+        bump_org_data_version(db, org_id)
+        mark_org_kpis_dirty(db, [org_id])
+    db.commit()
     return {"upserted": int(ingest_result.get("upserted", 0)), "deleted": deleted}
+
+
+def _claim_next_run(db: Session, org_id: str, stale_before: datetime) -> str | None:
+    """
+    Trava (FOR UPDATE) o run pendente mais antigo da org, que serve de mutex por org entre
+    processos. Devolve o id reivindicado, ou None se nao ha pendente ou se outro processo
+    ainda esta com ele (``running`` com heartbeat recente).
+    """
+    owned = and_(CertHubWebhookRun.status == "running", CertHubWebhookRun.heartbeat_at >= stale_before)
+    row = (
+        db.query(CertHubWebhookRun, case((owned, True), else_=False))
+        .filter(CertHubWebhookRun.org_id == org_id, CertHubWebhookRun.status.in_(_PENDING_STATUSES))
+        .order_by(CertHubWebhookRun.started_at.asc(), CertHubWebhookRun.id.asc())
+        .with_for_update()
+        .first()
+    )
+    if row is None or row[1]:
+        db.commit()
+        return None
+    run = row[0]
+    if run.status == "running":
+        logger.warning("CertHub webhook retomado run_id=%s (sem heartbeat desde %s)", run.id, run.heartbeat_at)
+    run.status = "running"
+    run.heartbeat_at = _now_utc()
+    run.finished_at = None
+    run.last_error = None
+    db.commit()
+    return run.id
+
+
+def _process_run(db: Session, run_id: str) -> None:
+    try:
+        run = db.get(CertHubWebhookRun, run_id)
+        org_id = run.org_id
+        payload = dict(run.payload or {})
+        certificates = [cert for cert in (payload.get("certificates") or []) if isinstance(cert, dict)]
+
+        def _progress(done: int) -> None:
+            run.processed = done
+            run.heartbeat_at = _now_utc()
+            db.commit()
+
+        if run.mode == "upsert":
+            result = ingest_certificates_from_payload(db, org_id, certificates, on_batch=_progress)
+        elif run.mode == "delete":
+            result = delete_certificates_by_cert_ids(db, org_id, payload.get("deleted_cert_ids") or [])
+            run.processed = int(run.total or 0)
+        else:
+            result = reconcile_full(db, org_id, certificates, on_batch=_progress)
+
+        run = db.get(CertHubWebhookRun, run_id)
+        run.status = "completed"
+        run.result = result
+        run.payload = None
+        run.finished_at = _now_utc()
+        db.commit()
+        logger.info("CertHub webhook processed run_id=%s mode=%s result=%s", run_id, run.mode, result)
+    except Exception as exc:
+        db.rollback()
+        logger.exception("CertHub webhook failed run_id=%s", run_id)
+        run = db.get(CertHubWebhookRun, run_id)
+        if run:
+            run.status = "failed"
+            run.last_error = str(exc)[:800]
+            run.finished_at = _now_utc()
+            db.commit()
+
+
+def drain_certhub_webhook_runs(org_id: str, *, stale_seconds: float | None = None) -> int:
+    """Processa os runs pendentes da org em ordem de chegada; retorna quantos processou."""
+    stale = settings.CERTHUB_WEBHOOK_STALE_SECONDS if stale_seconds is None else stale_seconds
+    processed = 0
+    db = SessionLocal()
+    try:
+        while True:
+            run_id = _claim_next_run(db, org_id, _now_utc() - timedelta(seconds=max(float(stale), 0.0)))
+            if run_id is None:
+                return processed
+            _process_run(db, run_id)
+            processed += 1
+    finally:
+        db.close()
+
+
+def run_certhub_webhook_job(run_id: str) -> None:
+    """Processa um webhook do CertHub enfileirado; runs da mesma org sao serializados no banco."""
+    db = SessionLocal()
+    try:
+        org_id = db.query(CertHubWebhookRun.org_id).filter(CertHubWebhookRun.id == run_id).scalar()
+    finally:
+        db.close()
+    if org_id:
+        drain_certhub_webhook_runs(org_id)
+
+
+def recover_certhub_webhook_runs(*, stale_seconds: float | None = None) -> dict[str, int]:
+    """
+    Retoma runs perdidos (reinicio ou queda depois do 202): orgs com run ``queued`` ou
+    ``running`` sem heartbeat ha mais que ``stale_seconds`` sao drenadas de novo.
+    """
+    stale = settings.CERTHUB_WEBHOOK_STALE_SECONDS if stale_seconds is None else stale_seconds
+    stale_before = _now_utc() - timedelta(seconds=max(float(stale), 0.0))
+    db = SessionLocal()
+    try:
+        org_ids = db.execute(
+            select(CertHubWebhookRun.org_id)
+            .where(
+                (CertHubWebhookRun.status == "queued")
+                | (
+                    (CertHubWebhookRun.status == "running")
+                    & (CertHubWebhookRun.heartbeat_at.is_(None) | (CertHubWebhookRun.heartbeat_at < stale_before))
+                )
+            )
+            .distinct()
+        ).scalars().all()
+    finally:
+        db.close()
+
+    stats = {"orgs": 0, "runs": 0}
+    for org_id in org_ids:
+        stats["orgs"] += 1
+        stats["runs"] += drain_certhub_webhook_runs(org_id, stale_seconds=stale)
+    return stats
+
+
+class CertHubWebhookRecoveryWorker:
+    """Consumidor em thread: na subida e a cada intervalo, retoma runs de webhook perdidos."""
+
+    def __init__(self, interval_seconds: float | None = None) -> None:
+        self._interval = interval_seconds
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def interval(self) -> float:
+        value = settings.CERTHUB_WEBHOOK_RECOVERY_SECONDS if self._interval is None else self._interval
+        return max(float(value), 1.0)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="certhub-webhook-recovery", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_once(self) -> dict[str, int]:
+        return recover_certhub_webhook_runs()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                stats = self.run_once()
+                if stats["runs"]:
+                    logger.info("CertHub webhook runs retomados runs=%s orgs=%s", stats["runs"], stats["orgs"])
+            except Exception:
+                logger.exception("Falha ao retomar runs de webhook do CertHub")
+            if self._stop.wait(self.interval):
+                return
+
+
+certhub_webhook_recovery_worker = CertHubWebhookRecoveryWorker()
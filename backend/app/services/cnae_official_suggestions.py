@@ -1,15 +1,23 @@
 from __future__ import annotations
 
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dataclasses import dataclass
+from datetime import datetime, timezone
 from typing import Callable
 
 from sqlalchemy.orm import Session
 
-from app.core.cnae import normalize_cnae_code
+from app.core.cnae import extract_cnae_codes, normalize_cnae_code
+from app.db.session import SessionLocal
+from app.models.cnae_official_lookup_run import CNAEOfficialLookupRun
 from app.models.cnae_risk_suggestion import CNAERiskSuggestion
+from app.models.company_profile import CompanyProfile
 from app.schemas.cnae_risk_suggestion import CNAERiskSuggestionOut
 from app.schemas.official_sources import OfficialSourceError, OfficialSourceFinding, OfficialSourceName
-from app.services.cnae_risk_suggestions import create_suggestion
+from app.services.cnae_risk_catalog import get_cnae_risk_catalog
+from app.services.cnae_risk_suggestions import create_suggestions_bulk
+from app.services.notifications import emit_org_notification
 from app.services.official_sources.anapolis import lookup_cnae as lookup_anapolis
 from app.services.official_sources.anvisa import lookup_cnae as lookup_anvisa
 from app.services.official_sources.cbmgo import lookup_cnae as lookup_cbmgo
@@ -26,6 +34,20 @@ OFFICIAL_SOURCE_ADAPTERS: dict[OfficialSourceName, Callable[[str], list[Official
 }
 
 _MUNICIPAL_SOURCES: set[OfficialSourceName] = {"ANAPOLIS", "GOIANIA"}
+_DEDUPE_FIELDS = (
+    "cnae_code",
+    "source_name",
+    "source_reference",
+    "suggested_risk_tier",
+    "suggested_base_weight",
+    "suggested_sanitary_risk",
+    "suggested_fire_risk",
+    "suggested_environmental_risk",
+    "evidence_excerpt",
+)
+LOOKUP_CHUNK_SIZE = 25
+MAX_LOOKUP_WORKERS = 8
+MAX_ERROR_ITEMS = 50
 
 
 @dataclass
@@ -71,44 +93,25 @@ def _finding_to_suggestion_payload(org_id: str, finding: OfficialSourceFinding)
     return payload
 
 
-def _is_duplicate_pending(
-    db: Session,
-    org_id: str,
-    payload: dict,
-) -> bool:
-    query = db.query(CNAERiskSuggestion).filter(
-        CNAERiskSuggestion.status == "PENDING",
-        CNAERiskSuggestion.cnae_code == payload["cnae_code"],
-        CNAERiskSuggestion.source_name == payload["source_name"],
-        CNAERiskSuggestion.source_reference == payload.get("source_reference"),
-        CNAERiskSuggestion.org_id == org_id,
-    )
-    existing = query.first()
-    if not existing:
-        return False
-
-    comparable_fields = (
-        "suggested_risk_tier",
-        "suggested_base_weight",
-        "suggested_sanitary_risk",
-        "suggested_fire_risk",
-        "suggested_environmental_risk",
-        "evidence_excerpt",
+def _suggestion_signature(payload: dict) -> tuple:
+    return tuple(payload.get(field) for field in _DEDUPE_FIELDS)
+
+
+def _load_pending_signatures(db: Session, org_id: str, source_names: list[OfficialSourceName]) -> set[tuple]:
+    columns = [getattr(CNAERiskSuggestion, field) for field in _DEDUPE_FIELDS]
+    rows = (
+        db.query(*columns)
+        .filter(
+            CNAERiskSuggestion.org_id == org_id,
+            CNAERiskSuggestion.status == "PENDING",
+            CNAERiskSuggestion.source_name.in_(source_names),
+        )
+        .all()
     )
-    for field in comparable_fields:
-        if getattr(existing, field) != payload.get(field):
-            return False
-    return True
+    return {tuple(row) for row in rows}
 
 
-def run_official_lookup_and_create_suggestions(
-    db: Session,
-    *,
-    org_id: str,
-    cnae_codes: list[str],
-    sources: list[OfficialSourceName] | None = None,
-) -> OfficialLookupResult:
-    source_names = _resolve_source_names(sources)
+def _normalize_codes(cnae_codes: list[str]) -> list[str]:
     normalized_codes: list[str] = []
     for item in cnae_codes:
         code = normalize_cnae_code(item)
@@ -116,28 +119,119 @@ def run_official_lookup_and_create_suggestions(
             continue
         if code not in normalized_codes:
             normalized_codes.append(code)
+    return normalized_codes
 
-    findings: list[OfficialSourceFinding] = []
-    source_errors: list[OfficialSourceError] = []
+
+def lookup_official_sources(
+    source_names: list[OfficialSourceName],
+    cnae_codes: list[str],
+    *,
+    chunk_size: int = LOOKUP_CHUNK_SIZE,
+    on_progress: Callable[[int], bool] | None = None,
+) -> tuple[list[OfficialSourceFinding], list[OfficialSourceError]]:
+    """
+    Consulta todas as fontes em paralelo (uma tarefa por fonte x lote de CNAEs).
+    ``on_progress`` recebe o total de pares fonte/CNAE ja processados e pode devolver
+    False para cancelar os lotes ainda nao iniciados.
+    """
+    tasks: list[tuple[OfficialSourceName, list[str]]] = []
     for source_name in source_names:
+        for start in range(0, len(cnae_codes), max(1, chunk_size)):
+            tasks.append((source_name, cnae_codes[start : start + chunk_size]))
+    if not tasks:
+        return [], []
+
+    failed_sources: set[str] = set()
+    failed_lock = threading.Lock()
+
+    def _run(source_name: OfficialSourceName, codes: list[str]):
         adapter = OFFICIAL_SOURCE_ADAPTERS[source_name]
-        for code in normalized_codes:
+        chunk_findings: list[OfficialSourceFinding] = []
+        for code in codes:
+            if source_name in failed_sources:
+                break
             try:
-                source_findings = adapter(code)
+                chunk_findings.extend(adapter(code))
             except Exception as exc:
-                source_errors.append(OfficialSourceError(source_name=source_name, message=str(exc)))
-                continue
-            findings.extend(source_findings)
+                # Se a fonte cair, os demais codigos falhariam do mesmo jeito: um erro por fonte.
+                with failed_lock:
+                    if source_name in failed_sources:
+                        return chunk_findings, None
+                    failed_sources.add(source_name)
+                return chunk_findings, OfficialSourceError(source_name=source_name, message=str(exc))
+        return chunk_findings, None
+
+    results: dict[int, tuple[list[OfficialSourceFinding], OfficialSourceError | None]] = {}
+    processed = 0
+    cancelled = False
+    workers = max(1, min(MAX_LOOKUP_WORKERS, len(tasks)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cnae-official") as executor:
+        pending = {
+            executor.submit(_run, source_name, codes): (index, len(codes))
+            for index, (source_name, codes) in enumerate(tasks)
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, size = pending.pop(future)
+                if future.cancelled():
+                    continue
+                results[index] = future.result()
+                processed += size
+            if on_progress is not None and not cancelled and on_progress(processed) is False:
+                cancelled = True
+                for future in pending:
+                    future.cancel()
 
-    created: list[CNAERiskSuggestion] = []
+    findings: list[OfficialSourceFinding] = []
+    source_errors: list[OfficialSourceError] = []
+    for index in sorted(results):
+        chunk_findings, error = results[index]
+        findings.extend(chunk_findings)
+        if error is not None:
+            source_errors.append(error)
+    return findings, source_errors
+
+
+def create_suggestions_from_findings(
+    db: Session,
+    *,
+    org_id: str,
+    findings: list[OfficialSourceFinding],
+    source_names: list[OfficialSourceName],
+) -> tuple[list[CNAERiskSuggestion], int]:
+    # Uma unica consulta de pendentes; duplicatas dentro do proprio lote tambem sao descartadas.
+    pending_signatures = _load_pending_signatures(db, org_id, source_names)
+    payloads: list[dict] = []
     skipped_duplicates = 0
     for finding in findings:
         payload = _finding_to_suggestion_payload(org_id, finding)
-        if _is_duplicate_pending(db, org_id, payload):
+        signature = _suggestion_signature(payload)
+        if signature in pending_signatures:
             skipped_duplicates += 1
             continue
-        suggestion = create_suggestion(db, org_id=org_id, payload=payload)
-        created.append(suggestion)
+        pending_signatures.add(signature)
+        payloads.append(payload)
+    return create_suggestions_bulk(db, org_id=org_id, payloads=payloads), skipped_duplicates
+
+
+def run_official_lookup_and_create_suggestions(
+    db: Session,
+    *,
+    org_id: str,
+    cnae_codes: list[str],
+    sources: list[OfficialSourceName] | None = None,
+) -> OfficialLookupResult:
+    source_names = _resolve_source_names(sources)
+    normalized_codes = _normalize_codes(cnae_codes)
+
+    findings, source_errors = lookup_official_sources(source_names, normalized_codes)
+    created, skipped_duplicates = create_suggestions_from_findings(
+        db,
+        org_id=org_id,
+        findings=findings,
+        source_names=source_names,
+    )
 
     return OfficialLookupResult(
         findings=findings,
@@ -147,6 +241,23 @@ def run_official_lookup_and_create_suggestions(
     )
 
 
+def collect_unmapped_cnae_codes(db: Session, org_id: str) -> list[str]:
+    rows = (
+        db.query(CompanyProfile.cnaes_principal, CompanyProfile.cnaes_secundarios)
+        .filter(CompanyProfile.org_id == org_id, CompanyProfile.score_status == "UNMAPPED_CNAE")
+        .all()
+    )
+    codes: set[str] = set()
+    for cnaes_principal, cnaes_secundarios in rows:
+        codes.update(extract_cnae_codes(cnaes_principal, cnaes_secundarios))
+    if not codes:
+        return []
+
+    # O catalogo pode ter mudado desde o ultimo recalculo de score.
+    mapped = get_cnae_risk_catalog(db).mapped_codes(codes)
+    return sorted(codes - mapped)
+
+
 def _resolve_source_names(sources: list[OfficialSourceName] | None) -> list[OfficialSourceName]:
     if sources:
         source_names: list[OfficialSourceName] = []
@@ -165,3 +276,119 @@ def _resolve_source_names(sources: list[OfficialSourceName] | None) -> list[Offi
 
 def serialize_created_suggestions(items: list[CNAERiskSuggestion]) -> list[CNAERiskSuggestionOut]:
     return [CNAERiskSuggestionOut.model_validate(item) for item in items]
+
+
+def _now_utc() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _get_run(db: Session, run_id: str) -> CNAEOfficialLookupRun | None:
+    return db.query(CNAEOfficialLookupRun).filter(CNAEOfficialLookupRun.id == run_id).first()
+
+
+def _emit_lookup_run_notification(run: CNAEOfficialLookupRun, db: Session) -> None:
+    severity = "info"
+    title = "Consulta oficial de CNAEs finalizada"
+    if run.status == "failed":
+        severity = "error"
+        title = "Consulta oficial de CNAEs com falha"
+    elif run.status == "cancelled":
+        severity = "warning"
+        title = "Consulta oficial de CNAEs cancelada"
+
+    message = (
+        f"Run {run.id} finalizada com status {run.status}. "
+        f"CNAEs={int(run.total_codes or 0)} Sugestoes criadas={int(run.created_count or 0)} "
+        f"Duplicadas={int(run.skipped_duplicates or 0)} Erros de fonte={int(run.error_count or 0)}."
+    )
+    emit_org_notification(
+        db,
+        org_id=run.org_id,
+        user_id=run.started_by_user_id,
+        event_type="job.cnae_official_lookup.finished",
+        severity=severity,
+        title=title,
+        message=message,
+        dedupe_key=f"job:cnae_official_lookup:{run.id}:{run.status}",
+        entity_type="cnae_official_lookup_run",
+        entity_id=run.id,
+        metadata_json={
+            "run_id": run.id,
+            "status": run.status,
+            "sources": list(run.sources or []),
+            "total_codes": int(run.total_codes or 0),
+            "created_count": int(run.created_count or 0),
+            "skipped_duplicates": int(run.skipped_duplicates or 0),
+            "error_count": int(run.error_count or 0),
+        },
+        commit=False,
+    )
+
+
+def run_cnae_official_lookup_job(run_id: str) -> None:
+    """Job em background: CNAEs sem mapeamento da org inteira -> sugestoes PENDING."""
+    db: Session = SessionLocal()
+    try:
+        run = _get_run(db, run_id)
+        if not run:
+            return
+
+        source_names = _resolve_source_names(run.sources or None)
+        codes = collect_unmapped_cnae_codes(db, run.org_id)
+        run.status = "running"
+        run.sources = list(source_names)
+        run.total_codes = len(codes)
+        run.total = len(codes) * len(source_names)
+        run.processed = 0
+        run.errors = []
+        db.commit()
+
+        def _on_progress(processed: int) -> bool:
+            db.expire_all()
+            current = _get_run(db, run_id)
+            if current is None or current.status == "cancelled":
+                return False
+            current.processed = processed
+            db.commit()
+            return True
+
+        findings, source_errors = lookup_official_sources(source_names, codes, on_progress=_on_progress)
+
+        db.expire_all()
+        run = _get_run(db, run_id)
+        if not run:
+            return
+        run.error_count = len(source_errors)
+        run.errors = [
+            {"source_name": error.source_name, "error": error.message[:800], "at": _now_utc().isoformat()}
+            for error in source_errors
+        ][-MAX_ERROR_ITEMS:]
+        if run.status != "cancelled":
+            created, skipped_duplicates = create_suggestions_from_findings(
+                db,
+                org_id=run.org_id,
+                findings=findings,
+                source_names=source_names,
+            )
+            run.findings_count = len(findings)
+            run.created_count = len(created)
+            run.skipped_duplicates = skipped_duplicates
+            run.processed = run.total
+            run.status = "completed"
+        run.finished_at = _now_utc()
+        _emit_lookup_run_notification(run, db)
+        db.commit()
+    except Exception as exc:
+        db.rollback()
+        failed_run = _get_run(db, run_id)
+        if failed_run:
+            failed_run.status = "failed"
+            failed_run.finished_at = _now_utc()
+            failed_run.error_count = int(failed_run.error_count or 0) + 1
+            errors = list(failed_run.errors or [])
+            errors.append({"error": str(exc)[:800] or "Falha interna ao executar job", "at": _now_utc().isoformat()})
+            failed_run.errors = errors[-MAX_ERROR_ITEMS:]
+            _emit_lookup_run_notification(failed_run, db)
+            db.commit()
+    finally:
+        db.close()
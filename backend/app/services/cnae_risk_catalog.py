@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterable, Mapping
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.db.listeners import FlushChanges
+from app.models.cnae_risk import CNAERisk
+from app.models.cnae_risk_catalog_version import CNAERiskCatalogVersion
+
+logger = logging.getLogger("econtrole.cnae_risk_catalog")
+
+CATALOG_SCOPE = "cnae_risks"
+REDIS_CHANNEL = "econtrole:cnae_risk_catalog"
+
+_PENDING_KEY = "cnae_risk_catalog_pending"
+_UNFLUSHED_KEY = "cnae_risk_catalog_unflushed"
+# Colunas cuja alteracao (evento "set") marca a sessao como suja antes do flush.
+CATALOG_COLUMNS = (
+    "cnae_code",
+    "cnae_text",
+    "risk_tier",
+    "base_weight",
+    "sanitary_risk",
+    "fire_risk",
+    "environmental_risk",
+    "is_active",
+)
+
+
+@dataclass(frozen=True)
+class CNAERiskEntry:
+    cnae_code: str
+    cnae_text: str
+    risk_tier: str | None
+    base_weight: int
+    sanitary_risk: str | None
+    fire_risk: str | None
+    environmental_risk: str | None
+
+
+@dataclass(frozen=True)
+class CNAERiskCatalog:
+    """Retrato imutavel dos CNAEs ativos; compartilhado entre threads sem copia."""
+
+    version: int
+    entries: Mapping[str, CNAERiskEntry]
+
+    def lookup(self, codes: Iterable[str]) -> list[CNAERiskEntry]:
+        found = (self.entries.get(code) for code in dict.fromkeys(codes))
+        return [entry for entry in found if entry is not None]
+
+    def mapped_codes(self, codes: Iterable[str]) -> set[str]:
+        return {code for code in codes if code in self.entries}
+
+
+def _now_utc() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _read_version(executor) -> int:
+    version = executor.execute(
+        select(CNAERiskCatalogVersion.version).where(CNAERiskCatalogVersion.scope == CATALOG_SCOPE)
+    ).scalar()
+    return int(version or 0)
+
+
+def _bump(executor, dialect: str) -> None:
+    now = _now_utc()
+    row = {"scope": CATALOG_SCOPE, "version": 1, "updated_at": now}
+    table = CNAERiskCatalogVersion.__table__
+    if dialect in {"postgresql", "postgres", "sqlite"}:
+        stmt = (sqlite_insert if dialect == "sqlite" else pg_insert)(CNAERiskCatalogVersion).values(row)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["scope"],
+            set_={"version": table.c.version + 1, "updated_at": now},
+        )
+        executor.execute(stmt)
+        return
+    result = executor.execute(
+        update(CNAERiskCatalogVersion)
+        .where(CNAERiskCatalogVersion.scope == CATALOG_SCOPE)
+        .values(version=CNAERiskCatalogVersion.version + 1, updated_at=now)
+    )
+    if not result.rowcount:
+        executor.execute(insert(CNAERiskCatalogVersion).values(**row))
+
+
+def _load_catalog(db: Session) -> CNAERiskCatalog:
+    # Versao antes das linhas: se alguem gravar no meio, o retrato fica rotulado com a
+    # versao antiga e a proxima conferencia recarrega (nunca o contrario).
+    version = _read_version(db)
+    rows = db.execute(
+        select(
+            CNAERisk.cnae_code,
+            CNAERisk.cnae_text,
+            CNAERisk.risk_tier,
+            CNAERisk.base_weight,
+            CNAERisk.sanitary_risk,
+            CNAERisk.fire_risk,
+            CNAERisk.environmental_risk,
+        ).where(CNAERisk.is_active.is_(True))
+    ).all()
+    entries = {
+        str(code): CNAERiskEntry(
+            cnae_code=str(code),
+            cnae_text=text,
+            risk_tier=risk_tier,
+            base_weight=int(base_weight or 0),
+            sanitary_risk=sanitary_risk,
+            fire_risk=fire_risk,
+            environmental_risk=environmental_risk,
+        )
+        for code, text, risk_tier, base_weight, sanitary_risk, fire_risk, environmental_risk in rows
+    }
+    return CNAERiskCatalog(version=version, entries=entries)
+
+
+class _CatalogCache:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._catalog: CNAERiskCatalog | None = None
+        self._checked_at = 0.0
+        self._generation = 0
+
+    def get(self, db: Session, check_seconds: float) -> CNAERiskCatalog:
+        with self._lock:
+            catalog, checked_at, generation = self._catalog, self._checked_at, self._generation
+        now = time.monotonic()
+        if catalog is not None and now - checked_at < check_seconds:
+            return catalog
+        if catalog is not None and _read_version(db) == catalog.version:
+            with self._lock:
+                if self._generation == generation:
+                    self._checked_at = now
+            return catalog
+        loaded = _load_catalog(db)
+        with self._lock:
+            # Invalidado durante a carga: entrega o lido, mas nao guarda.
+            if self._generation == generation:
+                self._catalog = loaded
+                self._checked_at = now
+        return loaded
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._catalog = None
+            self._checked_at = 0.0
+            self._generation += 1
+
+
+_cache = _CatalogCache()
+_redis = None
+
+
+def _redis_url() -> str:
+    return (settings.CNAE_CATALOG_REDIS_URL or settings.NOTIFICATIONS_REDIS_URL or "").strip()
+
+
+def _redis_client():
+    global _redis
+    if _redis is None:
+        import redis
+
+        _redis = redis.Redis.from_url(_redis_url())
+    return _redis
+
+
+class CNAECatalogInvalidationListener:
+    """
+    Assina o canal Redis do catalogo e invalida o cache local na hora. Iniciado uma vez pelo
+    lifespan da API; se o Redis cair, tenta de novo com espera crescente e, enquanto isso, a
+    conferencia periodica da versao continua valendo.
+    """
+
+    MAX_BACKOFF_SECONDS = 60.0
+
+    def __init__(self) -> None:
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if not _redis_url() or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cnae-risk-catalog-redis", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                self._listen()
+                backoff = 1.0
+            except Exception:
+                logger.warning(
+                    "cnae_risk_catalog redis listener falhou; nova tentativa em %.0fs", backoff, exc_info=True
+                )
+                if self._stop.wait(backoff):
+                    return
+                backoff = min(backoff * 2, self.MAX_BACKOFF_SECONDS)
+
+    def _listen(self) -> None:
+        pubsub = _redis_client().pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(REDIS_CHANNEL)
+            # Avisos perdidos enquanto estava desconectado: recarrega pela versao.
+            _cache.invalidate()
+            while not self._stop.is_set():
+                item = pubsub.get_message(timeout=1.0)
+                if item and item.get("type") == "message":
+                    _cache.invalidate()
+        finally:
+            pubsub.close()
+
+
+cnae_catalog_listener = CNAECatalogInvalidationListener()
+
+
+def _broadcast_invalidation() -> None:
+    if not _redis_url():
+        return
+    try:
+        _redis_client().publish(REDIS_CHANNEL, "invalidate")
+    except Exception:
+        logger.exception("cnae_risk_catalog redis publish failed")
+
+
+def get_cnae_risk_catalog(db: Session) -> CNAERiskCatalog:
+    """
+    Catalogo de CNAEs ativos em memoria. Recarrega so quando a versao do catalogo muda
+    (conferida a cada ``CNAE_CATALOG_CHECK_SECONDS``). Uma sessao com escrita no catalogo
+    ainda nao confirmada le direto do banco, para enxergar a propria mudanca.
+    """
+    if db.info.pop(_UNFLUSHED_KEY, None):
+        # Linha do catalogo alterada em memoria (sessoes sem autoflush): grava antes de ler.
+        db.flush()
+    if db.info.get(_PENDING_KEY):
+        return _load_catalog(db)
+    return _cache.get(db, max(0.0, float(settings.CNAE_CATALOG_CHECK_SECONDS)))
+
+
+def bump_cnae_risk_catalog_version(db: Session) -> None:
+    """Para escritas em lote (Core/bulk) em ``cnae_risks`` que nao passam pelo flush do ORM."""
+    _bump(db, db.get_bind().dialect.name)
+    db.info[_PENDING_KEY] = True
+
+
+def clear_cnae_risk_catalog_cache() -> None:
+    _cache.invalidate()
+
+
+def mark_catalog_unflushed(target, value, oldvalue, initiator) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info[_UNFLUSHED_KEY] = True
+
+
+def bump_catalog_after_flush(session: Session, changes: FlushChanges) -> None:
+    session.info.pop(_UNFLUSHED_KEY, None)
+    if changes.changed_of(CNAERisk):
+        connection = session.connection()
+        _bump(connection, connection.dialect.name)
+        session.info[_PENDING_KEY] = True
+
+
+def invalidate_after_commit(session: Session) -> None:
+    session.info.pop(_UNFLUSHED_KEY, None)
+    if not session.info.pop(_PENDING_KEY, None):
+        return
+    _cache.invalidate()
+    _broadcast_invalidation()
+
+
+def discard_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_UNFLUSHED_KEY, None)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
+from typing import Any
 
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
@@ -11,6 +12,7 @@ from app.models.cnae_risk import CNAERisk
 from app.models.cnae_risk_suggestion import CNAERiskSuggestion
 from app.models.company_profile import CompanyProfile
 from app.services.company_scoring import recalculate_company_score
+from app.services.score_simulation import CatalogChange, simulate_org_scores
 
 
 ALLOWED_STATUSES = {"PENDING", "APPROVED", "REJECTED", "APPLIED"}
@@ -49,12 +51,12 @@ def list_suggestions(
     return query.order_by(CNAERiskSuggestion.created_at.desc()).offset(offset).limit(limit).all()
 
 
-def create_suggestion(db: Session, *, org_id: str, payload: dict) -> CNAERiskSuggestion:
+def _build_suggestion(org_id: str, payload: dict) -> CNAERiskSuggestion:
     effective_org_id = payload.get("org_id")
     if effective_org_id is not None and effective_org_id != org_id:
         effective_org_id = org_id
 
-    suggestion = CNAERiskSuggestion(
+    return CNAERiskSuggestion(
         org_id=effective_org_id,
         cnae_code=payload["cnae_code"],
         suggested_risk_tier=payload.get("suggested_risk_tier"),
@@ -67,9 +69,9 @@ def create_suggestion(db: Session, *, org_id: str, payload: dict) -> CNAERiskSug
         evidence_excerpt=payload.get("evidence_excerpt"),
         status="PENDING",
     )
-    db.add(suggestion)
-    db.flush()
 
+
+def _record_created(suggestion: CNAERiskSuggestion) -> None:
     record_audit_event(
         AuditEvent(
             action="CNAE_RISK_SUGGESTION_CREATED",
@@ -77,9 +79,28 @@ def create_suggestion(db: Session, *, org_id: str, payload: dict) -> CNAERiskSug
             entity_id=suggestion.id,
         )
     )
+
+
+def create_suggestion(db: Session, *, org_id: str, payload: dict) -> CNAERiskSuggestion:
+    suggestion = _build_suggestion(org_id, payload)
+    db.add(suggestion)
+    db.flush()
+    _record_created(suggestion)
     return suggestion
 
 
+def create_suggestions_bulk(db: Session, *, org_id: str, payloads: list[dict]) -> list[CNAERiskSuggestion]:
+    suggestions = [_build_suggestion(org_id, payload) for payload in payloads]
+    if not suggestions:
+        return []
+    # Um unico flush: o SQLAlchemy agrupa os INSERTs (insertmanyvalues/executemany).
+    db.add_all(suggestions)
+    db.flush()
+    for suggestion in suggestions:
+        _record_created(suggestion)
+    return suggestions
+
+
 def update_pending_suggestion(
     db: Session, *, org_id: str, suggestion_id: str, payload: dict
 ) -> CNAERiskSuggestion:
@@ -196,6 +217,29 @@ def _recalculate_affected_companies(db: Session, cnae_code: str) -> tuple[int, i
     return affected, recalculated, changed
 
 
+def simulate_suggestion_impact(
+    db: Session,
+    *,
+    org_id: str,
+    suggestion_id: str,
+    top: int = 20,
+) -> dict[str, Any]:
+    """Distribuicao de score da org antes/depois de aplicar a sugestao, sem gravar."""
+    suggestion = _get_suggestion_or_404(db, org_id, suggestion_id)
+    if suggestion.status != "PENDING":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Only PENDING suggestions can be simulated",
+        )
+    change = CatalogChange(
+        cnae_code=suggestion.cnae_code,
+        risk_tier=suggestion.suggested_risk_tier,
+        base_weight=suggestion.suggested_base_weight,
+        is_active=True,
+    )
+    return simulate_org_scores(db, org_id, catalog_changes=[change], top=top)
+
+
 def approve_and_apply_suggestion(
     db: Session,
     *,
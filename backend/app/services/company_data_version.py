@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timezone
+from typing import Iterable
+
+from sqlalchemy import inspect as sa_inspect, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.db.listeners import FlushChanges
+from app.models.certificate_mirror import CertificateMirror
+from app.models.company import Company
+from app.models.company_data_version import CompanyDataVersion
+from app.models.company_licence import CompanyLicence
+from app.models.company_process import CompanyProcess
+from app.models.company_profile import CompanyProfile
+from app.models.company_tax import CompanyTax
+
+ORG_WIDE_KEY = ""
+
+_TRACKED_MODELS = (CompanyProfile, CompanyLicence, CompanyTax, CompanyProcess, CertificateMirror)
+
+
+def _now_utc() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _bump(executor, dialect: str, keys: set[tuple[str, str]]) -> None:
+    if not keys:
+        return
+    now = _now_utc()
+    rows = [
+        {"id": str(uuid.uuid4()), "org_id": org_id, "company_id": company_id, "version": 1, "updated_at": now}
+        for org_id, company_id in sorted(keys)
+    ]
+    table = CompanyDataVersion.__table__
+    if dialect in {"postgresql", "postgres", "sqlite"}:
+        if dialect == "sqlite":
+            stmt = sqlite_insert(CompanyDataVersion).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["org_id", "company_id"],
+                set_={"version": table.c.version + 1, "updated_at": now},
+            )
+        else:
+            stmt = pg_insert(CompanyDataVersion).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                constraint="uq_company_data_versions_org_company",
+                set_={"version": table.c.version + 1, "updated_at": now},
+            )
+        executor.execute(stmt)
+        return
+    for row in rows:
+        result = executor.execute(
+            update(CompanyDataVersion)
+            .where(CompanyDataVersion.org_id == row["org_id"], CompanyDataVersion.company_id == row["company_id"])
+            .values(version=CompanyDataVersion.version + 1, updated_at=now)
+        )
+        if not result.rowcount:
+            executor.execute(insert(CompanyDataVersion).values(**row))
+
+
+def bump_company_data_versions(db: Session, org_id: str, company_ids: Iterable[str | None]) -> None:
+    """Para escritas em lote (Core/bulk) que nao passam pelo flush do ORM."""
+    keys = {(org_id, str(company_id)) for company_id in company_ids if company_id}
+    _bump(db, db.get_bind().dialect.name, keys)
+
+
+def bump_org_data_version(db: Session, org_id: str) -> None:
+    """Invalida todas as empresas da org (escrita em lote sem empresas conhecidas)."""
+    _bump(db, db.get_bind().dialect.name, {(org_id, ORG_WIDE_KEY)})
+
+
+def get_company_data_versions(
+    db: Session, org_id: str, company_ids: Iterable[str]
+) -> tuple[dict[str, int], int]:
+    """Retorna ({company_id: versao}, versao_da_org) em uma consulta; ausente = 0."""
+    wanted = sorted({str(company_id) for company_id in company_ids if company_id})
+    rows = db.execute(
+        select(CompanyDataVersion.company_id, CompanyDataVersion.version).where(
+            CompanyDataVersion.org_id == org_id,
+            CompanyDataVersion.company_id.in_([ORG_WIDE_KEY, *wanted]),
+        )
+    ).all()
+    versions = {str(company_id): int(version) for company_id, version in rows}
+    org_version = versions.pop(ORG_WIDE_KEY, 0)
+    return {company_id: versions.get(company_id, 0) for company_id in wanted}, org_version
+
+
+def get_company_data_version(db: Session, org_id: str, company_id: str) -> tuple[int, int]:
+    versions, org_version = get_company_data_versions(db, org_id, [company_id])
+    return versions.get(company_id, 0), org_version
+
+
+def _keys_for(obj: object) -> set[tuple[str, str]]:
+    if isinstance(obj, Company):
+        return {(obj.org_id, obj.id)} if obj.org_id and obj.id else set()
+    if not isinstance(obj, _TRACKED_MODELS):
+        return set()
+    org_id = getattr(obj, "org_id", None)
+    if not org_id:
+        return set()
+    company_ids = {getattr(obj, "company_id", None)}
+    # Certificado religado a outra empresa: a anterior tambem muda.
+    history = sa_inspect(obj).attrs.company_id.history
+    company_ids.update(history.deleted or ())
+    return {(org_id, str(company_id)) for company_id in company_ids if company_id}
+
+
+def bump_versions_after_flush(session: Session, changes: FlushChanges) -> None:
+    keys: set[tuple[str, str]] = set()
+    for obj in changes.changed_of(Company, *_TRACKED_MODELS):
+        keys |= _keys_for(obj)
+    if keys:
+        connection = session.connection()
+        _bump(connection, connection.dialect.name, keys)
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 import re
+import threading
+from collections import OrderedDict
 from datetime import date, datetime, timedelta, timezone
-from typing import Any
+from typing import Any, Iterable
 
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session, joinedload
 
 from app.models.certificate_mirror import CertificateMirror
@@ -25,6 +28,8 @@ from app.schemas.company_overview import (
     CompanyOverviewTaxItem,
     CompanyOverviewTimelineItem,
 )
+from app.services.company_data_version import get_company_data_version, get_company_data_versions
+from app.services.licence_expiries import licence_expiry_entries
 from app.services.licence_regulatory_rules import (
     evaluate_definitive_alvara_regulatory_status,
     format_invalidating_reason_label,
@@ -40,13 +45,6 @@ TAX_FIELD_META = (
     ("taxa_bombeiros", "Taxa de Bombeiros"),
     ("tpi", "TPI"),
 )
-LICENCE_FIELD_META = (
-    ("alvara_vig_sanitaria", "Alvará Vigilância Sanitária", "alvara_vig_sanitaria_valid_until"),
-    ("cercon", "Cercon", "cercon_valid_until"),
-    ("alvara_funcionamento", "Alvará Funcionamento", "alvara_funcionamento_valid_until"),
-    ("licenca_ambiental", "Licença Ambiental", "licenca_ambiental_valid_until"),
-    ("certidao_uso_solo", "Certidão de Uso do Solo", "certidao_uso_solo_valid_until"),
-)
 PROCESS_CLOSED_KEYS = ("conclu", "encerr", "final", "arquiv")
 
 
@@ -215,12 +213,15 @@ def _sort_ts(value: date | datetime | None) -> float:
     return float("-inf")
 
 
+OVERVIEW_PROCESS_LIMIT = 10
+OVERVIEW_BATCH_CHUNK = 500
+
+
 def build_company_overview(db: Session, org_id: str, company_id: str) -> CompanyOverviewResponse | None:
     company = _company_with_profile(db, org_id, company_id)
     if not company:
         return None
 
-    profile = company.profile
     tax = db.query(CompanyTax).filter(CompanyTax.org_id == org_id, CompanyTax.company_id == company.id).first()
     licence = (
         db.query(CompanyLicence)
@@ -231,17 +232,125 @@ def build_company_overview(db: Session, org_id: str, company_id: str) -> Company
         db.query(CompanyProcess)
         .filter(CompanyProcess.org_id == org_id, CompanyProcess.company_id == company.id)
         .order_by(CompanyProcess.updated_at.desc())
-        .limit(10)
+        .limit(OVERVIEW_PROCESS_LIMIT)
         .all()
     )
-    regulatory_payload = evaluate_definitive_alvara_regulatory_status(licence=licence, processes=processes)
-    definitive_invalidated = bool(regulatory_payload["definitive_alvara_invalidated"])
     cert = (
         db.query(CertificateMirror)
         .filter(CertificateMirror.org_id == org_id, CertificateMirror.company_id == company.id)
         .order_by(CertificateMirror.not_after.is_(None), CertificateMirror.not_after.desc(), CertificateMirror.updated_at.desc())
         .first()
     )
+    return _assemble_overview(company, tax=tax, licence=licence, processes=processes, cert=cert)
+
+
+def _chunked(values: list[str], size: int) -> Iterable[list[str]]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def _prefetch_overview_rows(db: Session, org_id: str, company_ids: list[str]) -> dict[str, dict[str, Any]]:
+    """
+    Carrega os dados de varias empresas com uma consulta por tabela: empresas+perfil,
+    taxas, licencas, os ``OVERVIEW_PROCESS_LIMIT`` processos mais recentes por empresa
+    (ROW_NUMBER) e o certificado mais relevante por empresa (ROW_NUMBER).
+    """
+    companies = (
+        db.query(Company)
+        .options(joinedload(Company.profile))
+        .filter(Company.org_id == org_id, Company.id.in_(company_ids))
+        .all()
+    )
+    rows: dict[str, dict[str, Any]] = {
+        company.id: {"company": company, "tax": None, "licence": None, "processes": [], "cert": None}
+        for company in companies
+    }
+    found = list(rows)
+    if not found:
+        return rows
+
+    for tax in db.query(CompanyTax).filter(CompanyTax.org_id == org_id, CompanyTax.company_id.in_(found)):
+        rows[tax.company_id]["tax"] = rows[tax.company_id]["tax"] or tax
+    for licence in db.query(CompanyLicence).filter(
+        CompanyLicence.org_id == org_id, CompanyLicence.company_id.in_(found)
+    ):
+        rows[licence.company_id]["licence"] = rows[licence.company_id]["licence"] or licence
+
+    process_rank = (
+        select(
+            CompanyProcess.id.label("id"),
+            func.row_number()
+            .over(partition_by=CompanyProcess.company_id, order_by=CompanyProcess.updated_at.desc())
+            .label("rank"),
+        )
+        .where(CompanyProcess.org_id == org_id, CompanyProcess.company_id.in_(found))
+        .subquery()
+    )
+    processes = (
+        db.query(CompanyProcess)
+        .join(process_rank, process_rank.c.id == CompanyProcess.id)
+        .filter(process_rank.c.rank <= OVERVIEW_PROCESS_LIMIT)
+        .order_by(CompanyProcess.company_id, process_rank.c.rank)
+        .all()
+    )
+    for process in processes:
+        rows[process.company_id]["processes"].append(process)
+
+    cert_rank = (
+        select(
+            CertificateMirror.id.label("id"),
+            func.row_number()
+            .over(
+                partition_by=CertificateMirror.company_id,
+                order_by=(
+                    CertificateMirror.not_after.is_(None),
+                    CertificateMirror.not_after.desc(),
+                    CertificateMirror.updated_at.desc(),
+                ),
+            )
+            .label("rank"),
+        )
+        .where(CertificateMirror.org_id == org_id, CertificateMirror.company_id.in_(found))
+        .subquery()
+    )
+    for cert in (
+        db.query(CertificateMirror)
+        .join(cert_rank, cert_rank.c.id == CertificateMirror.id)
+        .filter(cert_rank.c.rank == 1)
+    ):
+        rows[cert.company_id]["cert"] = cert
+    return rows
+
+
+def build_company_overviews(
+    db: Session, org_id: str, company_ids: Iterable[str]
+) -> dict[str, CompanyOverviewResponse]:
+    """Overviews de varias empresas com prefetch compartilhado; ids de outra org sao ignorados."""
+    wanted = list(dict.fromkeys(str(company_id) for company_id in company_ids if company_id))
+    overviews: dict[str, CompanyOverviewResponse] = {}
+    for chunk in _chunked(wanted, OVERVIEW_BATCH_CHUNK):
+        for company_id, data in _prefetch_overview_rows(db, org_id, chunk).items():
+            overviews[company_id] = _assemble_overview(
+                data["company"],
+                tax=data["tax"],
+                licence=data["licence"],
+                processes=data["processes"],
+                cert=data["cert"],
+            )
+    return overviews
+
+
+def _assemble_overview(
+    company: Company,
+    *,
+    tax: CompanyTax | None,
+    licence: CompanyLicence | None,
+    processes: list[CompanyProcess],
+    cert: CertificateMirror | None,
+) -> CompanyOverviewResponse:
+    profile = company.profile
+    regulatory_payload = evaluate_definitive_alvara_regulatory_status(licence=licence, processes=processes)
+    definitive_invalidated = bool(regulatory_payload["definitive_alvara_invalidated"])
 
     raw_tax = tax.raw if tax and isinstance(tax.raw, dict) else {}
     taxes: list[CompanyOverviewTaxItem] = []
@@ -277,21 +386,16 @@ def build_company_overview(db: Session, org_id: str, company_id: str) -> Company
     taxes = taxes[:8]
 
     licences: list[CompanyOverviewLicenceItem] = []
-    raw_lic = licence.raw if licence and isinstance(licence.raw, dict) else {}
-    for field, label, valid_field in LICENCE_FIELD_META:
-        if not licence:
-            break
-        status_value = getattr(licence, field, None)
-        validade = getattr(licence, valid_field, None)
-        origem = raw_lic.get(f"source_kind_{field}")
-        if status_value is None and validade is None and origem is None:
-            continue
+    for entry in licence_expiry_entries(licence):
+        field = entry.licence_type
+        status_value = entry.status
+        validade = entry.valid_until
         licences.append(
             CompanyOverviewLicenceItem(
-                tipo=label,
+                tipo=entry.label,
                 validade=validade,
                 status=status_value,
-                origem=origem,
+                origem=entry.source,
                 alvara_funcionamento_kind=(licence.alvara_funcionamento_kind if field == "alvara_funcionamento" else None),
                 regulatory_status=(str(regulatory_payload["regulatory_status"]) if field == "alvara_funcionamento" else None),
                 invalidated_reasons=(list(regulatory_payload["invalidated_reasons"]) if field == "alvara_funcionamento" else []),
@@ -488,3 +592,98 @@ def build_company_overview(db: Session, org_id: str, company_id: str) -> Company
         processes=overview_processes,
         timeline=timeline,
     )
+
+
+OVERVIEW_CACHE_SIZE = 2048
+
+
+class _OverviewCache:
+    """LRU em processo de overviews prontos; a entrada so vale para a mesma versao."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._items: OrderedDict[tuple[str, str], tuple[str, CompanyOverviewResponse]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple[str, str], version: str) -> CompanyOverviewResponse | None:
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._items.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: tuple[str, str], version: str, value: CompanyOverviewResponse) -> None:
+        with self._lock:
+            self._items[key] = (version, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+_overview_cache = _OverviewCache(OVERVIEW_CACHE_SIZE)
+
+
+def company_overview_version(company_version: int, org_version: int, today: date | None = None) -> str:
+    # A data entra na versao: urgencias e vencimentos do overview sao relativos a hoje.
+    today = today or date.today()
+    return f"{company_version}.{org_version}.{today:%Y%m%d}"
+
+
+def company_overview_etag(version: str) -> str:
+    return f'W/"ov-{version}"'
+
+
+def current_company_overview_version(db: Session, org_id: str, company_id: str) -> str:
+    company_version, org_version = get_company_data_version(db, org_id, company_id)
+    return company_overview_version(company_version, org_version)
+
+
+def get_company_overview_cached(
+    db: Session,
+    org_id: str,
+    company_id: str,
+    *,
+    version: str | None = None,
+) -> tuple[CompanyOverviewResponse | None, str]:
+    """
+    Overview com cache por (org_id, company_id, versao dos dados). A versao e incrementada
+    em qualquer escrita da empresa, perfil, licencas, taxas, processos ou certificados.
+    O objeto retornado e compartilhado entre requisicoes: trate-o como somente leitura.
+    """
+    version = version or current_company_overview_version(db, org_id, company_id)
+    key = (org_id, company_id)
+    cached = _overview_cache.get(key, version)
+    if cached is not None:
+        return cached, version
+    overview = build_company_overview(db, org_id, company_id)
+    if overview is not None:
+        _overview_cache.put(key, version, overview)
+    return overview, version
+
+
+def get_company_overviews_cached(
+    db: Session, org_id: str, company_ids: Iterable[str]
+) -> dict[str, CompanyOverviewResponse]:
+    """Versao em lote: uma consulta de versoes, cache por empresa e prefetch so das faltantes."""
+    wanted = list(dict.fromkeys(str(company_id) for company_id in company_ids if company_id))
+    versions, org_version = get_company_data_versions(db, org_id, wanted)
+    today = date.today()
+    overviews: dict[str, CompanyOverviewResponse] = {}
+    missing_versions: dict[str, str] = {}
+    for company_id in wanted:
+        version = company_overview_version(versions.get(company_id, 0), org_version, today)
+        cached = _overview_cache.get((org_id, company_id), version)
+        if cached is not None:
+            overviews[company_id] = cached
+        else:
+            missing_versions[company_id] = version
+    if missing_versions:
+        for company_id, overview in build_company_overviews(db, org_id, list(missing_versions)).items():
+            _overview_cache.put((org_id, company_id), missing_versions[company_id], overview)
+            overviews[company_id] = overview
+    return overviews
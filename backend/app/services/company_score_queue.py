@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Iterable
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.base import utcnow
+from app.db.session import SessionLocal
+from app.models.company_score_queue import CompanyScoreQueueEntry
+from app.services.company_scoring import recalculate_company_score, recalculate_company_scores_bulk
+
+logger = logging.getLogger("econtrole.company_score_queue")
+
+
+def enqueue_company_scores(db: Session, org_id: str, company_ids: Iterable[str | None]) -> int:
+    """
+    Marca empresas para recalculo do score na transacao do chamador (nao faz commit).
+    Marcar de novo uma empresa pendente nao cria outra entrada: so avanca
+    ``last_enqueued_at``, e o consumidor recalcula uma vez por janela.
+    """
+    ids = sorted({str(company_id) for company_id in company_ids if company_id})
+    if not ids:
+        return 0
+    now = utcnow()
+    rows = [
+        {"id": str(uuid.uuid4()), "org_id": org_id, "company_id": company_id, "enqueued_at": now, "last_enqueued_at": now}
+        for company_id in ids
+    ]
+    dialect = db.get_bind().dialect.name
+    if dialect in {"postgresql", "postgres"}:
+        stmt = pg_insert(CompanyScoreQueueEntry).values(rows)
+        db.execute(
+            stmt.on_conflict_do_update(
+                constraint="uq_company_score_queue_org_company", set_={"last_enqueued_at": now}
+            )
+        )
+    elif dialect == "sqlite":
+        stmt = sqlite_insert(CompanyScoreQueueEntry).values(rows)
+        db.execute(
+            stmt.on_conflict_do_update(index_elements=["org_id", "company_id"], set_={"last_enqueued_at": now})
+        )
+    else:
+        for row in rows:
+            result = db.execute(
+                update(CompanyScoreQueueEntry)
+                .where(
+                    CompanyScoreQueueEntry.org_id == org_id,
+                    CompanyScoreQueueEntry.company_id == row["company_id"],
+                )
+                .values(last_enqueued_at=now)
+            )
+            if not result.rowcount:
+                db.execute(insert(CompanyScoreQueueEntry).values(**row))
+    return len(ids)
+
+
+def _recalculate_one_by_one(db: Session, org_id: str, company_ids: list[str], stats: dict[str, int]) -> None:
+    for company_id in company_ids:
+        try:
+            with db.begin_nested():
+                result = recalculate_company_score(db, org_id, company_id)
+            if result.get("updated"):
+                stats["recalculated"] += 1
+        except Exception:
+            # Falha persistente nao deve travar a fila: registra e descarta a entrada.
+            stats["failed"] += 1
+            logger.exception("Falha ao recalcular score org_id=%s company_id=%s", org_id, company_id)
+
+
+def drain_company_score_queue(
+    db: Session,
+    *,
+    batch_size: int | None = None,
+    debounce_seconds: float | None = None,
+    now: datetime | None = None,
+) -> dict[str, int]:
+    """
+    Recalcula um lote de empresas cuja primeira marcacao passou da janela de coalescencia
+    e faz commit. Entradas remarcadas durante o recalculo continuam na fila (com a janela
+    reiniciada) para pegar a escrita mais nova. ``debounce_seconds=0`` drena tudo.
+    O lote e recalculado por org com ``recalculate_company_scores_bulk``; so se ele falhar
+    cada empresa e refeita em savepoint proprio. No Postgres as entradas sao reservadas com
+    ``FOR UPDATE SKIP LOCKED``, entao varios processos da API podem consumir a fila juntos.
+    """
+    batch_size = batch_size or settings.SCORE_QUEUE_BATCH_SIZE
+    window = settings.SCORE_QUEUE_DEBOUNCE_SECONDS if debounce_seconds is None else debounce_seconds
+    cutoff = (now or utcnow()) - timedelta(seconds=max(float(window), 0.0))
+
+    entries = db.execute(
+        select(
+            CompanyScoreQueueEntry.id,
+            CompanyScoreQueueEntry.org_id,
+            CompanyScoreQueueEntry.company_id,
+            CompanyScoreQueueEntry.last_enqueued_at,
+        )
+        .where(CompanyScoreQueueEntry.enqueued_at <= cutoff)
+        .order_by(CompanyScoreQueueEntry.enqueued_at.asc(), CompanyScoreQueueEntry.id.asc())
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+
+    stats = {"processed": 0, "recalculated": 0, "failed": 0, "requeued": 0}
+    by_org: dict[str, list[str]] = {}
+    for _entry_id, org_id, company_id, _last_enqueued_at in entries:
+        by_org.setdefault(org_id, []).append(company_id)
+    for org_id, company_ids in by_org.items():
+        stats["processed"] += len(company_ids)
+        try:
+            with db.begin_nested():
+                result = recalculate_company_scores_bulk(db, org_id, company_ids)
+            stats["recalculated"] += result["updated"]
+        except Exception:
+            logger.exception("Falha no recalculo em lote org_id=%s; refazendo empresa a empresa", org_id)
+            _recalculate_one_by_one(db, org_id, company_ids, stats)
+
+    for entry_id, _org_id, _company_id, last_enqueued_at in entries:
+        removed = db.execute(
+            delete(CompanyScoreQueueEntry)
+            .where(
+                CompanyScoreQueueEntry.id == entry_id,
+                CompanyScoreQueueEntry.last_enqueued_at == last_enqueued_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if not removed.rowcount:
+            stats["requeued"] += 1
+            db.execute(
+                update(CompanyScoreQueueEntry)
+                .where(CompanyScoreQueueEntry.id == entry_id)
+                .values(enqueued_at=CompanyScoreQueueEntry.last_enqueued_at)
+                .execution_options(synchronize_session=False)
+            )
+    db.commit()
+    return stats
+
+
+def drain_all_company_scores(db: Session, *, debounce_seconds: float | None = None) -> dict[str, int]:
+    """Drena lotes ate nao sobrar entrada vencida."""
+    batch_size = settings.SCORE_QUEUE_BATCH_SIZE
+    total = {"processed": 0, "recalculated": 0, "failed": 0, "requeued": 0}
+    while True:
+        stats = drain_company_score_queue(db, batch_size=batch_size, debounce_seconds=debounce_seconds)
+        for key, value in stats.items():
+            total[key] += value
+        if stats["processed"] < batch_size or stats["processed"] == stats["requeued"]:
+            return total
+
+
+class CompanyScoreQueueWorker:
+    """Consumidor em thread: a cada janela drena a fila de scores numa sessao propria."""
+
+    def __init__(self, interval_seconds: float | None = None) -> None:
+        self._interval = interval_seconds
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def interval(self) -> float:
+        value = settings.SCORE_QUEUE_DEBOUNCE_SECONDS if self._interval is None else self._interval
+        return max(float(value), 0.5)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="company-score-queue", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_once(self) -> dict[str, Any]:
+        db = SessionLocal()
+        try:
+            return drain_all_company_scores(db)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                stats = self.run_once()
+                if stats["processed"]:
+                    logger.info(
+                        "Fila de score drenada processados=%s recalculados=%s falhas=%s reenfileirados=%s",
+                        stats["processed"],
+                        stats["recalculated"],
+                        stats["failed"],
+                        stats["requeued"],
+                    )
+            except Exception:
+                logger.exception("Falha ao drenar a fila de score")
+
+
+company_score_queue_worker = CompanyScoreQueueWorker()
@@ -1,28 +1,26 @@
 from __future__ import annotations
 
 from datetime import date, datetime, timezone
-from typing import Any
+from typing import Any, Iterable
 
 from sqlalchemy.orm import Session
 
 from app.core.cnae import extract_cnae_codes
-from app.models.cnae_risk import CNAERisk
 from app.models.company import Company
 from app.models.company_licence import CompanyLicence
 from app.models.company_profile import CompanyProfile
 from app.models.company_process import CompanyProcess
-from app.services.licence_regulatory_rules import evaluate_definitive_alvara_regulatory_status
+from app.services.cnae_risk_catalog import CNAERiskEntry, get_cnae_risk_catalog
+from app.services.licence_expiries import licence_expiry_entries
+from app.services.licence_regulatory_rules import (
+    _has_definitive_alvara,
+    evaluate_definitive_alvara_regulatory_status,
+)
 
 
 RISK_PRIORITY = {"LOW": 1, "MEDIUM": 2, "HIGH": 3}
 RISK_BY_PRIORITY = {value: key for key, value in RISK_PRIORITY.items()}
-LICENCE_VALID_UNTIL_FIELDS = (
-    "alvara_vig_sanitaria_valid_until",
-    "cercon_valid_until",
-    "alvara_funcionamento_valid_until",
-    "licenca_ambiental_valid_until",
-    "certidao_uso_solo_valid_until",
-)
+BULK_IN_CHUNK = 500
 
 
 def _extract_cnae_codes(profile: CompanyProfile | None) -> list[str]:
@@ -46,23 +44,82 @@ def _expiry_weight(next_expiry: date | None, today: date) -> int:
     return 0
 
 
+def _nearest_expiry(entries: Iterable[Any], *, ignore_alvara_funcionamento_periodic: bool = False) -> date | None:
+    """Menor validade entre entradas com ``licence_type``/``valid_until`` (licenca ou calendario)."""
+    valid_dates = [
+        entry.valid_until
+        for entry in entries
+        if entry.valid_until is not None
+        and not (ignore_alvara_funcionamento_periodic and entry.licence_type == "alvara_funcionamento")
+    ]
+    return min(valid_dates, default=None)
+
+
 def _pick_nearest_licence_expiry(
     licence: CompanyLicence | None,
     *,
     ignore_alvara_funcionamento_periodic: bool = False,
 ) -> date | None:
-    if not licence:
-        return None
-    valid_dates: list[date] = []
-    for field in LICENCE_VALID_UNTIL_FIELDS:
-        if ignore_alvara_funcionamento_periodic and field == "alvara_funcionamento_valid_until":
-            continue
-        value = getattr(licence, field, None)
-        if isinstance(value, date):
-            valid_dates.append(value)
-    if not valid_dates:
-        return None
-    return min(valid_dates)
+    return _nearest_expiry(
+        licence_expiry_entries(licence),
+        ignore_alvara_funcionamento_periodic=ignore_alvara_funcionamento_periodic,
+    )
+
+
+def compute_company_score(
+    *,
+    cnae_codes: list[str],
+    cnae_rows: list[CNAERiskEntry],
+    expiry_entries: Iterable[Any],
+    regulatory_status: dict[str, Any],
+    today: date,
+) -> dict[str, Any]:
+    """
+    Calculo puro do score a partir das entradas ja carregadas; usado pelo recalculo
+    persistido e pela simulacao em memoria, para que os dois nunca divirjam.
+    """
+    highest_risk_priority = max(
+        (RISK_PRIORITY.get(str(row.risk_tier or "").strip().upper(), 0) for row in cnae_rows),
+        default=0,
+    )
+    risco_consolidado = RISK_BY_PRIORITY.get(highest_risk_priority)
+
+    maior_base_weight = max((int(row.base_weight or 0) for row in cnae_rows), default=0)
+
+    definitive_invalidated = bool(regulatory_status.get("definitive_alvara_invalidated"))
+    has_definitive_alvara = bool(regulatory_status.get("has_definitive_alvara"))
+
+    nearest_expiry = _nearest_expiry(
+        expiry_entries,
+        ignore_alvara_funcionamento_periodic=has_definitive_alvara,
+    )
+    peso_vencimento = _expiry_weight(nearest_expiry, today)
+    peso_regulatorio = 50 if definitive_invalidated else 0
+
+    score_urgencia = maior_base_weight + max(peso_vencimento, peso_regulatorio)
+
+    if not cnae_codes:
+        score_status = "NO_CNAE"
+    elif not cnae_rows:
+        score_status = "UNMAPPED_CNAE"
+    elif definitive_invalidated:
+        score_status = "DEFINITIVE_INVALIDATED"
+    elif has_definitive_alvara:
+        score_status = "OK_DEFINITIVE"
+    elif nearest_expiry is None:
+        score_status = "NO_LICENCE"
+    else:
+        score_status = "OK"
+
+    return {
+        "risco_consolidado": risco_consolidado,
+        "score_urgencia": score_urgencia,
+        "score_status": score_status,
+        "matched_cnaes": len(cnae_rows),
+        "nearest_licence_expiry": nearest_expiry,
+        "peso_vencimento": peso_vencimento,
+        "peso_regulatorio": peso_regulatorio,
+    }
 
 
 def recalculate_company_score(db: Session, org_id: str, company_id: str) -> dict[str, Any]:
@@ -81,21 +138,9 @@ def recalculate_company_score(db: Session, org_id: str, company_id: str) -> dict
         db.flush()
 
     cnae_codes = _extract_cnae_codes(profile)
-    cnae_rows: list[CNAERisk] = []
+    cnae_rows: list[CNAERiskEntry] = []
     if cnae_codes:
-        cnae_rows = (
-            db.query(CNAERisk)
-            .filter(CNAERisk.is_active.is_(True), CNAERisk.cnae_code.in_(cnae_codes))
-            .all()
-        )
-
-    highest_risk_priority = max(
-        (RISK_PRIORITY.get(str(row.risk_tier or "").strip().upper(), 0) for row in cnae_rows),
-        default=0,
-    )
-    risco_consolidado = RISK_BY_PRIORITY.get(highest_risk_priority)
-
-    maior_base_weight = max((int(row.base_weight or 0) for row in cnae_rows), default=0)
+        cnae_rows = get_cnae_risk_catalog(db).lookup(cnae_codes)
 
     licence = (
         db.query(CompanyLicence)
@@ -108,30 +153,18 @@ def recalculate_company_score(db: Session, org_id: str, company_id: str) -> dict
         .all()
     )
     regulatory_status = evaluate_definitive_alvara_regulatory_status(licence=licence, processes=processes)
-    definitive_invalidated = bool(regulatory_status["definitive_alvara_invalidated"])
-    has_definitive_alvara = bool(regulatory_status["has_definitive_alvara"])
 
-    nearest_expiry = _pick_nearest_licence_expiry(
-        licence,
-        ignore_alvara_funcionamento_periodic=has_definitive_alvara,
+    score = compute_company_score(
+        cnae_codes=cnae_codes,
+        cnae_rows=cnae_rows,
+        expiry_entries=licence_expiry_entries(licence),
+        regulatory_status=regulatory_status,
+        today=date.today(),
     )
-    peso_vencimento = _expiry_weight(nearest_expiry, date.today())
-    peso_regulatorio = 50 if definitive_invalidated else 0
-
-    score_urgencia = maior_base_weight + max(peso_vencimento, peso_regulatorio)
-
-    if not cnae_codes:
-        score_status = "NO_CNAE"
-    elif not cnae_rows:
-        score_status = "UNMAPPED_CNAE"
-    elif definitive_invalidated:
-        score_status = "DEFINITIVE_INVALIDATED"
-    elif has_definitive_alvara:
-        score_status = "OK_DEFINITIVE"
-    elif nearest_expiry is None:
-        score_status = "NO_LICENCE"
-    else:
-        score_status = "OK"
+    risco_consolidado = score["risco_consolidado"]
+    score_urgencia = score["score_urgencia"]
+    score_status = score["score_status"]
+    nearest_expiry = score["nearest_licence_expiry"]
 
     changed = (
         profile.risco_consolidado != risco_consolidado
@@ -151,9 +184,88 @@ def recalculate_company_score(db: Session, org_id: str, company_id: str) -> dict
         "score_urgencia": score_urgencia,
         "score_status": score_status,
         "cnae_codes": cnae_codes,
-        "matched_cnaes": len(cnae_rows),
+        "matched_cnaes": score["matched_cnaes"],
         "nearest_licence_expiry": nearest_expiry.isoformat() if nearest_expiry else None,
-        "peso_vencimento": peso_vencimento,
-        "peso_regulatorio": peso_regulatorio,
+        "peso_vencimento": score["peso_vencimento"],
+        "peso_regulatorio": score["peso_regulatorio"],
         "regulatory_status": regulatory_status,
     }
+
+
+def _chunks(values: list[str]) -> Iterable[list[str]]:
+    for start in range(0, len(values), BULK_IN_CHUNK):
+        yield values[start : start + BULK_IN_CHUNK]
+
+
+def recalculate_company_scores_bulk(db: Session, org_id: str, company_ids: Iterable[str]) -> dict[str, int]:
+    """
+    Mesmo resultado de ``recalculate_company_score`` para um lote da org, com empresas,
+    perfis, licencas e processos (so de quem tem alvara definitivo) lidos em uma consulta
+    por tipo e o catalogo CNAE da memoria. Nao faz commit.
+    """
+    wanted = sorted({str(company_id) for company_id in company_ids if company_id})
+    stats = {"processed": 0, "updated": 0, "changed": 0, "missing": 0}
+    if not wanted:
+        return stats
+
+    existing: set[str] = set()
+    profiles: dict[str, CompanyProfile] = {}
+    licences: dict[str, CompanyLicence] = {}
+    for chunk in _chunks(wanted):
+        existing.update(
+            str(company_id)
+            for (company_id,) in db.query(Company.id).filter(Company.org_id == org_id, Company.id.in_(chunk))
+        )
+        for profile in db.query(CompanyProfile).filter(
+            CompanyProfile.org_id == org_id, CompanyProfile.company_id.in_(chunk)
+        ):
+            profiles.setdefault(profile.company_id, profile)
+        for licence in db.query(CompanyLicence).filter(
+            CompanyLicence.org_id == org_id, CompanyLicence.company_id.in_(chunk)
+        ):
+            licences.setdefault(licence.company_id, licence)
+
+    processes: dict[str, list[CompanyProcess]] = {}
+    definitive_ids = sorted(company_id for company_id, licence in licences.items() if _has_definitive_alvara(licence))
+    for chunk in _chunks(definitive_ids):
+        for process in db.query(CompanyProcess).filter(
+            CompanyProcess.org_id == org_id, CompanyProcess.company_id.in_(chunk)
+        ):
+            processes.setdefault(process.company_id, []).append(process)
+
+    catalog = get_cnae_risk_catalog(db)
+    today = date.today()
+    now = datetime.now(timezone.utc)
+    for company_id in wanted:
+        stats["processed"] += 1
+        if company_id not in existing:
+            stats["missing"] += 1
+            continue
+        profile = profiles.get(company_id)
+        if profile is None:
+            profile = CompanyProfile(org_id=org_id, company_id=company_id)
+            db.add(profile)
+        cnae_codes = _extract_cnae_codes(profile)
+        licence = licences.get(company_id)
+        score = compute_company_score(
+            cnae_codes=cnae_codes,
+            cnae_rows=catalog.lookup(cnae_codes) if cnae_codes else [],
+            expiry_entries=licence_expiry_entries(licence),
+            regulatory_status=evaluate_definitive_alvara_regulatory_status(
+                licence=licence, processes=processes.get(company_id, [])
+            ),
+            today=today,
+        )
+        if (
+            profile.risco_consolidado != score["risco_consolidado"]
+            or profile.score_urgencia != score["score_urgencia"]
+            or profile.score_status != score["score_status"]
+        ):
+            stats["changed"] += 1
+        profile.risco_consolidado = score["risco_consolidado"]
+        profile.score_urgencia = score["score_urgencia"]
+        profile.score_status = score["score_status"]
+        profile.score_updated_at = now
+        stats["updated"] += 1
+    db.flush()
+    return stats
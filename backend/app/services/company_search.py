@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+
+from sqlalchemy import case, func, literal, or_, select, text
+from sqlalchemy.orm import Session
+
+from app.core.normalize import build_company_search_text, normalize_search_text
+from app.db.listeners import FlushChanges
+from app.models.company import Company
+
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 50
+# Fracao minima dos trigramas da busca presentes no texto (equivale ao
+# pg_trgm.word_similarity_threshold padrao do Postgres).
+SEARCH_MIN_SCORE = 0.5
+
+_DOCUMENT_FRAGMENT = re.compile(r"^[\d\s./-]+$")
+_PENDING_KEY = "pending_company_search_updates"
+
+
+def normalize_search_query(value: str | None) -> str:
+    raw = str(value or "").strip()
+    if raw and _DOCUMENT_FRAGMENT.match(raw):
+        # "12.345.678/0001" vira "123456780001" para casar com o CNPJ sem mascara.
+        return re.sub(r"\D", "", raw)
+    return normalize_search_text(raw)
+
+
+def trigrams(value: str) -> set[str]:
+    """Trigramas no formato do pg_trgm: cada palavra com dois espacos antes e um depois."""
+    grams: set[str] = set()
+    for word in value.split():
+        padded = f"  {word} "
+        grams.update(padded[index : index + 3] for index in range(len(padded) - 2))
+    return grams
+
+
+@dataclass(frozen=True)
+class CompanySearchHit:
+    company_id: str
+    score: float
+
+
+@dataclass
+class _IndexedCompany:
+    text: str
+    grams: frozenset[str]
+    is_active: bool
+
+
+class CompanyNgramIndex:
+    """Indice invertido de trigramas de uma org, mantido em memoria (fallback sem pg_trgm)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._docs: dict[str, _IndexedCompany] = {}
+        self._postings: dict[str, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def upsert(self, company_id: str, search_text: str | None, is_active: bool) -> None:
+        with self._lock:
+            self._remove_locked(company_id)
+            value = search_text or ""
+            grams = frozenset(trigrams(value))
+            self._docs[company_id] = _IndexedCompany(value, grams, bool(is_active))
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(company_id)
+
+    def remove(self, company_id: str) -> None:
+        with self._lock:
+            self._remove_locked(company_id)
+
+    def _remove_locked(self, company_id: str) -> None:
+        previous = self._docs.pop(company_id, None)
+        if previous is None:
+            return
+        for gram in previous.grams:
+            postings = self._postings.get(gram)
+            if postings is None:
+                continue
+            postings.discard(company_id)
+            if not postings:
+                del self._postings[gram]
+
+    def search(self, query: str, *, limit: int, include_inactive: bool = False) -> list[CompanySearchHit]:
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+        total = len(query_grams)
+        # Quem contem o termo tem ao menos os trigramas internos de cada palavra.
+        interior = sum(max(len(word) - 2, 0) for word in query.split())
+        min_shared = max(1, min(math.ceil(total * SEARCH_MIN_SCORE), interior or total))
+        with self._lock:
+            overlap: Counter[str] = Counter()
+            for gram in query_grams:
+                overlap.update(self._postings.get(gram, ()))
+            ranked = []
+            for company_id, shared in overlap.items():
+                if shared < min_shared:
+                    continue
+                doc = self._docs[company_id]
+                if not include_inactive and not doc.is_active:
+                    continue
+                score = shared / total
+                contains = query in doc.text
+                if score < SEARCH_MIN_SCORE and not contains:
+                    continue
+                ranked.append((not contains, -score, doc.text, company_id))
+        return [
+            CompanySearchHit(company_id, round(-neg_score, 4))
+            for _, neg_score, _, company_id in heapq.nsmallest(limit, ranked)
+        ]
+
+
+_indexes: dict[str, CompanyNgramIndex] = {}
+_indexes_lock = threading.Lock()
+_pg_trgm_by_engine: dict[str, bool] = {}
+
+
+def reset_company_search_indexes() -> None:
+    with _indexes_lock:
+        _indexes.clear()
+
+
+def _org_index(db: Session, org_id: str) -> CompanyNgramIndex:
+    with _indexes_lock:
+        index = _indexes.get(org_id)
+    if index is not None:
+        return index
+    index = CompanyNgramIndex()
+    rows = db.execute(
+        select(Company.id, Company.search_text, Company.is_active).where(Company.org_id == org_id)
+    ).all()
+    for company_id, search_text, is_active in rows:
+        index.upsert(company_id, search_text, is_active)
+    with _indexes_lock:
+        # Outra requisicao pode ter carregado antes; fica a primeira.
+        return _indexes.setdefault(org_id, index)
+
+
+def _pg_trgm_available(db: Session) -> bool:
+    bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        return False
+    key = bind.url.render_as_string(hide_password=True)
+    available = _pg_trgm_by_engine.get(key)
+    if available is None:
+        available = bool(db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first())
+        _pg_trgm_by_engine[key] = available
+    return available
+
+
+def _search_pg_trgm(
+    db: Session, org_id: str, query: str, *, limit: int, include_inactive: bool
+) -> list[CompanySearchHit]:
+    pattern = f"%{query}%"
+    score = func.word_similarity(query, Company.search_text)
+    contains = Company.search_text.ilike(pattern)
+    stmt = (
+        select(Company.id, score.label("score"))
+        .where(
+            Company.org_id == org_id,
+            # "<%" usa o indice GIN de trigramas (word_similarity acima do limiar).
+            or_(contains, literal(query).op("<%")(Company.search_text)),
+        )
+        .order_by(case((contains, 0), else_=1), score.desc(), Company.razao_social)
+        .limit(limit)
+    )
+    if not include_inactive:
+        stmt = stmt.where(Company.is_active.is_(True))
+    return [CompanySearchHit(company_id, round(float(value or 0), 4)) for company_id, value in db.execute(stmt)]
+
+
+def search_companies(
+    db: Session,
+    org_id: str,
+    query: str,
+    *,
+    limit: int = SEARCH_DEFAULT_LIMIT,
+    include_inactive: bool = False,
+) -> list[CompanySearchHit]:
+    """
+    Busca aproximada por razao social, nome fantasia, pasta e fragmentos de CNPJ/CPF,
+    ignorando acentos e pontuacao. Ordena quem contem o termo primeiro e depois pela
+    similaridade de trigramas. No Postgres usa o indice GIN do pg_trgm; nos demais bancos
+    usa um indice de trigramas em memoria por org, carregado na primeira busca e
+    atualizado a cada commit que altera empresas.
+    """
+    normalized = normalize_search_query(query)
+    if not normalized:
+        return []
+    limit = max(1, min(int(limit), SEARCH_MAX_LIMIT))
+    if _pg_trgm_available(db):
+        return _search_pg_trgm(db, org_id, normalized, limit=limit, include_inactive=include_inactive)
+    return _org_index(db, org_id).search(normalized, limit=limit, include_inactive=include_inactive)
+
+
+def refresh_search_text(_mapper, _connection, company: Company) -> None:
+    company.search_text = build_company_search_text(
+        company.razao_social, company.nome_fantasia, company.fs_dirname, company.cnpj, company.cpf
+    )
+
+
+def collect_search_updates(session: Session, changes: FlushChanges) -> None:
+    companies = changes.new_of(Company) + changes.dirty_of(Company)
+    deleted = changes.deleted_of(Company)
+    if not companies and not deleted:
+        return
+    pending = session.info.setdefault(_PENDING_KEY, [])
+    for obj in companies:
+        pending.append((obj.org_id, obj.id, obj.search_text, obj.is_active))
+    for obj in deleted:
+        pending.append((obj.org_id, obj.id, None, None))
+
+
+def apply_search_updates(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    with _indexes_lock:
+        loaded = dict(_indexes)
+    for org_id, company_id, search_text, is_active in pending:
+        index = loaded.get(org_id)
+        if index is None:
+            # Org ainda nao carregada: a primeira busca le o estado atual do banco.
+            continue
+        if is_active is None:
+            index.remove(company_id)
+        else:
+            index.upsert(company_id, search_text, is_active)
+
+
+def discard_search_updates(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -7,7 +7,7 @@ from sqlalchemy.orm import Session
 
 from app.models.company import Company
 from app.schemas.copilot import CopilotCategory
-from app.services.company_overview import build_company_overview
+from app.services.company_overview import get_company_overview_cached
 from app.services.copilot_document_analysis import analyze_document_payload
 from app.services.copilot_domain_qa import answer_domain_question, needs_company_for_question
 from app.services.copilot_provider import CopilotProviderClient
@@ -191,7 +191,7 @@ def respond_to_copilot(
     if category in COMPANY_REQUIRED_CATEGORIES and company is None:
         raise ValueError("COMPANY_REQUIRED")
 
-    overview = build_company_overview(db, org_id, company.id) if company else None
+    overview = get_company_overview_cached(db, org_id, company.id)[0] if company else None
     provider = CopilotProviderClient()
     context = _company_context(company, overview)
     warnings: list[str] = []
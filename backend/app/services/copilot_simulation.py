@@ -6,9 +6,9 @@ from typing import Any
 from sqlalchemy.orm import Session
 
 from app.core.cnae import extract_cnae_codes
-from app.models.cnae_risk import CNAERisk
 from app.models.company_licence import CompanyLicence
 from app.models.company_profile import CompanyProfile
+from app.services.cnae_risk_catalog import get_cnae_risk_catalog
 from app.services.company_scoring import _expiry_weight
 
 RISK_PRIORITY = {"LOW": 1, "MEDIUM": 2, "HIGH": 3}
@@ -71,13 +71,7 @@ def simulate_company_risk_impact(
         getattr(profile, "cnaes_principal", None),
         getattr(profile, "cnaes_secundarios", None),
     )
-    cnae_rows = (
-        db.query(CNAERisk)
-        .filter(CNAERisk.is_active.is_(True), CNAERisk.cnae_code.in_(cnae_codes))
-        .all()
-        if cnae_codes
-        else []
-    )
+    cnae_rows = get_cnae_risk_catalog(db).lookup(cnae_codes) if cnae_codes else []
     base_weight = max((int(row.base_weight or 0) for row in cnae_rows), default=0)
     risk_before = RISK_BY_PRIORITY.get(
         max((RISK_PRIORITY.get(str(row.risk_tier or "").upper(), 0) for row in cnae_rows), default=0)
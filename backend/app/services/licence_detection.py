@@ -2,7 +2,9 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import date, datetime
+from functools import lru_cache
 import re
+from typing import Iterable
 import unicodedata
 
 
@@ -81,71 +83,148 @@ KIND_SPECS: dict[str, _KindSpec] = {
 }
 
 
+@dataclass(frozen=True)
+class _KindRule:
+    kind: str
+    # Cada grupo exige ao menos um dos tokens; todos os grupos precisam casar.
+    required: tuple[frozenset[str], ...]
+    excluded: frozenset[str]
+    score: int
+    evidence: str
+    bonus_tokens: frozenset[str]
+    definitive_bonus: bool = False
+
+
+def _rule(
+    kind: str,
+    required: tuple[tuple[str, ...], ...],
+    score: int,
+    evidence: str,
+    *,
+    excluded: tuple[str, ...] = (),
+) -> _KindRule:
+    bonus: set[str] = set()
+    if kind.startswith("ALVARA_"):
+        bonus.add("alvara")
+    if kind == "LICENCA_AMBIENTAL":
+        bonus.add("licenca")
+    if kind.startswith("DISPENSA_"):
+        bonus.add("dispensa")
+    if kind.startswith("ALVARA_FUNCIONAMENTO_"):
+        bonus.add("funcionamento")
+    if kind == "ALVARA_VIG_SANITARIA":
+        bonus.add("vig")
+    return _KindRule(
+        kind=kind,
+        required=tuple(frozenset(group) for group in required),
+        excluded=frozenset(excluded),
+        score=score,
+        evidence=evidence,
+        bonus_tokens=frozenset(bonus),
+        definitive_bonus=kind.endswith("DEFINITIVO"),
+    )
+
+
+KIND_RULES: tuple[_KindRule, ...] = (
+    _rule("ALVARA_BOMBEIROS", (("bombeiros", "cercon"),), 3, "keyword: bombeiros/cercon"),
+    _rule("ALVARA_VIG_SANITARIA", (("sanitaria",),), 3, "keyword: alvara vig sanitaria", excluded=("dispensa",)),
+    _rule("DISPENSA_SANITARIA", (("dispensa",), ("sanitaria",)), 4, "keyword: dispensa sanitaria"),
+    _rule(
+        "ALVARA_FUNCIONAMENTO_DEFINITIVO",
+        (("funcionamento",), ("definitivo",)),
+        4,
+        "keyword: funcionamento definitivo",
+    ),
+    _rule(
+        "ALVARA_FUNCIONAMENTO_CONDICIONADO",
+        (("funcionamento",), ("condicionado",)),
+        4,
+        "keyword: funcionamento condicionado",
+    ),
+    _rule(
+        "ALVARA_FUNCIONAMENTO_PROVISORIO",
+        (("funcionamento",), ("provisorio", "provisoria")),
+        4,
+        "keyword: funcionamento provisorio",
+    ),
+    _rule("USO_DO_SOLO", (("uso",), ("solo",)), 4, "keyword: uso do solo"),
+    _rule("LICENCA_AMBIENTAL", (("ambiental",),), 3, "keyword: licenca ambiental", excluded=("dispensa",)),
+    _rule("DISPENSA_AMBIENTAL", (("dispensa",), ("ambiental",)), 4, "keyword: dispensa ambiental"),
+)
+_RULES_BY_KIND: dict[str, _KindRule] = {rule.kind: rule for rule in KIND_RULES}
+
+
+def _index_rules_by_token(rules: tuple[_KindRule, ...]) -> dict[str, tuple[int, ...]]:
+    # Indice token -> regras: so pontua tipos que compartilham algum token com o nome do arquivo.
+    index: dict[str, tuple[int, ...]] = {}
+    for position, rule in enumerate(rules):
+        for token in set().union(*rule.required, rule.bonus_tokens):
+            index[token] = index.get(token, ()) + (position,)
+    return index
+
+
+_RULES_BY_TOKEN = _index_rules_by_token(KIND_RULES)
+_DEFINITIVE_RULES: tuple[int, ...] = tuple(
+    position for position, rule in enumerate(KIND_RULES) if rule.definitive_bonus
+)
+
+_SEPARATORS = str.maketrans({"-": " ", "_": " ", "/": " ", ".": " "})
+_WHITESPACE_RE = re.compile(r"\s+")
+_VAL_RE = re.compile(r"\bval\b")
+_EXTENSION_RE = re.compile(r"\.([A-Za-z0-9]+)$")
+PARSE_MEMO_SIZE = 8192
+
+
+class _AccentFoldTable(dict):
+    """Tabela para str.translate que remove diacriticos, preenchida sob demanda por caractere."""
+
+    def __missing__(self, codepoint: int) -> str:
+        decomposed = unicodedata.normalize("NFD", chr(codepoint))
+        folded = "".join(ch for ch in decomposed if unicodedata.category(ch) != "Mn")
+        self[codepoint] = folded
+        return folded
+
+
+_ACCENT_FOLD = _AccentFoldTable()
+
+
 def _strip_accents(value: str) -> str:
-    normalized = unicodedata.normalize("NFD", value)
-    return "".join(ch for ch in normalized if unicodedata.category(ch) != "Mn")
+    if value.isascii():
+        return value
+    return value.translate(_ACCENT_FOLD)
 
 
 def _normalize(value: str) -> str:
-    text = _strip_accents(str(value or "")).lower()
-    text = text.replace("-", " ").replace("_", " ").replace("/", " ").replace(".", " ")
-    return re.sub(r"\s+", " ", text).strip()
+    text = _strip_accents(str(value or "")).lower().translate(_SEPARATORS)
+    return _WHITESPACE_RE.sub(" ", text).strip()
 
 
-def _score_kind(tokens: set[str], normalized: str, kind: str) -> tuple[int, list[str]]:
+def _score_rule(rule: _KindRule, tokens: set[str], normalized: str) -> tuple[int, list[str]]:
     score = 0
     evidence: list[str] = []
-
-    def has(*items: str) -> bool:
-        return all(item in tokens for item in items)
-
-    if kind == "ALVARA_BOMBEIROS" and (has("bombeiros") or "cercon" in tokens):
-        score += 3
-        evidence.append("keyword: bombeiros/cercon")
-    if kind == "ALVARA_VIG_SANITARIA" and "sanitaria" in tokens and "dispensa" not in tokens:
-        score += 3
-        evidence.append("keyword: alvara vig sanitaria")
-    if kind == "DISPENSA_SANITARIA" and "dispensa" in tokens and "sanitaria" in tokens:
-        score += 4
-        evidence.append("keyword: dispensa sanitaria")
-    if kind == "ALVARA_FUNCIONAMENTO_DEFINITIVO" and "funcionamento" in tokens and "definitivo" in tokens:
-        score += 4
-        evidence.append("keyword: funcionamento definitivo")
-    if kind == "ALVARA_FUNCIONAMENTO_CONDICIONADO" and "funcionamento" in tokens and "condicionado" in tokens:
-        score += 4
-        evidence.append("keyword: funcionamento condicionado")
-    if kind == "ALVARA_FUNCIONAMENTO_PROVISORIO" and "funcionamento" in tokens and (
-        "provisorio" in tokens or "provisoria" in tokens
-    ):
-        score += 4
-        evidence.append("keyword: funcionamento provisorio")
-    if kind == "USO_DO_SOLO" and "uso" in tokens and "solo" in tokens:
-        score += 4
-        evidence.append("keyword: uso do solo")
-    if kind == "LICENCA_AMBIENTAL" and "ambiental" in tokens and "dispensa" not in tokens:
-        score += 3
-        evidence.append("keyword: licenca ambiental")
-    if kind == "DISPENSA_AMBIENTAL" and "dispensa" in tokens and "ambiental" in tokens:
-        score += 4
-        evidence.append("keyword: dispensa ambiental")
-
-    if "alvara" in tokens and kind.startswith("ALVARA_"):
-        score += 1
-    if "licenca" in tokens and kind == "LICENCA_AMBIENTAL":
-        score += 1
-    if "dispensa" in tokens and kind.startswith("DISPENSA_"):
-        score += 1
-    if "funcionamento" in tokens and kind.startswith("ALVARA_FUNCIONAMENTO_"):
-        score += 1
-    if "vig" in tokens and kind == "ALVARA_VIG_SANITARIA":
-        score += 1
-
-    if "definitivo" in normalized and kind.endswith("DEFINITIVO"):
+    if all(not group.isdisjoint(tokens) for group in rule.required) and rule.excluded.isdisjoint(tokens):
+        score += rule.score
+        evidence.append(rule.evidence)
+    score += len(rule.bonus_tokens & tokens)
+    if rule.definitive_bonus and "definitivo" in normalized:
         score += 2
-
     return score, evidence
 
 
+def _score_kind(tokens: set[str], normalized: str, kind: str) -> tuple[int, list[str]]:
+    return _score_rule(_RULES_BY_KIND[kind], tokens, normalized)
+
+
+def _candidate_rules(tokens: set[str], normalized: str) -> list[int]:
+    candidates: set[int] = set()
+    for token in tokens:
+        candidates.update(_RULES_BY_TOKEN.get(token, ()))
+    if "definitivo" in normalized:
+        candidates.update(_DEFINITIVE_RULES)
+    # Ordem de KIND_RULES (= KIND_SPECS) preserva o desempate do ranking original.
+    return sorted(candidates)
+
+
 def _extract_dates(filename: str) -> list[tuple[date, int, int, str]]:
     found: list[tuple[date, int, int, str]] = []
     for match in DATE_RE.finditer(filename):
@@ -162,7 +241,7 @@ def _pick_expiry(filename: str, normalized: str, dates: list[tuple[date, int, in
     if not dates:
         return None, None
 
-    val_positions = [m.start() for m in re.finditer(r"\bval\b", normalized)]
+    val_positions = [m.start() for m in _VAL_RE.finditer(normalized)]
     if val_positions:
         best: tuple[int, date, str] | None = None
         for parsed, start, _end, br_date in dates:
@@ -179,13 +258,30 @@ def _pick_expiry(filename: str, normalized: str, dates: list[tuple[date, int, in
 
 
 def parse_filename_to_suggestion(filename: str) -> LicenceSuggestion:
+    """
+    Resultado memoizado por nome de arquivo (LRU). A sugestao devolvida e compartilhada
+    entre chamadas: trate-a como somente leitura.
+    """
+    return _parse_filename_cached(str(filename or ""))
+
+
+def parse_many(filenames: Iterable[str]) -> list[LicenceSuggestion]:
+    return [parse_filename_to_suggestion(filename) for filename in filenames]
+
+
+@lru_cache(maxsize=PARSE_MEMO_SIZE)
+def _parse_filename_cached(filename: str) -> LicenceSuggestion:
+    return _parse_filename(filename)
+
+
+def _parse_filename(filename: str) -> LicenceSuggestion:
     original = str(filename or "").strip()
     basename = original.split("\\")[-1].strip()
     if basename.lower().startswith("c:/fakepath/"):
         basename = basename[len("c:/fakepath/") :]
     if basename.lower().startswith("fakepath/"):
         basename = basename[len("fakepath/") :]
-    extension_match = re.search(r"\.([A-Za-z0-9]+)$", basename)
+    extension_match = _EXTENSION_RE.search(basename)
     extension = extension_match.group(1).lower() if extension_match else ""
     normalized = _normalize(basename)
     tokens = set(TOKEN_RE.findall(normalized))
@@ -202,10 +298,11 @@ def parse_filename_to_suggestion(filename: str) -> LicenceSuggestion:
         evidence.append(expiry_reason)
 
     ranked: list[tuple[int, str, list[str]]] = []
-    for kind in KIND_SPECS:
-        score, kind_evidence = _score_kind(tokens, normalized, kind)
+    for position in _candidate_rules(tokens, normalized):
+        rule = KIND_RULES[position]
+        score, kind_evidence = _score_rule(rule, tokens, normalized)
         if score > 0:
-            ranked.append((score, kind, kind_evidence))
+            ranked.append((score, rule.kind, kind_evidence))
     ranked.sort(key=lambda item: item[0], reverse=True)
 
     if not ranked:
@@ -236,34 +333,42 @@ def parse_filename_to_suggestion(filename: str) -> LicenceSuggestion:
         warnings.append("Ambiguous classification; please review manually")
 
     confidence = min(1.0, max(0.1, 0.25 + 0.12 * top_score - (0.1 if warnings else 0.0)))
-    suggestion = LicenceSuggestion(
+    suggested_expires_at = expiry if spec.supports_expiry else None
+    suggested_definitive = is_definitive and spec.supports_definitive
+    extension = extension or "pdf"
+    return LicenceSuggestion(
         original_filename=basename,
         suggested_group=spec.group,
         suggested_document_kind=spec.kind,
-        suggested_expires_at=expiry if spec.supports_expiry else None,
-        is_definitive=is_definitive and spec.supports_definitive,
+        suggested_expires_at=suggested_expires_at,
+        is_definitive=suggested_definitive,
         confidence=round(confidence, 2),
         evidence_snippets=evidence[:4],
-        canonical_filename=None,
+        canonical_filename=_canonical_filename(spec, suggested_definitive, suggested_expires_at, extension),
         warnings=warnings,
         mapped_field=spec.field,
-        extension=extension or "pdf",
+        extension=extension,
     )
-    canonical = build_canonical_filename(suggestion)
-    return LicenceSuggestion(**{**suggestion.__dict__, "canonical_filename": canonical})
+
+
+def _canonical_filename(spec: _KindSpec, is_definitive: bool, expires_at: date | None, ext: str) -> str | None:
+    if is_definitive and spec.supports_definitive:
+        return f"{spec.canonical_label} - Definitivo.{ext}"
+    if expires_at and spec.supports_expiry:
+        return f"{spec.canonical_label} - Val {expires_at.strftime('%d.%m.%Y')}.{ext}"
+    return None
 
 
 def build_canonical_filename(suggestion: LicenceSuggestion) -> str | None:
     kind = suggestion.suggested_document_kind
     if not kind or kind not in KIND_SPECS:
         return None
-    spec = KIND_SPECS[kind]
-    ext = suggestion.extension or "pdf"
-    if suggestion.is_definitive and spec.supports_definitive:
-        return f"{spec.canonical_label} - Definitivo.{ext}"
-    if suggestion.suggested_expires_at and spec.supports_expiry:
-        return f"{spec.canonical_label} - Val {suggestion.suggested_expires_at.strftime('%d.%m.%Y')}.{ext}"
-    return None
+    return _canonical_filename(
+        KIND_SPECS[kind],
+        suggestion.is_definitive,
+        suggestion.suggested_expires_at,
+        suggestion.extension or "pdf",
+    )
 
 
 def compare_suggestions_for_same_group(a: LicenceSuggestion, b: LicenceSuggestion) -> LicenceSuggestion:
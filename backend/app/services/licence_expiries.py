@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from app.core.normalize import parse_date_br
+from app.db.base import utcnow
+from app.models.company_licence import CompanyLicence
+from app.models.licence_expiry import LicenceExpiry
+
+# Tipos de licenca com vencimento: campo de status em company_licences e rotulo exibido.
+LICENCE_EXPIRY_FIELDS = (
+    ("alvara_vig_sanitaria", "Alvará Vigilância Sanitária"),
+    ("cercon", "Cercon"),
+    ("alvara_funcionamento", "Alvará Funcionamento"),
+    ("licenca_ambiental", "Licença Ambiental"),
+    ("certidao_uso_solo", "Certidão de Uso do Solo"),
+)
+LICENCE_EXPIRY_LABELS = dict(LICENCE_EXPIRY_FIELDS)
+_DEFINITIVE = "DEFINITIVO"
+
+
+@dataclass(frozen=True)
+class LicenceExpiryEntry:
+    licence_type: str
+    label: str
+    status: str | None
+    valid_until: date | None
+    source: str | None
+    is_definitive: bool
+
+
+def licence_expiry_entries(licence: Any) -> list[LicenceExpiryEntry]:
+    """
+    Vencimentos de uma licenca por tipo. A validade vem da coluna ``<tipo>_valid_until``
+    e, sem ela, de ``raw`` (``validade_<tipo>`` do ingest); ``source`` e o
+    ``source_kind_<tipo>`` gravado pelo watcher. Tipos sem status, validade nem origem ficam de fora.
+    """
+    if licence is None:
+        return []
+    raw = licence.raw if isinstance(licence.raw, dict) else {}
+    alvara_definitive = str(getattr(licence, "alvara_funcionamento_kind", "") or "").strip().upper() == _DEFINITIVE
+    entries: list[LicenceExpiryEntry] = []
+    for field, label in LICENCE_EXPIRY_FIELDS:
+        status = getattr(licence, field, None)
+        valid_until = getattr(licence, f"{field}_valid_until", None)
+        if not isinstance(valid_until, date):
+            valid_until = parse_date_br(raw.get(f"validade_{field}") or raw.get(f"{field}_validade"))
+        source = str(raw.get(f"source_kind_{field}") or "").strip().lower() or None
+        if status is None and valid_until is None and source is None:
+            continue
+        entries.append(
+            LicenceExpiryEntry(
+                licence_type=field,
+                label=label,
+                status=status,
+                valid_until=valid_until,
+                source=source,
+                is_definitive=source == "definitivo" or (field == "alvara_funcionamento" and alvara_definitive),
+            )
+        )
+    return entries
+
+
+def _expiry_rows(licence: Any) -> list[dict[str, Any]]:
+    now = utcnow()
+    return [
+        {
+            "org_id": licence.org_id,
+            "company_id": licence.company_id,
+            "licence_id": licence.id,
+            "licence_type": entry.licence_type,
+            "status": entry.status,
+            "valid_until": entry.valid_until,
+            "source": entry.source,
+            "is_definitive": entry.is_definitive,
+            "updated_at": now,
+        }
+        for entry in licence_expiry_entries(licence)
+    ]
+
+
+def sync_licence_expiries(executor, licence: Any) -> None:
+    """Regrava as linhas de ``licence_expiries`` de uma licenca (conexao ou sessao)."""
+    executor.execute(delete(LicenceExpiry).where(LicenceExpiry.licence_id == licence.id))
+    rows = _expiry_rows(licence)
+    if rows:
+        executor.execute(insert(LicenceExpiry), [{"id": str(uuid.uuid4()), **row} for row in rows])
+
+
+def rebuild_licence_expiries(db: Session, org_id: str | None = None) -> int:
+    """Recalcula o calendario a partir de ``company_licences`` (backfill/reparo); nao faz commit."""
+    query = db.query(CompanyLicence)
+    if org_id:
+        query = query.filter(CompanyLicence.org_id == org_id)
+    count = 0
+    for licence in query.yield_per(500):
+        sync_licence_expiries(db, licence)
+        count += 1
+    return count
+
+
+def delete_licence_expiries_for_companies(db: Session, org_id: str, company_ids_select) -> None:
+    """Remove o calendario junto com licencas apagadas em lote (DELETE em lote nao dispara o mapper)."""
+    db.execute(
+        delete(LicenceExpiry)
+        .where(LicenceExpiry.org_id == org_id, LicenceExpiry.company_id.in_(company_ids_select))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def sync_expiries_after_write(_mapper, connection, licence: CompanyLicence) -> None:
+    sync_licence_expiries(connection, licence)
+
+
+def delete_expiries_after_delete(_mapper, connection, licence: CompanyLicence) -> None:
+    connection.execute(delete(LicenceExpiry).where(LicenceExpiry.licence_id == licence.id))
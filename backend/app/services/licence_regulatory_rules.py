@@ -1,14 +1,20 @@
 from __future__ import annotations
 
 import re
+import threading
 import unicodedata
-from datetime import datetime
-from typing import Iterable
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Hashable, Iterable
+
+from sqlalchemy import func, inspect as sa_inspect
+from sqlalchemy.orm import Session
 
 from app.models.company_licence import CompanyLicence
 from app.models.company_process import CompanyProcess
 
 
+REGULATORY_CACHE_SIZE = 8192
 INVALIDATING_REASON_VALUES = ("CNAE", "RAZAO_SOCIAL", "NOME_FANTASIA", "ENDERECO")
 REASON_PATTERNS: dict[str, tuple[re.Pattern[str], ...]] = {
     "CNAE": (
@@ -100,17 +106,87 @@ def _process_reference(process: CompanyProcess) -> str:
     return str(process.id)
 
 
+def _as_utc(value: datetime | None) -> datetime | None:
+    # Valores recem-gravados vem com fuso; lidos do SQLite vem sem.
+    if value is None:
+        return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
 def _reference_timestamp(licence: CompanyLicence | None) -> datetime | None:
     if not licence:
         return None
-    return getattr(licence, "updated_at", None) or getattr(licence, "created_at", None)
+    return _as_utc(getattr(licence, "updated_at", None) or getattr(licence, "created_at", None))
 
 
-def evaluate_definitive_alvara_regulatory_status(
-    *,
-    licence: CompanyLicence | None,
-    processes: Iterable[CompanyProcess] | None = None,
-) -> dict[str, object]:
+class _VersionedCache:
+    """LRU em processo; a entrada so vale para a mesma versao (mesmo padrao do cache do overview)."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._items: OrderedDict[Hashable, tuple[Hashable, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: Hashable) -> tuple[bool, Any]:
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None or entry[0] != version:
+                return False, None
+            self._items.move_to_end(key)
+            return True, entry[1]
+
+    def put(self, key: Hashable, version: Hashable, value: Any) -> None:
+        with self._lock:
+            self._items[key] = (version, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+_process_reasons_cache = _VersionedCache(REGULATORY_CACHE_SIZE)
+_evaluation_cache = _VersionedCache(REGULATORY_CACHE_SIZE)
+
+
+def clear_regulatory_cache() -> None:
+    _process_reasons_cache.clear()
+    _evaluation_cache.clear()
+
+
+def _is_clean_persistent(obj: object) -> bool:
+    # So objetos lidos do banco e sem alteracao pendente tem updated_at confiavel como versao.
+    state = sa_inspect(obj, raiseerr=False)
+    return state is not None and state.persistent and not state.modified
+
+
+def _compute_process_reasons(process: CompanyProcess) -> tuple[str, ...]:
+    if not _process_is_prefeitura_context(process):
+        return ()
+    if not _process_has_alteration_context(process):
+        return ()
+    return tuple(_match_invalidating_reasons(process.obs))
+
+
+def _process_invalidating_reasons(process: CompanyProcess) -> tuple[str, ...]:
+    """Motivos de invalidacao do processo, memorizados por (id, updated_at)."""
+    version = _as_utc(getattr(process, "updated_at", None))
+    if version is None or not _is_clean_persistent(process):
+        return _compute_process_reasons(process)
+    found, reasons = _process_reasons_cache.get(process.id, version)
+    if not found:
+        reasons = _compute_process_reasons(process)
+        _process_reasons_cache.put(process.id, version, reasons)
+    return reasons
+
+
+def _copy_result(result: dict[str, object]) -> dict[str, object]:
+    return {**result, "invalidated_reasons": list(result["invalidated_reasons"])}
+
+
+def _evaluate(licence: CompanyLicence | None, processes: list[CompanyProcess]) -> dict[str, object]:
     has_definitive_alvara = _has_definitive_alvara(licence)
     result: dict[str, object] = {
         "has_definitive_alvara": has_definitive_alvara,
@@ -126,29 +202,101 @@ def evaluate_definitive_alvara_regulatory_status(
 
     ref_timestamp = _reference_timestamp(licence)
     candidate_processes = sorted(
-        list(processes or []),
-        key=lambda item: getattr(item, "updated_at", None) or datetime.min,
+        processes,
+        key=lambda item: _as_utc(getattr(item, "updated_at", None)) or datetime.min.replace(tzinfo=timezone.utc),
         reverse=True,
     )
     for process in candidate_processes:
-        if not _process_is_prefeitura_context(process):
-            continue
-        if not _process_has_alteration_context(process):
-            continue
-        reasons = _match_invalidating_reasons(process.obs)
+        reasons = _process_invalidating_reasons(process)
         if not reasons:
             continue
 
-        process_updated_at = getattr(process, "updated_at", None)
+        process_updated_at = _as_utc(getattr(process, "updated_at", None))
         if ref_timestamp and process_updated_at and process_updated_at <= ref_timestamp:
             continue
 
         result["definitive_alvara_invalidated"] = True
         result["regulatory_status"] = "INVALIDATED"
-        result["invalidated_reasons"] = reasons
+        result["invalidated_reasons"] = list(reasons)
         result["invalidating_process_id"] = process.id
         result["invalidating_process_ref"] = _process_reference(process)
         result["requires_new_licence_request"] = True
         return result
 
     return result
+
+
+def _evaluation_version(licence: CompanyLicence, processes: list[CompanyProcess]) -> Hashable | None:
+    """
+    Versao da avaliacao: ``updated_at`` da licenca e o maior ``updated_at`` dos processos
+    (toda escrita avanca o carimbo), mais o conjunto de ids para pegar exclusoes.
+    """
+    if not _is_clean_persistent(licence) or not all(_is_clean_persistent(process) for process in processes):
+        return None
+    process_stamps = [_as_utc(getattr(process, "updated_at", None)) for process in processes]
+    if any(stamp is None for stamp in process_stamps):
+        return None
+    return (
+        _reference_timestamp(licence),
+        str(licence.alvara_funcionamento_kind or "").strip().upper(),
+        max(process_stamps, default=None),
+        frozenset(str(process.id) for process in processes),
+    )
+
+
+def evaluate_definitive_alvara_regulatory_status(
+    *,
+    licence: CompanyLicence | None,
+    processes: Iterable[CompanyProcess] | None = None,
+) -> dict[str, object]:
+    """
+    Situacao regulatoria do alvara definitivo. O resultado fica memorizado por licenca e
+    versao (licenca + processos); objetos novos ou com alteracao pendente sao avaliados direto.
+    """
+    process_list = list(processes or [])
+    if not _has_definitive_alvara(licence):
+        return _evaluate(licence, process_list)
+    version = _evaluation_version(licence, process_list)
+    if version is None:
+        return _evaluate(licence, process_list)
+    found, cached = _evaluation_cache.get(licence.id, version)
+    if not found:
+        cached = _evaluate(licence, process_list)
+        _evaluation_cache.put(licence.id, version, cached)
+    return _copy_result(cached)
+
+
+def evaluate_definitive_alvaras_bulk(
+    db: Session,
+    org_id: str,
+    licences: Iterable[CompanyLicence],
+) -> dict[str, dict[str, object]]:
+    """
+    Avaliacao em lote para varreduras da org: processos so das empresas com alvara
+    definitivo, numa consulta, e reaproveitamento do memo. Retorna ``{licence_id: resultado}``.
+    """
+    licence_list = list(licences)
+    definitive = [licence for licence in licence_list if _has_definitive_alvara(licence)]
+    processes_by_company: dict[str, list[CompanyProcess]] = {}
+    company_ids = sorted({licence.company_id for licence in definitive})
+    for start in range(0, len(company_ids), 500):
+        chunk = company_ids[start : start + 500]
+        for process in db.query(CompanyProcess).filter(
+            CompanyProcess.org_id == org_id, CompanyProcess.company_id.in_(chunk)
+        ):
+            processes_by_company.setdefault(process.company_id, []).append(process)
+    return {
+        licence.id: evaluate_definitive_alvara_regulatory_status(
+            licence=licence,
+            processes=processes_by_company.get(licence.company_id, []),
+        )
+        for licence in licence_list
+    }
+
+
+def definitive_alvara_filter(org_id: str):
+    """Filtro SQL das licencas com alvara de funcionamento definitivo."""
+    return (
+        CompanyLicence.org_id == org_id,
+        func.upper(func.trim(CompanyLicence.alvara_funcionamento_kind)) == "DEFINITIVO",
+    )
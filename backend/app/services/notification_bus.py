@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from app.core.config import settings
+
+logger = logging.getLogger("econtrole.notification_bus")
+
+REDIS_CHANNEL_PREFIX = "econtrole:notifications:"
+SUBSCRIPTION_QUEUE_SIZE = 256
+
+
+class NotificationSubscription:
+    """Fila de um cliente SSE; ``offer`` pode ser chamado de qualquer thread."""
+
+    def __init__(
+        self,
+        org_id: str,
+        user_id: str | None,
+        loop: asyncio.AbstractEventLoop,
+        maxsize: int = SUBSCRIPTION_QUEUE_SIZE,
+    ) -> None:
+        self.org_id = org_id
+        self.user_id = user_id
+        self.loop = loop
+        self.queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=maxsize)
+        self.lagged = False
+
+    def wants(self, message: dict[str, Any]) -> bool:
+        target = message.get("user_id")
+        return target is None or target == self.user_id
+
+    def offer(self, message: dict[str, Any]) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # loop ja encerrado: o cliente desconectou
+            pass
+
+    def _put(self, message: dict[str, Any]) -> None:
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.lagged = True
+
+
+class NotificationBus:
+    """Pub/sub em processo por org; com Redis configurado, replica entre processos."""
+
+    def __init__(self, redis_url: str = "") -> None:
+        self._lock = threading.Lock()
+        self._subscribers: dict[str, set[NotificationSubscription]] = defaultdict(set)
+        self._redis_url = (redis_url or "").strip()
+        self._redis = None
+        self._listener: threading.Thread | None = None
+
+    @property
+    def distributed(self) -> bool:
+        return bool(self._redis_url)
+
+    def has_subscribers(self, org_id: str) -> bool:
+        if self.distributed:
+            return True
+        with self._lock:
+            return bool(self._subscribers.get(org_id))
+
+    def subscribe(self, org_id: str, user_id: str | None = None) -> NotificationSubscription:
+        subscription = NotificationSubscription(org_id, user_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers[org_id].add(subscription)
+        if self.distributed:
+            self._ensure_listener()
+        return subscription
+
+    def unsubscribe(self, subscription: NotificationSubscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.org_id)
+            if subscribers is None:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                self._subscribers.pop(subscription.org_id, None)
+
+    def publish(self, org_id: str, message: dict[str, Any]) -> None:
+        if self.distributed:
+            try:
+                self._redis_client().publish(
+                    f"{REDIS_CHANNEL_PREFIX}{org_id}", json.dumps(message, default=str)
+                )
+                return
+            except Exception:
+                logger.exception("notification_bus redis publish failed; entregando localmente")
+        self.deliver_local(org_id, message)
+
+    def deliver_local(self, org_id: str, message: dict[str, Any]) -> int:
+        with self._lock:
+            targets = [sub for sub in self._subscribers.get(org_id, ()) if sub.wants(message)]
+        for subscription in targets:
+            subscription.offer(message)
+        return len(targets)
+
+    def _redis_client(self):
+        if self._redis is None:
+            import redis
+
+            self._redis = redis.Redis.from_url(self._redis_url)
+        return self._redis
+
+    def _ensure_listener(self) -> None:
+        with self._lock:
+            if self._listener is not None and self._listener.is_alive():
+                return
+            self._listener = threading.Thread(
+                target=self._listen, name="notification-bus-redis", daemon=True
+            )
+            self._listener.start()
+
+    def _listen(self) -> None:
+        try:
+            pubsub = self._redis_client().pubsub(ignore_subscribe_messages=True)
+            pubsub.psubscribe(f"{REDIS_CHANNEL_PREFIX}*")
+            for item in pubsub.listen():
+                if item.get("type") != "pmessage":
+                    continue
+                channel = item["channel"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode("utf-8")
+                try:
+                    message = json.loads(item["data"])
+                except (TypeError, ValueError):
+                    continue
+                self.deliver_local(channel[len(REDIS_CHANNEL_PREFIX):], message)
+        except Exception:
+            logger.exception("notification_bus redis listener stopped")
+
+
+_bus: NotificationBus | None = None
+_bus_lock = threading.Lock()
+
+
+def get_notification_bus() -> NotificationBus:
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            _bus = NotificationBus(settings.NOTIFICATIONS_REDIS_URL)
+        return _bus
+
+
+def format_sse(event: str, data: dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def stream_notifications(
+    bus: NotificationBus,
+    subscription: NotificationSubscription,
+    *,
+    unread_count: int,
+    is_disconnected: Callable[[], Awaitable[bool]],
+    heartbeat_seconds: float,
+) -> AsyncIterator[str]:
+    """
+    Gera o fluxo SSE de um cliente: contagem inicial de nao lidas, depois cada mensagem
+    publicada para a org (``notification``; o snapshot ``unread_counters`` vira o
+    ``unread_count`` do usuario conectado) e um comentario de heartbeat quando nada chega
+    no intervalo. Se a fila transbordar, envia ``resync`` para o cliente recarregar a
+    contagem pela rota REST.
+    """
+    try:
+        yield "retry: 5000\n\n"
+        yield format_sse("unread_count", {"unread_count": unread_count})
+        while not await is_disconnected():
+            try:
+                message = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat_seconds)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if subscription.lagged:
+                subscription.lagged = False
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                yield format_sse("resync", {})
+                continue
+            if message.get("type") == "unread_counters":
+                counters = message.get("counters") or {}
+                unread = int(counters.get("", 0))
+                if subscription.user_id:
+                    unread += int(counters.get(subscription.user_id, 0))
+                yield format_sse("unread_count", {"unread_count": unread})
+                continue
+            yield format_sse(str(message.get("type") or "message"), message)
+    finally:
+        bus.unsubscribe(subscription)
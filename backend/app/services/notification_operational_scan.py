@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-from datetime import date, datetime, timezone
+from datetime import date, datetime, time, timedelta, timezone
 
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
 
 from app.db.session import SessionLocal
@@ -9,42 +10,43 @@ from app.core.normalization import normalize_process_situacao
 from app.models.company import Company
 from app.models.company_licence import CompanyLicence
 from app.models.company_process import CompanyProcess
-from app.models.notification_event import NotificationEvent
+from app.models.licence_expiry import LicenceExpiry
 from app.models.notification_operational_scan_run import NotificationOperationalScanRun
-from app.services.business_days import business_days_between
+from app.services.business_days import add_business_days, business_days_between, business_days_cutoff
 from app.services.licence_regulatory_rules import (
-    evaluate_definitive_alvara_regulatory_status,
+    definitive_alvara_filter,
+    evaluate_definitive_alvaras_bulk,
     format_invalidating_reason_label,
 )
-from app.services.notifications import emit_org_notification
+from app.services.notifications import emit_org_notification, notification_dedupe_exists
 
 
 LICENCE_RULES = (
     {
         "code": "LIC_BOMBEIROS_BD5",
         "label": "CERCON/Bombeiros",
-        "valid_until_field": "cercon_valid_until",
+        "licence_type": "cercon",
         "window": 5,
         "window_type": "business",
     },
     {
         "code": "LIC_ALVARA_D30",
         "label": "Alvara de funcionamento",
-        "valid_until_field": "alvara_funcionamento_valid_until",
+        "licence_type": "alvara_funcionamento",
         "window": 30,
         "window_type": "calendar",
     },
     {
         "code": "LIC_SANITARIO_D30",
         "label": "Alvara Sanitario",
-        "valid_until_field": "alvara_vig_sanitaria_valid_until",
+        "licence_type": "alvara_vig_sanitaria",
         "window": 30,
         "window_type": "calendar",
     },
     {
         "code": "LIC_AMBIENTAL_BD30",
         "label": "Licenca Ambiental",
-        "valid_until_field": "licenca_ambiental_valid_until",
+        "licence_type": "licenca_ambiental",
         "window": 30,
         "window_type": "business",
     },
@@ -61,40 +63,67 @@ def _now_utc() -> datetime:
     return datetime.now(timezone.utc)
 
 
-def _parse_process_fallback_date(value: str | None) -> date | None:
-    if not value:
-        return None
-    raw = str(value).strip()
-    if not raw:
-        return None
+def _process_reference_date(process: CompanyProcess) -> date:
+    return process.updated_at.date()
 
-    # ISO date
-    try:
-        return date.fromisoformat(raw[:10])
-    except Exception:
-        pass
-
-    # BR format dd/mm/yyyy
-    if "/" in raw:
-        parts = raw.split("/")
-        if len(parts) == 3:
-            try:
-                day = int(parts[0])
-                month = int(parts[1])
-                year = int(parts[2])
-                return date(year, month, day)
-            except Exception:
-                return None
-    return None
 
+def _stale_process_rows(db: Session, org_id: str, today: date) -> list[tuple[CompanyProcess, Company | None]]:
+    """
+    Processos nao terminais parados ha pelo menos a menor janela de ``PROCESS_RULES``,
+    numa unica consulta: referencia e ``updated_at`` (obrigatorio; indice
+    ``ix_company_processes_org_updated``). Situacoes fora do canonico sao conferidas de novo em Python.
+    """
+    cutoff = business_days_cutoff(today, min(int(rule["window"]) for rule in PROCESS_RULES))
+    cutoff_ts = datetime.combine(cutoff + timedelta(days=1), time.min, tzinfo=timezone.utc)
+    return (
+        db.query(CompanyProcess, Company)
+        .outerjoin(
+            Company,
+            (Company.id == CompanyProcess.company_id) & (Company.org_id == CompanyProcess.org_id),
+        )
+        .filter(
+            CompanyProcess.org_id == org_id,
+            or_(CompanyProcess.situacao.is_(None), CompanyProcess.situacao.notin_(TERMINAL_PROCESS_STATUS)),
+            CompanyProcess.updated_at < cutoff_ts,
+        )
+        .all()
+    )
 
-def _already_emitted(db: Session, org_id: str, dedupe_key: str) -> bool:
-    existing = (
-        db.query(NotificationEvent.id)
-        .filter(NotificationEvent.org_id == org_id, NotificationEvent.dedupe_key == dedupe_key)
-        .first()
+
+def _licence_rule_horizon(today: date) -> date:
+    """Ultimo vencimento que ainda cabe em alguma janela de ``LICENCE_RULES``."""
+    horizons = [
+        add_business_days(today, int(rule["window"]) + 1) - timedelta(days=1)
+        if rule["window_type"] == "business"
+        else today + timedelta(days=int(rule["window"]))
+        for rule in LICENCE_RULES
+    ]
+    return max(horizons)
+
+
+def _upcoming_licence_expiries(
+    db: Session, org_id: str, today: date
+) -> list[tuple[LicenceExpiry, Company | None]]:
+    """Vencimentos entre hoje e o horizonte das regras, por faixa em ``ix_licence_expiries_org_valid_until``."""
+    licence_types = [rule["licence_type"] for rule in LICENCE_RULES]
+    return (
+        db.query(LicenceExpiry, Company)
+        .outerjoin(
+            Company,
+            (Company.id == LicenceExpiry.company_id) & (Company.org_id == LicenceExpiry.org_id),
+        )
+        .filter(
+            LicenceExpiry.org_id == org_id,
+            LicenceExpiry.valid_until >= today,
+            LicenceExpiry.valid_until <= _licence_rule_horizon(today),
+            LicenceExpiry.licence_type.in_(licence_types),
+        )
+        .all()
     )
-    return existing is not None
+
+
+def _already_emitted(db: Session, org_id: str, dedupe_key: str) -> bool:
+    return notification_dedupe_exists(db, org_id, dedupe_key)
 
 
 def run_notification_operational_scan(
@@ -107,36 +136,28 @@ def run_notification_operational_scan(
     emitted_count = 0
     deduped_count = 0
     processed = 0
-    process_rows = (
-        db.query(CompanyProcess, Company)
-        .outerjoin(
-            Company,
-            (Company.id == CompanyProcess.company_id) & (Company.org_id == CompanyProcess.org_id),
-        )
-        .filter(CompanyProcess.org_id == org_id)
-        .all()
+
+    licence_total = int(
+        db.query(func.count(CompanyLicence.id)).filter(CompanyLicence.org_id == org_id).scalar() or 0
     )
-    processes_by_company: dict[str, list[CompanyProcess]] = {}
-    for process, _company in process_rows:
-        processes_by_company.setdefault(process.company_id, []).append(process)
+    processed += licence_total
 
-    licence_rows = (
+    # So alvaras definitivos podem ser invalidados; os demais nem precisam ser carregados.
+    definitive_rows = (
         db.query(CompanyLicence, Company)
         .outerjoin(
             Company,
             (Company.id == CompanyLicence.company_id) & (Company.org_id == CompanyLicence.org_id),
         )
-        .filter(CompanyLicence.org_id == org_id)
+        .filter(*definitive_alvara_filter(org_id))
         .all()
     )
-    for licence, company in licence_rows:
-        processed += 1
+    regulatory_by_licence = evaluate_definitive_alvaras_bulk(
+        db, org_id, [licence for licence, _company in definitive_rows]
+    )
+    for licence, company in definitive_rows:
         company_label = (company.razao_social if company else None) or f"empresa {licence.company_id}"
-        regulatory_payload = evaluate_definitive_alvara_regulatory_status(
-            licence=licence,
-            processes=processes_by_company.get(licence.company_id, []),
-        )
-        has_definitive_alvara = bool(regulatory_payload["has_definitive_alvara"])
+        regulatory_payload = regulatory_by_licence[licence.id]
         if regulatory_payload["definitive_alvara_invalidated"]:
             process_ref = str(regulatory_payload["invalidating_process_ref"] or "sem_referencia")
             dedupe_key = f"notif:{org_id}:{licence.id}:LIC_DEFINITIVO_INVALIDADO:{process_ref}"
@@ -175,69 +196,67 @@ def run_notification_operational_scan(
                     commit=False,
                 )
                 emitted_count += 1
-        for rule in LICENCE_RULES:
-            if rule["valid_until_field"] == "alvara_funcionamento_valid_until" and has_definitive_alvara:
-                continue
-            due_date = getattr(licence, rule["valid_until_field"])
-            if not isinstance(due_date, date):
-                continue
 
-            if rule["window_type"] == "business":
-                remaining = business_days_between(today, due_date)
-            else:
-                remaining = (due_date - today).days
+    rules_by_type = {rule["licence_type"]: rule for rule in LICENCE_RULES}
+    for expiry, company in _upcoming_licence_expiries(db, org_id, today):
+        rule = rules_by_type[expiry.licence_type]
+        if expiry.licence_type == "alvara_funcionamento" and expiry.is_definitive:
+            continue
+        due_date = expiry.valid_until
+        company_label = (company.razao_social if company else None) or f"empresa {expiry.company_id}"
 
-            if remaining < 0 or remaining > int(rule["window"]):
-                continue
+        if rule["window_type"] == "business":
+            remaining = business_days_between(today, due_date)
+        else:
+            remaining = (due_date - today).days
 
-            dedupe_key = (
-                f"notif:{org_id}:{licence.id}:{rule['code']}:{due_date.isoformat()}:W{int(rule['window'])}"
-            )
-            if _already_emitted(db, org_id, dedupe_key):
-                deduped_count += 1
-                continue
+        if remaining < 0 or remaining > int(rule["window"]):
+            continue
 
-            severity = "warning" if remaining <= 5 else "info"
-            emit_org_notification(
-                db,
-                org_id=org_id,
-                event_type="operational.licence.renewal",
-                severity=severity,
-                title=f"{rule['label']} proximo do vencimento",
-                message=(
-                    f"{company_label}: {rule['label']} vence em {remaining} dia(s). "
-                    f"Vencimento em {due_date.isoformat()}."
-                ),
-                dedupe_key=dedupe_key,
-                entity_type="company_licence",
-                entity_id=licence.id,
-                route_path="/painel?tab=licencas",
-                metadata_json={
-                    "rule_code": rule["code"],
-                    "window": int(rule["window"]),
-                    "window_type": rule["window_type"],
-                    "due_date": due_date.isoformat(),
-                    "days_remaining": int(remaining),
-                    "company_id": licence.company_id,
-                },
-                commit=False,
-            )
-            emitted_count += 1
+        dedupe_key = (
+            f"notif:{org_id}:{expiry.licence_id}:{rule['code']}:{due_date.isoformat()}:W{int(rule['window'])}"
+        )
+        if _already_emitted(db, org_id, dedupe_key):
+            deduped_count += 1
+            continue
+
+        severity = "warning" if remaining <= 5 else "info"
+        emit_org_notification(
+            db,
+            org_id=org_id,
+            event_type="operational.licence.renewal",
+            severity=severity,
+            title=f"{rule['label']} proximo do vencimento",
+            message=(
+                f"{company_label}: {rule['label']} vence em {remaining} dia(s). "
+                f"Vencimento em {due_date.isoformat()}."
+            ),
+            dedupe_key=dedupe_key,
+            entity_type="company_licence",
+            entity_id=expiry.licence_id,
+            route_path="/painel?tab=licencas",
+            metadata_json={
+                "rule_code": rule["code"],
+                "window": int(rule["window"]),
+                "window_type": rule["window_type"],
+                "due_date": due_date.isoformat(),
+                "days_remaining": int(remaining),
+                "company_id": expiry.company_id,
+            },
+            commit=False,
+        )
+        emitted_count += 1
 
-    for process, company in process_rows:
-        processed += 1
+    process_total = int(
+        db.query(func.count(CompanyProcess.id)).filter(CompanyProcess.org_id == org_id).scalar() or 0
+    )
+    processed += process_total
+    for process, company in _stale_process_rows(db, org_id, today):
         process_status = normalize_process_situacao(process.situacao, strict=False)
         if process_status in TERMINAL_PROCESS_STATUS:
             continue
 
-        last_ref_date = None
-        if process.updated_at is not None:
-            last_ref_date = process.updated_at.date()
-        if last_ref_date is None:
-            last_ref_date = _parse_process_fallback_date(process.data_solicitacao)
-        if last_ref_date is None:
-            continue
-
+        last_ref_date = _process_reference_date(process)
         stale_business_days = business_days_between(last_ref_date, today)
         if stale_business_days < 0:
             continue
@@ -280,7 +299,7 @@ def run_notification_operational_scan(
             emitted_count += 1
 
     db.commit()
-    total = len(licence_rows) + len(process_rows)
+    total = licence_total + process_total
     return {
         "total": int(total),
         "processed": int(processed),
@@ -1,18 +1,211 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+import base64
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
 from typing import Any
 
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.models.notification_event import NotificationEvent
+from app.models.notification_event_archive import NotificationEventArchive
+from app.models.notification_unread_counter import NotificationUnreadCounter
+from app.schemas.notification import NotificationEventOut
+from app.services.notification_bus import get_notification_bus
+
+logger = logging.getLogger("econtrole.notifications")
+
+# Publicacoes pendentes por sessao: {org_id: [payload, ...]}; so saem apos o commit.
+_PENDING_KEY = "pending_notification_publications"
+
+ARCHIVE_BATCH_SIZE = 1000
+ORG_WIDE_KEY = ""
+
+_ARCHIVE_COLUMNS = (
+    "id",
+    "org_id",
+    "user_id",
+    "event_type",
+    "severity",
+    "title",
+    "message",
+    "entity_type",
+    "entity_id",
+    "route_path",
+    "dedupe_key",
+    "metadata_json",
+    "read_at",
+    "created_at",
+)
 
 
 def _now_utc() -> datetime:
     return datetime.now(timezone.utc)
 
 
+def _user_key(user_id: str | None) -> str:
+    return user_id or ORG_WIDE_KEY
+
+
+def visible_to_user(user_id: str | None):
+    """Eventos da org inteira mais os direcionados ao usuario."""
+    if not user_id:
+        return NotificationEvent.user_id.is_(None)
+    return or_(NotificationEvent.user_id.is_(None), NotificationEvent.user_id == user_id)
+
+
+def _queue_publication(db: Session, org_id: str, event: NotificationEvent | None = None) -> None:
+    pending = db.info.setdefault(_PENDING_KEY, {})
+    payloads = pending.setdefault(org_id, [])
+    if event is not None:
+        payloads.append(
+            {
+                "type": "notification",
+                "user_id": event.user_id,
+                "event": NotificationEventOut.model_validate(event).model_dump(mode="json"),
+            }
+        )
+
+
+def _count_unread_events(executor, org_id: str, user_key: str) -> int:
+    stmt = select(func.count(NotificationEvent.id)).where(
+        NotificationEvent.org_id == org_id,
+        NotificationEvent.read_at.is_(None),
+        NotificationEvent.user_id.is_(None) if user_key == ORG_WIDE_KEY else NotificationEvent.user_id == user_key,
+    )
+    return int(executor.execute(stmt).scalar() or 0)
+
+
+def _insert_counter_if_missing(db: Session, values: dict[str, Any]) -> bool:
+    dialect = db.get_bind().dialect.name
+    if dialect in {"postgresql", "postgres"}:
+        stmt = pg_insert(NotificationUnreadCounter).values(**values).on_conflict_do_nothing(
+            constraint="uq_notification_unread_counters_org_user"
+        )
+    elif dialect == "sqlite":
+        stmt = sqlite_insert(NotificationUnreadCounter).values(**values).on_conflict_do_nothing()
+    else:
+        stmt = insert(NotificationUnreadCounter).values(**values)
+    return bool(db.execute(stmt).rowcount)
+
+
+def _bump_unread_counter(db: Session, org_id: str, user_id: str | None, delta: int, *, create: bool) -> None:
+    key = _user_key(user_id)
+    condition = and_(NotificationUnreadCounter.org_id == org_id, NotificationUnreadCounter.user_key == key)
+    bump = (
+        update(NotificationUnreadCounter)
+        .where(condition)
+        .values(unread_count=NotificationUnreadCounter.unread_count + delta, updated_at=_now_utc())
+    )
+    if db.execute(bump).rowcount or not create:
+        return
+    # Primeira emissao da chave: a contagem ja inclui o evento recem-inserido (flush feito).
+    values = {
+        "id": str(uuid.uuid4()),
+        "org_id": org_id,
+        "user_key": key,
+        "unread_count": _count_unread_events(db, org_id, key),
+        "updated_at": _now_utc(),
+    }
+    if not _insert_counter_if_missing(db, values):
+        db.execute(bump)
+
+
+def count_unread_notifications(db: Session, org_id: str, user_id: str | None = None) -> int:
+    """Le os contadores mantidos; chaves ainda sem contador caem para um COUNT pontual."""
+    keys = [ORG_WIDE_KEY] if not user_id else [ORG_WIDE_KEY, user_id]
+    counters = dict(
+        db.execute(
+            select(NotificationUnreadCounter.user_key, NotificationUnreadCounter.unread_count).where(
+                NotificationUnreadCounter.org_id == org_id,
+                NotificationUnreadCounter.user_key.in_(keys),
+            )
+        ).all()
+    )
+    total = 0
+    for key in keys:
+        value = counters.get(key)
+        total += max(0, int(value)) if value is not None else _count_unread_events(db, org_id, key)
+    return total
+
+
+def rebuild_unread_counters(db: Session, org_id: str) -> int:
+    """Recalcula os contadores da org a partir de ``notification_events`` (corrige drift)."""
+    rows = db.execute(
+        select(func.coalesce(NotificationEvent.user_id, ORG_WIDE_KEY), func.count(NotificationEvent.id))
+        .where(NotificationEvent.org_id == org_id, NotificationEvent.read_at.is_(None))
+        .group_by(func.coalesce(NotificationEvent.user_id, ORG_WIDE_KEY))
+    ).all()
+    counts = {str(key): int(count) for key, count in rows}
+    counts.setdefault(ORG_WIDE_KEY, 0)
+    db.execute(delete(NotificationUnreadCounter).where(NotificationUnreadCounter.org_id == org_id))
+    now = _now_utc()
+    db.execute(
+        insert(NotificationUnreadCounter),
+        [
+            {"id": str(uuid.uuid4()), "org_id": org_id, "user_key": key, "unread_count": count, "updated_at": now}
+            for key, count in counts.items()
+        ],
+    )
+    return sum(counts.values())
+
+
+def _unread_snapshot(conn, org_id: str) -> dict[str, int]:
+    counters = {
+        str(key): max(0, int(count))
+        for key, count in conn.execute(
+            select(NotificationUnreadCounter.user_key, NotificationUnreadCounter.unread_count).where(
+                NotificationUnreadCounter.org_id == org_id
+            )
+        ).all()
+    }
+    if ORG_WIDE_KEY not in counters:
+        counters[ORG_WIDE_KEY] = _count_unread_events(conn, org_id, ORG_WIDE_KEY)
+    return counters
+
+
+def publish_after_commit(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    bus = get_notification_bus()
+    for org_id, payloads in pending.items():
+        if not bus.has_subscribers(org_id):
+            continue
+        try:
+            for payload in payloads:
+                bus.publish(org_id, payload)
+            # A sessao esta fora de transacao aqui: a leitura usa uma conexao propria.
+            with session.get_bind().connect() as conn:
+                counters = _unread_snapshot(conn, org_id)
+            bus.publish(org_id, {"type": "unread_counters", "user_id": None, "counters": counters})
+        except Exception:
+            logger.exception("notification publish failed org_id=%s", org_id)
+
+
+def discard_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+def notification_dedupe_exists(db: Session, org_id: str, dedupe_key: str) -> bool:
+    """Considera tambem eventos arquivados, para que o arquivamento nao reabra notificacoes."""
+    for model in (NotificationEvent, NotificationEventArchive):
+        found = (
+            db.query(model.id)
+            .filter(model.org_id == org_id, model.dedupe_key == dedupe_key)
+            .first()
+        )
+        if found is not None:
+            return True
+    return False
+
+
 def emit_org_notification(
     db: Session,
     *,
@@ -28,7 +221,8 @@ def emit_org_notification(
     route_path: str | None = None,
     metadata_json: dict[str, Any] | None = None,
     commit: bool = False,
-) -> NotificationEvent:
+) -> NotificationEvent | None:
+    """Retorna o evento criado ou o existente; ``None`` quando o dedupe_key ja foi arquivado."""
     existing = (
         db.query(NotificationEvent)
         .filter(
@@ -39,6 +233,16 @@ def emit_org_notification(
     )
     if existing:
         return existing
+    archived = (
+        db.query(NotificationEventArchive.id)
+        .filter(
+            NotificationEventArchive.org_id == org_id,
+            NotificationEventArchive.dedupe_key == dedupe_key,
+        )
+        .first()
+    )
+    if archived is not None:
+        return None
 
     event = NotificationEvent(
         org_id=org_id,
@@ -52,14 +256,20 @@ def emit_org_notification(
         route_path=route_path,
         dedupe_key=dedupe_key,
         metadata_json=metadata_json,
+        created_at=_now_utc(),
     )
     db.add(event)
 
     if not commit:
         db.flush()
+        _bump_unread_counter(db, org_id, user_id, 1, create=True)
+        _queue_publication(db, org_id, event)
         return event
 
     try:
+        db.flush()
+        _bump_unread_counter(db, org_id, user_id, 1, create=True)
+        _queue_publication(db, org_id, event)
         db.commit()
         db.refresh(event)
         return event
@@ -81,6 +291,110 @@ def emit_org_notification(
 def mark_notification_as_read(db: Session, event: NotificationEvent) -> NotificationEvent:
     if event.read_at is None:
         event.read_at = _now_utc()
+        _bump_unread_counter(db, event.org_id, event.user_id, -1, create=False)
+        _queue_publication(db, event.org_id)
         db.commit()
         db.refresh(event)
     return event
+
+
+def encode_notification_cursor(event: NotificationEvent) -> str:
+    raw = json.dumps({"c": event.created_at.isoformat(), "i": event.id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_notification_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(payload["c"]), str(payload["i"])
+    except (ValueError, KeyError, TypeError) as exc:
+        raise ValueError("invalid notification cursor") from exc
+
+
+def list_notifications_page(
+    db: Session,
+    org_id: str,
+    *,
+    user_id: str | None,
+    limit: int,
+    cursor: str | None = None,
+    offset: int = 0,
+    include_total: bool = False,
+) -> tuple[list[NotificationEvent], str | None, int | None]:
+    """
+    Pagina o feed por keyset em (created_at, id) desc, apoiado em
+    ``ix_notification_events_org_created``. ``offset`` so vale sem cursor (compatibilidade);
+    o COUNT total so roda com ``include_total``.
+    """
+    base_query = db.query(NotificationEvent).filter(
+        NotificationEvent.org_id == org_id,
+        visible_to_user(user_id),
+    )
+    total = int(base_query.count()) if include_total else None
+
+    query = base_query
+    if cursor:
+        created_at, event_id = decode_notification_cursor(cursor)
+        query = query.filter(
+            or_(
+                NotificationEvent.created_at < created_at,
+                and_(NotificationEvent.created_at == created_at, NotificationEvent.id < event_id),
+            )
+        )
+    elif offset:
+        query = query.offset(offset)
+    rows = (
+        query.order_by(NotificationEvent.created_at.desc(), NotificationEvent.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_notification_cursor(rows[-1]) if has_more and rows else None
+    return rows, next_cursor, total
+
+
+def archive_read_notifications(
+    db: Session,
+    *,
+    older_than_days: int,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    org_id: str | None = None,
+    now: datetime | None = None,
+) -> dict[str, int]:
+    """
+    Move eventos lidos ha mais de ``older_than_days`` para ``notification_events_archive``
+    em lotes (INSERT ... SELECT + DELETE, commit por lote). Nao lidas nunca sao movidas,
+    entao os contadores de nao lidas nao mudam.
+    """
+    cutoff = (now or _now_utc()) - timedelta(days=max(0, int(older_than_days)))
+    batch_size = max(1, int(batch_size))
+    source_columns = [getattr(NotificationEvent, name) for name in _ARCHIVE_COLUMNS]
+    filters = [NotificationEvent.read_at.is_not(None), NotificationEvent.read_at < cutoff]
+    if org_id:
+        filters.append(NotificationEvent.org_id == org_id)
+
+    archived = 0
+    batches = 0
+    while True:
+        ids = list(
+            db.execute(
+                select(NotificationEvent.id).where(*filters).order_by(NotificationEvent.read_at).limit(batch_size)
+            ).scalars()
+        )
+        if not ids:
+            break
+        db.execute(
+            insert(NotificationEventArchive).from_select(
+                list(_ARCHIVE_COLUMNS),
+                select(*source_columns).where(NotificationEvent.id.in_(ids)),
+            )
+        )
+        db.execute(delete(NotificationEvent).where(NotificationEvent.id.in_(ids)))
+        db.commit()
+        archived += len(ids)
+        batches += 1
+
+    logger.info("notification_archive cutoff=%s archived=%s batches=%s", cutoff.isoformat(), archived, batches)
+    return {"archived": archived, "batches": batches}
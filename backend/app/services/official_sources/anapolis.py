@@ -1,16 +1,10 @@
 from __future__ import annotations
 
-import re
-
-import httpx
-
 from app.core.cnae import normalize_cnae_code
 from app.schemas.official_sources import OfficialSourceFinding
+from app.services.official_sources.cnae_index import CnaeIndex, get_source_index
 
 
-_HTTP_TIMEOUT_SECONDS = 12.0
-_HTTP_HEADERS = {"User-Agent": "eControle/2.0 (+official-source-parser)"}
-
 _ANAPOLIS_SOURCES: tuple[dict, ...] = (
     {
         "label": "Lei Municipal 4.438/2025",
@@ -57,49 +51,8 @@ _CONTEXTUAL_KEYWORDS = (
 )
 
 
-def _decode_text(content: bytes) -> str:
-    for encoding in ("utf-8", "latin-1", "cp1252"):
-        try:
-            decoded = content.decode(encoding)
-            break
-        except UnicodeDecodeError:
-            continue
-    else:
-        decoded = content.decode("utf-8", errors="ignore")
-    return re.sub(r"\s+", " ", decoded).strip()
-
-
-def _fetch_source_text(url: str) -> str:
-    with httpx.Client(timeout=_HTTP_TIMEOUT_SECONDS, headers=_HTTP_HEADERS, follow_redirects=True) as client:
-        response = client.get(url)
-        response.raise_for_status()
-    return _decode_text(response.content)
-
-
-def _extract_cnae_snippets(normalized_cnae: str, source_text: str, limit: int = 4) -> list[str]:
-    if not source_text:
-        return []
-
-    cnae_digits = re.sub(r"\D", "", normalized_cnae)
-    variants = {
-        normalized_cnae,
-        normalized_cnae.replace(".", "").replace("-", "").replace("/", ""),
-        cnae_digits,
-        f"{normalized_cnae[:2]}.{normalized_cnae[3:5]}-{normalized_cnae[6]}-{normalized_cnae[8:]}",
-    }
-
-    pieces = re.split(r"(?<=[.;])\s+|\s{2,}", source_text)
-    snippets: list[str] = []
-    for piece in pieces:
-        candidate = piece.strip()
-        if len(candidate) < 12:
-            continue
-        lowered = candidate.lower()
-        if any(variant.lower() in lowered for variant in variants):
-            snippets.append(candidate[:360])
-            if len(snippets) >= limit:
-                break
-    return snippets
+def _source_index(url: str) -> CnaeIndex:
+    return get_source_index(url, namespace="ANAPOLIS", tier_hint=_tier_from_snippet)
 
 
 def _snippet_requires_questionnaire(snippet: str) -> bool:
@@ -138,15 +91,16 @@ def lookup_cnae(cnae_code: str) -> list[OfficialSourceFinding]:
     successful_fetches = 0
     for source in _ANAPOLIS_SOURCES:
         try:
-            source_text = _fetch_source_text(source["url"])
+            index = _source_index(source["url"])
             successful_fetches += 1
         except Exception as exc:
             errors.append(f'{source["label"]}: {exc}')
             continue
 
-        for snippet in _extract_cnae_snippets(normalized, source_text):
+        for indexed in index.lookup(normalized):
+            snippet = indexed.text
             contextual = source["contextual_default"] or _snippet_requires_questionnaire(snippet)
-            tier = None if contextual else _tier_from_snippet(snippet)
+            tier = None if contextual else indexed.tier_hint
             findings.append(
                 OfficialSourceFinding(
                     cnae_code=normalized,
@@ -6,11 +6,10 @@ import httpx
 
 from app.core.cnae import normalize_cnae_code
 from app.schemas.official_sources import OfficialSourceFinding
+from app.services.official_sources.cnae_index import get_source_index
+from app.services.official_sources.http_cache import fetch_text
 
 
-_HTTP_TIMEOUT_SECONDS = 12.0
-_HTTP_HEADERS = {"User-Agent": "eControle/2.0 (+official-source-parser)"}
-
 _PRIMARY_DOC_URL = (
     "https://www.gov.br/empresas-e-negocios/pt-br/empreendedor/"
     "comite-para-gestao-da-rede-nacional-para-a-simplificacao-do-registro-e-da-legalizacao-"
@@ -24,38 +23,6 @@ _INDEX_URL = (
 )
 
 
-def _decode_text(content: bytes) -> str:
-    for encoding in ("utf-8", "latin-1", "cp1252"):
-        try:
-            decoded = content.decode(encoding)
-            break
-        except UnicodeDecodeError:
-            continue
-    else:
-        decoded = content.decode("utf-8", errors="ignore")
-    return re.sub(r"\s+", " ", decoded).strip()
-
-
-def _extract_cnae_snippets(normalized_cnae: str, source_text: str, limit: int = 4) -> list[str]:
-    cnae_digits = re.sub(r"\D", "", normalized_cnae)
-    variants = {
-        normalized_cnae.lower(),
-        normalized_cnae.replace(".", "").replace("-", "").replace("/", "").lower(),
-        cnae_digits.lower(),
-    }
-    snippets: list[str] = []
-    for chunk in re.split(r"(?<=[.;])\s+|\s{2,}", source_text):
-        candidate = chunk.strip()
-        if len(candidate) < 12:
-            continue
-        lowered = candidate.lower()
-        if any(variant in lowered for variant in variants):
-            snippets.append(candidate[:360])
-            if len(snippets) >= limit:
-                break
-    return snippets
-
-
 def _extract_discovered_official_link(index_text: str) -> str | None:
     links = re.findall(r'https?://[^"\'\s>]+', index_text)
     for link in links:
@@ -88,37 +55,32 @@ def _fetch_cgsim_text() -> tuple[str, str, bool]:
     errors: list[str] = []
     direct_403 = False
 
-    with httpx.Client(timeout=_HTTP_TIMEOUT_SECONDS, headers=_HTTP_HEADERS, follow_redirects=True) as client:
-        for attempt_url in (_PRIMARY_DOC_URL, _VIEW_DOC_URL):
-            try:
-                response = client.get(attempt_url)
-                if response.status_code == 403:
-                    if attempt_url == _PRIMARY_DOC_URL:
-                        direct_403 = True
-                    errors.append(f"{attempt_url}: HTTP 403")
-                    continue
-                response.raise_for_status()
-                return _decode_text(response.content), attempt_url, False
-            except Exception as exc:
-                errors.append(f"{attempt_url}: {exc}")
-
+    for attempt_url in (_PRIMARY_DOC_URL, _VIEW_DOC_URL):
         try:
-            index_response = client.get(_INDEX_URL)
-            index_response.raise_for_status()
-            index_text = _decode_text(index_response.content)
-            discovered_link = _extract_discovered_official_link(index_text)
-            if discovered_link:
-                try:
-                    discovered_response = client.get(discovered_link)
-                    discovered_response.raise_for_status()
-                    return _decode_text(discovered_response.content), discovered_link, False
-                except Exception as exc:
-                    errors.append(f"{discovered_link}: {exc}")
-            if direct_403:
-                # Semi-real mode: gov.br blocked direct URL, keep official index traceability.
-                return index_text, _INDEX_URL, True
+            return fetch_text(attempt_url), attempt_url, False
+        except httpx.HTTPStatusError as exc:
+            if exc.response.status_code == 403:
+                if attempt_url == _PRIMARY_DOC_URL:
+                    direct_403 = True
+                errors.append(f"{attempt_url}: HTTP 403")
+                continue
+            errors.append(f"{attempt_url}: {exc}")
         except Exception as exc:
-            errors.append(f"{_INDEX_URL}: {exc}")
+            errors.append(f"{attempt_url}: {exc}")
+
+    try:
+        index_text = fetch_text(_INDEX_URL)
+        discovered_link = _extract_discovered_official_link(index_text)
+        if discovered_link:
+            try:
+                return fetch_text(discovered_link), discovered_link, False
+            except Exception as exc:
+                errors.append(f"{discovered_link}: {exc}")
+        if direct_403:
+            # Semi-real mode: gov.br blocked direct URL, keep official index traceability.
+            return index_text, _INDEX_URL, True
+    except Exception as exc:
+        errors.append(f"{_INDEX_URL}: {exc}")
 
     raise RuntimeError(f"CGSIM official source unavailable: {'; '.join(errors)}")
 
@@ -128,12 +90,12 @@ def lookup_cnae(cnae_code: str) -> list[OfficialSourceFinding]:
     if not normalized:
         return []
 
-    source_text, used_reference, semi_real_mode = _fetch_cgsim_text()
-    snippets = _extract_cnae_snippets(normalized, source_text)
+    _source_text, used_reference, semi_real_mode = _fetch_cgsim_text()
+    snippets = get_source_index(used_reference, namespace="CGSIM").lookup(normalized)
     if not snippets:
         return []
 
-    primary_snippet = snippets[0]
+    primary_snippet = snippets[0].text
     tier = _tier_from_snippet(primary_snippet, semi_real_mode=semi_real_mode)
     return [
         OfficialSourceFinding(
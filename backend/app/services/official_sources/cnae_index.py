@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Callable
+
+from app.core.cnae import normalize_cnae_code
+from app.services.official_sources.http_cache import fetch_document, get_fetcher
+
+
+_INDEX_FORMAT_VERSION = 1
+_SNIPPET_SPLIT = re.compile(r"(?<=[.;])\s+|\s{2,}")
+# 56.11-2-01, 56.11-2/01, 5611-2/01 e 5611201 (sem colar em numeros maiores, ex.: CNPJ).
+_CNAE_TOKEN = re.compile(r"(?<![\d.])(\d{2}\.?\d{2}-?\d[-/]?\d{2})(?![\d])")
+_MIN_SNIPPET_LENGTH = 12
+_MAX_SNIPPET_LENGTH = 360
+_DEFAULT_LIMIT = 4
+
+
+@dataclass(frozen=True)
+class IndexedSnippet:
+    text: str
+    tier_hint: str | None = None
+
+
+@dataclass(frozen=True)
+class CnaeIndex:
+    namespace: str
+    url: str
+    version: str
+    entries: dict[str, tuple[IndexedSnippet, ...]]
+
+    def lookup(self, cnae_code: str) -> tuple[IndexedSnippet, ...]:
+        normalized = normalize_cnae_code(cnae_code)
+        if not normalized:
+            return ()
+        return self.entries.get(normalized, ())
+
+
+def build_cnae_index(
+    source_text: str,
+    *,
+    tier_hint: Callable[[str], str | None] | None = None,
+    limit: int = _DEFAULT_LIMIT,
+) -> dict[str, tuple[IndexedSnippet, ...]]:
+    """Percorre o documento uma unica vez e agrupa os trechos por CNAE normalizado."""
+    grouped: dict[str, list[IndexedSnippet]] = {}
+    if not source_text:
+        return {}
+
+    for piece in _SNIPPET_SPLIT.split(source_text):
+        candidate = piece.strip()
+        if len(candidate) < _MIN_SNIPPET_LENGTH:
+            continue
+        codes: list[str] = []
+        for match in _CNAE_TOKEN.finditer(candidate):
+            digits = re.sub(r"\D", "", match.group(1))
+            if len(digits) != 7:
+                continue
+            code = normalize_cnae_code(digits)
+            if code and code not in codes:
+                codes.append(code)
+        if not codes:
+            continue
+
+        text = candidate[:_MAX_SNIPPET_LENGTH]
+        snippet = IndexedSnippet(text=text, tier_hint=tier_hint(text) if tier_hint else None)
+        for code in codes:
+            bucket = grouped.setdefault(code, [])
+            if len(bucket) < limit:
+                bucket.append(snippet)
+
+    return {code: tuple(items) for code, items in grouped.items()}
+
+
+_indexes: dict[tuple[str, str], CnaeIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def _index_path(namespace: str, url: str) -> str | None:
+    cache_dir = get_fetcher().cache_dir
+    if cache_dir is None:
+        return None
+    key = hashlib.sha1(f"{namespace}|{url}".encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, f"{key}.cnae-index.json")
+
+
+def _load_persisted(namespace: str, url: str, version: str) -> CnaeIndex | None:
+    path = _index_path(namespace, url)
+    if not path:
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    if (
+        data.get("format") != _INDEX_FORMAT_VERSION
+        or data.get("url") != url
+        or data.get("version") != version
+    ):
+        return None
+    entries = {
+        code: tuple(IndexedSnippet(text=item["text"], tier_hint=item.get("tier_hint")) for item in items)
+        for code, items in (data.get("entries") or {}).items()
+    }
+    return CnaeIndex(namespace=namespace, url=url, version=version, entries=entries)
+
+
+def _persist(index: CnaeIndex) -> None:
+    path = _index_path(index.namespace, index.url)
+    if not path:
+        return
+    payload = {
+        "format": _INDEX_FORMAT_VERSION,
+        "namespace": index.namespace,
+        "url": index.url,
+        "version": index.version,
+        "entries": {
+            code: [{"text": item.text, "tier_hint": item.tier_hint} for item in items]
+            for code, items in index.entries.items()
+        },
+    }
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def get_source_index(
+    url: str,
+    *,
+    namespace: str,
+    tier_hint: Callable[[str], str | None] | None = None,
+) -> CnaeIndex:
+    """
+    Indice invertido CNAE -> trechos de uma fonte oficial, amarrado a versao do documento
+    (ETag/Last-Modified/sha1). Reconstroi somente quando a fonte muda.
+    """
+    document = fetch_document(url)
+    key = (namespace, url)
+    with _indexes_lock:
+        current = _indexes.get(key)
+        if current is not None and current.version == document.version:
+            return current
+
+        index = _load_persisted(namespace, url, document.version)
+        if index is None:
+            index = CnaeIndex(
+                namespace=namespace,
+                url=url,
+                version=document.version,
+                entries=build_cnae_index(document.text, tier_hint=tier_hint),
+            )
+            _persist(index)
+        _indexes[key] = index
+        return index
+
+
+def clear_index_memo() -> None:
+    with _indexes_lock:
+        _indexes.clear()
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import httpx
+
+from app.core.config import settings
+
+
+_HTTP_TIMEOUT_SECONDS = 12.0
+_HTTP_HEADERS = {"User-Agent": "eControle/2.0 (+official-source-parser)"}
+_DEFAULT_ERROR_TTL_SECONDS = 60.0
+
+
+def _is_transient(exc: Exception) -> bool:
+    """Falha passageira da fonte (5xx, 429, rede): serve copia velha e tenta de novo logo."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500 or exc.response.status_code == 429
+    return isinstance(exc, httpx.TransportError)
+
+
+def decode_text(content: bytes) -> str:
+    for encoding in ("utf-8", "latin-1", "cp1252"):
+        try:
+            decoded = content.decode(encoding)
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        decoded = content.decode("utf-8", errors="ignore")
+    return re.sub(r"\s+", " ", decoded).strip()
+
+
+@dataclass(frozen=True)
+class SourceDocument:
+    url: str
+    text: str
+    version: str
+
+
+def _meta_version(meta: dict) -> str | None:
+    return meta.get("etag") or meta.get("last_modified") or meta.get("sha1")
+
+
+@dataclass
+class _MemoEntry:
+    text: str | None
+    validator: str | None
+    checked_at: float
+    error: Exception | None = None
+
+
+class OfficialSourceFetcher:
+    """
+    Camada HTTP compartilhada das fontes oficiais: um unico httpx.Client (pool de conexoes),
+    cache em disco revalidado por ETag/Last-Modified e memo do texto ja decodificado.
+    Dentro de ``ttl_seconds`` uma URL nao volta a rede; depois disso faz GET condicional.
+    Erros ficam memorizados so por ``error_ttl_seconds``; em falha passageira (5xx, 429,
+    rede) a copia em disco, mesmo vencida, continua sendo servida.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | os.PathLike[str] | None,
+        *,
+        ttl_seconds: float = 21600,
+        error_ttl_seconds: float = _DEFAULT_ERROR_TTL_SECONDS,
+        timeout_seconds: float = _HTTP_TIMEOUT_SECONDS,
+        transport: httpx.BaseTransport | None = None,
+    ):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.ttl_seconds = max(0.0, float(ttl_seconds))
+        self.error_ttl_seconds = max(0.0, min(float(error_ttl_seconds), self.ttl_seconds))
+        self.timeout_seconds = timeout_seconds
+        self._transport = transport
+        self._client: httpx.Client | None = None
+        self._client_lock = threading.Lock()
+        self._url_locks: dict[str, threading.Lock] = {}
+        self._url_locks_guard = threading.Lock()
+        self._memo: dict[str, _MemoEntry] = {}
+        self.network_requests = 0
+
+    # ------------------------------------------------------------------
+    # client / locks
+    # ------------------------------------------------------------------
+    def _get_client(self) -> httpx.Client:
+        with self._client_lock:
+            if self._client is None:
+                self._client = httpx.Client(
+                    timeout=self.timeout_seconds,
+                    headers=_HTTP_HEADERS,
+                    follow_redirects=True,
+                    transport=self._transport,
+                )
+            return self._client
+
+    def _lock_for(self, url: str) -> threading.Lock:
+        with self._url_locks_guard:
+            lock = self._url_locks.get(url)
+            if lock is None:
+                lock = threading.Lock()
+                self._url_locks[url] = lock
+            return lock
+
+    def close(self) -> None:
+        with self._client_lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    # ------------------------------------------------------------------
+    # disk cache
+    # ------------------------------------------------------------------
+    def _paths(self, url: str) -> tuple[Path, Path] | None:
+        if self.cache_dir is None:
+            return None
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{key}.body", self.cache_dir / f"{key}.json"
+
+    def _read_disk(self, url: str) -> tuple[dict, bytes] | None:
+        paths = self._paths(url)
+        if paths is None:
+            return None
+        body_path, meta_path = paths
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            body = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+        if meta.get("url") != url:
+            return None
+        return meta, body
+
+    def _write_disk(self, url: str, meta: dict, body: bytes | None) -> None:
+        paths = self._paths(url)
+        if paths is None:
+            return
+        body_path, meta_path = paths
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            if body is not None:
+                tmp_body = body_path.with_suffix(".body.tmp")
+                tmp_body.write_bytes(body)
+                os.replace(tmp_body, body_path)
+            tmp_meta = meta_path.with_suffix(".json.tmp")
+            tmp_meta.write_text(json.dumps(meta), encoding="utf-8")
+            os.replace(tmp_meta, meta_path)
+        except OSError:
+            # Cache em disco e best-effort; falha de escrita nao derruba o lookup.
+            pass
+
+    # ------------------------------------------------------------------
+    # fetch
+    # ------------------------------------------------------------------
+    def _is_fresh(self, checked_at: float, now: float) -> bool:
+        return (now - checked_at) < self.ttl_seconds
+
+    def _memo_is_fresh(self, memo: _MemoEntry, now: float) -> bool:
+        ttl = self.error_ttl_seconds if memo.error is not None else self.ttl_seconds
+        return (now - memo.checked_at) < ttl
+
+    def fetch_text(self, url: str) -> str:
+        return self.fetch_document(url).text
+
+    def fetch_document(self, url: str) -> SourceDocument:
+        with self._lock_for(url):
+            now = time.time()
+            memo = self._memo.get(url)
+            if memo is not None and self._memo_is_fresh(memo, now):
+                if memo.error is not None:
+                    raise memo.error
+                return SourceDocument(url=url, text=memo.text or "", version=memo.validator or "")
+
+            cached = self._read_disk(url)
+            if cached is not None:
+                meta, body = cached
+                validator = _meta_version(meta)
+                if self._is_fresh(float(meta.get("checked_at") or 0), now):
+                    return self._remember(url, body, validator, float(meta["checked_at"]), memo)
+
+            headers: dict[str, str] = {}
+            if cached is not None:
+                meta = cached[0]
+                if meta.get("etag"):
+                    headers["If-None-Match"] = meta["etag"]
+                if meta.get("last_modified"):
+                    headers["If-Modified-Since"] = meta["last_modified"]
+
+            self.network_requests += 1
+            try:
+                response = self._get_client().get(url, headers=headers)
+                if response.status_code == 304 and cached is not None:
+                    meta, body = cached
+                    meta["checked_at"] = now
+                    self._write_disk(url, meta, None)
+                    validator = _meta_version(meta)
+                    return self._remember(url, body, validator, now, memo)
+                response.raise_for_status()
+            except (httpx.HTTPStatusError, httpx.TransportError) as exc:
+                if cached is not None and _is_transient(exc):
+                    # Copia vencida em disco: serve e volta a tentar depois de error_ttl_seconds.
+                    meta, body = cached
+                    retry_at = now - self.ttl_seconds + self.error_ttl_seconds
+                    return self._remember(url, body, _meta_version(meta), retry_at, memo)
+                self._memo[url] = _MemoEntry(text=None, validator=None, checked_at=now, error=exc)
+                raise
+
+            body = response.content
+            meta = {
+                "url": url,
+                "etag": response.headers.get("etag"),
+                "last_modified": response.headers.get("last-modified"),
+                "checked_at": now,
+                "sha1": hashlib.sha1(body).hexdigest(),
+            }
+            self._write_disk(url, meta, body)
+            return self._remember(url, body, _meta_version(meta), now, None)
+
+    def _remember(
+        self,
+        url: str,
+        body: bytes,
+        validator: str | None,
+        checked_at: float,
+        previous: _MemoEntry | None,
+    ) -> SourceDocument:
+        # Revalidacao 304 com o mesmo validador reaproveita o texto ja decodificado.
+        if previous is not None and previous.error is None and previous.validator == validator and validator:
+            text = previous.text or ""
+        else:
+            text = decode_text(body)
+        self._memo[url] = _MemoEntry(text=text, validator=validator, checked_at=checked_at)
+        return SourceDocument(url=url, text=text, version=validator or "")
+
+
+_default_fetcher: OfficialSourceFetcher | None = None
+_default_fetcher_lock = threading.Lock()
+
+
+def get_fetcher() -> OfficialSourceFetcher:
+    global _default_fetcher
+    with _default_fetcher_lock:
+        if _default_fetcher is None:
+            _default_fetcher = OfficialSourceFetcher(
+                settings.OFFICIAL_SOURCES_CACHE_DIR or None,
+                ttl_seconds=settings.OFFICIAL_SOURCES_CACHE_TTL_SECONDS,
+                error_ttl_seconds=settings.OFFICIAL_SOURCES_ERROR_TTL_SECONDS,
+            )
+        return _default_fetcher
+
+
+def set_fetcher(fetcher: OfficialSourceFetcher | None) -> None:
+    global _default_fetcher
+    with _default_fetcher_lock:
+        previous = _default_fetcher
+        _default_fetcher = fetcher
+    if previous is not None and previous is not fetcher:
+        previous.close()
+
+
+def fetch_text(url: str) -> str:
+    return get_fetcher().fetch_text(url)
+
+
+def fetch_document(url: str) -> SourceDocument:
+    return get_fetcher().fetch_document(url)
@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import logging
+import threading
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Iterable
+
+from sqlalchemy import case, delete, exists, func, insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.base import utcnow
+from app.db.listeners import FlushChanges
+from app.db.session import SessionLocal
+from app.models.certificate_mirror import CertificateMirror
+from app.models.company import Company
+from app.models.company_licence import CompanyLicence
+from app.models.company_process import CompanyProcess
+from app.models.company_profile import CompanyProfile
+from app.models.company_tax import CompanyTax
+from app.models.licence_expiry import LicenceExpiry
+from app.models.org_kpi_snapshot import OrgKpiDirtyMark, OrgKpiSnapshot
+from app.services.alerts_feed import ALERT_SEVERITIES, AlertFilters, _licence_alert_query, _process_alerts
+
+logger = logging.getLogger("econtrole.org_kpi_snapshot")
+
+KPI_LICENCE_WINDOWS = (7, 30, 60)
+_TRACKED_MODELS = (Company, CompanyProfile, CompanyLicence, CompanyTax, CompanyProcess, CertificateMirror)
+_DELETE_CHUNK = 500
+
+
+def _mark(executor, org_ids: set[str]) -> None:
+    if not org_ids:
+        return
+    # So INSERT: nada de upsert na linha do snapshot, que seguraria lock ate o commit.
+    now = utcnow()
+    executor.execute(
+        insert(OrgKpiDirtyMark),
+        [{"id": str(uuid.uuid4()), "org_id": org_id, "marked_at": now} for org_id in sorted(org_ids)],
+    )
+
+
+def mark_org_kpis_dirty(db: Session, org_ids: Iterable[str | None]) -> None:
+    """Para escritas em lote (Core/bulk) que nao passam pelo flush do ORM."""
+    _mark(db, {str(org_id) for org_id in org_ids if org_id})
+
+
+def has_pending_kpi_marks(db: Session, org_id: str) -> bool:
+    return db.execute(select(exists().where(OrgKpiDirtyMark.org_id == org_id))).scalar_one()
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def _status_key(value: str | None, empty: str) -> str:
+    return str(value or "").strip().lower() or empty
+
+
+def compute_org_kpis(db: Session, org_id: str, today: date | None = None) -> dict[str, dict[str, int]]:
+    """KPIs do painel agrupados (``{grupo: {chave: valor}}``) com consultas agregadas por org."""
+    today = today or datetime.now(timezone.utc).date()
+
+    companies: dict[str, int] = {"empresas_ativas": 0, "empresas_inativas": 0}
+    for is_active, count in db.execute(
+        select(Company.is_active, func.count(Company.id)).where(Company.org_id == org_id).group_by(Company.is_active)
+    ):
+        companies["empresas_ativas" if is_active else "empresas_inativas"] += int(count)
+
+    active_profiles = (
+        select(CompanyProfile.risco_consolidado, CompanyProfile.score_status)
+        .join(Company, (Company.id == CompanyProfile.company_id) & (Company.org_id == CompanyProfile.org_id))
+        .where(CompanyProfile.org_id == org_id, Company.is_active.is_(True))
+        .subquery()
+    )
+    risk: dict[str, int] = {"risco_high": 0, "risco_medium": 0, "risco_low": 0, "risco_sem_classificacao": 0}
+    for tier, count in db.execute(
+        select(active_profiles.c.risco_consolidado, func.count()).group_by(active_profiles.c.risco_consolidado)
+    ):
+        key = f"risco_{_status_key(tier, 'sem_classificacao')}"
+        risk[key] = risk.get(key, 0) + int(count)
+    scores: dict[str, int] = {}
+    for score_status, count in db.execute(
+        select(active_profiles.c.score_status, func.count()).group_by(active_profiles.c.score_status)
+    ):
+        key = f"score_{_status_key(score_status, 'sem_status')}"
+        scores[key] = scores.get(key, 0) + int(count)
+
+    licence_query, status_key = _licence_alert_query(
+        db, org_id, AlertFilters(tipos=frozenset({"licenca"}), severities=frozenset(ALERT_SEVERITIES))
+    )
+    buckets = [
+        func.sum(
+            case(
+                (
+                    or_(
+                        LicenceExpiry.valid_until < today,
+                        LicenceExpiry.valid_until.is_(None) & status_key.like("%vencid%"),
+                    ),
+                    1,
+                ),
+                else_=0,
+            )
+        )
+    ]
+    for window in KPI_LICENCE_WINDOWS:
+        buckets.append(
+            func.sum(
+                case(
+                    (
+                        (LicenceExpiry.valid_until >= today)
+                        & (LicenceExpiry.valid_until <= today + timedelta(days=window)),
+                        1,
+                    ),
+                    else_=0,
+                )
+            )
+        )
+    licence_counts = licence_query.with_entities(*buckets).one()
+    licences = {"licencas_vencidas": int(licence_counts[0] or 0)}
+    for window, count in zip(KPI_LICENCE_WINDOWS, licence_counts[1:]):
+        licences[f"licencas_vencendo_{window}d"] = int(count or 0)
+
+    open_taxes = (
+        db.query(func.count(CompanyTax.id))
+        .join(Company, (Company.id == CompanyTax.company_id) & (Company.org_id == CompanyTax.org_id))
+        .filter(
+            CompanyTax.org_id == org_id,
+            Company.is_active.is_(True),
+            func.lower(func.trim(CompanyTax.status_taxas)) == "irregular",
+        )
+        .scalar()
+    )
+    stale_processes = _process_alerts(
+        db,
+        org_id,
+        today,
+        AlertFilters(tipos=frozenset({"processo"}), severities=frozenset(ALERT_SEVERITIES)),
+    )
+
+    # Mesmas faixas de ``compute_situacao``: vencido, ate 7 dias (alerta), ok, sem data.
+    situacao = case(
+        (CertificateMirror.not_after.is_(None), "desconhecido"),
+        (CertificateMirror.not_after < _day_start(today), "vencido"),
+        (CertificateMirror.not_after < _day_start(today + timedelta(days=8)), "alerta"),
+        else_="ok",
+    )
+    certificates = {f"certificados_{key}": 0 for key in ("vencido", "alerta", "ok", "desconhecido")}
+    for key, count in db.execute(
+        select(situacao, func.count(CertificateMirror.id))
+        .where(CertificateMirror.org_id == org_id)
+        .group_by(situacao)
+    ):
+        certificates[f"certificados_{key}"] = int(count)
+
+    return {
+        "empresas": companies,
+        "risco": risk,
+        "score": scores,
+        "licencas": licences,
+        "taxas": {"taxas_em_aberto": int(open_taxes or 0)},
+        "processos": {"processos_parados": len(stale_processes)},
+        "certificados": certificates,
+    }
+
+
+def refresh_org_kpi_snapshot(db: Session, org_id: str, *, now: datetime | None = None) -> OrgKpiSnapshot:
+    """Recalcula o snapshot da org na transacao do chamador (nao faz commit)."""
+    now = now or utcnow()
+    # So as marcas vistas antes do calculo saem; as que chegarem depois pedem outro recalculo.
+    seen = db.execute(select(OrgKpiDirtyMark.id).where(OrgKpiDirtyMark.org_id == org_id)).scalars().all()
+    snapshot = db.query(OrgKpiSnapshot).filter(OrgKpiSnapshot.org_id == org_id).first()
+    if snapshot is None:
+        snapshot = OrgKpiSnapshot(org_id=org_id)
+        db.add(snapshot)
+    snapshot.metrics = compute_org_kpis(db, org_id, now.date())
+    snapshot.computed_at = now
+    db.flush()
+    for offset in range(0, len(seen), _DELETE_CHUNK):
+        db.execute(
+            delete(OrgKpiDirtyMark)
+            .where(OrgKpiDirtyMark.id.in_(seen[offset : offset + _DELETE_CHUNK]))
+            .execution_options(synchronize_session=False)
+        )
+    return snapshot
+
+
+def refresh_due_kpi_snapshots(
+    db: Session,
+    *,
+    debounce_seconds: float | None = None,
+    reconcile_seconds: float | None = None,
+    now: datetime | None = None,
+) -> dict[str, int]:
+    """
+    Recalcula as orgs marcadas ha mais que a janela de coalescencia e as que nao sao
+    recalculadas desde o inicio do dia ou ha mais de ``reconcile_seconds``; faz commit por org.
+    """
+    now = now or utcnow()
+    window = settings.KPI_SNAPSHOT_DEBOUNCE_SECONDS if debounce_seconds is None else debounce_seconds
+    reconcile = settings.KPI_SNAPSHOT_RECONCILE_SECONDS if reconcile_seconds is None else reconcile_seconds
+    stale_before = max(now - timedelta(seconds=max(float(reconcile), 0.0)), _day_start(now.date()))
+    # Coalescencia: a org entra quando a marca mais antiga passou da janela.
+    marked = set(
+        db.execute(
+            select(OrgKpiDirtyMark.org_id)
+            .group_by(OrgKpiDirtyMark.org_id)
+            .having(func.min(OrgKpiDirtyMark.marked_at) <= now - timedelta(seconds=max(float(window), 0.0)))
+        ).scalars()
+    )
+    stale = set(
+        db.execute(
+            select(OrgKpiSnapshot.org_id).where(
+                or_(OrgKpiSnapshot.computed_at.is_(None), OrgKpiSnapshot.computed_at < stale_before)
+            )
+        ).scalars()
+    )
+    due = sorted(marked | stale)
+
+    stats = {"refreshed": 0, "failed": 0}
+    for org_id in due:
+        try:
+            refresh_org_kpi_snapshot(db, org_id, now=now)
+            db.commit()
+            stats["refreshed"] += 1
+        except Exception:
+            db.rollback()
+            stats["failed"] += 1
+            logger.exception("Falha ao recalcular KPIs org_id=%s", org_id)
+    return stats
+
+
+def get_org_kpi_snapshot(db: Session, org_id: str) -> OrgKpiSnapshot:
+    """Le o snapshot (uma linha); so calcula na hora se a org ainda nao tem nenhum."""
+    snapshot = db.query(OrgKpiSnapshot).filter(OrgKpiSnapshot.org_id == org_id).first()
+    if snapshot is None or snapshot.computed_at is None:
+        try:
+            snapshot = refresh_org_kpi_snapshot(db, org_id)
+            db.commit()
+        except IntegrityError:
+            # Primeira leitura concorrente: outra requisicao criou o snapshot antes; usa o dela.
+            db.rollback()
+            snapshot = db.query(OrgKpiSnapshot).filter(OrgKpiSnapshot.org_id == org_id).one()
+    return snapshot
+
+
+def _org_ids_for(obj: object) -> set[str]:
+    if not isinstance(obj, _TRACKED_MODELS):
+        return set()
+    org_id = getattr(obj, "org_id", None)
+    return {str(org_id)} if org_id else set()
+
+
+def mark_kpis_after_flush(session: Session, changes: FlushChanges) -> None:
+    org_ids: set[str] = set()
+    for obj in changes.changed_of(*_TRACKED_MODELS):
+        org_ids |= _org_ids_for(obj)
+    if org_ids:
+        _mark(session.connection(), org_ids)
+
+
+class OrgKpiSnapshotWorker:
+    """Consumidor em thread: recalcula snapshots marcados e reconcilia os antigos."""
+
+    def __init__(self, interval_seconds: float | None = None) -> None:
+        self._interval = interval_seconds
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def interval(self) -> float:
+        value = settings.KPI_SNAPSHOT_DEBOUNCE_SECONDS if self._interval is None else self._interval
+        return max(float(value), 0.5)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="org-kpi-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_once(self) -> dict[str, Any]:
+        db = SessionLocal()
+        try:
+            return refresh_due_kpi_snapshots(db)
+        finally:
+            db.close()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                stats = self.run_once()
+                if stats["refreshed"] or stats["failed"]:
+                    logger.info("KPIs recalculados orgs=%s falhas=%s", stats["refreshed"], stats["failed"])
+            except Exception:
+                logger.exception("Falha ao recalcular snapshots de KPI")
+
+
+org_kpi_snapshot_worker = OrgKpiSnapshotWorker()
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime, timezone
+
+from sqlalchemy import and_, delete, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.company_process import CompanyProcess
+from app.models.company_process_obs_history import CompanyProcessObsHistory
+from app.models.user import User
+
+OBS_HISTORY_DEFAULT_LIMIT = 200
+OBS_HISTORY_MAX_LIMIT = 500
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def record_process_obs_change(
+    db: Session,
+    process: CompanyProcess,
+    new_value: str | None,
+    *,
+    actor: User | None = None,
+    action: str = "updated",
+) -> CompanyProcessObsHistory:
+    """Troca ``obs`` do processo e registra a alteracao com um unico INSERT (sem commit)."""
+    entry = CompanyProcessObsHistory(
+        org_id=process.org_id,
+        process_id=process.id,
+        actor_id=getattr(actor, "id", None),
+        actor_email=getattr(actor, "email", None),
+        old_value=process.obs,
+        new_value=new_value,
+        action=action,
+    )
+    process.obs = new_value
+    db.add(entry)
+    return entry
+
+
+def encode_obs_history_cursor(entry: CompanyProcessObsHistory) -> str:
+    raw = json.dumps({"c": _as_utc(entry.changed_at).isoformat(), "i": entry.id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_obs_history_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return _as_utc(datetime.fromisoformat(payload["c"])), str(payload["i"])
+    except (ValueError, KeyError, TypeError) as exc:
+        raise ValueError("invalid obs history cursor") from exc
+
+
+def list_process_obs_history(
+    db: Session,
+    process_id: str,
+    *,
+    limit: int = OBS_HISTORY_DEFAULT_LIMIT,
+    cursor: str | None = None,
+) -> tuple[list[CompanyProcessObsHistory], str | None]:
+    """
+    Pagina o historico de tras para frente por keyset em (changed_at, id), apoiado em
+    ``ix_company_process_obs_history_process_changed``. Cada pagina traz as ``limit``
+    alteracoes mais recentes antes do cursor, em ordem cronologica; ``next_cursor`` aponta
+    para as anteriores.
+    """
+    stmt = select(CompanyProcessObsHistory).where(CompanyProcessObsHistory.process_id == process_id)
+    if cursor:
+        changed_at, entry_id = decode_obs_history_cursor(cursor)
+        stmt = stmt.where(
+            or_(
+                CompanyProcessObsHistory.changed_at < changed_at,
+                and_(CompanyProcessObsHistory.changed_at == changed_at, CompanyProcessObsHistory.id < entry_id),
+            )
+        )
+    rows = list(
+        db.execute(
+            stmt.order_by(CompanyProcessObsHistory.changed_at.desc(), CompanyProcessObsHistory.id.desc()).limit(
+                limit + 1
+            )
+        ).scalars()
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_obs_history_cursor(rows[-1]) if has_more and rows else None
+    rows.reverse()
+    return rows, next_cursor
+
+
+def delete_obs_history_for_processes(db: Session, org_id: str, process_ids_select) -> None:
+    """Remove o historico junto com processos apagados em lote (o DELETE em lote nao cascateia no SQLite)."""
+    db.execute(
+        delete(CompanyProcessObsHistory)
+        .where(
+            CompanyProcessObsHistory.org_id == org_id,
+            CompanyProcessObsHistory.process_id.in_(process_ids_select),
+        )
+        .execution_options(synchronize_session=False)
+    )
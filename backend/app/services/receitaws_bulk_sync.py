@@ -17,7 +17,7 @@ from app.db.session import SessionLocal
 from app.models.company import Company
 from app.models.company_profile import CompanyProfile
 from app.models.receitaws_bulk_sync_run import ReceitaWSBulkSyncRun
-from app.services.company_scoring import recalculate_company_score
+from app.services.company_score_queue import enqueue_company_scores
 from app.services.notifications import emit_org_notification
 
 
@@ -308,7 +308,7 @@ def run_receitaws_bulk_sync_job(run_id: str) -> None:
                         only_missing=run.only_missing,
                     )
                     if apply_result["changes"] and _changes_affect_company_score(apply_result["changes"]):
-                        recalculate_company_score(db, run.org_id, company.id)
+                        enqueue_company_scores(db, run.org_id, [company.id])
             except Exception as exc:
                 message = str(exc)
                 is_rate_limited = "429" in message
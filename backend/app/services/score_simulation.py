@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import dataclasses
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Iterable, NamedTuple
+
+from sqlalchemy import and_, select
+from sqlalchemy.orm import Session
+
+from app.core.cnae import extract_cnae_codes
+from app.models.company import Company
+from app.models.company_licence import CompanyLicence
+from app.models.company_profile import CompanyProfile
+from app.models.licence_expiry import LicenceExpiry
+from app.services.cnae_risk_catalog import CNAERiskCatalog, CNAERiskEntry, get_cnae_risk_catalog
+from app.services.company_scoring import compute_company_score
+from app.services.licence_expiries import LICENCE_EXPIRY_LABELS
+from app.services.licence_regulatory_rules import definitive_alvara_filter, evaluate_definitive_alvaras_bulk
+
+RENEWAL_DEFAULT_DAYS = 365
+SCORE_BUCKETS = ((0, 24), (25, 49), (50, 74), (75, 99), (100, None))
+NO_RISK_KEY = "NONE"
+
+_NO_DEFINITIVE = {"has_definitive_alvara": False, "definitive_alvara_invalidated": False}
+
+
+@dataclass(frozen=True)
+class CatalogChange:
+    """Linha proposta do catalogo; ``None`` mantem o valor atual e ``is_active=False`` remove."""
+
+    cnae_code: str
+    risk_tier: str | None = None
+    base_weight: int | None = None
+    is_active: bool | None = None
+
+
+@dataclass(frozen=True)
+class LicenceRenewal:
+    """Renova ``licence_type`` ate ``valid_until`` (vazio = hoje + 365) nas empresas que o tem."""
+
+    licence_type: str
+    valid_until: date | None = None
+    company_ids: frozenset[str] | None = None
+
+
+class _Expiry(NamedTuple):
+    licence_type: str
+    valid_until: date | None
+
+
+def _apply_catalog_changes(
+    catalog: CNAERiskCatalog, changes: Iterable[CatalogChange]
+) -> tuple[CNAERiskCatalog, set[str]]:
+    entries = dict(catalog.entries)
+    changed_codes: set[str] = set()
+    for change in changes:
+        code = change.cnae_code
+        current = entries.get(code)
+        changed_codes.add(code)
+        if change.is_active is False:
+            entries.pop(code, None)
+        elif current is None:
+            # Como na aprovacao de sugestao: CNAE fora do catalogo entra com o proposto.
+            entries[code] = CNAERiskEntry(
+                cnae_code=code,
+                cnae_text=f"CNAE {code}",
+                risk_tier=change.risk_tier,
+                base_weight=int(change.base_weight or 0),
+                sanitary_risk=None,
+                fire_risk=None,
+                environmental_risk=None,
+            )
+        else:
+            entries[code] = dataclasses.replace(
+                current,
+                risk_tier=change.risk_tier if change.risk_tier is not None else current.risk_tier,
+                base_weight=int(change.base_weight) if change.base_weight is not None else current.base_weight,
+            )
+    return CNAERiskCatalog(version=catalog.version, entries=entries), changed_codes
+
+
+def _renewed(
+    expiries: list[_Expiry], renewals: list[tuple[str, date, frozenset[str] | None]], company_id: str
+) -> list[_Expiry] | None:
+    """Vencimentos com as renovacoes aplicadas, ou ``None`` se nenhuma atinge a empresa."""
+    result = expiries
+    for licence_type, valid_until, company_ids in renewals:
+        if company_ids is not None and company_id not in company_ids:
+            continue
+        if any(entry.licence_type == licence_type for entry in result):
+            result = [
+                _Expiry(licence_type, valid_until) if entry.licence_type == licence_type else entry
+                for entry in result
+            ]
+    return None if result is expiries else result
+
+
+def _company_rows(db: Session, org_id: str) -> list[Any]:
+    return db.execute(
+        select(
+            Company.id,
+            Company.razao_social,
+            CompanyProfile.cnaes_principal,
+            CompanyProfile.cnaes_secundarios,
+        )
+        .outerjoin(
+            CompanyProfile,
+            and_(CompanyProfile.org_id == Company.org_id, CompanyProfile.company_id == Company.id),
+        )
+        .where(Company.org_id == org_id, Company.is_active.is_(True))
+    ).all()
+
+
+def _expiries_by_company(db: Session, org_id: str) -> dict[str, list[_Expiry]]:
+    grouped: dict[str, list[_Expiry]] = {}
+    rows = db.execute(
+        select(LicenceExpiry.company_id, LicenceExpiry.licence_type, LicenceExpiry.valid_until).where(
+            LicenceExpiry.org_id == org_id
+        )
+    )
+    for company_id, licence_type, valid_until in rows:
+        grouped.setdefault(str(company_id), []).append(_Expiry(licence_type, valid_until))
+    return grouped
+
+
+def _regulatory_by_company(db: Session, org_id: str) -> dict[str, dict[str, Any]]:
+    licences = db.query(CompanyLicence).filter(*definitive_alvara_filter(org_id)).all()
+    results = evaluate_definitive_alvaras_bulk(db, org_id, licences)
+    by_company: dict[str, dict[str, Any]] = {}
+    for licence in licences:
+        by_company.setdefault(str(licence.company_id), results[licence.id])
+    return by_company
+
+
+def _bucket_label(score: int) -> str:
+    for low, high in SCORE_BUCKETS:
+        if high is None:
+            if score >= low:
+                return f"{low}+"
+        elif low <= score <= high:
+            return f"{low}-{high}"
+    return f"{SCORE_BUCKETS[0][0]}-{SCORE_BUCKETS[0][1]}"
+
+
+def _distribution(scores: list[dict[str, Any]]) -> dict[str, Any]:
+    buckets = {_bucket_label(low): 0 for low, _high in SCORE_BUCKETS}
+    statuses: Counter[str] = Counter()
+    risks: Counter[str] = Counter()
+    total_score = 0
+    for score in scores:
+        buckets[_bucket_label(score["score_urgencia"])] += 1
+        statuses[score["score_status"]] += 1
+        risks[score["risco_consolidado"] or NO_RISK_KEY] += 1
+        total_score += score["score_urgencia"]
+    return {
+        "total": len(scores),
+        "avg_score_urgencia": round(total_score / len(scores), 2) if scores else 0.0,
+        "score_buckets": buckets,
+        "score_status": dict(sorted(statuses.items())),
+        "risco_consolidado": dict(sorted(risks.items())),
+    }
+
+
+def simulate_org_scores(
+    db: Session,
+    org_id: str,
+    *,
+    catalog_changes: Iterable[CatalogChange] = (),
+    licence_renewals: Iterable[LicenceRenewal] = (),
+    top: int = 20,
+    today: date | None = None,
+) -> dict[str, Any]:
+    """
+    Simulacao "e se" do score de todas as empresas ativas da org, sem gravar nada:
+    carrega perfis, calendario de vencimentos e alvaras definitivos em poucas consultas,
+    calcula o score atual e o proposto em memoria e devolve as duas distribuicoes.
+    So recalcula o "depois" das empresas atingidas por alguma alteracao.
+    """
+    today = today or date.today()
+    renewals: list[tuple[str, date, frozenset[str] | None]] = []
+    for renewal in licence_renewals:
+        if renewal.licence_type not in LICENCE_EXPIRY_LABELS:
+            raise ValueError(f"licence_type invalido: {renewal.licence_type}")
+        renewals.append(
+            (
+                renewal.licence_type,
+                renewal.valid_until or today + timedelta(days=RENEWAL_DEFAULT_DAYS),
+                frozenset(renewal.company_ids) if renewal.company_ids is not None else None,
+            )
+        )
+
+    catalog = get_cnae_risk_catalog(db)
+    proposed, changed_codes = _apply_catalog_changes(catalog, catalog_changes)
+    expiries = _expiries_by_company(db, org_id)
+    regulatory = _regulatory_by_company(db, org_id)
+
+    before_scores: list[dict[str, Any]] = []
+    after_scores: list[dict[str, Any]] = []
+    transitions: Counter[tuple[str, str]] = Counter()
+    changes: list[dict[str, Any]] = []
+    affected = 0
+    for company_id, razao_social, cnaes_principal, cnaes_secundarios in _company_rows(db, org_id):
+        company_id = str(company_id)
+        cnae_codes = extract_cnae_codes(cnaes_principal, cnaes_secundarios)
+        company_expiries = expiries.get(company_id, [])
+        regulatory_status = regulatory.get(company_id, _NO_DEFINITIVE)
+        before = compute_company_score(
+            cnae_codes=cnae_codes,
+            cnae_rows=catalog.lookup(cnae_codes),
+            expiry_entries=company_expiries,
+            regulatory_status=regulatory_status,
+            today=today,
+        )
+        renewed = _renewed(company_expiries, renewals, company_id) if renewals else None
+        if renewed is None and not changed_codes.intersection(cnae_codes):
+            after = before
+        else:
+            affected += 1
+            after = compute_company_score(
+                cnae_codes=cnae_codes,
+                cnae_rows=proposed.lookup(cnae_codes),
+                expiry_entries=renewed if renewed is not None else company_expiries,
+                regulatory_status=regulatory_status,
+                today=today,
+            )
+        before_scores.append(before)
+        after_scores.append(after)
+        if after is before or (
+            after["score_urgencia"] == before["score_urgencia"]
+            and after["score_status"] == before["score_status"]
+            and after["risco_consolidado"] == before["risco_consolidado"]
+        ):
+            continue
+        if after["score_status"] != before["score_status"]:
+            transitions[(before["score_status"], after["score_status"])] += 1
+        changes.append(
+            {
+                "company_id": company_id,
+                "razao_social": razao_social,
+                "score_before": before["score_urgencia"],
+                "score_after": after["score_urgencia"],
+                "delta": after["score_urgencia"] - before["score_urgencia"],
+                "status_before": before["score_status"],
+                "status_after": after["score_status"],
+                "risk_before": before["risco_consolidado"],
+                "risk_after": after["risco_consolidado"],
+            }
+        )
+
+    changes.sort(key=lambda item: (-abs(item["delta"]), item["razao_social"] or "", item["company_id"]))
+    return {
+        "total_companies": len(before_scores),
+        "affected_companies": affected,
+        "changed_companies": len(changes),
+        "before": _distribution(before_scores),
+        "after": _distribution(after_scores),
+        "status_transitions": [
+            {"from_status": from_status, "to_status": to_status, "count": count}
+            for (from_status, to_status), count in sorted(transitions.items(), key=lambda item: (-item[1], item[0]))
+        ],
+        "top_changes": changes[:top],
+    }
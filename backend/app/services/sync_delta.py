@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import base64
+import json
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Iterable
+
+from sqlalchemy import and_, delete, insert, or_, select, update
+from sqlalchemy.orm import Query, Session
+
+from app.core.config import settings
+from app.db.base import utcnow
+from app.db.listeners import FlushChanges
+from app.models.certificate_mirror import CertificateMirror
+from app.models.company import Company
+from app.models.company_licence import CompanyLicence
+from app.models.company_process import CompanyProcess
+from app.models.company_profile import CompanyProfile
+from app.models.company_tax import CompanyTax
+from app.models.sync_tombstone import SyncTombstone
+
+SYNC_ENTITIES: dict[str, Any] = {
+    "companies": Company,
+    "licences": CompanyLicence,
+    "taxes": CompanyTax,
+    "processes": CompanyProcess,
+    "certificates": CertificateMirror,
+}
+_ENTITY_BY_MODEL = {model: entity for entity, model in SYNC_ENTITIES.items()}
+# O /companies mostra campos do perfil e a situacao de debito das taxas: mudar um deles
+# "atualiza" a empresa para o sync.
+_COMPANY_CHILD_MODELS = (CompanyProfile, CompanyTax)
+
+SYNC_FROM_START = "0"
+SYNC_TOMBSTONE_LIMIT = 5000
+_BATCH_SIZE = 500
+
+
+@dataclass(frozen=True)
+class SyncCursor:
+    """Posicao do cliente: keyset (updated_at, id) das linhas e (deleted_at, id) das exclusoes."""
+
+    updated_at: datetime | None = None
+    last_id: str = ""
+    deleted_at: datetime | None = None
+    last_tombstone_id: str = ""
+
+
+def _iso(value: datetime | None) -> str | None:
+    if value is None:
+        return None
+    return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).isoformat()
+
+
+def _parse_iso(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def encode_sync_cursor(cursor: SyncCursor) -> str:
+    raw = json.dumps(
+        {
+            "t": _iso(cursor.updated_at),
+            "i": cursor.last_id,
+            "d": _iso(cursor.deleted_at),
+            "e": cursor.last_tombstone_id,
+        },
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_sync_cursor(value: str) -> SyncCursor:
+    """
+    Aceita ``0`` (desde o inicio), o cursor opaco devolvido pela ultima chamada ou uma
+    data ISO 8601 (linhas alteradas e exclusoes depois dela).
+    """
+    value = (value or "").strip()
+    if value == SYNC_FROM_START:
+        return SyncCursor()
+    try:
+        padded = value + "=" * (-len(value) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return SyncCursor(
+            updated_at=_parse_iso(payload["t"]),
+            last_id=str(payload["i"] or ""),
+            deleted_at=_parse_iso(payload["d"]),
+            last_tombstone_id=str(payload["e"] or ""),
+        )
+    except (ValueError, KeyError, TypeError, AttributeError):
+        pass
+    try:
+        since = _parse_iso(value)
+    except ValueError as exc:
+        raise ValueError("invalid updated_since cursor") from exc
+    if since is None:
+        raise ValueError("invalid updated_since cursor")
+    return SyncCursor(updated_at=since, deleted_at=since)
+
+
+@dataclass
+class SyncDelta:
+    rows: list[Any]
+    deleted: list[str]
+    next_cursor: str
+    has_more: bool
+
+
+def fetch_sync_delta(
+    db: Session,
+    org_id: str,
+    entity: str,
+    query: Query,
+    *,
+    cursor: SyncCursor,
+    limit: int,
+    primary: Callable[[Any], Any] = lambda row: row,
+    safety_lag_seconds: float | None = None,
+    now: datetime | None = None,
+) -> SyncDelta:
+    """
+    Linhas de ``query`` alteradas depois do cursor, por keyset em (updated_at, id) apoiado
+    nos indices ``ix_<tabela>_org_updated``, e ids excluidos desde a ultima chamada.
+    Sem cursor anterior (``0``) devolve tudo, pagina a pagina, e nenhuma exclusao.
+    ``primary`` extrai a entidade da linha quando a consulta traz tuplas (ex.: licenca+empresa).
+
+    ``updated_at``/``deleted_at`` sao gravados no flush, nao no commit: uma transacao que
+    fez flush antes de outra pode ficar visivel depois dela. Por isso linhas e exclusoes
+    mais novas que ``now - SYNC_SAFETY_LAG_SECONDS`` ficam para a proxima chamada e o
+    cursor nunca passa desse horizonte.
+    """
+    model = SYNC_ENTITIES[entity]
+    lag = settings.SYNC_SAFETY_LAG_SECONDS if safety_lag_seconds is None else safety_lag_seconds
+    horizon = (now or utcnow()) - timedelta(seconds=max(float(lag), 0.0))
+
+    items_query = query.filter(model.updated_at <= horizon)
+    if cursor.updated_at is not None:
+        items_query = items_query.filter(
+            or_(
+                model.updated_at > cursor.updated_at,
+                and_(model.updated_at == cursor.updated_at, model.id > cursor.last_id),
+            )
+        )
+    rows = items_query.order_by(model.updated_at.asc(), model.id.asc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    updated_at, last_id = cursor.updated_at, cursor.last_id
+    if rows:
+        last = primary(rows[-1])
+        updated_at, last_id = last.updated_at, last.id
+
+    deleted: list[str] = []
+    deleted_at, last_tombstone_id = cursor.deleted_at, cursor.last_tombstone_id
+    if deleted_at is None:
+        # Carga inicial: exclusoes anteriores nao interessam a quem ainda nao tem copia.
+        deleted_at, last_tombstone_id = horizon, ""
+    else:
+        tombstones = db.execute(
+            select(SyncTombstone.id, SyncTombstone.entity_id, SyncTombstone.deleted_at)
+            .where(
+                SyncTombstone.org_id == org_id,
+                SyncTombstone.entity == entity,
+                SyncTombstone.deleted_at <= horizon,
+                or_(
+                    SyncTombstone.deleted_at > deleted_at,
+                    and_(SyncTombstone.deleted_at == deleted_at, SyncTombstone.id > last_tombstone_id),
+                ),
+            )
+            .order_by(SyncTombstone.deleted_at.asc(), SyncTombstone.id.asc())
+            .limit(SYNC_TOMBSTONE_LIMIT + 1)
+        ).all()
+        if len(tombstones) > SYNC_TOMBSTONE_LIMIT:
+            has_more = True
+            tombstones = tombstones[:SYNC_TOMBSTONE_LIMIT]
+        if tombstones:
+            deleted = list(dict.fromkeys(entity_id for _, entity_id, _ in tombstones))
+            last_tombstone_id, deleted_at = tombstones[-1][0], tombstones[-1][2]
+
+    next_cursor = encode_sync_cursor(
+        SyncCursor(
+            updated_at=updated_at,
+            last_id=last_id,
+            deleted_at=deleted_at,
+            last_tombstone_id=last_tombstone_id,
+        )
+    )
+    return SyncDelta(rows=rows, deleted=deleted, next_cursor=next_cursor, has_more=has_more)
+
+
+def _chunks(values: list[Any], size: int) -> Iterable[list[Any]]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def _insert_tombstones(executor, keys: Iterable[tuple[str, str, str]]) -> None:
+    now = utcnow()
+    rows = [
+        {"id": str(uuid.uuid4()), "org_id": org_id, "entity": entity, "entity_id": entity_id, "deleted_at": now}
+        for org_id, entity, entity_id in sorted(set(keys))
+    ]
+    for chunk in _chunks(rows, _BATCH_SIZE):
+        executor.execute(insert(SyncTombstone), chunk)
+
+
+def _touch_companies(executor, keys: Iterable[tuple[str, str]]) -> None:
+    by_org: dict[str, set[str]] = {}
+    for org_id, company_id in keys:
+        by_org.setdefault(org_id, set()).add(company_id)
+    now = utcnow()
+    for org_id, company_ids in by_org.items():
+        for chunk in _chunks(sorted(company_ids), _BATCH_SIZE):
+            executor.execute(
+                update(Company).where(Company.org_id == org_id, Company.id.in_(chunk)).values(updated_at=now)
+            )
+
+
+def delete_with_tombstones(db: Session, model: Any, org_id: str, *criteria) -> int:
+    """DELETE em lote que registra tombstones dos ids removidos (o flush do ORM nao ve estes)."""
+    ids = list(db.execute(select(model.id).where(model.org_id == org_id, *criteria)).scalars())
+    deleted = 0
+    for chunk in _chunks(ids, _BATCH_SIZE):
+        result = db.execute(
+            delete(model).where(model.org_id == org_id, model.id.in_(chunk)).execution_options(synchronize_session=False)
+        )
+        deleted += int(result.rowcount or 0)
+    _insert_tombstones(db, ((org_id, _ENTITY_BY_MODEL[model], str(row_id)) for row_id in ids))
+    return deleted
+
+
+def touch_companies_where(db: Session, org_id: str, company_ids_select) -> None:
+    """Marca como alteradas (para o sync) as empresas de um UPDATE em lote de perfis/taxas."""
+    db.execute(
+        update(Company)
+        .where(Company.org_id == org_id, Company.id.in_(company_ids_select))
+        .values(updated_at=utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def record_sync_changes_after_flush(session: Session, changes: FlushChanges) -> None:
+    tombstones: set[tuple[str, str, str]] = set()
+    touched: set[tuple[str, str]] = set()
+    deleted_companies: set[str] = set()
+    for obj in changes.deleted_of(*_ENTITY_BY_MODEL):
+        entity = _ENTITY_BY_MODEL.get(type(obj))
+        if entity and obj.org_id and obj.id:
+            tombstones.add((obj.org_id, entity, str(obj.id)))
+            if entity == "companies":
+                deleted_companies.add(str(obj.id))
+    for obj in changes.changed_of(*_COMPANY_CHILD_MODELS):
+        if obj.org_id and obj.company_id:
+            touched.add((obj.org_id, str(obj.company_id)))
+    touched = {key for key in touched if key[1] not in deleted_companies}
+    if not tombstones and not touched:
+        return
+    connection = session.connection()
+    if tombstones:
+        _insert_tombstones(connection, tombstones)
+    if touched:
+        _touch_companies(connection, touched)
@@ -9,6 +9,7 @@ from pathlib import Path
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.db.listeners import register_session_listeners
 from app.db.session import SessionLocal
 from app.models.company import Company
 from app.models.company_licence import CompanyLicence
@@ -23,7 +24,7 @@ from app.services.licence_files import (
     is_safe_fs_dirname,
     sha256_bytes,
 )
-from app.services.company_scoring import recalculate_company_score
+from app.services.company_score_queue import enqueue_company_scores
 from app.core.regulatory import (
     DEFAULT_ALVARA_FUNCIONAMENTO_KIND,
     infer_alvara_funcionamento_kind,
@@ -69,6 +70,8 @@ def _upsert_licence_projection(
     if not row:
         row = CompanyLicence(org_id=company.org_id, company_id=company.id, municipio=company.municipio, raw={})
         db.add(row)
+        # A sessao nao usa autoflush: sem isso o proximo grupo da mesma pasta criaria outra linha.
+        db.flush()
 
     raw = dict(row.raw) if isinstance(row.raw, dict) else {}
     current_kind = str(raw.get(f"source_kind_{licence_field}") or "").strip().lower()
@@ -164,14 +167,15 @@ def process_company_licence_dir(db: Session, company: Company, root_dir: Path) -
         return stats
 
     best_by_group: dict[str, tuple[LicenceSuggestion, str]] = {}
-    for file_path in target_dir.iterdir():
-        if not file_path.is_file():
-            continue
+    file_paths = [
+        file_path
+        for file_path in target_dir.iterdir()
+        if file_path.is_file() and not file_path.name.lower().endswith(".tmp")
+    ]
+    for file_path in file_paths:
         filename = file_path.name
-        if filename.lower().endswith(".tmp"):
-            continue
-
         try:
+            # Classificacao memoizada por nome; erro num arquivo conta so para ele.
             suggestion = parse_filename_to_suggestion(filename)
             if not suggestion.suggested_group or not suggestion.mapped_field or suggestion.confidence < 0.45:
                 stats["skipped"] += 1
@@ -267,7 +271,7 @@ def process_company_licence_dir(db: Session, company: Company, root_dir: Path) -
             projection_changed = projection_changed or bool(changed)
         db.commit()
         if projection_changed:
-            recalculate_company_score(db, company.org_id, company.id)
+            enqueue_company_scores(db, company.org_id, [company.id])
             db.commit()
     return stats
 
@@ -296,6 +300,7 @@ def main() -> int:
     parser.add_argument("--interval-seconds", type=int, default=15, help="Loop interval in seconds")
     args = parser.parse_args()
 
+    register_session_listeners()
     logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
 
     if not args.loop:
@@ -2,17 +2,23 @@ import asyncio
 from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 
 from app.api.v1.api import api_router
 from app.api.v1.endpoints.lookups import ensure_rfb_agent_running, stop_rfb_agent
 from app.core.config import settings
 from app.core.logging import configure_logging
+from app.core.metrics import QueryMetricsMiddleware, metrics_registry
 from app.core.seed import ensure_seed_data
+from app.db.listeners import register_session_listeners
 from app.db.session import SessionLocal
+from app.services.certificados_mirror import certhub_webhook_recovery_worker
+from app.services.cnae_risk_catalog import cnae_catalog_listener
+from app.services.company_score_queue import company_score_queue_worker
+from app.services.org_kpi_snapshot import org_kpi_snapshot_worker
 
 configure_logging(settings.LOG_LEVEL)
 
@@ -27,9 +33,17 @@ def seed_dev_data():
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    register_session_listeners()
     seed_dev_data()
 
     prewarm_task = None
+    cnae_catalog_listener.start()
+    if settings.SCORE_QUEUE_WORKER_ENABLED:
+        company_score_queue_worker.start()
+    if settings.KPI_SNAPSHOT_WORKER_ENABLED:
+        org_kpi_snapshot_worker.start()
+    if settings.CERTHUB_WEBHOOK_RECOVERY_ENABLED:
+        certhub_webhook_recovery_worker.start()
     try:
         prewarm_task = asyncio.create_task(ensure_rfb_agent_running())
         yield
@@ -37,6 +51,10 @@ async def lifespan(app: FastAPI):
         if prewarm_task and not prewarm_task.done():
             prewarm_task.cancel()
         stop_rfb_agent()
+        cnae_catalog_listener.stop()
+        company_score_queue_worker.stop()
+        org_kpi_snapshot_worker.stop()
+        certhub_webhook_recovery_worker.stop()
 
 
 app = FastAPI(
@@ -48,6 +66,9 @@ app = FastAPI(
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+if settings.QUERY_METRICS_ENABLED:
+    app.add_middleware(QueryMetricsMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
@@ -56,6 +77,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+_LOOPBACK_HOSTS = {"127.0.0.1", "::1", "localhost"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics(request: Request) -> PlainTextResponse:
+    client_host = request.client.host if request.client else ""
+    if not settings.METRICS_ALLOW_REMOTE and client_host not in _LOOPBACK_HOSTS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Metrics are local only")
+    return PlainTextResponse(
+        metrics_registry.render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 # Mount static files for ReDoc
 static_dir = Path(__file__).parent / "app" / "static"
 if static_dir.exists():
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+BACKEND_DIR = ROOT_DIR / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.core.config import settings  # noqa: E402
+from app.db.listeners import register_session_listeners  # noqa: E402
+from app.db.session import SessionLocal  # noqa: E402
+from app.models.org import Org  # noqa: E402
+from app.services.notifications import (  # noqa: E402
+    ARCHIVE_BATCH_SIZE,
+    archive_read_notifications,
+    rebuild_unread_counters,
+)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Move notificacoes lidas antigas para notification_events_archive em lotes."
+    )
+    parser.add_argument("--older-than-days", type=int, default=settings.NOTIFICATIONS_ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--org-slug", default=None)
+    parser.add_argument(
+        "--rebuild-counters",
+        action="store_true",
+        help="recalcula os contadores de nao lidas das orgs ao final",
+    )
+    args = parser.parse_args()
+    register_session_listeners()
+
+    db = SessionLocal()
+    try:
+        org_ids: list[str]
+        if args.org_slug:
+            org = db.query(Org).filter(Org.slug == args.org_slug).first()
+            if not org:
+                print(f"Org nao encontrada para slug={args.org_slug}", file=sys.stderr)
+                return 2
+            org_ids = [org.id]
+        else:
+            org_ids = [row[0] for row in db.query(Org.id).all()]
+
+        result = archive_read_notifications(
+            db,
+            older_than_days=args.older_than_days,
+            batch_size=args.batch_size,
+            org_id=org_ids[0] if args.org_slug else None,
+        )
+        print(
+            f"[archive_notifications] arquivadas={result['archived']} lotes={result['batches']} "
+            f"older_than_days={args.older_than_days}"
+        )
+
+        if args.rebuild_counters:
+            for org_id in org_ids:
+                unread = rebuild_unread_counters(db, org_id)
+                db.commit()
+                print(f"[archive_notifications] contadores org_id={org_id} nao_lidas={unread}")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,8 +1,17 @@
 from __future__ import annotations
 
 import argparse
+import json
+import multiprocessing
+import os
+import queue
 import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any
 
 from sqlalchemy import and_
 
@@ -12,9 +21,37 @@ BACKEND_DIR = ROOT_DIR / "backend"
 if str(BACKEND_DIR) not in sys.path:
     sys.path.insert(0, str(BACKEND_DIR))
 
-from app.db.session import SessionLocal  # noqa: E402
+from app.db.listeners import register_session_listeners  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
 from app.models.company_profile import CompanyProfile  # noqa: E402
-from app.services.company_scoring import recalculate_company_score  # noqa: E402
+from app.services.company_scoring import (  # noqa: E402
+    recalculate_company_score,
+    recalculate_company_scores_bulk,
+)
+
+LOG_PREFIX = "[backfill_company_scores]"
+SHARD_MODES = ("org", "range")
+PROGRESS_INTERVAL_SECONDS = 5.0
+# SQLite serializa escritas: processos concorrentes so geram "database is locked".
+_SERIAL_DIALECTS = {"sqlite"}
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Faixa ``[first_company_id, last_company_id]`` de uma org; ``key`` identifica no checkpoint."""
+
+    key: str
+    org_id: str
+    first_company_id: str
+    last_company_id: str
+    total: int
+
+
+@dataclass(frozen=True)
+class ShardOptions:
+    batch_size: int
+    dry_run: bool
+    checkpoint: str | None
 
 
 def _load_targets(org_id: str | None, limit: int | None) -> list[tuple[str, str]]:
@@ -33,76 +70,301 @@ def _load_targets(org_id: str | None, limit: int | None) -> list[tuple[str, str]
         db.close()
 
 
-def run_backfill(
-    *,
-    org_id: str | None,
-    limit: int | None,
-    batch_size: int,
-    dry_run: bool,
-) -> int:
-    targets = _load_targets(org_id=org_id, limit=limit)
-    total_read = len(targets)
-    processed = 0
-    success = 0
-    failures = 0
-    pending_batch = 0
+def _plan_shards(targets: list[tuple[str, str]], *, shard_by: str, shard_size: int) -> list[Shard]:
+    """Shards nunca cruzam orgs: cada lote do worker consulta uma org so."""
+    by_org: dict[str, list[str]] = {}
+    for org_id, company_id in targets:
+        by_org.setdefault(org_id, []).append(company_id)
+    shards: list[Shard] = []
+    for org_id, company_ids in by_org.items():
+        size = len(company_ids) if shard_by == "org" else shard_size
+        for start in range(0, len(company_ids), size):
+            chunk = company_ids[start : start + size]
+            key = org_id if shard_by == "org" else f"{org_id}:{chunk[0]}:{chunk[-1]}"
+            shards.append(Shard(key, org_id, chunk[0], chunk[-1], len(chunk)))
+    # Orgs grandes primeiro: o pool termina mais equilibrado.
+    shards.sort(key=lambda shard: -shard.total)
+    return shards
 
-    print(
-        f"[backfill_company_scores] inicio total={total_read} "
-        f"org_id={org_id or '-'} limit={limit if limit is not None else '-'} "
-        f"batch_size={batch_size} dry_run={dry_run}"
-    )
 
+def _checkpoint_params(args: dict[str, Any]) -> dict[str, Any]:
+    return {key: args[key] for key in ("org_id", "limit", "shard_by", "shard_size")}
+
+
+def _load_checkpoint(path: str, params: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    """
+    Checkpoint em JSONL (append de uma linha por lote confirmado, seguro entre processos):
+    a primeira linha guarda os parametros; para cada shard vale a ultima linha.
+    """
+    state: dict[str, dict[str, Any]] = {}
+    lines: list[str] = []
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as handle:
+            lines = [line.strip() for line in handle if line.strip()]
+    if not lines:
+        _append_checkpoint(path, {"params": params})
+        return state
+    for number, line in enumerate(lines):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            # linha truncada por interrupcao no meio da escrita
+            continue
+        if number == 0:
+            if record.get("params") != params:
+                raise ValueError(
+                    f"checkpoint {path} foi criado com outros parametros ({record.get('params')}); "
+                    "use os mesmos parametros ou apague o arquivo."
+                )
+            continue
+        state[record["shard"]] = record
+    return state
+
+
+def _append_checkpoint(path: str, record: dict[str, Any]) -> None:
+    with open(path, "a", encoding="utf-8") as handle:
+        handle.write(json.dumps(record) + "\n")
+        handle.flush()
+
+
+def _init_worker() -> None:
+    # Conexoes herdadas do processo pai (fork) nao podem ser reusadas no filho.
+    engine.dispose(close=False)
+    register_session_listeners()
+
+
+def _recalculate_one_by_one(db, org_id: str, company_ids: list[str], stats: dict[str, int]) -> None:
+    """Fallback de um lote que falhou em bloco: isola a empresa com erro em savepoint."""
+    for company_id in company_ids:
+        stats["processed"] += 1
+        try:
+            with db.begin_nested():
+                result = recalculate_company_score(db, org_id, company_id)
+            if not result.get("updated"):
+                stats["missing"] += 1
+                continue
+            stats["updated"] += 1
+            if result.get("changed"):
+                stats["changed"] += 1
+        except Exception as exc:
+            stats["failures"] += 1
+            print(f"{LOG_PREFIX} erro org_id={org_id} company_id={company_id} detalhe={exc}", flush=True)
+
+
+def _run_shard(shard: Shard, options: ShardOptions, resume_after: str | None, progress) -> dict[str, Any]:
+    """Processa um shard em lotes de ``batch_size``; cada lote confirmado vai para o checkpoint."""
+    stats = {"processed": 0, "updated": 0, "changed": 0, "missing": 0, "failures": 0}
+    started = time.monotonic()
+    last_company_id = resume_after
+    checkpointed = True
     db = SessionLocal()
     try:
-        for target_org_id, target_company_id in targets:
-            processed += 1
+        while True:
+            query = db.query(CompanyProfile.company_id).filter(
+                CompanyProfile.org_id == shard.org_id,
+                CompanyProfile.company_id >= shard.first_company_id,
+                CompanyProfile.company_id <= shard.last_company_id,
+            )
+            if last_company_id is not None:
+                query = query.filter(CompanyProfile.company_id > last_company_id)
+            company_ids = [
+                str(company_id)
+                for (company_id,) in query.order_by(CompanyProfile.company_id.asc()).limit(options.batch_size)
+            ]
+            if not company_ids:
+                break
+
+            transaction = db.begin_nested() if options.dry_run else None
             try:
-                if dry_run:
-                    nested_tx = db.begin_nested()
-                    try:
-                        recalculate_company_score(db, target_org_id, target_company_id)
-                    finally:
-                        nested_tx.rollback()
-                else:
-                    with db.begin_nested():
-                        recalculate_company_score(db, target_org_id, target_company_id)
-                    pending_batch += 1
-                success += 1
+                batch = recalculate_company_scores_bulk(db, shard.org_id, company_ids)
+                for key, value in batch.items():
+                    stats[key] += value
             except Exception as exc:
-                failures += 1
                 print(
-                    f"[backfill_company_scores] erro org_id={target_org_id} "
-                    f"company_id={target_company_id} detalhe={exc}"
+                    f"{LOG_PREFIX} lote falhou em bloco shard={shard.key} detalhe={exc}; recalculando um a um",
+                    flush=True,
                 )
+                if transaction is not None:
+                    transaction.rollback()
+                    transaction = db.begin_nested()
+                else:
+                    db.rollback()
+                _recalculate_one_by_one(db, shard.org_id, company_ids, stats)
 
-            if not dry_run and pending_batch >= batch_size:
+            if transaction is not None:
+                transaction.rollback()
+            else:
                 db.commit()
-                print(
-                    f"[backfill_company_scores] commit batch processados={processed} "
-                    f"sucesso={success} falhas={failures}"
+            last_company_id = company_ids[-1]
+            # Depois de uma falha o checkpoint para de avancar: a retomada refaz dali em diante.
+            if stats["failures"]:
+                checkpointed = False
+            if checkpointed and options.checkpoint and not options.dry_run:
+                _append_checkpoint(
+                    options.checkpoint,
+                    {"shard": shard.key, "last_company_id": last_company_id, "done": False},
                 )
-                pending_batch = 0
+            progress.put(len(company_ids))
 
-        if dry_run:
+        if options.dry_run:
             db.rollback()
-        elif pending_batch > 0:
-            db.commit()
-            print(
-                f"[backfill_company_scores] commit final processados={processed} "
-                f"sucesso={success} falhas={failures}"
+        elif checkpointed and options.checkpoint:
+            _append_checkpoint(
+                options.checkpoint,
+                {"shard": shard.key, "last_company_id": last_company_id, "done": True},
             )
     except Exception:
         db.rollback()
         raise
     finally:
         db.close()
+    stats["elapsed"] = time.monotonic() - started
+    return stats
+
+
+class _ProgressReporter:
+    """Soma o progresso enviado pelos workers e imprime taxa e ETA a cada intervalo."""
+
+    def __init__(self, progress, total: int, interval: float = PROGRESS_INTERVAL_SECONDS) -> None:
+        self._progress = progress
+        self._total = total
+        self._interval = interval
+        self._done = 0
+        self._started = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="backfill-progress", daemon=True)
+
+    @property
+    def done(self) -> int:
+        return self._done
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._drain()
+
+    def rate(self) -> float:
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        return self._done / elapsed
 
+    def _drain(self) -> None:
+        while True:
+            try:
+                self._done += self._progress.get_nowait()
+            except queue.Empty:
+                return
+
+    def _run(self) -> None:
+        last_report = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self._done += self._progress.get(timeout=0.5)
+            except queue.Empty:
+                pass
+            if time.monotonic() - last_report >= self._interval:
+                last_report = time.monotonic()
+                self.report()
+
+    def report(self) -> None:
+        rate = self.rate()
+        remaining = max(self._total - self._done, 0)
+        eta = f"{remaining / rate:.0f}s" if rate > 0 else "-"
+        percent = (self._done / self._total * 100) if self._total else 100.0
+        print(
+            f"{LOG_PREFIX} progresso {self._done}/{self._total} ({percent:.1f}%) "
+            f"taxa={rate:.1f}/s eta={eta}",
+            flush=True,
+        )
+
+
+def run_backfill(
+    *,
+    org_id: str | None,
+    limit: int | None,
+    batch_size: int,
+    dry_run: bool,
+    workers: int = 1,
+    shard_by: str = "org",
+    shard_size: int = 5000,
+    checkpoint: str | None = None,
+) -> int:
+    if shard_by not in SHARD_MODES:
+        raise ValueError(f"--shard-by deve ser um de {', '.join(SHARD_MODES)}.")
+    if workers > 1 and engine.dialect.name in _SERIAL_DIALECTS:
+        print(f"{LOG_PREFIX} {engine.dialect.name} nao suporta escrita paralela; usando workers=1", flush=True)
+        workers = 1
+    targets = _load_targets(org_id=org_id, limit=limit)
+    total_read = len(targets)
+    shards = _plan_shards(targets, shard_by=shard_by, shard_size=shard_size)
+
+    state: dict[str, dict[str, Any]] = {}
+    if checkpoint and not dry_run:
+        state = _load_checkpoint(
+            checkpoint,
+            _checkpoint_params(
+                {"org_id": org_id, "limit": limit, "shard_by": shard_by, "shard_size": shard_size}
+            ),
+        )
+    pending = [shard for shard in shards if not state.get(shard.key, {}).get("done")]
+    resume_after = {shard.key: state.get(shard.key, {}).get("last_company_id") for shard in pending}
+    skipped = len(shards) - len(pending)
+
+    print(
+        f"{LOG_PREFIX} inicio total={total_read} "
+        f"org_id={org_id or '-'} limit={limit if limit is not None else '-'} "
+        f"batch_size={batch_size} dry_run={dry_run} workers={workers} shard_by={shard_by} "
+        f"shards={len(shards)} retomados={skipped} checkpoint={checkpoint or '-'}",
+        flush=True,
+    )
+
+    # Total do progresso: o que falta, descontando shards concluidos (ETA aproximada nos parciais).
+    remaining_total = sum(shard.total for shard in pending)
+    options = ShardOptions(batch_size=batch_size, dry_run=dry_run, checkpoint=checkpoint)
+    totals = {"processed": 0, "updated": 0, "changed": 0, "missing": 0, "failures": 0}
+    manager = multiprocessing.Manager() if workers > 1 else None
+    progress = manager.Queue() if manager is not None else queue.Queue()
+    reporter = _ProgressReporter(progress, remaining_total)
+    reporter.start()
+    try:
+        if manager is None:
+            for shard in pending:
+                _merge_shard(totals, shard, _run_shard(shard, options, resume_after[shard.key], progress))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                futures = {
+                    pool.submit(_run_shard, shard, options, resume_after[shard.key], progress): shard
+                    for shard in pending
+                }
+                for future in as_completed(futures):
+                    _merge_shard(totals, futures[future], future.result())
+    finally:
+        reporter.stop()
+        if manager is not None:
+            manager.shutdown()
+
+    reporter.report()
+    print(
+        f"{LOG_PREFIX} resumo total_lido={total_read} "
+        f"processados={totals['processed']} sucesso={totals['updated']} alterados={totals['changed']} "
+        f"ignorados={totals['missing']} falhas={totals['failures']} taxa={reporter.rate():.1f}/s",
+        flush=True,
+    )
+    return 0 if totals["failures"] == 0 else 1
+
+
+def _merge_shard(totals: dict[str, int], shard: Shard, stats: dict[str, Any]) -> None:
+    for key in totals:
+        totals[key] += int(stats.get(key, 0))
+    elapsed = float(stats.get("elapsed") or 0.0)
+    rate = stats["processed"] / elapsed if elapsed > 0 else 0.0
     print(
-        f"[backfill_company_scores] resumo total_lido={total_read} "
-        f"processados={processed} sucesso={success} falhas={failures}"
+        f"{LOG_PREFIX} shard concluido {shard.key} processados={stats['processed']} "
+        f"falhas={stats['failures']} tempo={elapsed:.1f}s taxa={rate:.1f}/s",
+        flush=True,
     )
-    return 0 if failures == 0 else 1
 
 
 def main() -> int:
@@ -126,18 +388,49 @@ def main() -> int:
         action="store_true",
         help="Executa sem persistir alterações no banco.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processos em paralelo; 1 executa no processo atual (default: 1).",
+    )
+    parser.add_argument(
+        "--shard-by",
+        choices=SHARD_MODES,
+        default="org",
+        help="Divide o trabalho por org ou por faixas de company_id dentro da org (default: org).",
+    )
+    parser.add_argument(
+        "--shard-size",
+        type=int,
+        default=5000,
+        help="Empresas por shard com --shard-by range (default: 5000).",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        help="Arquivo JSONL de checkpoint; reexecutar com o mesmo arquivo retoma de onde parou.",
+    )
     args = parser.parse_args()
+    register_session_listeners()
 
     if args.limit is not None and args.limit <= 0:
         raise ValueError("--limit deve ser maior que zero quando informado.")
     if args.batch_size <= 0:
         raise ValueError("--batch-size deve ser maior que zero.")
+    if args.workers <= 0:
+        raise ValueError("--workers deve ser maior que zero.")
+    if args.shard_size <= 0:
+        raise ValueError("--shard-size deve ser maior que zero.")
 
     return run_backfill(
         org_id=args.org_id,
         limit=args.limit,
         batch_size=args.batch_size,
         dry_run=args.dry_run,
+        workers=args.workers,
+        shard_by=args.shard_by,
+        shard_size=args.shard_size,
+        checkpoint=args.checkpoint,
     )
 
 
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+DATASETS_DIR = ROOT_DIR / "scripts" / "datasets"
+DATASET_KINDS = ("companies", "licences", "taxes", "processes")
+
+_NAME_PREFIXES = (
+    "Comercial",
+    "Distribuidora",
+    "Auto Pecas",
+    "Padaria",
+    "Farmacia",
+    "Restaurante",
+    "Mercado",
+    "Clinica",
+    "Transportadora",
+    "Construtora",
+    "Oficina",
+    "Torneadora",
+)
+_NAME_SUFFIXES = ("LTDA", "ME", "EIRELI", "LTDA EPP", "SA")
+_MUNICIPIOS = (
+    ("Anápolis", "GO"),
+    ("Goiânia", "GO"),
+    ("Aparecida de Goiânia", "GO"),
+    ("Senador Canedo", "GO"),
+    ("Trindade", "GO"),
+    ("Brasília", "DF"),
+)
+_CNAES = (
+    ("47.11-3-02", "Comércio varejista de mercadorias em geral - supermercados"),
+    ("56.11-2-01", "Restaurantes e similares"),
+    ("47.71-7-01", "Comércio varejista de produtos farmacêuticos"),
+    ("10.91-1-02", "Fabricação de produtos de padaria e confeitaria"),
+    ("45.30-7-03", "Comércio a varejo de peças e acessórios para veículos"),
+    ("49.30-2-02", "Transporte rodoviário de carga intermunicipal"),
+    ("86.30-5-03", "Atividade médica ambulatorial restrita a consultas"),
+    ("41.20-4-00", "Construção de edifícios"),
+    ("25.39-0-01", "Serviços de usinagem, tornearia e solda"),
+    ("69.20-6-01", "Atividades de contabilidade"),
+)
+_PORTES = ("ME", "EPP", "DEMAIS")
+_LICENCE_VALUES = ("*", "Sujeito", "Definitivo", "Dispensa", "Possui", "Vencido", "Em aberto", "-")
+_TAX_VALUES = ("*", "Pago", "Em aberto", "Em aberto desde 2020", "Isento", "-")
+_TAX_STATUS = ("Regular", "Irregular", "*")
+_PROCESS_TYPES = ("DIVERSOS", "CERCON", "USO_SOLO", "ALVARA_SANITARIO", "FUNCIONAMENTO")
+_PROCESS_SITUACOES = ("EM ANÁLISE", "CONCLUIDO", "AGUARD PAGTO", "AGUARD VISTORIA", "PENDENTE", "INDEFERIDO")
+_PROCESS_ORGAOS = (None, "PREFEITURA", "VISA", "CBMGO", "SEMMA")
+_PROCESS_OPERACOES = (None, "CANCEL DE TRIBUTOS", "1º ALVARÁ", "RENOVAÇÃO", "ALTERAÇÃO")
+
+
+def load_model_envelope(kind: str) -> dict:
+    """Le o cabecalho (source/org) do modelo versionado em scripts/datasets."""
+    path = DATASETS_DIR / f"{kind}_ingest_model.json"
+    with open(path, "r", encoding="utf-8") as handle:
+        data = json.load(handle)
+    return {"source": dict(data.get("source") or {}), "org": dict(data.get("org") or {})}
+
+
+def _cnpj_check_digit(digits: str) -> str:
+    weights = list(range(len(digits) - 7, 1, -1)) + list(range(9, 1, -1))
+    total = sum(int(d) * w for d, w in zip(digits, weights))
+    remainder = total % 11
+    return "0" if remainder < 2 else str(11 - remainder)
+
+
+def synthetic_cnpj(index: int, *, branch: int = 1) -> str:
+    base = f"{index + 10_000_000:08d}"[-8:] + f"{branch:04d}"
+    first = _cnpj_check_digit(base)
+    second = _cnpj_check_digit(base + first)
+    digits = base + first + second
+    return f"{digits[:2]}.{digits[2:5]}.{digits[5:8]}/{digits[8:12]}-{digits[12:]}"
+
+
+def _br_date(rng: random.Random, *, start_year: int, end_year: int) -> str:
+    return f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(start_year, end_year)}"
+
+
+def _company_record(rng: random.Random, index: int) -> dict:
+    empresa = f"{rng.choice(_NAME_PREFIXES)} Bench {index:06d} {rng.choice(_NAME_SUFFIXES)}"
+    municipio, uf = rng.choice(_MUNICIPIOS)
+    cnpj = synthetic_cnpj(index, branch=1 if rng.random() < 0.85 else 2)
+    principal_code, principal_text = rng.choice(_CNAES)
+    secundarios = [
+        {"code": code, "text": text}
+        for code, text in rng.sample(_CNAES, k=rng.randint(0, 3))
+        if code != principal_code
+    ]
+    return {
+        "external_id": str(index + 1),
+        "empresa": empresa,
+        "fs_dirname": empresa,
+        "cnpj": cnpj,
+        "municipio": municipio,
+        "uf": uf,
+        "is_active": rng.random() < 0.92,
+        "porte": rng.choice(_PORTES),
+        "cnaes_principal": [{"code": principal_code, "text": principal_text}],
+        "cnaes_secundarios": secundarios,
+        "raw": {"EMPRESA": empresa, "CNPJ": cnpj, "MUNICÍPIO": municipio},
+    }
+
+
+def _licence_record(rng: random.Random, company: dict) -> dict:
+    values = {
+        field: rng.choice(_LICENCE_VALUES)
+        for field in (
+            "alvara_vig_sanitaria",
+            "cercon",
+            "alvara_funcionamento",
+            "licenca_ambiental",
+            "certidao_uso_solo",
+        )
+    }
+    return {
+        "cnpj": company["cnpj"],
+        "municipio": company["municipio"].upper(),
+        **values,
+        "raw": {
+            "EMPRESA": company["empresa"],
+            "CNPJ": company["cnpj"],
+            "MUNICÍPIO": company["municipio"],
+            "ALVARÁ VIG SANITÁRIA": values["alvara_vig_sanitaria"],
+            "CERCON": values["cercon"],
+            "ALVARÁ FUNCIONAMENTO": values["alvara_funcionamento"],
+            "LICENÇA AMBIENTAL": values["licenca_ambiental"],
+            "CERTIDÃO USO SOLO": values["certidao_uso_solo"],
+        },
+    }
+
+
+def _tax_record(rng: random.Random, company: dict) -> dict:
+    values = {
+        field: rng.choice(_TAX_VALUES)
+        for field in (
+            "taxa_funcionamento",
+            "taxa_publicidade",
+            "taxa_vig_sanitaria",
+            "iss",
+            "taxa_localiz_instalacao",
+            "taxa_ocup_area_publica",
+            "taxa_bombeiros",
+            "tpi",
+        )
+    }
+    data_envio = _br_date(rng, start_year=2024, end_year=2026) if rng.random() < 0.5 else ""
+    vencimento_tpi = _br_date(rng, start_year=2025, end_year=2027) if rng.random() < 0.3 else "-"
+    status_taxas = rng.choice(_TAX_STATUS)
+    return {
+        "cnpj": company["cnpj"],
+        "data_envio": data_envio,
+        **values,
+        "vencimento_tpi": vencimento_tpi,
+        "status_taxas": status_taxas,
+        "raw": {"EMPRESA": company["empresa"], "CNPJ": company["cnpj"], "status_taxas": status_taxas},
+    }
+
+
+def _process_record(rng: random.Random, company: dict, seq: int) -> dict:
+    protocolo = f"{rng.randint(1, 99999):05d}.{seq:08d}/{rng.randint(2023, 2026)}-{rng.randint(10, 99)}"
+    data_solicitacao = _br_date(rng, start_year=2024, end_year=2026)
+    situacao = rng.choice(_PROCESS_SITUACOES)
+    operacao = rng.choice(_PROCESS_OPERACOES)
+    orgao = rng.choice(_PROCESS_ORGAOS)
+    return {
+        "cnpj": company["cnpj"],
+        "process_type": rng.choice(_PROCESS_TYPES),
+        "protocolo": protocolo,
+        "municipio": company["municipio"].upper(),
+        "orgao": orgao,
+        "operacao": operacao,
+        "data_solicitacao": data_solicitacao,
+        "situacao": situacao,
+        "obs": "Processo sintetico de benchmark" if rng.random() < 0.4 else None,
+        "extra": {},
+        "raw": {
+            "EMPRESA": company["empresa"],
+            "CNPJ": company["cnpj"],
+            "PROTOCOLO": protocolo,
+            "DATA SOLICITAÇÃO": data_solicitacao,
+            "SITUAÇÃO": situacao,
+        },
+    }
+
+
+def build_synthetic_org(size: int, *, seed: int = 42, org_slug: str | None = None) -> dict[str, dict]:
+    """
+    Gera os quatro envelopes de ingest (companies/licences/taxes/processes) com o mesmo
+    formato dos modelos em scripts/datasets, para uma org sintetica com ``size`` empresas.
+    Mesma ``seed`` + mesmo ``size`` => mesmo dataset.
+    """
+    if size <= 0:
+        raise ValueError("size deve ser maior que zero.")
+    rng = random.Random(f"{seed}:{size}")
+    slug = org_slug or f"bench-{size}"
+
+    companies = [_company_record(rng, index) for index in range(size)]
+    licences = [_licence_record(rng, company) for company in companies if rng.random() < 0.9]
+    taxes = [_tax_record(rng, company) for company in companies if rng.random() < 0.8]
+    processes: list[dict] = []
+    for company in companies:
+        for _ in range(rng.choices((0, 1, 2, 3), weights=(40, 35, 15, 10))[0]):
+            processes.append(_process_record(rng, company, len(processes)))
+
+    datasets = {"companies": companies, "licences": licences, "taxes": taxes, "processes": processes}
+    envelopes: dict[str, dict] = {}
+    for kind in DATASET_KINDS:
+        envelope = load_model_envelope(kind)
+        envelope["source"]["name"] = f"{envelope['source'].get('name') or kind} (bench {size})"
+        envelope["org"] = {"slug": slug}
+        envelope[kind] = datasets[kind]
+        envelopes[kind] = envelope
+    return envelopes
+
+
+def write_synthetic_org(output_dir: Path, size: int, *, seed: int = 42) -> list[Path]:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    written: list[Path] = []
+    for kind, envelope in build_synthetic_org(size, seed=seed).items():
+        path = output_dir / f"{kind}_bench_{size}.json"
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(envelope, handle, ensure_ascii=False, indent=2)
+        written.append(path)
+    return written
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Gera datasets sinteticos de ingest (formato scripts/datasets/*_ingest_model.json)."
+    )
+    parser.add_argument("--sizes", default="1000,10000,50000", help="Tamanhos de org separados por virgula.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output-dir", default="tmp/bench_datasets", help="Diretorio de saida.")
+    args = parser.parse_args()
+
+    sizes = [int(item) for item in str(args.sizes).split(",") if item.strip()]
+    if not sizes or any(size <= 0 for size in sizes):
+        raise ValueError("--sizes deve conter inteiros maiores que zero.")
+
+    for size in sizes:
+        for path in write_synthetic_org(Path(args.output_dir), size, seed=args.seed):
+            print(f"[bench_dataset] size={size} arquivo={path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+BACKEND_DIR = ROOT_DIR / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services import licence_detection  # noqa: E402
+
+
+_LABELS = (
+    "Alvará Bombeiros",
+    "CERCON",
+    "Alvará Vig Sanitária",
+    "Dispensa Sanitária",
+    "Alvará Funcionamento - Definitivo",
+    "Alvará Funcionamento - Condicionado",
+    "Alvará Funcionamento - Provisório",
+    "Uso do Solo",
+    "Licença Ambiental",
+    "Dispensa Ambiental",
+    "Contrato Social",
+    "Foto fachada",
+)
+_EXTENSIONS = ("pdf", "PDF", "jpg")
+
+
+def build_synthetic_filenames(count: int, *, distinct: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    pool = [
+        (
+            f"{rng.choice(_LABELS)} - Val {rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}."
+            f"{rng.randint(2024, 2030)}.{rng.choice(_EXTENSIONS)}"
+        )
+        for _ in range(distinct)
+    ]
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def _measure(label: str, func, filenames: list[str]) -> float:
+    started = time.perf_counter()
+    func(filenames)
+    elapsed = time.perf_counter() - started
+    rate = len(filenames) / elapsed if elapsed > 0 else float("inf")
+    print(f"[bench_licence_detection] {label:<28} {elapsed:8.3f}s {rate:12,.0f} arquivos/s")
+    return elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Micro-benchmark do classificador de nomes de arquivo de licencas."
+    )
+    parser.add_argument("--count", type=int, default=100_000, help="Total de nomes (default: 100000).")
+    parser.add_argument(
+        "--distinct",
+        type=int,
+        default=5_000,
+        help="Nomes distintos no pool; simula arquivos revistos a cada passada do watcher (default: 5000).",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.count <= 0 or args.distinct <= 0:
+        raise ValueError("--count e --distinct devem ser maiores que zero.")
+
+    filenames = build_synthetic_filenames(args.count, distinct=args.distinct, seed=args.seed)
+    print(f"[bench_licence_detection] count={args.count} distinct={len(set(filenames))} seed={args.seed}")
+
+    uncached = _measure(
+        "sem memo (classificacao)",
+        lambda names: [licence_detection._parse_filename(name) for name in names],
+        filenames,
+    )
+    licence_detection._parse_filename_cached.cache_clear()
+    cold = _measure("parse_many (memo frio)", licence_detection.parse_many, filenames)
+    warm = _measure("parse_many (memo quente)", licence_detection.parse_many, filenames)
+
+    print(
+        f"[bench_licence_detection] ganho memo frio={uncached / cold:.1f}x "
+        f"memo quente={uncached / warm:.1f}x "
+        f"cache={licence_detection._parse_filename_cached.cache_info()}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,453 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+BACKEND_DIR = ROOT_DIR / "backend"
+SCRIPTS_DIR = Path(__file__).resolve().parent
+for _path in (BACKEND_DIR, SCRIPTS_DIR):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+RESULT_FORMAT_VERSION = 1
+CASES = (
+    "run_ingest_companies",
+    "process_company_licence_dir",
+    "recalculate_company_score",
+    "build_company_overview",
+    "run_notification_operational_scan",
+    "export_report",
+    "parse_filename_to_suggestion",
+)
+EXPORT_FIELDS = ["nome_fantasia", "municipio", "uf", "is_active", "porte", "possui_debitos", "risco_consolidado"]
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _summarize(case: str, size: int, samples: list[float], *, unit_count: int, extra: dict | None = None) -> dict:
+    ordered = sorted(samples)
+    total = sum(samples)
+    return {
+        "case": case,
+        "size": size,
+        "iterations": len(samples),
+        "units": unit_count,
+        "total_s": round(total, 6),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3) if samples else 0.0,
+        "p50_ms": round(_percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(_percentile(ordered, 95) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        "units_per_s": round(unit_count / total, 3) if total > 0 else None,
+        "extra": extra or {},
+    }
+
+
+def _timed(func: Callable[[], object]) -> tuple[float, object]:
+    started = time.perf_counter()
+    result = func()
+    return time.perf_counter() - started, result
+
+
+def _git_revision() -> str | None:
+    try:
+        return (
+            subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                cwd=ROOT_DIR,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+            or None
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _report(row: dict) -> None:
+    print(
+        f"[bench_suite] size={row['size']:<6} {row['case']:<36} "
+        f"n={row['iterations']:<5} total={row['total_s']:9.3f}s "
+        f"p50={row['p50_ms']:9.2f}ms p95={row['p95_ms']:9.2f}ms"
+    )
+
+
+class BenchRunner:
+    """Executa os casos de benchmark de uma org sintetica contra o DATABASE_URL configurado."""
+
+    def __init__(self, *, seed: int, sample: int, repeat: int, files_per_company: int, work_dir: Path):
+        from app.db.listeners import register_session_listeners
+        from app.db.session import SessionLocal, engine
+
+        register_session_listeners()
+        self.engine = engine
+        self.SessionLocal = SessionLocal
+        self.seed = seed
+        self.sample = sample
+        self.repeat = repeat
+        self.files_per_company = files_per_company
+        self.work_dir = work_dir
+
+    def reset_schema(self) -> None:
+        import app.models  # noqa: F401
+        from app.db.base import Base
+
+        Base.metadata.drop_all(bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+
+    def _seed_org(self, db, size: int) -> str:
+        from app.models.cnae_risk import CNAERisk
+        from app.models.org import Org
+        from bench_dataset import _CNAES
+
+        org = Org(name=f"Bench Org {size}", slug=f"bench-{size}")
+        db.add(org)
+        tiers = ("LOW", "MEDIUM", "HIGH")
+        for position, (code, text) in enumerate(_CNAES[::2]):
+            db.add(
+                CNAERisk(
+                    cnae_code=code,
+                    cnae_text=text,
+                    risk_tier=tiers[position % len(tiers)],
+                    base_weight=10 * (position + 1),
+                    sanitary_risk="MEDIUM",
+                    fire_risk="LOW",
+                    environmental_risk="LOW",
+                    source="bench",
+                    is_active=True,
+                )
+            )
+        db.commit()
+        return org.id
+
+    def _sample_company_ids(self, db, org_id: str) -> list[str]:
+        from app.models.company import Company
+
+        ids = [
+            row[0]
+            for row in db.query(Company.id).filter(Company.org_id == org_id).order_by(Company.cnpj.asc()).all()
+        ]
+        rng = random.Random(self.seed)
+        return rng.sample(ids, k=min(self.sample, len(ids)))
+
+    def _build_licence_tree(self, db, org_id: str, company_ids: list[str]) -> Path:
+        from app.models.company import Company
+        from app.worker.watchers import LICENCES_SUBDIR
+        from bench_licence_detection import build_synthetic_filenames
+
+        root = self.work_dir / f"empresas-{org_id}"
+        if root.exists():
+            shutil.rmtree(root)
+        companies = db.query(Company).filter(Company.org_id == org_id, Company.id.in_(company_ids)).all()
+        for company in companies:
+            target = root / str(company.fs_dirname) / LICENCES_SUBDIR
+            target.mkdir(parents=True, exist_ok=True)
+            names = build_synthetic_filenames(
+                self.files_per_company,
+                distinct=self.files_per_company,
+                seed=zlib.crc32(f"{self.seed}:{company.cnpj}".encode("utf-8")),
+            )
+            for position, name in enumerate(dict.fromkeys(names)):
+                (target / name).write_bytes(f"{company.cnpj}:{position}:{name}".encode("utf-8"))
+        return root.resolve()
+
+    def run_size(self, size: int, cases: tuple[str, ...]) -> list[dict]:
+        from app.api.v1.endpoints.relatorios import RelatorioExportRequest, export_report
+        from app.models.company import Company
+        from app.models.org import Org
+        from app.schemas.ingest.companies import CompaniesIngestEnvelope
+        from app.services.company_overview import build_company_overview
+        from app.services.company_scoring import recalculate_company_score
+        from app.services.ingest.run import run_ingest_companies
+        from app.services.licence_detection import parse_filename_to_suggestion
+        from app.services.notification_operational_scan import run_notification_operational_scan
+        from app.worker.watchers import process_company_licence_dir
+        from bench_dataset import build_synthetic_org
+        from bench_licence_detection import build_synthetic_filenames
+
+        rows: list[dict] = []
+        self.reset_schema()
+        envelopes = build_synthetic_org(size, seed=self.seed)
+        payload = CompaniesIngestEnvelope.model_validate(
+            {
+                "source": envelopes["companies"]["source"],
+                "org": envelopes["companies"]["org"],
+                "companies": envelopes["companies"]["companies"],
+                "licences": envelopes["licences"]["licences"],
+                "taxes": envelopes["taxes"]["taxes"],
+                "processes": envelopes["processes"]["processes"],
+            }
+        )
+
+        db = self.SessionLocal()
+        try:
+            org_id = self._seed_org(db, size)
+
+            # A ingestao popula a org para os demais casos, entao roda sempre.
+            elapsed, ingest_run = _timed(
+                lambda: run_ingest_companies(
+                    db=db,
+                    org_id=org_id,
+                    source=payload.source.model_dump(),
+                    source_hash=None,
+                    companies=[item.model_dump() for item in payload.companies],
+                    licences=[item.model_dump() for item in payload.licences],
+                    taxes=[item.model_dump() for item in payload.taxes],
+                    processes=[item.model_dump() for item in payload.processes],
+                )
+            )
+            commit_elapsed, _ = _timed(db.commit)
+            if "run_ingest_companies" in cases:
+                rows.append(
+                    _summarize(
+                        "run_ingest_companies",
+                        size,
+                        [elapsed + commit_elapsed],
+                        unit_count=size,
+                        extra={"stats": ingest_run.stats},
+                    )
+                )
+                _report(rows[-1])
+
+            company_ids = self._sample_company_ids(db, org_id)
+
+            if "process_company_licence_dir" in cases:
+                root = self._build_licence_tree(db, org_id, company_ids)
+                companies = db.query(Company).filter(Company.id.in_(company_ids)).all()
+                samples = []
+                totals = {"processed": 0, "skipped": 0, "errors": 0}
+                for company in companies:
+                    elapsed, stats = _timed(lambda: process_company_licence_dir(db, company, root))
+                    samples.append(elapsed)
+                    for key in totals:
+                        totals[key] += int(stats.get(key, 0))
+                rows.append(
+                    _summarize(
+                        "process_company_licence_dir",
+                        size,
+                        samples,
+                        unit_count=len(samples),
+                        extra={"files_per_company": self.files_per_company, "stats": totals},
+                    )
+                )
+                _report(rows[-1])
+
+            if "recalculate_company_score" in cases:
+                samples = []
+                for company_id in company_ids:
+                    elapsed, _ = _timed(lambda: recalculate_company_score(db, org_id, company_id))
+                    samples.append(elapsed)
+                db.commit()
+                rows.append(_summarize("recalculate_company_score", size, samples, unit_count=len(samples)))
+                _report(rows[-1])
+
+            if "build_company_overview" in cases:
+                samples = []
+                for company_id in company_ids:
+                    elapsed, _ = _timed(lambda: build_company_overview(db, org_id, company_id))
+                    samples.append(elapsed)
+                db.rollback()
+                rows.append(_summarize("build_company_overview", size, samples, unit_count=len(samples)))
+                _report(rows[-1])
+
+            if "run_notification_operational_scan" in cases:
+                samples = []
+                results = []
+                # A primeira passada emite; as seguintes medem o caminho de dedupe.
+                for _ in range(self.repeat):
+                    elapsed, result = _timed(lambda: run_notification_operational_scan(db, org_id=org_id))
+                    samples.append(elapsed)
+                    results.append(result)
+                rows.append(
+                    _summarize(
+                        "run_notification_operational_scan",
+                        size,
+                        samples,
+                        unit_count=size * len(samples),
+                        extra={"results": results},
+                    )
+                )
+                _report(rows[-1])
+
+            if "export_report" in cases:
+                org = db.get(Org, org_id)
+                request = RelatorioExportRequest(campos=EXPORT_FIELDS)
+                samples = []
+                for _ in range(self.repeat):
+                    elapsed, _ = _timed(lambda: export_report(request, db=db, org=org, _user=None))
+                    samples.append(elapsed)
+                db.rollback()
+                rows.append(
+                    _summarize(
+                        "export_report",
+                        size,
+                        samples,
+                        unit_count=size * len(samples),
+                        extra={"campos": EXPORT_FIELDS},
+                    )
+                )
+                _report(rows[-1])
+        finally:
+            db.close()
+
+        if "parse_filename_to_suggestion" in cases:
+            filenames = build_synthetic_filenames(
+                size * self.files_per_company,
+                distinct=max(1, size),
+                seed=self.seed,
+            )
+            elapsed, _ = _timed(lambda: [parse_filename_to_suggestion(name) for name in filenames])
+            rows.append(
+                _summarize(
+                    "parse_filename_to_suggestion",
+                    size,
+                    [elapsed],
+                    unit_count=len(filenames),
+                    extra={"distinct": len(set(filenames))},
+                )
+            )
+            _report(rows[-1])
+
+        return rows
+
+
+def _compare(baseline_path: Path, results: dict) -> None:
+    with open(baseline_path, "r", encoding="utf-8") as handle:
+        baseline = json.load(handle)
+    previous = {(row["case"], row["size"]): row for row in baseline.get("results", [])}
+    for row in results["results"]:
+        before = previous.get((row["case"], row["size"]))
+        if not before or not before.get("total_s"):
+            continue
+        before_unit = before["total_s"] / max(1, before["units"])
+        after_unit = row["total_s"] / max(1, row["units"])
+        ratio = before_unit / after_unit if after_unit > 0 else float("inf")
+        print(f"[bench_suite] compare size={row['size']:<6} {row['case']:<36} speedup={ratio:8.2f}x")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Suite de benchmark de ponta a ponta (ingest, watcher, score, overview, scan, export) "
+            "sobre orgs sinteticas. Roda contra SQLite ou Postgres e grava resultados em JSON."
+        )
+    )
+    parser.add_argument("--sizes", default="1000,10000,50000", help="Tamanhos de org (default: 1000,10000,50000).")
+    parser.add_argument(
+        "--database-url",
+        help=(
+            "Banco alvo (ex.: postgresql+psycopg2://.../econtrole_bench). "
+            "Default: SQLite temporario. O schema e recriado a cada tamanho."
+        ),
+    )
+    parser.add_argument(
+        "--allow-reset",
+        action="store_true",
+        help="Obrigatorio para bancos nao-SQLite: confirma que o schema do banco alvo pode ser apagado.",
+    )
+    parser.add_argument("--cases", default=",".join(CASES), help="Casos separados por virgula (default: todos).")
+    parser.add_argument("--sample", type=int, default=200, help="Empresas amostradas nos casos por empresa (default: 200).")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticoes dos casos org-wide (default: 3).")
+    parser.add_argument("--files-per-company", type=int, default=6, help="Arquivos de licenca por pasta (default: 6).")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--label", default="", help="Rotulo livre gravado no resultado (ex.: before/after).")
+    parser.add_argument("--output", help="Arquivo JSON de saida (default: tmp/bench/<dialeto>-<timestamp>.json).")
+    parser.add_argument("--compare", help="JSON de uma execucao anterior para imprimir o ganho por caso.")
+    args = parser.parse_args()
+
+    sizes = [int(item) for item in str(args.sizes).split(",") if item.strip()]
+    if not sizes or any(size <= 0 for size in sizes):
+        raise ValueError("--sizes deve conter inteiros maiores que zero.")
+    cases = tuple(item.strip() for item in str(args.cases).split(",") if item.strip())
+    unknown = [case for case in cases if case not in CASES]
+    if unknown:
+        raise ValueError(f"Casos desconhecidos: {', '.join(unknown)}")
+    if args.sample <= 0 or args.repeat <= 0 or args.files_per_company <= 0:
+        raise ValueError("--sample, --repeat e --files-per-company devem ser maiores que zero.")
+
+    work_dir = Path(tempfile.mkdtemp(prefix="econtrole-bench-"))
+    database_url = args.database_url or f"sqlite+pysqlite:///{(work_dir / 'bench.sqlite3').as_posix()}"
+    if not database_url.startswith("sqlite") and not args.allow_reset:
+        raise ValueError("--allow-reset e obrigatorio fora do SQLite: a suite apaga e recria o schema.")
+    # O engine da aplicacao le DATABASE_URL no import; precisa estar definido antes.
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("SEED_ENABLED", "false")
+
+    from sqlalchemy.engine.url import make_url
+
+    runner = BenchRunner(
+        seed=args.seed,
+        sample=args.sample,
+        repeat=args.repeat,
+        files_per_company=args.files_per_company,
+        work_dir=work_dir,
+    )
+    dialect = runner.engine.dialect.name
+    print(
+        f"[bench_suite] inicio dialect={dialect} sizes={sizes} cases={len(cases)} "
+        f"sample={args.sample} repeat={args.repeat} seed={args.seed}"
+    )
+
+    results = {
+        "format": RESULT_FORMAT_VERSION,
+        "label": args.label,
+        "git_revision": _git_revision(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "database": {
+            "dialect": dialect,
+            "url": make_url(database_url).render_as_string(hide_password=True),
+        },
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {
+            "sizes": sizes,
+            "cases": list(cases),
+            "sample": args.sample,
+            "repeat": args.repeat,
+            "files_per_company": args.files_per_company,
+            "seed": args.seed,
+        },
+        "results": [],
+    }
+    try:
+        for size in sizes:
+            results["results"].extend(runner.run_size(size, cases))
+    finally:
+        runner.engine.dispose()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    results["finished_at"] = datetime.now(timezone.utc).isoformat()
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    output = Path(args.output) if args.output else ROOT_DIR / "tmp" / "bench" / f"{dialect}-{stamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as handle:
+        json.dump(results, handle, ensure_ascii=False, indent=2)
+    print(f"[bench_suite] resultados={output}")
+
+    if args.compare:
+        _compare(Path(args.compare), results)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -16,9 +16,11 @@ if str(BACKEND_DIR) not in sys.path:
     sys.path.insert(0, str(BACKEND_DIR))
 
 from app.core.cnae import extract_cnae_codes, normalize_cnae_code  # noqa: E402
+from app.db.listeners import register_session_listeners  # noqa: E402
 from app.db.session import SessionLocal  # noqa: E402
 from app.models.cnae_risk import CNAERisk  # noqa: E402
 from app.models.company_profile import CompanyProfile  # noqa: E402
+from app.services.cnae_risk_catalog import bump_cnae_risk_catalog_version  # noqa: E402
 from app.services.company_scoring import recalculate_company_score  # noqa: E402
 
 
@@ -180,6 +182,8 @@ def load_seed(
                 },
             )
             db.execute(stmt)
+            if changed_codes:
+                bump_cnae_risk_catalog_version(db)
 
         if recalculate_affected or recalculate_all:
             targets = _collect_recalc_targets(
@@ -219,6 +223,7 @@ def main() -> int:
         help="Recalcula snapshots de score para todas as empresas com profile.",
     )
     args = parser.parse_args()
+    register_session_listeners()
 
     seed_file = Path(args.seed_file).resolve()
     if not seed_file.exists():
@@ -4,6 +4,7 @@ import argparse
 import sys
 
 from app.core.config import settings
+from app.db.listeners import register_session_listeners
 from app.db.session import SessionLocal
 from app.models.org import Org
 from app.models.tax_portal_sync_run import TaxPortalSyncRun
@@ -17,6 +18,7 @@ def main() -> int:
     parser.add_argument("--limit", type=int, default=None)
     parser.add_argument("--dry-run", action="store_true")
     args = parser.parse_args()
+    register_session_listeners()
 
     db = SessionLocal()
     try:
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import datetime
+
+import httpx
+
+from app.services.certhub_client import CertHubClient
+
+
+class StubCertHub:
+    """
+    CertHub local em memoria, servido via httpx.MockTransport.
+    Suporta updated_since, page_size + next_cursor, ETag/If-None-Match e tombstones (deleted=true).
+    """
+
+    base_url = "https://certhub.stub/api/v1"
+    list_path = "/orgs/{org_id}/certificates"
+
+    def __init__(self, token: str = "stub-token"):
+        self.token = token
+        self.certificates: dict[str, dict] = {}
+        self.requests: list[httpx.Request] = []
+
+    def put(self, cert: dict) -> None:
+        self.certificates[cert["cert_id"]] = dict(cert)
+
+    def _etag(self, items: list[dict]) -> str:
+        digest = hashlib.sha1(json.dumps(items, sort_keys=True).encode("utf-8")).hexdigest()
+        return f'"{digest}"'
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.headers.get("Authorization") != f"Bearer {self.token}":
+            return httpx.Response(401, json={"detail": "unauthorized"})
+
+        params = request.url.params
+        items = sorted(self.certificates.values(), key=lambda item: (item["updated_at"], item["cert_id"]))
+        updated_since = params.get("updated_since")
+        if updated_since:
+            since = datetime.fromisoformat(updated_since)
+            items = [item for item in items if datetime.fromisoformat(item["updated_at"]) > since]
+
+        etag = self._etag(items)
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304)
+
+        page_size = int(params.get("page_size") or 100)
+        offset = int(params.get("cursor") or 0)
+        page = items[offset : offset + page_size]
+        body: dict = {"items": page}
+        if offset + page_size < len(items):
+            body["next_cursor"] = str(offset + page_size)
+        return httpx.Response(200, json=body, headers={"ETag": etag})
+
+    def client(self, *, page_size: int = 2) -> CertHubClient:
+        return CertHubClient(
+            base_url=self.base_url,
+            api_token=self.token,
+            list_url_template=f"{self.base_url}{self.list_path}",
+            page_size=page_size,
+            transport=httpx.MockTransport(self.handler),
+        )
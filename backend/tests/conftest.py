@@ -1,5 +1,6 @@
 import os
 import sys
+from contextlib import contextmanager
 
 import pytest
 from fastapi.testclient import TestClient
@@ -12,11 +13,22 @@ os.environ.setdefault("DATABASE_URL", "sqlite+pysqlite:///:memory:")
 os.environ.setdefault("ENV", "dev")
 # keep seeding enabled so auth/org tests have deterministic default users/org
 os.environ.setdefault("SEED_ENABLED", "true")
+# a fila de score e drenada explicitamente nos testes (sem thread concorrente)
+os.environ.setdefault("SCORE_QUEUE_WORKER_ENABLED", "false")
+os.environ.setdefault("KPI_SNAPSHOT_WORKER_ENABLED", "false")
+os.environ.setdefault("CERTHUB_WEBHOOK_RECOVERY_ENABLED", "false")
+# cada teste recria o banco: o catalogo CNAE em memoria confere a versao a cada uso
+os.environ.setdefault("CNAE_CATALOG_CHECK_SECONDS", "0")
+# os testes sincronizam logo apos o commit; a janela de seguranca tem teste proprio
+os.environ.setdefault("SYNC_SAFETY_LAG_SECONDS", "0")
 
 import app.models  # noqa: E402,F401
 from app.db.base import Base  # noqa: E402
+from app.db.listeners import register_session_listeners  # noqa: E402
 from app.db.session import engine  # noqa: E402
 
+register_session_listeners()
+
 # monkeypatch authentication to avoid bcrypt/seeding issues during tests
 from app.core import security
 
@@ -33,3 +45,22 @@ def client():
     with TestClient(app) as test_client:
         yield test_client
     Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture()
+def query_budget():
+    """
+    ``with query_budget(5): client.get(...)`` falha se o bloco executar mais de 5
+    consultas SQL (em qualquer thread), listando o SQL executado.
+    """
+    from app.db.query_metrics import record_queries
+
+    @contextmanager
+    def _budget(max_queries: int):
+        with record_queries() as recorder:
+            yield recorder
+        assert recorder.count <= max_queries, (
+            f"{recorder.count} consultas (orcamento {max_queries}):\n" + "\n".join(recorder.statements)
+        )
+
+    return _budget
@@ -0,0 +1,191 @@
+from datetime import date, datetime, timedelta, timezone
+
+from app.db.session import SessionLocal
+from app.models.certificate_mirror import CertificateMirror
+from app.models.company import Company
+from app.models.company_licence import CompanyLicence
+from app.models.company_process import CompanyProcess
+from app.models.company_tax import CompanyTax
+from app.models.org import Org
+
+
+def _login(client) -> dict[str, str]:
+    response = client.post("/api/v1/auth/login", json={"email": "admin@example.com", "password": "admin123"})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _seed_alert_sources() -> str:
+    today = date.today()
+    now = datetime.now(timezone.utc)
+    db = SessionLocal()
+    try:
+        org = db.query(Org).first()
+        company = Company(org_id=org.id, cnpj="51515151000151", razao_social="Alertas Feed")
+        inactive = Company(org_id=org.id, cnpj="52525252000152", razao_social="Inativa", is_active=False)
+        db.add_all([company, inactive])
+        db.flush()
+        db.add(
+            CompanyLicence(
+                org_id=org.id,
+                company_id=company.id,
+                cercon="possui",
+                cercon_valid_until=today + timedelta(days=3),
+                alvara_vig_sanitaria="possui",
+                alvara_vig_sanitaria_valid_until=today - timedelta(days=5),
+                licenca_ambiental="possui",
+                licenca_ambiental_valid_until=today + timedelta(days=20),
+                certidao_uso_solo="nao_exigido",
+                certidao_uso_solo_valid_until=today + timedelta(days=2),
+                alvara_funcionamento="definitivo",
+                alvara_funcionamento_kind="DEFINITIVO",
+                alvara_funcionamento_valid_until=today + timedelta(days=1),
+            )
+        )
+        db.add(
+            CompanyLicence(
+                org_id=org.id,
+                company_id=inactive.id,
+                cercon="possui",
+                cercon_valid_until=today + timedelta(days=1),
+            )
+        )
+        db.add(
+            CertificateMirror(
+                org_id=org.id,
+                company_id=company.id,
+                sha1_fingerprint="feed-cert",
+                name="ALERTAS FEED",
+                not_after=now + timedelta(days=2),
+            )
+        )
+        db.add(
+            CertificateMirror(
+                org_id=org.id, sha1_fingerprint="far-cert", name="LONGE", not_after=now + timedelta(days=200)
+            )
+        )
+        db.add(
+            CompanyTax(
+                org_id=org.id,
+                company_id=company.id,
+                taxa_funcionamento="Em aberto",
+                status_taxas="irregular",
+            )
+        )
+        db.add(
+            CompanyProcess(
+                org_id=org.id,
+                company_id=company.id,
+                process_type="DIVERSOS",
+                protocolo="FEED-1",
+                situacao="em_analise",
+                updated_at=now - timedelta(days=40),
+            )
+        )
+        db.commit()
+        return company.id
+    finally:
+        db.close()
+
+
+def test_alert_feed_merges_sources_and_filters(client):
+    headers = _login(client)
+    company_id = _seed_alert_sources()
+
+    response = client.get("/api/v1/alertas", headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    items = body["items"]
+    assert body["total"] == len(items) == 6
+    assert body["next_cursor"] is None
+    assert {item["empresa_id"] for item in items} == {company_id}
+    assert sorted(item["tipo_alerta"] for item in items) == [
+        "certificado",
+        "licenca",
+        "licenca",
+        "licenca",
+        "processo",
+        "taxa",
+    ]
+    dates = [item["data_referencia"] for item in items]
+    assert dates == sorted(dates)
+
+    by_title = {item["titulo"]: item for item in items}
+    assert by_title["Alvará Vigilância Sanitária vencido ha 5 dia(s)"]["severity"] == "critical"
+    assert by_title["Cercon vence em 3 dia(s)"]["severity"] == "warning"
+    assert by_title["Licença Ambiental vence em 20 dia(s)"]["severity"] == "info"
+    assert by_title["Taxas em aberto"]["descricao"] == "Taxa de Funcionamento."
+
+    critical = client.get("/api/v1/alertas", params={"severity": "critical"}, headers=headers).json()
+    assert {(item["tipo_alerta"], item["severity"]) for item in critical["items"]} == {
+        ("licenca", "critical"),
+        ("processo", "critical"),
+    }
+
+    licences = client.get(
+        "/api/v1/alertas", params={"tipo_alerta": "licenca", "dias": 7}, headers=headers
+    ).json()
+    assert [item["dias_restantes"] for item in licences["items"]] == [-5, 3]
+
+    assert client.get("/api/v1/alertas", params={"tipo_alerta": "outro"}, headers=headers).status_code == 400
+
+
+def test_alert_feed_keyset_pages_cover_everything_once(client):
+    headers = _login(client)
+    _seed_alert_sources()
+    everything = client.get("/api/v1/alertas", headers=headers).json()["items"]
+
+    seen: list[str] = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/api/v1/alertas", params=params, headers=headers).json()
+        assert page["total"] == len(everything)
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert seen == [item["id"] for item in everything]
+    assert client.get("/api/v1/alertas", params={"cursor": "invalido"}, headers=headers).status_code == 400
+
+
+def test_certificate_alerts_skip_inactive_orphan_and_renewed_certificates(client):
+    headers = _login(client)
+    now = datetime.now(timezone.utc)
+    db = SessionLocal()
+    try:
+        org = db.query(Org).first()
+        active = Company(org_id=org.id, cnpj="53535353000153", razao_social="Ativa")
+        inactive = Company(org_id=org.id, cnpj="54545454000154", razao_social="Inativa", is_active=False)
+        db.add_all([active, inactive])
+        db.flush()
+
+        def _cert(sha1: str, company_id: str | None, days: int, document: str = "53535353000153") -> None:
+            db.add(
+                CertificateMirror(
+                    org_id=org.id,
+                    company_id=company_id,
+                    sha1_fingerprint=sha1,
+                    document_digits=document,
+                    name=sha1,
+                    not_after=now + timedelta(days=days),
+                )
+            )
+
+        # Vencidos ha anos e ja renovados: so o mais novo de cada empresa/documento conta.
+        _cert("renovado-2019", active.id, -2000)
+        _cert("renovado-2022", active.id, -900)
+        _cert("vigente", active.id, 300)
+        _cert("socio-vencido", active.id, -10, document="11122233344")
+        _cert("sem-empresa", None, -3)
+        _cert("empresa-inativa", inactive.id, 1, document="54545454000154")
+        db.commit()
+    finally:
+        db.close()
+
+    body = client.get("/api/v1/alertas", params={"tipo_alerta": "certificado"}, headers=headers).json()
+    assert body["total"] == 1
+    assert [item["descricao"] for item in body["items"]] == ["Certificado de socio-vencido."]
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import textwrap
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+
+from app.db.session import SessionLocal
+from app.models.cnae_risk import CNAERisk
+from app.models.company import Company
+from app.models.company_licence import CompanyLicence
+from app.models.company_process import CompanyProcess
+from app.models.company_profile import CompanyProfile
+from app.models.org import Org
+from app.services.company_scoring import recalculate_company_score
+
+
+def _load_script():
+    script_path = Path(__file__).resolve().parents[1] / "scripts" / "backfill_company_scores.py"
+    spec = importlib.util.spec_from_file_location("backfill_company_scores", script_path)
+    assert spec and spec.loader
+    module = importlib.util.module_from_spec(spec)
+    # dataclasses do script resolvem anotacoes pelo modulo registrado
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def _seed_companies(count: int) -> tuple[str, list[str]]:
+    db = SessionLocal()
+    try:
+        org = db.query(Org).first()
+        db.add(CNAERisk(cnae_code="56.11-2-01", cnae_text="Restaurantes", risk_tier="MEDIUM", base_weight=20))
+        company_ids: list[str] = []
+        for index in range(count):
+            company = Company(org_id=org.id, cnpj=f"7070707000{index:04d}", razao_social=f"Backfill {index}")
+            db.add(company)
+            db.flush()
+            db.add(
+                CompanyProfile(
+                    org_id=org.id,
+                    company_id=company.id,
+                    cnaes_principal=[{"code": "56.11-2-01", "text": "Restaurantes"}] if index % 3 else [],
+                    raw={},
+                )
+            )
+            licence = CompanyLicence(
+                org_id=org.id,
+                company_id=company.id,
+                cercon="possui",
+                cercon_valid_until=date.today() + timedelta(days=5 * index - 10),
+            )
+            if index == 4:
+                licence.alvara_funcionamento = "definitivo"
+                licence.alvara_funcionamento_kind = "DEFINITIVO"
+            db.add(licence)
+            company_ids.append(company.id)
+        db.flush()
+        db.add(
+            CompanyProcess(
+                org_id=org.id,
+                company_id=company_ids[4],
+                process_type="ALVARA_FUNCIONAMENTO",
+                protocolo="BF-1",
+                situacao="em_analise",
+                obs="alteracao de endereco",
+            )
+        )
+        db.commit()
+        return org.id, sorted(company_ids)
+    finally:
+        db.close()
+
+
+def _scores(org_id: str) -> dict[str, tuple]:
+    db = SessionLocal()
+    try:
+        return {
+            profile.company_id: (profile.score_urgencia, profile.score_status, profile.risco_consolidado)
+            for profile in db.query(CompanyProfile).filter(CompanyProfile.org_id == org_id)
+        }
+    finally:
+        db.close()
+
+
+def test_backfill_bulk_matches_single_recalculation(client):
+    script = _load_script()
+    org_id, company_ids = _seed_companies(7)
+
+    exit_code = script.run_backfill(
+        org_id=org_id, limit=None, batch_size=3, dry_run=False, shard_by="range", shard_size=4
+    )
+    assert exit_code == 0
+    bulk = _scores(org_id)
+    assert all(score is not None for score, _status, _risk in bulk.values())
+
+    db = SessionLocal()
+    try:
+        expected = {}
+        for company_id in company_ids:
+            result = recalculate_company_score(db, org_id, company_id)
+            expected[company_id] = (result["score_urgencia"], result["score_status"], result["risco_consolidado"])
+        db.rollback()
+    finally:
+        db.close()
+    assert bulk == expected
+
+
+def test_backfill_resumes_from_checkpoint(client, tmp_path):
+    script = _load_script()
+    org_id, company_ids = _seed_companies(5)
+    checkpoint = tmp_path / "backfill.jsonl"
+    params = {"org_id": org_id, "limit": None, "shard_by": "range", "shard_size": 2}
+
+    # Execucao interrompida: primeiro shard concluido e o segundo parado no meio.
+    checkpoint.write_text(
+        "\n".join(
+            json.dumps(record)
+            for record in (
+                {"params": params},
+                {"shard": f"{org_id}:{company_ids[0]}:{company_ids[1]}", "last_company_id": company_ids[1], "done": True},
+                {"shard": f"{org_id}:{company_ids[2]}:{company_ids[3]}", "last_company_id": company_ids[2], "done": False},
+            )
+        )
+        + "\n",
+        encoding="utf-8",
+    )
+
+    exit_code = script.run_backfill(
+        org_id=org_id,
+        limit=None,
+        batch_size=1,
+        dry_run=False,
+        shard_by="range",
+        shard_size=2,
+        checkpoint=str(checkpoint),
+    )
+    assert exit_code == 0
+    scores = _scores(org_id)
+    assert [scores[company_id][0] is not None for company_id in company_ids] == [False, False, False, True, True]
+
+    records = [json.loads(line) for line in checkpoint.read_text(encoding="utf-8").splitlines()]
+    assert {record["shard"] for record in records[1:] if record["done"]} == {
+        f"{org_id}:{company_ids[0]}:{company_ids[1]}",
+        f"{org_id}:{company_ids[2]}:{company_ids[3]}",
+        f"{org_id}:{company_ids[4]}:{company_ids[4]}",
+    }
+
+    with pytest.raises(ValueError):
+        script.run_backfill(
+            org_id=org_id,
+            limit=None,
+            batch_size=1,
+            dry_run=False,
+            shard_by="org",
+            shard_size=2,
+            checkpoint=str(checkpoint),
+        )
+
+
+def test_backfill_process_pool_path_on_file_database(tmp_path):
+    # Os workers (fork) nao enxergam o SQLite em memoria dos testes: roda em outro processo
+    # com banco em arquivo e sem a trava de dialeto, passando por ProcessPoolExecutor,
+    # _init_worker e a fila de progresso do Manager.
+    code = textwrap.dedent(
+        """
+        import json, sys
+        sys.path.insert(0, "tests")
+        import app.models
+        from app.db.base import Base
+        from app.db.listeners import register_session_listeners
+        from app.db.session import SessionLocal, engine
+        from app.models.org import Org
+        from app.services.company_scoring import recalculate_company_score
+        import test_backfill_company_scores as helpers
+
+        register_session_listeners()
+        Base.metadata.create_all(bind=engine)
+        db = SessionLocal()
+        db.add(Org(name="Backfill pool", slug="backfill-pool"))
+        db.commit()
+        db.close()
+        org_id, company_ids = helpers._seed_companies(7)
+
+        script = helpers._load_script()
+        script._SERIAL_DIALECTS = set()
+        exit_code = script.run_backfill(
+            org_id=org_id, limit=None, batch_size=2, dry_run=False, workers=2,
+            shard_by="range", shard_size=4, checkpoint=sys.argv[1],
+        )
+        bulk = helpers._scores(org_id)
+        db = SessionLocal()
+        expected = {}
+        for company_id in company_ids:
+            result = recalculate_company_score(db, org_id, company_id)
+            expected[company_id] = (result["score_urgencia"], result["score_status"], result["risco_consolidado"])
+        db.rollback()
+        db.close()
+        print("RESULT " + json.dumps({"exit_code": exit_code, "matches": bulk == expected, "scored": len(bulk)}))
+        """
+    )
+    checkpoint = tmp_path / "backfill.jsonl"
+    env = {**os.environ, "DATABASE_URL": f"sqlite+pysqlite:///{tmp_path / 'backfill.db'}", "SEED_ENABLED": "false"}
+    completed = subprocess.run(
+        [sys.executable, "-c", code, str(checkpoint)],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert completed.returncode == 0, completed.stderr
+    assert "workers=2" in completed.stdout
+    result = json.loads(completed.stdout.split("RESULT ", 1)[1])
+    assert result == {"exit_code": 0, "matches": True, "scored": 7}
+
+    records = [json.loads(line) for line in checkpoint.read_text(encoding="utf-8").splitlines()]
+    assert sum(1 for record in records[1:] if record["done"]) == 2
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import app.api.v1.endpoints.certificados as certificados_endpoint
+from app.db.session import SessionLocal
+from app.models.certhub_sync_cursor import CertHubSyncCursor
+from app.models.certificate_mirror import CertificateMirror
+from app.models.org import Org
+from app.services.certhub_sync import run_certhub_pull_sync
+from tests.certhub_stub import StubCertHub
+
+
+def _login(client, email: str = "admin@example.com", password: str = "admin123") -> str:
+    response = client.post("/api/v1/auth/login", json={"email": email, "password": password})
+    assert response.status_code == 200
+    return response.json()["access_token"]
+
+
+def _stub_cert(index: int, *, updated_at: str, **extra) -> dict:
+    return {
+        "cert_id": f"cert-{index}",
+        "sha1_fingerprint": f"SHA{index:03d}",
+        "name": f"Certificado {index}",
+        "document_type": "CNPJ",
+        "document_masked": f"{index:014d}",
+        "not_after": (datetime.now(timezone.utc) + timedelta(days=90)).isoformat(),
+        "updated_at": updated_at,
+        **extra,
+    }
+
+
+def _mirror_names(db, org_id: str) -> dict[str, str]:
+    db.expire_all()
+    rows = db.query(CertificateMirror.cert_id, CertificateMirror.name).filter(CertificateMirror.org_id == org_id)
+    return {cert_id: name for cert_id, name in rows.all()}
+
+
+def test_certhub_pull_sync_is_incremental_paginated_and_conditional(client):
+    stub = StubCertHub()
+    for index in range(5):
+        stub.put(_stub_cert(index, updated_at=f"2026-04-01T10:00:0{index}+00:00"))
+    certhub = stub.client(page_size=2)
+
+    db = SessionLocal()
+    try:
+        org_id = db.query(Org).first().id
+
+        first = run_certhub_pull_sync(db, org_id, certhub)
+        assert (first.mode, first.pages, first.received, first.inserted) == ("incremental", 3, 5, 5)
+        # Cursor recua a janela de sobreposicao em relacao ao maior updated_at visto.
+        assert first.cursor == "2026-04-01T09:55:04+00:00"
+        assert len(_mirror_names(db, org_id)) == 5
+        assert "updated_since" not in stub.requests[0].url.params
+        assert db.query(CertHubSyncCursor).filter(CertHubSyncCursor.org_id == org_id).one().etag is None
+
+        # Mesma janela de novo: relista a sobreposicao, cursor nao muda e o ETag passa a valer.
+        overlap = run_certhub_pull_sync(db, org_id, certhub)
+        assert stub.requests[-1].url.params["updated_since"] == "2026-04-01T09:55:04+00:00"
+        assert (overlap.received, overlap.inserted) == (5, 0)
+        assert overlap.not_modified is False
+        assert overlap.cursor == first.cursor
+
+        cached = run_certhub_pull_sync(db, org_id, certhub)
+        assert cached.not_modified is True
+        assert cached.pages == 0
+
+        stub.put(_stub_cert(1, updated_at="2026-04-02T08:00:00+00:00", name="Renovado"))
+        stub.put(_stub_cert(3, updated_at="2026-04-02T08:00:01+00:00", deleted=True))
+        delta = run_certhub_pull_sync(db, org_id, certhub)
+        assert (delta.pages, delta.received, delta.deleted) == (3, 4, 1)
+        names = _mirror_names(db, org_id)
+        assert names["cert-1"] == "Renovado"
+        assert "cert-3" not in names
+
+        cursor = db.query(CertHubSyncCursor).filter(CertHubSyncCursor.org_id == org_id).one()
+        assert cursor.updated_since == "2026-04-02T07:55:01+00:00"
+        assert cursor.etag is None
+        assert cursor.last_full_sync_at is None
+
+        # Item que chega ao CertHub depois, mas com updated_at anterior ao maximo ja visto.
+        stub.put(_stub_cert(7, updated_at="2026-04-02T07:59:00+00:00", name="Atrasado"))
+        late = run_certhub_pull_sync(db, org_id, certhub)
+        assert late.inserted == 1
+        assert _mirror_names(db, org_id)["cert-7"] == "Atrasado"
+
+        full = run_certhub_pull_sync(db, org_id, certhub, full=True)
+        assert "updated_since" not in stub.requests[-3].url.params
+        assert (full.mode, full.pages, full.received) == ("full", 3, 5)
+        db.expire_all()
+        assert db.query(CertHubSyncCursor).filter(CertHubSyncCursor.org_id == org_id).one().last_full_sync_at
+    finally:
+        db.close()
+    certhub.close()
+
+
+def test_certificados_sync_pull_mode_uses_incremental_cursor(client, monkeypatch):
+    stub = StubCertHub()
+    stub.put(_stub_cert(1, updated_at="2026-04-01T10:00:00+00:00"))
+    certhub = stub.client(page_size=10)
+    monkeypatch.setattr(certificados_endpoint, "get_certhub_client", lambda: certhub)
+    headers = {"Authorization": f"Bearer {_login(client)}"}
+
+    first = client.post("/api/v1/certificados/sync", json={}, headers=headers)
+    assert first.status_code == 200
+    assert first.json()["mode"] == "incremental"
+    assert first.json()["inserted"] == 1
+
+    stub.put(_stub_cert(2, updated_at="2026-04-01T11:00:00+00:00"))
+    second = client.post("/api/v1/certificados/sync", json={}, headers=headers)
+    assert second.status_code == 200
+    assert (second.json()["received"], second.json()["inserted"]) == (2, 1)
+    assert second.json()["cursor"] == "2026-04-01T10:55:00+00:00"
+
+    full = client.post("/api/v1/certificados/sync?full=true", json={}, headers=headers)
+    assert full.status_code == 200
+    assert (full.json()["mode"], full.json()["received"], full.json()["updated"]) == ("full", 2, 2)
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from app.db.session import SessionLocal
+from app.models.certhub_webhook_run import CertHubWebhookRun
+from app.models.certificate_mirror import CertificateMirror
+from app.models.company import Company
+from app.models.company_profile import CompanyProfile
+from app.models.org import Org
+from app.services.certificados_mirror import (
+    recover_certhub_webhook_runs,
+    refresh_company_profiles_certificado_digital,
+    run_certhub_webhook_job,
+    upsert_mirror,
+)
+
+
+def _cert(sha1: str | None, *, cnpj: str, cert_id: str | None = None, days: int = 90, name: str = "Cert") -> dict:
+    return {
+        "cert_id": cert_id,
+        "sha1_fingerprint": sha1,
+        "name": name,
+        "document_type": "CNPJ",
+        "document_unmasked": cnpj,
+        "parse_ok": True,
+        "not_after": (datetime.now(timezone.utc) + timedelta(days=days)).isoformat(),
+    }
+
+
+def _seed_companies(db, org_id: str) -> dict[str, str]:
+    ids: dict[str, str] = {}
+    for cnpj, certificado in (
+        ("11111111000111", None),
+        ("22222222000122", "SIM"),
+        ("33333333000133", "NÃO"),
+    ):
+        company = Company(org_id=org_id, cnpj=cnpj, razao_social=f"Empresa {cnpj}")
+        db.add(company)
+        db.flush()
+        db.add(CompanyProfile(org_id=org_id, company_id=company.id, certificado_digital=certificado))
+        ids[cnpj] = company.id
+    db.commit()
+    return ids
+
+
+def test_upsert_mirror_bulk_inserts_updates_and_dedupes(client):
+    db = SessionLocal()
+    try:
+        org = db.query(Org).first()
+        ids = _seed_companies(db, org.id)
+
+        first = upsert_mirror(
+            db,
+            org.id,
+            [
+                _cert("AA", cnpj="11111111000111", cert_id="c-1"),
+                _cert("BB", cnpj="22222222000122", cert_id="c-2", days=-5),
+                _cert("BB", cnpj="22222222000122", cert_id="c-2", days=-3, name="Repetido"),
+                _cert(None, cnpj="99999999000199", cert_id="c-3"),
+            ],
+        )
+        db.commit()
+        assert (first.received, first.inserted, first.updated) == (4, 3, 0)
+        assert (first.mapped_companies, first.unmapped_cnpjs) == (3, 1)
+        assert db.query(CertificateMirror).filter(CertificateMirror.org_id == org.id).count() == 3
+        repeated = db.query(CertificateMirror).filter(CertificateMirror.sha1_fingerprint == "BB").one()
+        assert repeated.name == "Repetido"
+
+        second = upsert_mirror(
+            db,
+            org.id,
+            [
+                _cert("AA", cnpj="11111111000111", cert_id="c-1", name="Renovado"),
+                _cert(None, cnpj="99999999000199", cert_id="c-3", name="Por cert_id"),
+                _cert("CC", cnpj="33333333000133", cert_id="c-4"),
+            ],
+        )
+        db.commit()
+        assert (second.inserted, second.updated) == (1, 2)
+        db.expire_all()
+        assert db.query(CertificateMirror).filter(CertificateMirror.org_id == org.id).count() == 4
+        assert db.query(CertificateMirror).filter(CertificateMirror.cert_id == "c-3").one().name == "Por cert_id"
+        renewed = db.query(CertificateMirror).filter(CertificateMirror.sha1_fingerprint == "AA").one()
+        assert renewed.name == "Renovado"
+        assert renewed.company_id == ids["11111111000111"]
+    finally:
+        db.close()
+
+
+def test_refresh_company_profiles_certificado_digital_is_set_based(client):
+    db = SessionLocal()
+    try:
+        org = db.query(Org).first()
+        ids = _seed_companies(db, org.id)
+        db.add_all(
+            [
+                CertificateMirror(
+                    org_id=org.id,
+                    company_id=ids["11111111000111"],
+                    sha1_fingerprint="ACTIVE",
+                    parse_ok=True,
+                    not_after=datetime.now(timezone.utc) + timedelta(days=30),
+                ),
+                CertificateMirror(
+                    org_id=org.id,
+                    company_id=ids["22222222000122"],
+                    sha1_fingerprint="EXPIRED",
+                    parse_ok=True,
+                    not_after=datetime.now(timezone.utc) - timedelta(days=1),
+                ),
+            ]
+        )
+        db.commit()
+
+        changed = refresh_company_profiles_certificado_digital(db, org.id)
+        db.commit()
+        db.expire_all()
+        values = {
+            company_id: certificado
+            for company_id, certificado in db.query(CompanyProfile.company_id, CompanyProfile.certificado_digital)
+            .filter(CompanyProfile.company_id.in_(ids.values()))
+            .all()
+        }
+        assert values[ids["11111111000111"]] == "SIM"
+        assert values[ids["22222222000122"]] == "NÃO"
+        assert values[ids["33333333000133"]] == "NÃO"
+        assert changed == 2
+
+        assert refresh_company_profiles_certificado_digital(db, org.id) == 0
+    finally:
+        db.close()
+
+
+def test_certhub_webhook_accepts_and_reconciles_in_background(client, monkeypatch):
+    from app.core.config import settings
+    from app.models.certhub_webhook_run import CertHubWebhookRun
+    from app.services import certificados_mirror
+
+    monkeypatch.setattr(settings, "CERTHUB_WEBHOOK_TOKEN", "hook-token", raising=False)
+    monkeypatch.setattr(certificados_mirror, "WEBHOOK_BATCH_SIZE", 2)
+    headers = {"Authorization": "Bearer hook-token"}
+
+    db = SessionLocal()
+    try:
+        org = db.query(Org).first()
+        org_slug = org.slug
+        if not org_slug:
+            org.slug = org_slug = "webhook-org"
+            db.commit()
+        ids = _seed_companies(db, org.id)
+        db.add(CertificateMirror(org_id=org.id, sha1_fingerprint="STALE", parse_ok=True))
+        db.commit()
+    finally:
+        db.close()
+
+    unauthorized = client.post(
+        "/api/v1/integracoes/certhub/webhook",
+        json={"mode": "upsert", "org_slug": org_slug, "certificates": []},
+    )
+    assert unauthorized.status_code == 401
+
+    response = client.post(
+        "/api/v1/integracoes/certhub/webhook",
+        headers=headers,
+        json={
+            "mode": "full",
+            "org_slug": org_slug,
+            "certificates": [
+                _cert("AA", cnpj="11111111000111", cert_id="c-1"),
+                _cert("BB", cnpj="22222222000122", cert_id="c-2"),
+                _cert("CC", cnpj="44444444000144", cert_id="c-3"),
+            ],
+        },
+    )
+    assert response.status_code == 202
+    body = response.json()
+    assert body["status"] == "accepted"
+    assert body["received"] == 3
+
+    status_response = client.get(f"/api/v1/integracoes/certhub/webhook/runs/{body['run_id']}", headers=headers)
+    assert status_response.status_code == 200
+    run_status = status_response.json()
+    assert run_status["status"] == "completed"
+    assert run_status["processed"] == 3
+    assert run_status["result"] == {"upserted": 3, "deleted": 1}
+
+    db = SessionLocal()
+    try:
+        fingerprints = {row[0] for row in db.query(CertificateMirror.sha1_fingerprint).all()}
+        assert fingerprints == {"AA", "BB", "CC"}
+        assert db.get(CertHubWebhookRun, body["run_id"]).payload is None
+        profile = db.query(CompanyProfile).filter(CompanyProfile.company_id == ids["11111111000111"]).one()
+        assert profile.certificado_digital == "SIM"
+    finally:
+        db.close()
+
+    deleted = client.post(
+        "/api/v1/integracoes/certhub/webhook",
+        headers=headers,
+        json={"mode": "delete", "org_slug": org_slug, "deleted_cert_ids": ["c-3"]},
+    )
+    assert deleted.status_code == 202
+    deleted_status = client.get(
+        f"/api/v1/integracoes/certhub/webhook/runs/{deleted.json()['run_id']}", headers=headers
+    ).json()
+    assert deleted_status["result"] == {"deleted": 1}
+
+
+def _seed_runs(*, older_heartbeat_age: timedelta) -> tuple[str, str]:
+    """Run ``full`` mais antigo ja em ``running`` e um ``upsert`` mais novo na fila."""
+    db = SessionLocal()
+    try:
+        org = db.query(Org).first()
+        now = datetime.now(timezone.utc)
+        older = CertHubWebhookRun(
+            org_id=org.id,
+            mode="full",
+            status="running",
+            payload={"certificates": [_cert("AA", cnpj="11111111000111", cert_id="c-1")]},
+            total=1,
+            started_at=now - timedelta(minutes=30),
+            heartbeat_at=now - older_heartbeat_age,
+        )
+        newer = CertHubWebhookRun(
+            org_id=org.id,
+            mode="upsert",
+            status="queued",
+            payload={"certificates": [_cert("BB", cnpj="22222222000122", cert_id="c-2")]},
+            total=1,
+            started_at=now - timedelta(minutes=29),
+        )
+        db.add_all([older, newer, CertificateMirror(org_id=org.id, sha1_fingerprint="STALE", parse_ok=True)])
+        db.commit()
+        return older.id, newer.id
+    finally:
+        db.close()
+
+
+def _statuses(*run_ids: str) -> list[str]:
+    db = SessionLocal()
+    try:
+        return [db.get(CertHubWebhookRun, run_id).status for run_id in run_ids]
+    finally:
+        db.close()
+
+
+def _fingerprints() -> set[str]:
+    db = SessionLocal()
+    try:
+        return {row[0] for row in db.query(CertificateMirror.sha1_fingerprint).all()}
+    finally:
+        db.close()
+
+
+def test_lost_webhook_runs_are_recovered_in_arrival_order(client):
+    older_id, newer_id = _seed_runs(older_heartbeat_age=timedelta(hours=1))
+
+    assert recover_certhub_webhook_runs(stale_seconds=300) == {"orgs": 1, "runs": 2}
+    assert _statuses(older_id, newer_id) == ["completed", "completed"]
+    # o full antigo roda antes do upsert novo e nao apaga o BB
+    assert _fingerprints() == {"AA", "BB"}
+
+
+def test_webhook_run_waits_for_the_org_run_owned_by_another_process(client):
+    older_id, newer_id = _seed_runs(older_heartbeat_age=timedelta(seconds=5))
+
+    # outro processo esta com o run mais antigo da org (heartbeat recente): o novo espera
+    run_certhub_webhook_job(newer_id)
+    assert recover_certhub_webhook_runs(stale_seconds=300) == {"orgs": 1, "runs": 0}
+    assert _statuses(older_id, newer_id) == ["running", "queued"]
+    assert _fingerprints() == {"STALE"}
+
+    # sem heartbeat alem da janela, o run e retomado e a fila da org anda em ordem
+    assert recover_certhub_webhook_runs(stale_seconds=1) == {"orgs": 1, "runs": 2}
+    assert _statuses(older_id, newer_id) == ["completed", "completed"]
+    assert _fingerprints() == {"AA", "BB"}
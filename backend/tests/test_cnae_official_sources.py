@@ -1,13 +1,17 @@
 from __future__ import annotations
 
 import httpx
+import pytest
 
 from app.db.session import SessionLocal
 from app.models.cnae_risk import CNAERisk
 from app.models.cnae_risk_suggestion import CNAERiskSuggestion
+from app.models.company import Company
+from app.models.company_profile import CompanyProfile
+from app.models.org import Org
 from app.schemas.official_sources import OfficialSourceFinding
 from app.services import cnae_official_suggestions as orchestrator
-from app.services.official_sources import anapolis, anvisa, cbmgo, cgsim
+from app.services.official_sources import anapolis, anvisa, cbmgo, cgsim, cnae_index, http_cache
 
 
 def _login(client, email: str = "admin@example.com", password: str = "admin123") -> str:
@@ -16,32 +20,35 @@ def _login(client, email: str = "admin@example.com", password: str = "admin123")
     return response.json()["access_token"]
 
 
-def test_lookup_anapolis_with_mocked_online_parser():
-    def _fake_fetch(_url: str) -> str:
-        return "Anexo Unico LC 377/2018 CNAE 56.11-2-01 Complexidade III."
+def _install_fetcher(monkeypatch, handler, cache_dir, *, ttl_seconds: float = 3600) -> http_cache.OfficialSourceFetcher:
+    fetcher = http_cache.OfficialSourceFetcher(
+        cache_dir,
+        ttl_seconds=ttl_seconds,
+        transport=httpx.MockTransport(handler),
+    )
+    monkeypatch.setattr(http_cache, "_default_fetcher", fetcher)
+    monkeypatch.setattr(cnae_index, "_indexes", {})
+    return fetcher
 
-    original_fetch = anapolis._fetch_source_text
-    anapolis._fetch_source_text = _fake_fetch
-    try:
-        findings = anapolis.lookup_cnae("56.11-2-01")
-    finally:
-        anapolis._fetch_source_text = original_fetch
+
+def test_lookup_anapolis_with_mocked_online_parser(monkeypatch, tmp_path):
+    def _handler(_request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text="Anexo Unico LC 377/2018 CNAE 56.11-2-01 Complexidade III.")
+
+    _install_fetcher(monkeypatch, _handler, tmp_path)
+    findings = anapolis.lookup_cnae("56.11-2-01")
 
     assert len(findings) >= 1
     assert all(item.source_name == "ANAPOLIS" for item in findings)
     assert any(item.source_reference for item in findings)
 
 
-def test_lookup_anvisa_with_mocked_online_parser():
-    def _fake_fetch(_url: str) -> str:
-        return "IN 66/2020 lista CNAE 56.11-2-01 como atividade de alto risco sanitario."
+def test_lookup_anvisa_with_mocked_online_parser(monkeypatch, tmp_path):
+    def _handler(_request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text="IN 66/2020 lista CNAE 56.11-2-01 como atividade de alto risco sanitario.")
 
-    original_fetch = anvisa._fetch_source_text
-    anvisa._fetch_source_text = _fake_fetch
-    try:
-        findings = anvisa.lookup_cnae("56.11-2-01")
-    finally:
-        anvisa._fetch_source_text = original_fetch
+    _install_fetcher(monkeypatch, _handler, tmp_path)
+    findings = anvisa.lookup_cnae("56.11-2-01")
 
     assert len(findings) == 1
     assert findings[0].source_name == "ANVISA"
@@ -49,39 +56,60 @@ def test_lookup_anvisa_with_mocked_online_parser():
     assert findings[0].suggested_risk_tier == "HIGH"
 
 
-def test_cgsim_fallback_when_direct_url_returns_403(monkeypatch):
-    class _FakeResponse:
-        def __init__(self, url: str, status_code: int, text: str):
-            self.url = url
-            self.status_code = status_code
-            self.content = text.encode("utf-8")
-            self.request = httpx.Request("GET", url)
-
-        def raise_for_status(self) -> None:
-            if self.status_code >= 400:
-                raise httpx.HTTPStatusError("status error", request=self.request, response=self)
-
-    class _FakeClient:
-        def __init__(self, *args, **kwargs):
-            self.args = args
-            self.kwargs = kwargs
-
-        def __enter__(self):
-            return self
-
-        def __exit__(self, exc_type, exc, tb):
-            return False
-
-        def get(self, url: str):
-            if url == cgsim._PRIMARY_DOC_URL:
-                return _FakeResponse(url, 403, "forbidden")
-            if url == cgsim._VIEW_DOC_URL:
-                return _FakeResponse(url, 200, "Resolucao CGSIM com CNAE 62.01-5-01 de baixo risco.")
-            if url == cgsim._INDEX_URL:
-                return _FakeResponse(url, 200, "indice oficial")
-            return _FakeResponse(url, 404, "not found")
-
-    monkeypatch.setattr(cgsim.httpx, "Client", _FakeClient)
+def test_build_cnae_index_groups_snippets_by_normalized_code():
+    text = (
+        "Anexo I; CNAE 56.11-2-01 restaurantes de alto risco. "
+        "Item 4 cita 5611201 e 4781-4/00 com grau I. "
+        "CNPJ 12345678000199 nao e CNAE."
+    )
+    index = cnae_index.build_cnae_index(text, tier_hint=anvisa._tier_from_snippet)
+
+    assert set(index) == {"56.11-2-01", "47.81-4-00"}
+    assert [item.tier_hint for item in index["56.11-2-01"]] == ["HIGH", "LOW"]
+    assert index["47.81-4-00"][0].text.startswith("Item 4")
+
+
+def test_source_index_is_persisted_with_source_version(monkeypatch, tmp_path):
+    versions = {"current": '"v1"'}
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        if request.headers.get("if-none-match") == versions["current"]:
+            return httpx.Response(304)
+        body = "CNAE 56.11-2-01 de alto risco." if versions["current"] == '"v1"' else "CNAE 62.01-5-01 baixo risco."
+        return httpx.Response(200, text=body, headers={"ETag": versions["current"]})
+
+    _install_fetcher(monkeypatch, _handler, tmp_path, ttl_seconds=0)
+    url = "https://fonte.example/anexo"
+    first = cnae_index.get_source_index(url, namespace="TEST")
+    assert first.version == '"v1"'
+    assert first.lookup("5611201")
+
+    # Sem memo em processo: 304 reaproveita o indice persistido na mesma versao.
+    original_build = cnae_index.build_cnae_index
+    monkeypatch.setattr(cnae_index, "build_cnae_index", lambda *_args, **_kwargs: pytest.fail("rebuilt"))
+    monkeypatch.setattr(cnae_index, "_indexes", {})
+    assert cnae_index.get_source_index(url, namespace="TEST").lookup("56.11-2-01")
+    monkeypatch.setattr(cnae_index, "build_cnae_index", original_build)
+
+    versions["current"] = '"v2"'
+    updated = cnae_index.get_source_index(url, namespace="TEST")
+    assert updated.version == '"v2"'
+    assert not updated.lookup("56.11-2-01")
+    assert updated.lookup("62.01-5-01")
+
+
+def test_cgsim_fallback_when_direct_url_returns_403(monkeypatch, tmp_path):
+    def _handler(request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        if url == cgsim._PRIMARY_DOC_URL:
+            return httpx.Response(403, text="forbidden")
+        if url == cgsim._VIEW_DOC_URL:
+            return httpx.Response(200, text="Resolucao CGSIM com CNAE 62.01-5-01 de baixo risco.")
+        if url == cgsim._INDEX_URL:
+            return httpx.Response(200, text="indice oficial")
+        return httpx.Response(404, text="not found")
+
+    _install_fetcher(monkeypatch, _handler, tmp_path)
     findings = cgsim.lookup_cnae("62.01-5-01")
     assert len(findings) == 1
     finding = findings[0]
@@ -90,6 +118,109 @@ def test_cgsim_fallback_when_direct_url_returns_403(monkeypatch):
     assert finding.requires_questionnaire is False
 
 
+def test_official_source_fetcher_downloads_each_source_once_per_batch(monkeypatch, tmp_path):
+    hits: dict[str, int] = {}
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        hits[url] = hits.get(url, 0) + 1
+        if url == cgsim._PRIMARY_DOC_URL:
+            return httpx.Response(403, text="forbidden")
+        return httpx.Response(
+            200,
+            text="Anexo oficial CNAE 56.11-2-01 Complexidade III. CNAE 62.01-5-01 de baixo risco.",
+            headers={"ETag": '"v1"'},
+        )
+
+    fetcher = _install_fetcher(monkeypatch, _handler, tmp_path)
+    codes = [f"56.11-2-{index:02d}" for index in range(1, 51)]
+    for code in codes:
+        anapolis.lookup_cnae(code)
+        anvisa.lookup_cnae(code)
+        cgsim.lookup_cnae(code)
+
+    assert hits
+    assert all(count == 1 for count in hits.values())
+    assert fetcher.network_requests == len(hits)
+
+
+def test_official_source_fetcher_revalidates_disk_cache_with_etag(monkeypatch, tmp_path):
+    seen_validators: list[str | None] = []
+    url = "https://fonte.example/lei"
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        seen_validators.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text="Lei   municipal\n CNAE 56.11-2-01", headers={"ETag": '"v1"'})
+
+    first = http_cache.OfficialSourceFetcher(tmp_path, ttl_seconds=3600, transport=httpx.MockTransport(_handler))
+    assert first.fetch_text(url) == "Lei municipal CNAE 56.11-2-01"
+    first.close()
+
+    # Novo processo com cache expirado: GET condicional, 304 reaproveita o corpo em disco.
+    second = http_cache.OfficialSourceFetcher(tmp_path, ttl_seconds=0, transport=httpx.MockTransport(_handler))
+    assert second.fetch_text(url) == "Lei municipal CNAE 56.11-2-01"
+    second.close()
+
+    assert seen_validators == [None, '"v1"']
+
+
+def test_official_source_fetcher_retries_transient_error_after_short_ttl(monkeypatch, tmp_path):
+    statuses = [503, 200]
+    clock = [1_000_000.0]
+    monkeypatch.setattr(http_cache.time, "time", lambda: clock[0])
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(statuses.pop(0), text="CNAE 56.11-2-01")
+
+    fetcher = http_cache.OfficialSourceFetcher(
+        tmp_path, ttl_seconds=3600, error_ttl_seconds=60, transport=httpx.MockTransport(_handler)
+    )
+    with pytest.raises(httpx.HTTPStatusError):
+        fetcher.fetch_text("https://fonte.example/instavel")
+    # Erro memorizado so pela janela curta, nao pelo TTL de sucesso.
+    with pytest.raises(httpx.HTTPStatusError):
+        fetcher.fetch_text("https://fonte.example/instavel")
+    assert fetcher.network_requests == 1
+
+    clock[0] += 61
+    assert fetcher.fetch_text("https://fonte.example/instavel") == "CNAE 56.11-2-01"
+    assert fetcher.network_requests == 2
+    fetcher.close()
+
+
+def test_official_source_fetcher_serves_stale_copy_on_transient_error(monkeypatch, tmp_path):
+    url = "https://fonte.example/lei"
+    responses = [httpx.Response(200, text="Lei antiga CNAE 56.11-2-01", headers={"ETag": '"v1"'})]
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        return responses.pop(0)
+
+    first = http_cache.OfficialSourceFetcher(tmp_path, ttl_seconds=3600, transport=httpx.MockTransport(_handler))
+    assert first.fetch_text(url) == "Lei antiga CNAE 56.11-2-01"
+    first.close()
+
+    # Copia em disco vencida e fonte fora do ar: serve a copia em vez de propagar o 503.
+    clock = [http_cache.time.time() + 7200]
+    monkeypatch.setattr(http_cache.time, "time", lambda: clock[0])
+    responses.extend([httpx.Response(503), httpx.Response(304)])
+    second = http_cache.OfficialSourceFetcher(
+        tmp_path, ttl_seconds=3600, error_ttl_seconds=60, transport=httpx.MockTransport(_handler)
+    )
+    document = second.fetch_document(url)
+    assert (document.text, document.version) == ("Lei antiga CNAE 56.11-2-01", '"v1"')
+    assert second.fetch_text(url) == "Lei antiga CNAE 56.11-2-01"
+    assert second.network_requests == 1
+
+    # Passada a janela curta volta a revalidar na fonte.
+    clock[0] += 61
+    assert second.fetch_text(url) == "Lei antiga CNAE 56.11-2-01"
+    assert second.network_requests == 2
+    assert responses == []
+    second.close()
+
+
 def test_lookup_single_creates_pending_suggestions_without_catalog_apply(client, monkeypatch):
     monkeypatch.setitem(
         orchestrator.OFFICIAL_SOURCE_ADAPTERS,
@@ -234,3 +365,95 @@ def test_goiania_kept_only_when_explicitly_requested():
 
     names_explicit = orchestrator._resolve_source_names(["GOIANIA"])
     assert names_explicit == ["GOIANIA"]
+
+
+def _sanitary_finding(code: str) -> OfficialSourceFinding:
+    return OfficialSourceFinding(
+        cnae_code=code,
+        domain="sanitary",
+        official_result="Regra sanitaria objetiva",
+        suggested_risk_tier="HIGH",
+        suggested_base_weight=None,
+        source_name="ANVISA",
+        source_reference="https://anvisa.example/in66",
+        evidence_excerpt=f"IN 66/2020 CNAE {code}",
+        confidence=0.9,
+        requires_questionnaire=False,
+    )
+
+
+def test_org_lookup_job_collects_unmapped_cnaes_and_bulk_creates_suggestions(client, monkeypatch):
+    cgsim_calls: list[str] = []
+
+    def _cgsim_down(code: str):
+        cgsim_calls.append(code)
+        raise RuntimeError("CGSIM fora do ar")
+
+    monkeypatch.setitem(orchestrator.OFFICIAL_SOURCE_ADAPTERS, "ANVISA", lambda code: [_sanitary_finding(code)])
+    monkeypatch.setitem(orchestrator.OFFICIAL_SOURCE_ADAPTERS, "CGSIM", _cgsim_down)
+    monkeypatch.setitem(orchestrator.OFFICIAL_SOURCE_ADAPTERS, "GOIANIA", lambda _code: [])
+
+    db = SessionLocal()
+    try:
+        org = db.query(Org).first()
+        profiles = (
+            ("11111111000111", "UNMAPPED_CNAE", [{"code": "5611201", "text": "Restaurantes"}]),
+            ("22222222000122", "UNMAPPED_CNAE", [{"code": "4781400", "text": "Vestuario"}]),
+            ("33333333000133", "UNMAPPED_CNAE", [{"code": "5611201", "text": "Restaurantes"}]),
+            ("44444444000144", "OK", [{"code": "6201501", "text": "Software"}]),
+        )
+        for cnpj, score_status, cnaes in profiles:
+            company = Company(org_id=org.id, cnpj=cnpj, razao_social=f"Empresa {cnpj}")
+            db.add(company)
+            db.flush()
+            db.add(
+                CompanyProfile(
+                    org_id=org.id,
+                    company_id=company.id,
+                    cnaes_principal=cnaes,
+                    score_status=score_status,
+                )
+            )
+        existing = orchestrator._finding_to_suggestion_payload(org.id, _sanitary_finding("56.11-2-01"))
+        db.add(CNAERiskSuggestion(status="PENDING", **existing))
+        db.commit()
+    finally:
+        db.close()
+
+    token = _login(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    started = client.post(
+        "/api/v1/catalog/cnae-risk-suggestions/official/lookup-org/start",
+        headers=headers,
+        json={"sources": ["ANVISA", "CGSIM", "GOIANIA"]},
+    )
+    assert started.status_code == 200
+    run_id = started.json()["run_id"]
+
+    status_response = client.get(
+        f"/api/v1/catalog/cnae-risk-suggestions/official/lookup-org/{run_id}",
+        headers=headers,
+    )
+    assert status_response.status_code == 200
+    body = status_response.json()
+    assert body["status"] == "completed"
+    assert body["total_codes"] == 2
+    assert body["processed"] == body["total"] == 6
+    assert body["findings_count"] == 2
+    assert body["created_count"] == 1
+    assert body["skipped_duplicates"] == 1
+    assert body["error_count"] == 1
+    assert body["errors"][0]["source_name"] == "CGSIM"
+    assert len(cgsim_calls) == 1
+
+    db = SessionLocal()
+    try:
+        pending_codes = sorted(
+            code
+            for (code,) in db.query(CNAERiskSuggestion.cnae_code)
+            .filter(CNAERiskSuggestion.status == "PENDING", CNAERiskSuggestion.source_name == "ANVISA")
+            .all()
+        )
+        assert pending_codes == ["47.81-4-00", "56.11-2-01"]
+    finally:
+        db.close()
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import threading
+
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.cnae_risk import CNAERisk
+from app.models.company import Company
+from app.models.company_profile import CompanyProfile
+from app.models.org import Org
+from app.services import cnae_risk_catalog
+from app.services.cnae_risk_catalog import (
+    CNAECatalogInvalidationListener,
+    bump_cnae_risk_catalog_version,
+    clear_cnae_risk_catalog_cache,
+    get_cnae_risk_catalog,
+)
+from app.services.company_scoring import recalculate_company_score
+
+
+def _risk(code: str, *, risk_tier: str = "LOW", base_weight: int = 10, is_active: bool = True) -> CNAERisk:
+    return CNAERisk(
+        cnae_code=code,
+        cnae_text=f"CNAE {code}",
+        risk_tier=risk_tier,
+        base_weight=base_weight,
+        source="test",
+        is_active=is_active,
+    )
+
+
+def test_catalog_is_reused_until_the_version_bumps(client, monkeypatch, query_budget):
+    monkeypatch.setattr(settings, "CNAE_CATALOG_CHECK_SECONDS", 0.0)
+    clear_cnae_risk_catalog_cache()
+    db = SessionLocal()
+    try:
+        db.add_all([_risk("47.11-3-01"), _risk("10.91-1-02", is_active=False)])
+        db.commit()
+
+        catalog = get_cnae_risk_catalog(db)
+        assert set(catalog.entries) == {"47.11-3-01"}
+        assert catalog.version >= 1
+        assert [entry.cnae_code for entry in catalog.lookup(["47.11-3-01", "10.91-1-02", "47.11-3-01"])] == [
+            "47.11-3-01"
+        ]
+
+        # Versao igual: uma conferencia da linha de versao, sem reler o catalogo.
+        with query_budget(1):
+            assert get_cnae_risk_catalog(db) is catalog
+
+        # Escrita Core sem flush do ORM: o bump explicito invalida.
+        db.execute(update(CNAERisk).where(CNAERisk.cnae_code == "10.91-1-02").values(is_active=True))
+        bump_cnae_risk_catalog_version(db)
+        db.commit()
+        reloaded = get_cnae_risk_catalog(db)
+        assert reloaded.version == catalog.version + 1
+        assert reloaded.mapped_codes(["10.91-1-02", "99.99-9-99"]) == {"10.91-1-02"}
+
+        monkeypatch.setattr(settings, "CNAE_CATALOG_CHECK_SECONDS", 3600.0)
+        with query_budget(0):
+            assert get_cnae_risk_catalog(db) is reloaded
+    finally:
+        db.close()
+
+
+def test_uncommitted_catalog_change_is_visible_only_to_its_session(client, monkeypatch):
+    monkeypatch.setattr(settings, "CNAE_CATALOG_CHECK_SECONDS", 3600.0)
+    clear_cnae_risk_catalog_cache()
+    db = SessionLocal()
+    other = SessionLocal()
+    try:
+        org = db.query(Org).first()
+        company = Company(org_id=org.id, cnpj="48484848000148", razao_social="Catalogo Cache")
+        db.add_all([company, _risk("56.11-2-01", risk_tier="LOW", base_weight=10)])
+        db.flush()
+        db.add(
+            CompanyProfile(
+                org_id=org.id,
+                company_id=company.id,
+                cnaes_principal=[{"code": "56.11-2-01", "text": "Restaurantes"}],
+                raw={},
+            )
+        )
+        db.commit()
+        assert recalculate_company_score(db, org.id, company.id)["score_urgencia"] == 10
+        db.commit()
+
+        risk = db.query(CNAERisk).filter(CNAERisk.cnae_code == "56.11-2-01").one()
+        risk.base_weight = 40
+        assert recalculate_company_score(db, org.id, company.id)["score_urgencia"] == 40
+        assert get_cnae_risk_catalog(other).entries["56.11-2-01"].base_weight == 10
+        other.rollback()
+
+        db.commit()
+        assert get_cnae_risk_catalog(other).entries["56.11-2-01"].base_weight == 40
+    finally:
+        other.close()
+        db.close()
+
+
+def test_redis_listener_is_started_once_and_backs_off_when_redis_is_down(client, monkeypatch):
+    attempts: list[int] = []
+    waits: list[float] = []
+
+    def unreachable():
+        attempts.append(1)
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(settings, "CNAE_CATALOG_REDIS_URL", "redis://unreachable:6379/0")
+    monkeypatch.setattr(cnae_risk_catalog, "_redis_client", unreachable)
+
+    class _RecordingStop(threading.Event):
+        # Registra as esperas sem dormir e encerra depois da terceira falha.
+        def wait(self, timeout=None):
+            waits.append(timeout)
+            if len(waits) >= 3:
+                self.set()
+            return self.is_set()
+
+    listener = CNAECatalogInvalidationListener()
+    listener._stop = _RecordingStop()
+    listener.start()
+    listener._thread.join(5)
+    assert waits == [1.0, 2.0, 4.0]
+    assert len(attempts) == 3
+
+    # A leitura do catalogo nao abre conexao nem thread com o Redis.
+    threads_before = threading.active_count()
+    db = SessionLocal()
+    try:
+        get_cnae_risk_catalog(db)
+    finally:
+        db.close()
+    assert len(attempts) == 3
+    assert threading.active_count() == threads_before
+    listener.stop()
@@ -269,3 +269,185 @@ def test_company_overview_exposes_invalidated_definitive_alvara(client):
         and item["requires_new_licence_request"] is True
         for item in payload["licences"]
     )
+
+
+def test_company_overview_etag_revalidates_and_changes_on_writes(client, monkeypatch):
+    from app.services import company_overview
+    from app.services.certificados_mirror import upsert_mirror
+
+    token = _login(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    org_id = _default_org_id()
+    company_id = _create_company_full(org_id)
+    url = f"/api/v1/companies/{company_id}/overview"
+
+    builds: list[str] = []
+    original_build = company_overview.build_company_overview
+
+    def _counting_build(db, org_id_arg, company_id_arg):
+        builds.append(company_id_arg)
+        return original_build(db, org_id_arg, company_id_arg)
+
+    monkeypatch.setattr(company_overview, "build_company_overview", _counting_build)
+
+    first = client.get(url, headers=headers)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    not_modified = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+    assert client.get(url, headers=headers).status_code == 200
+    assert builds == [company_id]
+
+    db = SessionLocal()
+    try:
+        process = db.query(CompanyProcess).filter(CompanyProcess.company_id == company_id).first()
+        process.situacao = "Concluído"
+        db.commit()
+    finally:
+        db.close()
+
+    after_process = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert after_process.status_code == 200
+    assert after_process.headers["etag"] != etag
+    assert len(builds) == 2
+
+    db = SessionLocal()
+    try:
+        upsert_mirror(
+            db,
+            org_id,
+            [
+                {
+                    "sha1_fingerprint": "OVERVIEW-NEW",
+                    "document_type": "CNPJ",
+                    "document_unmasked": "12345678000199",
+                    "parse_ok": True,
+                    "not_after": (datetime.now(timezone.utc) + timedelta(days=400)).isoformat(),
+                }
+            ],
+            refresh_profiles=False,
+        )
+        db.commit()
+    finally:
+        db.close()
+
+    after_cert = client.get(url, headers={**headers, "If-None-Match": after_process.headers["etag"]})
+    assert after_cert.status_code == 200
+    assert after_cert.headers["etag"] != after_process.headers["etag"]
+    assert len(builds) == 3
+
+
+def test_company_data_version_tracks_orm_and_org_wide_writes(client):
+    from app.services.company_data_version import bump_org_data_version, get_company_data_version
+
+    org_id = _default_org_id()
+    company_id = _create_company_full(org_id)
+    db = SessionLocal()
+    try:
+        company_version, org_version = get_company_data_version(db, org_id, company_id)
+        assert company_version >= 1
+
+        tax = db.query(CompanyTax).filter(CompanyTax.company_id == company_id).first()
+        tax.iss = "Pago"
+        db.commit()
+        assert get_company_data_version(db, org_id, company_id) == (company_version + 1, org_version)
+
+        # sem alteracao efetiva nao ha nova versao
+        db.query(CompanyTax).filter(CompanyTax.company_id == company_id).first()
+        db.commit()
+        assert get_company_data_version(db, org_id, company_id) == (company_version + 1, org_version)
+
+        bump_org_data_version(db, org_id)
+        db.commit()
+        assert get_company_data_version(db, org_id, company_id) == (company_version + 1, org_version + 1)
+    finally:
+        db.close()
+
+
+def _seed_many_companies(org_id: str, count: int) -> list[str]:
+    db = SessionLocal()
+    try:
+        ids: list[str] = []
+        for index in range(count):
+            company = Company(org_id=org_id, cnpj=f"{50000000 + index:08d}000100", razao_social=f"Lote {index}")
+            db.add(company)
+            db.flush()
+            db.add(CompanyProfile(org_id=org_id, company_id=company.id, risco_consolidado="LOW"))
+            db.add(CompanyTax(org_id=org_id, company_id=company.id, taxa_funcionamento="em_aberto"))
+            db.add(
+                CompanyLicence(
+                    org_id=org_id,
+                    company_id=company.id,
+                    cercon="possui",
+                    cercon_valid_until=date.today() + timedelta(days=10 + index),
+                )
+            )
+            for position in range(12):
+                db.add(
+                    CompanyProcess(
+                        org_id=org_id,
+                        company_id=company.id,
+                        process_type="DIVERSOS",
+                        protocolo=f"LOTE-{index}-{position}",
+                        situacao="pendente",
+                        updated_at=datetime.now(timezone.utc) - timedelta(days=position),
+                    )
+                )
+            for offset_days in (5, 300):
+                db.add(
+                    CertificateMirror(
+                        org_id=org_id,
+                        company_id=company.id,
+                        sha1_fingerprint=f"LOTE-{index}-{offset_days}",
+                        not_after=datetime.now(timezone.utc) + timedelta(days=offset_days),
+                    )
+                )
+            ids.append(company.id)
+        db.commit()
+        return ids
+    finally:
+        db.close()
+
+
+def test_company_overview_batch_matches_single_and_uses_few_queries(client, query_budget):
+    from app.services.company_overview import build_company_overview, build_company_overviews
+
+    token = _login(client)
+    org_id = _default_org_id()
+    ids = _seed_many_companies(org_id, 25)
+    foreign_id = _create_other_org_company()
+
+    db = SessionLocal()
+    try:
+        with query_budget(6):
+            batch = build_company_overviews(db, org_id, ids)
+        assert len(batch) == 25
+
+        for company_id in ids[:3]:
+            single = build_company_overview(db, org_id, company_id)
+            assert batch[company_id].model_dump() == single.model_dump()
+        assert len(batch[ids[0]].processes) == 10
+        assert batch[ids[0]].processes[0].protocolo == "LOTE-0-0"
+        assert batch[ids[0]].certificate.fingerprint == "LOTE-0-300"
+    finally:
+        db.close()
+
+    response = client.post(
+        "/api/v1/companies/overview/batch",
+        headers={"Authorization": f"Bearer {token}"},
+        json={"company_ids": [ids[1], foreign_id, ids[0], "inexistente", ids[1]]},
+    )
+    assert response.status_code == 200
+    payload = response.json()
+    assert [item["company"]["id"] for item in payload["items"]] == [ids[1], ids[0]]
+    assert payload["missing"] == [foreign_id, "inexistente"]
+
+    too_many = client.post(
+        "/api/v1/companies/overview/batch",
+        headers={"Authorization": f"Bearer {token}"},
+        json={"company_ids": [f"id-{index}" for index in range(501)]},
+    )
+    assert too_many.status_code == 422
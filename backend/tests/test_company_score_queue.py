@@ -0,0 +1,184 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import update
+
+import app.services.company_score_queue as queue_module
+from app.db.session import SessionLocal
+from app.models.cnae_risk import CNAERisk
+from app.models.company import Company
+from app.models.company_licence import CompanyLicence
+from app.models.company_process import CompanyProcess
+from app.models.company_profile import CompanyProfile
+from app.models.company_score_queue import CompanyScoreQueueEntry
+from app.models.org import Org
+from app.services.company_score_queue import drain_company_score_queue, enqueue_company_scores
+
+
+def _login(client) -> dict[str, str]:
+    response = client.post("/api/v1/auth/login", json={"email": "admin@example.com", "password": "admin123"})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _seed_definitive_company() -> tuple[str, str, str]:
+    db = SessionLocal()
+    try:
+        org = db.query(Org).first()
+        db.add(CNAERisk(cnae_code="56.11-2-01", cnae_text="Restaurantes", risk_tier="HIGH", base_weight=45, is_active=True))
+        company = Company(org_id=org.id, cnpj="42424242000142", razao_social="Fila Score")
+        db.add(company)
+        db.flush()
+        db.add(
+            CompanyProfile(
+                org_id=org.id,
+                company_id=company.id,
+                cnaes_principal=[{"code": "56.11-2-01", "text": "Restaurantes"}],
+                raw={},
+            )
+        )
+        db.add(
+            CompanyLicence(
+                org_id=org.id,
+                company_id=company.id,
+                alvara_funcionamento="definitivo",
+                alvara_funcionamento_kind="DEFINITIVO",
+            )
+        )
+        db.flush()
+        process = CompanyProcess(
+            org_id=org.id,
+            company_id=company.id,
+            process_type="DIVERSOS",
+            protocolo="ALT-041",
+            orgao="Prefeitura",
+            operacao="Alteração",
+            updated_at=datetime.now(timezone.utc) + timedelta(minutes=1),
+        )
+        db.add(process)
+        db.commit()
+        return org.id, company.id, process.id
+    finally:
+        db.close()
+
+
+def test_process_obs_change_enqueues_and_drain_recalculates(client):
+    headers = _login(client)
+    org_id, company_id, process_id = _seed_definitive_company()
+
+    response = client.patch(
+        f"/api/v1/processos/{process_id}/obs",
+        json={"obs": "Alteração de CNAE e razão social."},
+        headers=headers,
+    )
+    assert response.status_code == 200
+
+    db = SessionLocal()
+    try:
+        entries = db.query(CompanyScoreQueueEntry).all()
+        assert [(entry.org_id, entry.company_id) for entry in entries] == [(org_id, company_id)]
+
+        stats = drain_company_score_queue(db, debounce_seconds=0)
+        assert stats == {"processed": 1, "recalculated": 1, "failed": 0, "requeued": 0}
+        assert db.query(CompanyScoreQueueEntry).count() == 0
+        profile = db.query(CompanyProfile).filter(CompanyProfile.company_id == company_id).one()
+        assert profile.score_status == "DEFINITIVE_INVALIDATED"
+        assert profile.score_urgencia == 95
+    finally:
+        db.close()
+
+
+def test_repeated_enqueues_coalesce_and_wait_for_the_window(client):
+    org_id, company_id, _process_id = _seed_definitive_company()
+    db = SessionLocal()
+    try:
+        for _ in range(3):
+            enqueue_company_scores(db, org_id, [company_id, None])
+            db.commit()
+        assert db.query(CompanyScoreQueueEntry).count() == 1
+
+        assert drain_company_score_queue(db, debounce_seconds=60)["processed"] == 0
+        assert db.query(CompanyScoreQueueEntry).count() == 1
+
+        later = datetime.now(timezone.utc) + timedelta(seconds=61)
+        assert drain_company_score_queue(db, debounce_seconds=60, now=later)["recalculated"] == 1
+        assert db.query(CompanyScoreQueueEntry).count() == 0
+    finally:
+        db.close()
+
+
+def test_entry_marked_again_during_recalculation_stays_queued(client, monkeypatch):
+    org_id, company_id, _process_id = _seed_definitive_company()
+    original = queue_module.recalculate_company_scores_bulk
+
+    def _recalculate_with_concurrent_write(db, target_org_id, target_company_ids):
+        # outra escrita marca a mesma empresa enquanto o lote esta sendo recalculado
+        db.execute(
+            update(CompanyScoreQueueEntry)
+            .where(CompanyScoreQueueEntry.company_id.in_(target_company_ids))
+            .values(last_enqueued_at=datetime.now(timezone.utc) + timedelta(seconds=1))
+        )
+        return original(db, target_org_id, target_company_ids)
+
+    monkeypatch.setattr(queue_module, "recalculate_company_scores_bulk", _recalculate_with_concurrent_write)
+    db = SessionLocal()
+    try:
+        enqueue_company_scores(db, org_id, [company_id])
+        db.commit()
+        stats = drain_company_score_queue(db, debounce_seconds=0)
+        assert stats["recalculated"] == 1 and stats["requeued"] == 1
+        entry = db.query(CompanyScoreQueueEntry).one()
+        assert entry.enqueued_at == entry.last_enqueued_at
+    finally:
+        db.close()
+
+
+def test_drain_uses_bulk_recalculation_and_falls_back_per_company(client, monkeypatch):
+    org_id, company_id, _process_id = _seed_definitive_company()
+    db = SessionLocal()
+    try:
+        other = Company(org_id=org_id, cnpj="43434343000143", razao_social="Fila Score 2")
+        db.add(other)
+        db.commit()
+        other_id = other.id
+    finally:
+        db.close()
+
+    bulk_calls: list[list[str]] = []
+    single_calls: list[str] = []
+    original_bulk = queue_module.recalculate_company_scores_bulk
+    original_single = queue_module.recalculate_company_score
+
+    def _bulk(db, target_org_id, target_company_ids):
+        bulk_calls.append(sorted(target_company_ids))
+        return original_bulk(db, target_org_id, target_company_ids)
+
+    def _single(db, target_org_id, target_company_id):
+        single_calls.append(target_company_id)
+        if target_company_id == other_id:
+            raise RuntimeError("falha isolada")
+        return original_single(db, target_org_id, target_company_id)
+
+    monkeypatch.setattr(queue_module, "recalculate_company_scores_bulk", _bulk)
+    monkeypatch.setattr(queue_module, "recalculate_company_score", _single)
+    db = SessionLocal()
+    try:
+        enqueue_company_scores(db, org_id, [company_id, other_id])
+        db.commit()
+        stats = drain_company_score_queue(db, debounce_seconds=0)
+        assert stats == {"processed": 2, "recalculated": 2, "failed": 0, "requeued": 0}
+        assert bulk_calls == [sorted([company_id, other_id])] and single_calls == []
+
+        def _broken_bulk(db, target_org_id, target_company_ids):
+            raise RuntimeError("lote quebrado")
+
+        monkeypatch.setattr(queue_module, "recalculate_company_scores_bulk", _broken_bulk)
+        enqueue_company_scores(db, org_id, [company_id, other_id])
+        db.commit()
+        stats = drain_company_score_queue(db, debounce_seconds=0)
+        assert stats == {"processed": 2, "recalculated": 1, "failed": 1, "requeued": 0}
+        assert sorted(single_calls) == sorted([company_id, other_id])
+        assert db.query(CompanyScoreQueueEntry).count() == 0
+        profile = db.query(CompanyProfile).filter(CompanyProfile.company_id == company_id).one()
+        assert profile.score_status == "OK_DEFINITIVE"
+    finally:
+        db.close()
@@ -12,6 +12,7 @@ from app.models.company_profile import CompanyProfile
 from app.models.org import Org
 from app.models.receitaws_bulk_sync_run import ReceitaWSBulkSyncRun
 from app.models.user import User
+from app.services.company_score_queue import drain_all_company_scores
 from app.services.company_scoring import recalculate_company_score
 from app.services.receitaws_bulk_sync import run_receitaws_bulk_sync_job
 from app.worker.watchers import LICENCES_SUBDIR, run_scan_once
@@ -23,6 +24,14 @@ def _login(client, email: str = "admin@example.com", password: str = "admin123")
     return response.json()["access_token"]
 
 
+def _drain_score_queue() -> dict[str, int]:
+    db = SessionLocal()
+    try:
+        return drain_all_company_scores(db, debounce_seconds=0)
+    finally:
+        db.close()
+
+
 def _first_org(db) -> Org:
     org = db.query(Org).first()
     assert org is not None
@@ -457,7 +466,11 @@ def test_patch_company_recalculates_score(client):
         json={"cnaes_principal": [{"code": "56.11-2-01", "text": "Restaurantes e similares"}]},
     )
     assert patched.status_code == 200
-    payload = patched.json()
+    assert _drain_score_queue()["recalculated"] == 1
+
+    refreshed = client.get(f"/api/v1/companies/{company_id}", headers=headers)
+    assert refreshed.status_code == 200
+    payload = refreshed.json()
     assert payload["score_status"] == "NO_LICENCE"
     assert payload["score_urgencia"] == 45
     assert payload["risco_consolidado"] == "HIGH"
@@ -497,6 +510,7 @@ def test_patch_licence_item_recalculates_score(client):
         json={"field": "cercon", "status": "vencido", "validade": expired_date},
     )
     assert response.status_code == 200
+    _drain_score_queue()
 
     db = SessionLocal()
     try:
@@ -553,6 +567,7 @@ def test_bulk_sync_recalculates_score_when_cnae_changes(client, monkeypatch):
 
     monkeypatch.setattr("app.services.receitaws_bulk_sync.fetch_receitaws_payload", _fake_fetch)
     run_receitaws_bulk_sync_job(run_id)
+    _drain_score_queue()
 
     db = SessionLocal()
     try:
@@ -596,11 +611,11 @@ def test_watcher_recalculates_only_when_projection_changes(client, tmp_path, mon
         db.add(CompanyLicence(org_id=org.id, company_id=company.id, municipio="Goiania", raw={}))
         db.commit()
 
-        def _fake_recalculate(*_args, **_kwargs):
+        def _fake_enqueue(*_args, **_kwargs):
             call_counter["count"] += 1
-            return {"updated": True, "changed": True}
+            return 1
 
-        monkeypatch.setattr(watcher_module, "recalculate_company_score", _fake_recalculate)
+        monkeypatch.setattr(watcher_module, "enqueue_company_scores", _fake_enqueue)
 
         base = tmp_path / "Watcher Score" / LICENCES_SUBDIR
         base.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,113 @@
+import random
+import time
+
+from app.core.normalize import build_company_search_text
+from app.db.session import SessionLocal
+from app.models.company import Company
+from app.models.org import Org
+from app.services.company_search import CompanyNgramIndex, normalize_search_query, search_companies
+
+
+def _login(client) -> dict[str, str]:
+    response = client.post("/api/v1/auth/login", json={"email": "admin@example.com", "password": "admin123"})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _seed_companies(rows: list[dict]) -> tuple[str, dict[str, str]]:
+    db = SessionLocal()
+    try:
+        org = db.query(Org).first()
+        ids = {}
+        for row in rows:
+            company = Company(org_id=org.id, **row)
+            db.add(company)
+            db.flush()
+            ids[row["razao_social"]] = company.id
+        db.commit()
+        return org.id, ids
+    finally:
+        db.close()
+
+
+def test_search_text_strips_accents_and_keeps_document_digits():
+    text = build_company_search_text("São José Comércio LTDA", "Padaria Pão-Doce", None, "12.345.678/0001-90")
+    assert text == "sao jose comercio ltda padaria pao doce 12345678000190"
+    assert normalize_search_query("12.345.678/0001") == "123456780001"
+    assert normalize_search_query("  Açaí  ") == "acai"
+
+
+def test_search_endpoint_ranks_accent_insensitive_matches(client):
+    headers = _login(client)
+    _seed_companies(
+        [
+            {"razao_social": "São José Comércio LTDA", "cnpj": "12345678000190", "nome_fantasia": "Padaria Pão Doce"},
+            {"razao_social": "Joselito Serviços ME", "cnpj": "98765432000110"},
+            {"razao_social": "Auto Peças Goiás", "cnpj": "11222333000144", "fs_dirname": "AUTOPECAS_GOIAS"},
+            {"razao_social": "Jose Inativa LTDA", "cnpj": "55666777000188", "is_active": False},
+        ]
+    )
+
+    response = client.get("/api/v1/companies/search", params={"q": "sao jose"}, headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body[0]["razao_social"] == "São José Comércio LTDA"
+    assert all(item["razao_social"] != "Jose Inativa LTDA" for item in body)
+
+    by_fantasia = client.get("/api/v1/companies/search", params={"q": "pao doce"}, headers=headers).json()
+    assert [item["razao_social"] for item in by_fantasia] == ["São José Comércio LTDA"]
+
+    by_cnpj = client.get("/api/v1/companies/search", params={"q": "98.765.432"}, headers=headers).json()
+    assert [item["cnpj"] for item in by_cnpj] == ["98765432000110"]
+
+    with_typo = client.get("/api/v1/companies/search", params={"q": "autopecas goias"}, headers=headers).json()
+    assert with_typo[0]["razao_social"] == "Auto Peças Goiás"
+
+    inactive = client.get(
+        "/api/v1/companies/search", params={"q": "jose inativa", "include_inactive": "true"}, headers=headers
+    ).json()
+    assert inactive[0]["razao_social"] == "Jose Inativa LTDA"
+
+
+def test_search_index_follows_committed_writes(client):
+    headers = _login(client)
+    org_id, ids = _seed_companies([{"razao_social": "Mercado Central", "cnpj": "10101010000110"}])
+    assert client.get("/api/v1/companies/search", params={"q": "mercado"}, headers=headers).json()
+
+    db = SessionLocal()
+    try:
+        company = db.get(Company, ids["Mercado Central"])
+        company.razao_social = "Farmácia Popular"
+        db.commit()
+        assert [hit.company_id for hit in search_companies(db, org_id, "farmacia")] == [company.id]
+        assert search_companies(db, org_id, "mercado") == []
+
+        company.razao_social = "Descartado"
+        db.flush()
+        db.rollback()
+        assert search_companies(db, org_id, "descartado") == []
+
+        db.delete(db.get(Company, ids["Mercado Central"]))
+        db.commit()
+        assert search_companies(db, org_id, "farmacia") == []
+    finally:
+        db.close()
+
+
+def test_ngram_index_type_ahead_at_20k_companies():
+    rng = random.Random(7)
+    words = ["comercio", "servicos", "padaria", "transportes", "goias", "anapolis", "mercado", "auto", "pecas", "saude"]
+    index = CompanyNgramIndex()
+    for position in range(20_000):
+        name = " ".join(rng.sample(words, 3))
+        index.upsert(str(position), build_company_search_text(name, None, None, f"{position:014d}"), True)
+    index.upsert("target", build_company_search_text("Distribuidora Xavantina"), True)
+
+    started = time.perf_counter()
+    for query in ("distrib", "xavant", "padaria goias", "00000000012345"):
+        hits = index.search(normalize_search_query(query), limit=20)
+        assert hits
+    elapsed_ms = (time.perf_counter() - started) * 1000 / 4
+
+    assert index.search("xavantina", limit=5)[0].company_id == "target"
+    assert elapsed_ms < 250
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+from app.db import listeners
+from app.db.session import SessionLocal
+from app.models.company import Company
+from app.models.company_profile import CompanyProfile
+from app.models.org import Org
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def test_db_session_import_does_not_pull_services():
+    code = (
+        "import sys; import app.db.session; "
+        "print(sorted(name for name in sys.modules if name.startswith('app.services')))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_register_session_listeners_is_idempotent():
+    handlers = list(listeners._flush_handlers)
+    listeners.register_session_listeners()
+    listeners.register_session_listeners()
+    assert listeners._flush_handlers == handlers
+    assert len(handlers) == len(set(handlers))
+
+
+def test_flush_changes_groups_objects_in_one_pass(client):
+    db = SessionLocal()
+    try:
+        org = db.query(Org).first()
+        company = Company(org_id=org.id, cnpj="81818181000181", razao_social="Listener")
+        db.add(company)
+        db.flush()
+        profile = CompanyProfile(org_id=org.id, company_id=company.id, raw={})
+        db.add(profile)
+        db.flush()
+        company.razao_social = "Listener 2"
+        db.delete(profile)
+
+        changes = listeners.FlushChanges(db)
+        assert changes.new_of(Company) == []
+        assert changes.dirty_of(Company) == [company]
+        assert changes.deleted_of(CompanyProfile) == [profile]
+        assert changes.changed_of(Company, CompanyProfile) == [company, profile]
+        db.rollback()
+    finally:
+        db.close()
@@ -3,6 +3,7 @@ from app.db.session import SessionLocal
 from app.models.org import Org
 from app.models.role import Role
 from app.models.user import User
+from app.services import licence_detection
 
 
 def _login(client, email: str = "admin@example.com", password: str = "admin123") -> str:
@@ -91,3 +92,25 @@ def test_detect_blocks_view_role(client):
     token = _login(client, email="view-detect@example.com", password="view123")
     response = _detect(client, token, ["Alvará Bombeiros - Val 10.10.2026.pdf"])
     assert response.status_code == 403
+
+
+def test_parse_many_matches_single_parse_and_reuses_memo():
+    filenames = [
+        "Alvará Funcionamento - Definitivo.pdf",
+        "CERCON - Val 10.10.2026.pdf",
+        "Alvará Funcionamento - Definitivo.pdf",
+        "Contrato Social.pdf",
+    ]
+    licence_detection._parse_filename_cached.cache_clear()
+
+    results = licence_detection.parse_many(filenames)
+
+    assert [item.suggested_document_kind for item in results] == [
+        "ALVARA_FUNCIONAMENTO_DEFINITIVO",
+        "ALVARA_BOMBEIROS",
+        "ALVARA_FUNCIONAMENTO_DEFINITIVO",
+        None,
+    ]
+    assert results[0] is results[2]
+    assert results == [licence_detection._parse_filename(name) for name in filenames]
+    assert licence_detection._parse_filename_cached.cache_info().misses == 3
@@ -0,0 +1,100 @@
+from datetime import date, timedelta
+
+from app.db.session import SessionLocal
+from app.models.company import Company
+from app.models.company_licence import CompanyLicence
+from app.models.licence_expiry import LicenceExpiry
+from app.models.org import Org
+from app.services.notification_operational_scan import _upcoming_licence_expiries
+
+
+def _login(client) -> dict[str, str]:
+    response = client.post("/api/v1/auth/login", json={"email": "admin@example.com", "password": "admin123"})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _seed_licence(**fields) -> tuple[str, str, str]:
+    db = SessionLocal()
+    try:
+        org = db.query(Org).first()
+        company = Company(org_id=org.id, cnpj="31313131000131", razao_social="Calendario Licencas")
+        db.add(company)
+        db.flush()
+        licence = CompanyLicence(org_id=org.id, company_id=company.id, **fields)
+        db.add(licence)
+        db.commit()
+        return org.id, company.id, licence.id
+    finally:
+        db.close()
+
+
+def _expiries(licence_id: str) -> dict[str, LicenceExpiry]:
+    db = SessionLocal()
+    try:
+        rows = db.query(LicenceExpiry).filter(LicenceExpiry.licence_id == licence_id).all()
+        return {row.licence_type: row for row in rows}
+    finally:
+        db.close()
+
+
+def test_calendar_follows_licence_writes_and_company_delete(client):
+    headers = _login(client)
+    soon = date.today() + timedelta(days=10)
+    org_id, company_id, licence_id = _seed_licence(
+        cercon="possui",
+        cercon_valid_until=soon,
+        alvara_funcionamento="definitivo",
+        alvara_funcionamento_kind="DEFINITIVO",
+        raw={"validade_alvara_vig_sanitaria": "15/01/2031", "source_kind_cercon": "Vencimento"},
+    )
+    expiries = _expiries(licence_id)
+    assert set(expiries) == {"cercon", "alvara_funcionamento", "alvara_vig_sanitaria"}
+    assert expiries["cercon"].valid_until == soon
+    assert expiries["cercon"].source == "vencimento"
+    assert expiries["alvara_vig_sanitaria"].valid_until == date(2031, 1, 15)
+    assert expiries["alvara_funcionamento"].is_definitive is True
+
+    later = date.today() + timedelta(days=200)
+    response = client.patch(
+        f"/api/v1/licencas/{licence_id}/item",
+        json={"field": "cercon", "status": "possui", "validade": later.isoformat()},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    assert _expiries(licence_id)["cercon"].valid_until == later
+
+    db = SessionLocal()
+    try:
+        upcoming = _upcoming_licence_expiries(db, org_id, date.today())
+        assert all(row.valid_until <= date.today() + timedelta(days=60) for row, _company in upcoming)
+        assert not [row for row, _company in upcoming if row.licence_id == licence_id]
+    finally:
+        db.close()
+
+    response = client.request(
+        "DELETE", f"/api/v1/companies/{company_id}", json={"password": "admin123"}, headers=headers
+    )
+    assert response.status_code == 200
+    assert _expiries(licence_id) == {}
+
+
+def test_upcoming_range_only_returns_dates_inside_rule_horizon(client):
+    today = date.today()
+    org_id, _company_id, licence_id = _seed_licence(
+        alvara_vig_sanitaria="possui",
+        alvara_vig_sanitaria_valid_until=today + timedelta(days=20),
+        licenca_ambiental="possui",
+        licenca_ambiental_valid_until=today - timedelta(days=1),
+        certidao_uso_solo="possui",
+        certidao_uso_solo_valid_until=today + timedelta(days=5),
+    )
+    db = SessionLocal()
+    try:
+        upcoming = _upcoming_licence_expiries(db, org_id, today)
+        # certidao de uso do solo nao tem regra de notificacao; licenca vencida fica fora da faixa
+        assert [(row.licence_id, row.licence_type) for row, _company in upcoming] == [
+            (licence_id, "alvara_vig_sanitaria")
+        ]
+    finally:
+        db.close()
@@ -75,3 +75,77 @@ def test_definitive_alvara_ignores_ambiguous_or_old_processes():
     assert payload["invalidated_reasons"] == []
     assert payload["invalidating_process_id"] is None
     assert payload["requires_new_licence_request"] is False
+
+
+def _seed_definitive_company_with_process(obs: str) -> tuple[str, str, str]:
+    from app.db.session import SessionLocal
+    from app.models.company import Company
+    from app.models.org import Org
+
+    db = SessionLocal()
+    try:
+        org = db.query(Org).first()
+        company = Company(org_id=org.id, cnpj="71717171000171", razao_social="Memo Regulatorio")
+        db.add(company)
+        db.flush()
+        licence = CompanyLicence(
+            org_id=org.id,
+            company_id=company.id,
+            alvara_funcionamento="definitivo",
+            alvara_funcionamento_kind="DEFINITIVO",
+            updated_at=datetime.now(timezone.utc) - timedelta(days=1),
+        )
+        process = CompanyProcess(
+            org_id=org.id,
+            company_id=company.id,
+            process_type="DIVERSOS",
+            protocolo="MEMO-1",
+            orgao="Prefeitura",
+            operacao="Alteração",
+            obs=obs,
+        )
+        db.add_all([licence, process])
+        db.commit()
+        return org.id, licence.id, process.id
+    finally:
+        db.close()
+
+
+def test_evaluation_is_memoized_per_version_and_bulk_evaluator_reuses_it(client, monkeypatch):
+    import app.services.licence_regulatory_rules as rules
+    from app.db.session import SessionLocal
+
+    org_id, licence_id, process_id = _seed_definitive_company_with_process("Alteração do CNAE principal.")
+    calls: list[str] = []
+    original = rules._compute_process_reasons
+
+    def _counting(process):
+        calls.append(process.id)
+        return original(process)
+
+    monkeypatch.setattr(rules, "_compute_process_reasons", _counting)
+
+    db = SessionLocal()
+    try:
+        licence = db.get(CompanyLicence, licence_id)
+        processes = db.query(CompanyProcess).filter(CompanyProcess.company_id == licence.company_id).all()
+        first = rules.evaluate_definitive_alvara_regulatory_status(licence=licence, processes=processes)
+        first["invalidated_reasons"].append("MUTADO")
+        second = rules.evaluate_definitive_alvara_regulatory_status(licence=licence, processes=processes)
+        assert second["invalidated_reasons"] == ["CNAE"]
+        assert calls == [process_id]
+
+        bulk = rules.evaluate_definitive_alvaras_bulk(db, org_id, [licence])
+        assert bulk[licence_id]["invalidating_process_ref"] == "MEMO-1"
+        assert calls == [process_id]
+
+        # alteracao pendente nao usa o memo; depois do commit a nova versao e recalculada
+        processes[0].obs = "Alteração de endereço."
+        pending = rules.evaluate_definitive_alvara_regulatory_status(licence=licence, processes=processes)
+        assert pending["invalidated_reasons"] == ["ENDERECO"]
+        db.commit()
+        refreshed = rules.evaluate_definitive_alvaras_bulk(db, org_id, [db.get(CompanyLicence, licence_id)])
+        assert refreshed[licence_id]["invalidated_reasons"] == ["ENDERECO"]
+        assert len(calls) == 3
+    finally:
+        db.close()
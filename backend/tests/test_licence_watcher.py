@@ -180,3 +180,79 @@ def test_watcher_uses_structured_subdir_and_skips_when_missing(client, tmp_path,
         assert filial_row is not None and filial_row.cercon in (None, "")
     finally:
         db.close()
+
+
+def test_watcher_creates_single_projection_row_for_multiple_groups(client, tmp_path, monkeypatch):
+    db = SessionLocal()
+    try:
+        monkeypatch.setattr(watcher_module, "SessionLocal", lambda: db)
+        monkeypatch.setattr(db, "close", lambda: None)
+        org = db.query(Org).first()
+        company = Company(
+            org_id=org.id,
+            cnpj="82345678000110",
+            razao_social="Empresa Sem Licenca",
+            fs_dirname="Empresa Sem Licenca",
+            municipio="Goiania",
+        )
+        db.add(company)
+        db.commit()
+
+        base = Path(tmp_path) / "Empresa Sem Licenca" / LICENCES_SUBDIR
+        base.mkdir(parents=True, exist_ok=True)
+        (base / "Alvará Bombeiros - Val 25.12.2027.pdf").write_bytes(b"bombeiros")
+        (base / "Alvará Vig Sanitária - Val 10.06.2027.pdf").write_bytes(b"sanitaria")
+
+        stats = run_scan_once(str(tmp_path))
+        assert stats["processed"] == 2
+        assert stats["errors"] == 0
+
+        db.expire_all()
+        rows = (
+            db.query(CompanyLicence)
+            .filter(CompanyLicence.org_id == org.id, CompanyLicence.company_id == company.id)
+            .all()
+        )
+        assert len(rows) == 1
+        assert rows[0].cercon == "possui"
+        assert rows[0].alvara_vig_sanitaria == "possui"
+    finally:
+        db.close()
+
+
+def test_watcher_counts_parser_error_per_file(client, tmp_path, monkeypatch):
+    db = SessionLocal()
+    try:
+        monkeypatch.setattr(watcher_module, "SessionLocal", lambda: db)
+        monkeypatch.setattr(db, "close", lambda: None)
+        org = db.query(Org).first()
+        company = Company(
+            org_id=org.id,
+            cnpj="42345678000129",
+            razao_social="Empresa Parser",
+            fs_dirname="Empresa Parser",
+            municipio="Goiania",
+        )
+        db.add(company)
+        db.flush()
+        db.add(CompanyLicence(org_id=org.id, company_id=company.id, municipio="Goiania", raw={}))
+        db.commit()
+
+        base = Path(tmp_path) / "Empresa Parser" / LICENCES_SUBDIR
+        base.mkdir(parents=True, exist_ok=True)
+        (base / "ALVARA_BOMBEIROS - Val 25.12.2026.pdf").write_bytes(b"conteudo-ok")
+        (base / "QUEBRA_PARSER.pdf").write_bytes(b"conteudo-quebrado")
+
+        parse = watcher_module.parse_filename_to_suggestion
+
+        def flaky_parse(filename):
+            if filename.startswith("QUEBRA"):
+                raise ValueError("parser quebrado")
+            return parse(filename)
+
+        monkeypatch.setattr(watcher_module, "parse_filename_to_suggestion", flaky_parse)
+        stats = run_scan_once(str(tmp_path))
+        assert stats["processed"] == 1
+        assert stats["errors"] == 1
+    finally:
+        db.close()
@@ -10,7 +10,7 @@ from app.models.company_process import CompanyProcess
 from app.models.notification_event import NotificationEvent
 from app.models.org import Org
 from app.services.business_days import add_business_days
-from app.services.notification_operational_scan import run_notification_operational_scan
+from app.services.notification_operational_scan import _stale_process_rows, run_notification_operational_scan
 
 
 def _create_company(db, org_id: str, suffix: str) -> Company:
@@ -177,3 +177,37 @@ def test_notification_rules_emit_specific_alert_for_invalidated_definitive_alvar
         assert "LIC_ALVARA_D30" not in event.dedupe_key
     finally:
         db.close()
+
+
+def test_stale_process_query_only_returns_open_processes_past_the_smallest_window(client):
+    base_date = datetime(2026, 4, 6, 12, 0, tzinfo=timezone.utc).date()  # Monday
+
+    db = SessionLocal()
+    try:
+        org = db.query(Org).first()
+        assert org is not None
+        company = _create_company(db, org.id, "41")
+
+        def _process(protocolo: str, business_days_ago: int, situacao: str | None = None) -> CompanyProcess:
+            process = CompanyProcess(
+                org_id=org.id,
+                company_id=company.id,
+                process_type="DIVERSOS",
+                protocolo=protocolo,
+                situacao=situacao,
+                updated_at=datetime.combine(
+                    add_business_days(base_date, -business_days_ago), datetime.min.time(), tzinfo=timezone.utc
+                ),
+            )
+            db.add(process)
+            return process
+
+        boundary = _process("STALE-7", 7)
+        _process("FRESH-6", 6)
+        _process("DONE-20", 20, situacao="concluido")
+        db.commit()
+
+        rows = _stale_process_rows(db, org.id, base_date)
+        assert [process.id for process, _company in rows] == [boundary.id]
+    finally:
+        db.close()
@@ -178,3 +178,143 @@ def test_operational_scan_endpoint_requires_admin_or_dev_and_integrates_worker_j
     payload = worker_response.json()
     assert payload["job_type"] == "notification_operational_scan"
     assert payload["source"] == "notification_operational_scan_runs"
+
+
+def test_notifications_stream_requires_token_in_header_or_query(client):
+    assert client.get("/api/v1/notificacoes/stream").status_code == 401
+    assert client.get("/api/v1/notificacoes/stream", params={"ticket": "invalido"}).status_code == 401
+
+
+def test_notifications_stream_query_accepts_only_stream_ticket(client, monkeypatch):
+    from app.api.v1.endpoints import notifications as notifications_endpoint
+
+    admin_token = _login(client, "admin@example.com", "admin123")
+    assert client.post("/api/v1/notificacoes/stream-ticket").status_code == 401
+
+    ticket_response = client.post(
+        "/api/v1/notificacoes/stream-ticket",
+        headers={"Authorization": f"Bearer {admin_token}"},
+    )
+    assert ticket_response.status_code == 200
+    ticket = ticket_response.json()["ticket"]
+    assert ticket_response.json()["expires_in"] == 60
+
+    # Access token de longa duracao nao vale na URL, nem como ticket nem no parametro antigo.
+    assert client.get("/api/v1/notificacoes/stream", params={"access_token": admin_token}).status_code == 401
+    assert client.get("/api/v1/notificacoes/stream", params={"ticket": admin_token}).status_code == 401
+    # E o ticket nao vale como access token nas demais rotas.
+    assert (
+        client.get("/api/v1/notificacoes/unread-count", headers={"Authorization": f"Bearer {ticket}"}).status_code
+        == 401
+    )
+
+    async def _single_chunk(*args, **kwargs):
+        yield "event: unread_count\ndata: {}\n\n"
+
+    monkeypatch.setattr(notifications_endpoint, "stream_notifications", _single_chunk)
+    with client.stream("GET", "/api/v1/notificacoes/stream", params={"ticket": ticket}) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+
+
+def test_notifications_stream_releases_db_sessions_before_streaming(client, monkeypatch):
+    from app.api.v1.endpoints import notifications as notifications_endpoint
+    from app.core import security as security_module
+
+    admin_token = _login(client, "admin@example.com", "admin123")
+    ticket = client.post(
+        "/api/v1/notificacoes/stream-ticket",
+        headers={"Authorization": f"Bearer {admin_token}"},
+    ).json()["ticket"]
+
+    opened = []
+
+    def tracking_session():
+        session = SessionLocal()
+        opened.append(session)
+        return session
+
+    monkeypatch.setattr(security_module, "SessionLocal", tracking_session)
+    monkeypatch.setattr(notifications_endpoint, "SessionLocal", tracking_session)
+    open_while_streaming = []
+
+    async def _single_chunk(*args, **kwargs):
+        open_while_streaming.extend(session for session in opened if session.in_transaction())
+        yield "event: unread_count\ndata: {}\n\n"
+
+    monkeypatch.setattr(notifications_endpoint, "stream_notifications", _single_chunk)
+    with client.stream("GET", "/api/v1/notificacoes/stream", params={"ticket": ticket}) as response:
+        assert response.status_code == 200
+        response.read()
+
+    # usuario e contagem de nao lidas usam sessoes proprias, ja fechadas quando o stream comeca
+    assert len(opened) == 2
+    assert open_while_streaming == []
+
+
+def test_notifications_keyset_pagination_without_total(client):
+    from datetime import datetime, timedelta, timezone
+
+    admin_token = _login(client, "admin@example.com", "admin123")
+    me = _get_me(client, admin_token)
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    base = datetime(2026, 1, 10, 12, 0, tzinfo=timezone.utc)
+    db = SessionLocal()
+    try:
+        for index in range(5):
+            db.add(
+                NotificationEvent(
+                    org_id=me["org_id"],
+                    event_type="job.test.finished",
+                    severity="info",
+                    title=f"Keyset {index}",
+                    message="Mensagem",
+                    dedupe_key=f"notif:keyset:{index}",
+                    # dois eventos com o mesmo created_at para exercitar o desempate por id
+                    created_at=base + timedelta(minutes=min(index, 3)),
+                )
+            )
+        db.add(
+            NotificationEvent(
+                org_id=me["org_id"],
+                user_id="outro-usuario",
+                event_type="job.test.finished",
+                severity="info",
+                title="Direcionada a outro usuario",
+                message="Mensagem",
+                dedupe_key="notif:keyset:other-user",
+                created_at=base,
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
+
+    seen: list[str] = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {"limit": 2, "include_total": "false"}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/v1/notificacoes", params=params, headers=headers)
+        assert response.status_code == 200
+        payload = response.json()
+        assert payload["total"] is None
+        seen.extend(item["title"] for item in payload["items"])
+        pages += 1
+        cursor = payload["next_cursor"]
+        if not cursor:
+            break
+
+    assert pages == 3
+    assert len(seen) == len(set(seen)) == 5
+    assert seen[0] == "Keyset 4" or seen[0] == "Keyset 3"
+    assert "Direcionada a outro usuario" not in seen
+
+    with_total = client.get("/api/v1/notificacoes", params={"limit": 2}, headers=headers).json()
+    assert with_total["total"] == 5
+
+    invalid = client.get("/api/v1/notificacoes", params={"cursor": "nao-e-cursor"}, headers=headers)
+    assert invalid.status_code == 400
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import asyncio
+
 from app.db.session import SessionLocal
 from app.models.notification_event import NotificationEvent
 from app.models.org import Org
@@ -56,3 +58,174 @@ def test_emit_org_notification_dedupes_by_org_and_dedupe_key(client):
         assert _count_for_org(db, other_org.id) == 1
     finally:
         db.close()
+
+
+def _emit(db, org_id: str, dedupe_key: str, *, user_id: str | None = None, commit: bool = True):
+    return emit_org_notification(
+        db,
+        org_id=org_id,
+        event_type="job.test.finished",
+        severity="info",
+        title="Run concluida",
+        message="Push",
+        dedupe_key=dedupe_key,
+        user_id=user_id,
+        commit=commit,
+    )
+
+
+def test_notifications_are_pushed_to_bus_only_after_commit(client):
+    from app.models.user import User
+    from app.services.notification_bus import get_notification_bus
+    from app.services.notifications import mark_notification_as_read
+
+    bus = get_notification_bus()
+
+    def _work(org_id: str, other_user_id: str) -> None:
+        db = SessionLocal()
+        try:
+            _emit(db, org_id, "push:rolled-back", commit=False)
+            db.rollback()
+            _emit(db, org_id, "push:org-wide", commit=False)
+            _emit(db, org_id, "push:other-user", user_id=other_user_id, commit=False)
+            db.commit()
+            event = db.query(NotificationEvent).filter(NotificationEvent.dedupe_key == "push:org-wide").one()
+            mark_notification_as_read(db, event)
+        finally:
+            db.close()
+
+    async def _scenario(org_id: str, user_id: str, other_user_id: str) -> list[dict]:
+        subscription = bus.subscribe(org_id, user_id)
+        try:
+            await asyncio.to_thread(_work, org_id, other_user_id)
+            await asyncio.sleep(0)
+            messages = []
+            while not subscription.queue.empty():
+                messages.append(subscription.queue.get_nowait())
+            return messages
+        finally:
+            bus.unsubscribe(subscription)
+
+    db = SessionLocal()
+    try:
+        org = db.query(Org).first()
+        user = db.query(User).filter(User.org_id == org.id).first()
+        org_id, user_id = org.id, user.id
+        baseline = db.query(NotificationEvent).filter(
+            NotificationEvent.org_id == org_id,
+            NotificationEvent.read_at.is_(None),
+            NotificationEvent.user_id.is_(None),
+        ).count()
+    finally:
+        db.close()
+
+    messages = asyncio.run(_scenario(org_id, user_id, "outro-usuario"))
+
+    assert [m["type"] for m in messages] == ["notification", "unread_counters", "unread_counters"]
+    assert messages[0]["event"]["dedupe_key"] == "push:org-wide"
+    assert messages[1]["counters"] == {"": baseline + 1, "outro-usuario": 1}
+    assert messages[2]["counters"] == {"": baseline, "outro-usuario": 1}
+    assert not bus.has_subscribers(org_id)
+
+
+def test_stream_notifications_emits_initial_count_messages_and_heartbeat():
+    from app.services.notification_bus import NotificationBus, stream_notifications
+
+    async def _scenario() -> list[str]:
+        bus = NotificationBus()
+        subscription = bus.subscribe("org-1", "user-1")
+        checks = iter([False, False, False, True])
+
+        async def _is_disconnected() -> bool:
+            return next(checks)
+
+        bus.publish("org-1", {"type": "unread_counters", "user_id": None, "counters": {"": 3, "user-1": 1}})
+        bus.publish("org-2", {"type": "unread_counters", "user_id": None, "counters": {"": 9}})
+        await asyncio.sleep(0)
+        chunks = [
+            chunk
+            async for chunk in stream_notifications(
+                bus,
+                subscription,
+                unread_count=3,
+                is_disconnected=_is_disconnected,
+                heartbeat_seconds=0.01,
+            )
+        ]
+        assert not bus.has_subscribers("org-1")
+        return chunks
+
+    chunks = asyncio.run(_scenario())
+    assert chunks[0].startswith("retry:")
+    assert chunks[1] == 'event: unread_count\ndata: {"unread_count": 3}\n\n'
+    assert chunks[2].startswith("event: unread_count\n") and '"unread_count": 4' in chunks[2]
+    assert chunks[3] == ": ping\n\n"
+    assert len(chunks) == 5
+
+
+def test_unread_counters_are_maintained_per_user_and_rebuildable(client):
+    from app.models.user import User
+    from app.services.notifications import (
+        count_unread_notifications,
+        mark_notification_as_read,
+        rebuild_unread_counters,
+    )
+
+    db = SessionLocal()
+    try:
+        org = db.query(Org).first()
+        user = db.query(User).filter(User.org_id == org.id).first()
+        base_org = count_unread_notifications(db, org.id)
+
+        org_wide = _emit(db, org.id, "counter:org")
+        _emit(db, org.id, "counter:mine", user_id=user.id)
+        _emit(db, org.id, "counter:other", user_id="outro-usuario")
+
+        assert count_unread_notifications(db, org.id) == base_org + 1
+        assert count_unread_notifications(db, org.id, user.id) == base_org + 2
+        assert count_unread_notifications(db, org.id, "outro-usuario") == base_org + 2
+
+        mark_notification_as_read(db, org_wide)
+        mark_notification_as_read(db, org_wide)
+        assert count_unread_notifications(db, org.id, user.id) == base_org + 1
+
+        assert rebuild_unread_counters(db, org.id) == base_org + 2
+        db.commit()
+        assert count_unread_notifications(db, org.id, user.id) == base_org + 1
+    finally:
+        db.close()
+
+
+def test_archive_moves_old_read_events_in_batches_and_keeps_dedupe(client):
+    from datetime import datetime, timedelta, timezone
+
+    from app.models.notification_event_archive import NotificationEventArchive
+    from app.services.notifications import archive_read_notifications, notification_dedupe_exists
+
+    now = datetime.now(timezone.utc)
+    db = SessionLocal()
+    try:
+        org = db.query(Org).first()
+        for index in range(5):
+            event = _emit(db, org.id, f"archive:old:{index}")
+            event.read_at = now - timedelta(days=120)
+        _emit(db, org.id, "archive:recent").read_at = now - timedelta(days=5)
+        _emit(db, org.id, "archive:unread")
+        db.commit()
+
+        result = archive_read_notifications(db, older_than_days=90, batch_size=2, org_id=org.id, now=now)
+        assert result == {"archived": 5, "batches": 3}
+
+        remaining = {
+            key
+            for (key,) in db.query(NotificationEvent.dedupe_key).filter(
+                NotificationEvent.dedupe_key.like("archive:%")
+            )
+        }
+        assert remaining == {"archive:recent", "archive:unread"}
+        assert db.query(NotificationEventArchive).filter(NotificationEventArchive.org_id == org.id).count() == 5
+        assert notification_dedupe_exists(db, org.id, "archive:old:0")
+        assert _emit(db, org.id, "archive:old:0") is None
+        assert db.query(NotificationEvent).filter(NotificationEvent.dedupe_key == "archive:old:0").count() == 0
+    finally:
+        db.close()
@@ -0,0 +1,163 @@
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy.exc import IntegrityError
+
+from app.db.session import SessionLocal
+from app.models.company import Company
+from app.models.company_licence import CompanyLicence
+from app.models.company_profile import CompanyProfile
+from app.models.org import Org
+from app.models.org_kpi_snapshot import OrgKpiDirtyMark, OrgKpiSnapshot
+from app.services import org_kpi_snapshot
+from app.services.org_kpi_snapshot import refresh_due_kpi_snapshots
+
+
+def _login(client) -> dict[str, str]:
+    response = client.post("/api/v1/auth/login", json={"email": "admin@example.com", "password": "admin123"})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _kpis(client, headers, **params) -> tuple[dict[str, int], dict]:
+    response = client.get("/api/v1/grupos/kpis", params=params, headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    return {item["chave"]: item["valor"] for item in body["items"]}, body
+
+
+def _seed_company(cnpj: str, *, risk: str, cercon_days: int) -> str:
+    db = SessionLocal()
+    try:
+        org = db.query(Org).first()
+        company = Company(org_id=org.id, cnpj=cnpj, razao_social=f"KPI {cnpj}")
+        db.add(company)
+        db.flush()
+        db.add(CompanyProfile(org_id=org.id, company_id=company.id, risco_consolidado=risk, score_status="OK"))
+        db.add(
+            CompanyLicence(
+                org_id=org.id,
+                company_id=company.id,
+                cercon="possui",
+                cercon_valid_until=date.today() + timedelta(days=cercon_days),
+            )
+        )
+        db.commit()
+        return company.id
+    finally:
+        db.close()
+
+
+def test_kpis_are_served_from_snapshot_and_refreshed_after_writes(client):
+    headers = _login(client)
+    _seed_company("61616161000161", risk="HIGH", cercon_days=5)
+
+    values, body = _kpis(client, headers)
+    assert body["stale"] is False
+    assert values["empresas_ativas"] == 1
+    assert values["risco_high"] == 1
+    assert values["score_ok"] == 1
+    assert values["licencas_vencendo_7d"] == 1
+    assert values["licencas_vencendo_30d"] == 1
+    assert values["licencas_vencidas"] == 0
+
+    _seed_company("62626262000162", risk="LOW", cercon_days=-2)
+    values, body = _kpis(client, headers)
+    # a escrita so marca o snapshot; a leitura continua constante ate o recalculo
+    assert body["stale"] is True
+    assert values["empresas_ativas"] == 1
+
+    db = SessionLocal()
+    try:
+        assert refresh_due_kpi_snapshots(db, debounce_seconds=0)["refreshed"] == 1
+    finally:
+        db.close()
+
+    values, body = _kpis(client, headers, grupo="licencas")
+    assert body["stale"] is False
+    assert values == {
+        "licencas_vencidas": 1,
+        "licencas_vencendo_7d": 1,
+        "licencas_vencendo_30d": 1,
+        "licencas_vencendo_60d": 1,
+    }
+    values, _body = _kpis(client, headers)
+    assert values["empresas_ativas"] == 2
+    assert values["risco_low"] == 1
+
+
+def test_reconcile_refreshes_snapshots_from_a_previous_day(client):
+    headers = _login(client)
+    _kpis(client, headers)
+
+    db = SessionLocal()
+    try:
+        assert refresh_due_kpi_snapshots(db, debounce_seconds=60)["refreshed"] == 0
+        snapshot = db.query(OrgKpiSnapshot).one()
+        snapshot.computed_at = datetime.now(timezone.utc) - timedelta(days=1)
+        db.commit()
+        assert refresh_due_kpi_snapshots(db, debounce_seconds=60)["refreshed"] == 1
+        db.expire_all()
+        assert db.query(OrgKpiSnapshot).one().computed_at.date() == datetime.now(timezone.utc).date()
+    finally:
+        db.close()
+
+
+def test_writes_append_marks_and_refresh_keeps_marks_from_during_the_compute(client, monkeypatch):
+    headers = _login(client)
+    _kpis(client, headers)
+    db = SessionLocal()
+    try:
+        computed_at = db.query(OrgKpiSnapshot).one().computed_at
+    finally:
+        db.close()
+
+    _seed_company("63636363000163", risk="LOW", cercon_days=40)
+    _seed_company("64646464000164", risk="LOW", cercon_days=40)
+
+    db = SessionLocal()
+    try:
+        # cada escrita so acrescenta marcas; a linha do snapshot nao e tocada
+        assert db.query(OrgKpiDirtyMark).count() >= 2
+        assert db.query(OrgKpiSnapshot).one().computed_at == computed_at
+
+        compute = org_kpi_snapshot.compute_org_kpis
+
+        def compute_with_concurrent_write(session, org_id, today=None):
+            org_kpi_snapshot.mark_org_kpis_dirty(session, [org_id])
+            return compute(session, org_id, today)
+
+        monkeypatch.setattr(org_kpi_snapshot, "compute_org_kpis", compute_with_concurrent_write)
+        assert refresh_due_kpi_snapshots(db, debounce_seconds=0)["refreshed"] == 1
+        # a marca gravada durante o calculo continua pendente
+        assert db.query(OrgKpiDirtyMark).count() == 1
+    finally:
+        db.close()
+
+    values, body = _kpis(client, headers)
+    assert body["stale"] is True
+    assert values["empresas_ativas"] == 2
+
+
+def test_concurrent_first_read_reuses_the_snapshot_created_by_the_other_request(client, monkeypatch):
+    headers = _login(client)
+    refresh = org_kpi_snapshot.refresh_org_kpi_snapshot
+    calls: list[str] = []
+
+    def lose_the_insert_race(db, org_id, **kwargs):
+        calls.append(org_id)
+        if len(calls) > 1:
+            return refresh(db, org_id, **kwargs)
+        # A outra requisicao grava e confirma primeiro; a nossa insercao bate na unique.
+        other = SessionLocal()
+        try:
+            refresh(other, org_id)
+            other.commit()
+        finally:
+            other.close()
+        raise IntegrityError("INSERT INTO org_kpi_snapshots", {}, Exception("uq_org_kpi_snapshots_org"))
+
+    monkeypatch.setattr(org_kpi_snapshot, "refresh_org_kpi_snapshot", lose_the_insert_race)
+    values, body = _kpis(client, headers)
+    assert len(calls) == 1
+    assert body["computed_at"] is not None
+    assert "empresas_ativas" in values
@@ -0,0 +1,74 @@
+from app.db.session import SessionLocal
+from app.models.company_process_obs_history import CompanyProcessObsHistory
+
+
+def _login(client) -> dict[str, str]:
+    response = client.post("/api/v1/auth/login", json={"email": "admin@example.com", "password": "admin123"})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _create_process(client, headers) -> str:
+    company = client.post(
+        "/api/v1/companies",
+        headers=headers,
+        json={"cnpj": "12.345.678/0001-66", "razao_social": "Empresa Historico"},
+    )
+    assert company.status_code == 200
+    created = client.post(
+        "/api/v1/processos",
+        headers=headers,
+        json={"company_id": company.json()["id"], "process_type": "DIVERSOS", "protocolo": "HIST-1"},
+    )
+    assert created.status_code == 200
+    return created.json()["id"]
+
+
+def test_obs_updates_append_rows_and_history_pages_backwards(client):
+    headers = _login(client)
+    process_id = _create_process(client, headers)
+
+    for value in ("primeira", "segunda", "terceira"):
+        response = client.patch(f"/api/v1/processos/{process_id}/obs", json={"obs": value}, headers=headers)
+        assert response.status_code == 200
+        assert response.json()["obs"] == value
+
+    latest = client.get(f"/api/v1/processos/{process_id}/obs-history", params={"limit": 2}, headers=headers)
+    assert latest.status_code == 200
+    assert [item["new_value"] for item in latest.json()] == ["segunda", "terceira"]
+    assert latest.json()[1]["old_value"] == "segunda"
+    assert latest.json()[1]["actor_email"] == "admin@example.com"
+    assert latest.json()[1]["timestamp"].endswith("Z")
+
+    older = client.get(
+        f"/api/v1/processos/{process_id}/obs-history",
+        params={"limit": 2, "cursor": latest.headers["x-next-cursor"]},
+        headers=headers,
+    )
+    assert [item["new_value"] for item in older.json()] == ["primeira"]
+    assert "x-next-cursor" not in older.headers
+
+    everything = client.get(f"/api/v1/processos/{process_id}/obs-history", headers=headers)
+    assert [item["new_value"] for item in everything.json()] == ["primeira", "segunda", "terceira"]
+
+    invalid = client.get(
+        f"/api/v1/processos/{process_id}/obs-history", params={"cursor": "nao-e-cursor"}, headers=headers
+    )
+    assert invalid.status_code == 400
+
+
+def test_deleting_process_removes_its_history(client):
+    headers = _login(client)
+    process_id = _create_process(client, headers)
+    client.patch(f"/api/v1/processos/{process_id}/obs", json={"obs": "anotacao"}, headers=headers)
+
+    response = client.request(
+        "DELETE", f"/api/v1/processos/{process_id}", json={"password": "admin123"}, headers=headers
+    )
+    assert response.status_code == 200
+
+    db = SessionLocal()
+    try:
+        assert db.query(CompanyProcessObsHistory).count() == 0
+    finally:
+        db.close()
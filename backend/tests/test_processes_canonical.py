@@ -204,3 +204,37 @@ def test_process_type_aliases_are_canonicalized_on_update(client):
     )
     assert updated.status_code == 200
     assert updated.json()["process_type"] == "LICENCA_AMBIENTAL"
+
+
+def test_process_requested_on_follows_data_solicitacao(client):
+    token = _login(client, "admin@example.com", "admin123")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    company = client.post(
+        "/api/v1/companies",
+        headers=headers,
+        json={"cnpj": "12.345.678/0001-66", "razao_social": "Empresa Data"},
+    )
+    assert company.status_code == 200
+
+    created = client.post(
+        "/api/v1/processos",
+        headers=headers,
+        json={
+            "company_id": company.json()["id"],
+            "process_type": "DIVERSOS",
+            "protocolo": "P-2026-0100",
+            "data_solicitacao": "05/03/2026",
+        },
+    )
+    assert created.status_code == 200
+    assert created.json()["data_solicitacao"] == "2026-03-05"
+    assert created.json()["requested_on"] == "2026-03-05"
+
+    updated = client.patch(
+        f"/api/v1/processos/{created.json()['id']}",
+        headers=headers,
+        json={"data_solicitacao": None},
+    )
+    assert updated.status_code == 200
+    assert updated.json()["requested_on"] is None
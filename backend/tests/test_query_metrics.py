@@ -0,0 +1,102 @@
+from app.core.config import settings
+from app.core.metrics import MetricsRegistry, metrics_registry
+from app.db.query_metrics import QueryStats
+from app.db.session import SessionLocal
+from app.models.company import Company
+from app.models.company_licence import CompanyLicence
+from app.models.company_process import CompanyProcess
+from app.models.company_profile import CompanyProfile
+from app.models.company_tax import CompanyTax
+from app.models.org import Org
+
+
+def _login(client) -> dict[str, str]:
+    response = client.post("/api/v1/auth/login", json={"email": "admin@example.com", "password": "admin123"})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _seed(count: int) -> list[str]:
+    db = SessionLocal()
+    try:
+        org = db.query(Org).first()
+        ids = []
+        for position in range(count):
+            company = Company(org_id=org.id, cnpj=f"{position + 1:014d}", razao_social=f"Empresa {position}")
+            db.add(company)
+            db.flush()
+            db.add(CompanyProfile(org_id=org.id, company_id=company.id))
+            db.add(CompanyTax(org_id=org.id, company_id=company.id, taxa_funcionamento="em_aberto"))
+            db.add(CompanyLicence(org_id=org.id, company_id=company.id))
+            db.add(
+                CompanyProcess(
+                    org_id=org.id, company_id=company.id, process_type="DIVERSOS", protocolo=f"P-{position}"
+                )
+            )
+            ids.append(company.id)
+        db.commit()
+        return ids
+    finally:
+        db.close()
+
+
+def test_responses_carry_server_timing_and_query_count(client):
+    headers = _login(client)
+    _seed(3)
+    response = client.get("/api/v1/companies", headers=headers)
+    assert response.status_code == 200
+    count = int(response.headers["x-db-query-count"])
+    # usuario + org + empresas + taxas: as consultas do endpoint sincrono (threadpool) contam
+    assert count >= 3
+    assert response.headers["server-timing"].startswith("db;dur=")
+    assert f'desc="{count} queries"' in response.headers["server-timing"]
+
+
+def test_metrics_endpoint_is_local_only_and_renders_prometheus(client, monkeypatch):
+    headers = _login(client)
+    metrics_registry.reset()
+    client.get("/api/v1/companies", headers=headers)
+
+    assert client.get("/metrics").status_code == 403
+
+    monkeypatch.setattr(settings, "METRICS_ALLOW_REMOTE", True)
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'econtrole_http_requests_total{method="GET",route="/api/v1/companies",status="200"} 1' in body
+    assert 'econtrole_db_queries_per_request_bucket{method="GET",route="/api/v1/companies",le="+Inf"} 1' in body
+
+
+def test_registry_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    registry.observe("GET", "/x", 200, 0.01, QueryStats(count=3, duration=0.002))
+    registry.observe("GET", "/x", 200, 0.01, QueryStats(count=40, duration=0.02))
+    body = registry.render_prometheus()
+    assert 'econtrole_db_queries_per_request_bucket{method="GET",route="/x",le="5"} 1' in body
+    assert 'econtrole_db_queries_per_request_bucket{method="GET",route="/x",le="50"} 2' in body
+    assert 'econtrole_db_queries_per_request_max{method="GET",route="/x"} 40' in body
+
+
+def test_list_endpoints_stay_within_query_budget(client, query_budget):
+    headers = _login(client)
+    ids = _seed(20)
+
+    # Orcamentos fixos: nao podem crescer com o numero de empresas (N+1).
+    budgets = {
+        "/api/v1/companies": 5,
+        "/api/v1/licencas": 4,
+        "/api/v1/taxas": 4,
+        "/api/v1/processos": 4,
+        "/api/v1/certificados": 4,
+        f"/api/v1/companies/{ids[0]}/overview": 9,
+        "/api/v1/notificacoes": 5,
+    }
+    for path, budget in budgets.items():
+        with query_budget(budget):
+            response = client.get(path, headers=headers)
+        assert response.status_code == 200, path
+
+    with query_budget(9):
+        response = client.post("/api/v1/companies/overview/batch", json={"company_ids": ids}, headers=headers)
+    assert response.status_code == 200
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from app.db.session import SessionLocal
+from app.models.cnae_risk import CNAERisk
+from app.models.cnae_risk_suggestion import CNAERiskSuggestion
+from app.models.company import Company
+from app.models.company_licence import CompanyLicence
+from app.models.company_profile import CompanyProfile
+from app.models.org import Org
+from app.services.company_scoring import recalculate_company_score
+from app.services.score_simulation import CatalogChange, LicenceRenewal, simulate_org_scores
+
+
+def _login(client) -> dict[str, str]:
+    response = client.post("/api/v1/auth/login", json={"email": "admin@example.com", "password": "admin123"})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _profile(org_id: str, company_id: str, code: str | None) -> CompanyProfile:
+    cnaes = [{"code": code, "text": "Atividade"}] if code else []
+    return CompanyProfile(org_id=org_id, company_id=company_id, cnaes_principal=cnaes, raw={})
+
+
+def _seed() -> tuple[str, dict[str, str]]:
+    db = SessionLocal()
+    try:
+        org = db.query(Org).first()
+        db.add_all(
+            [
+                CNAERisk(cnae_code="56.11-2-01", cnae_text="Restaurantes", risk_tier="LOW", base_weight=10),
+                CNAERisk(cnae_code="47.11-3-01", cnae_text="Mercado", risk_tier="MEDIUM", base_weight=20),
+            ]
+        )
+        ids: dict[str, str] = {}
+        for key, cnpj, code in (
+            ("restaurante", "61616161000161", "56.11-2-01"),
+            ("mercado", "62626262000162", "47.11-3-01"),
+            ("sem_cnae", "63636363000163", None),
+            ("nao_mapeado", "64646464000164", "96.09-2-99"),
+        ):
+            company = Company(org_id=org.id, cnpj=cnpj, razao_social=f"Simulacao {key}")
+            db.add(company)
+            db.flush()
+            db.add(_profile(org.id, company.id, code))
+            ids[key] = company.id
+        db.add(
+            CompanyLicence(
+                org_id=org.id,
+                company_id=ids["restaurante"],
+                cercon="possui",
+                cercon_valid_until=date.today() + timedelta(days=3),
+            )
+        )
+        db.flush()
+        for company_id in ids.values():
+            recalculate_company_score(db, org.id, company_id)
+        db.commit()
+        return org.id, ids
+    finally:
+        db.close()
+
+
+def test_simulation_matches_persisted_scores_and_writes_nothing(client, query_budget):
+    org_id, ids = _seed()
+    db = SessionLocal()
+    try:
+        stored = {
+            profile.company_id: (profile.score_urgencia, profile.score_status)
+            for profile in db.query(CompanyProfile).filter(CompanyProfile.org_id == org_id)
+        }
+        simulate_org_scores(db, org_id)
+        with query_budget(6):
+            result = simulate_org_scores(
+                db,
+                org_id,
+                catalog_changes=[
+                    CatalogChange(cnae_code="56.11-2-01", risk_tier="HIGH", base_weight=30),
+                    CatalogChange(cnae_code="96.09-2-99", risk_tier="MEDIUM", base_weight=15),
+                ],
+                licence_renewals=[LicenceRenewal(licence_type="cercon")],
+            )
+
+        assert result["total_companies"] == 4
+        assert result["affected_companies"] == 2
+        assert result["changed_companies"] == 2
+        assert result["before"]["score_status"] == {"NO_CNAE": 1, "NO_LICENCE": 1, "OK": 1, "UNMAPPED_CNAE": 1}
+        assert result["after"]["score_status"] == {"NO_CNAE": 1, "NO_LICENCE": 2, "OK": 1}
+        assert result["after"]["risco_consolidado"] == {"HIGH": 1, "MEDIUM": 2, "NONE": 1}
+        assert result["status_transitions"] == [{"from_status": "UNMAPPED_CNAE", "to_status": "NO_LICENCE", "count": 1}]
+
+        by_company = {item["company_id"]: item for item in result["top_changes"]}
+        assert (by_company[ids["restaurante"]]["score_before"], by_company[ids["restaurante"]]["score_after"]) == (
+            stored[ids["restaurante"]][0],
+            30,
+        )
+        assert by_company[ids["nao_mapeado"]]["delta"] == 15
+
+        assert sum(result["before"]["score_buckets"].values()) == 4
+        assert result["before"]["avg_score_urgencia"] == round(
+            sum(score for score, _status in stored.values()) / 4, 2
+        )
+        db.rollback()
+        assert db.query(CNAERisk).filter(CNAERisk.cnae_code == "96.09-2-99").count() == 0
+        assert db.query(CNAERisk).filter(CNAERisk.cnae_code == "56.11-2-01").one().base_weight == 10
+    finally:
+        db.close()
+
+
+def test_suggestion_simulation_endpoint(client):
+    headers = _login(client)
+    org_id, ids = _seed()
+    db = SessionLocal()
+    try:
+        suggestion = CNAERiskSuggestion(
+            org_id=org_id,
+            cnae_code="47.11-3-01",
+            suggested_risk_tier="HIGH",
+            suggested_base_weight=45,
+            source_name="teste",
+            status="PENDING",
+        )
+        db.add(suggestion)
+        db.commit()
+        suggestion_id = suggestion.id
+    finally:
+        db.close()
+
+    response = client.post(f"/api/v1/catalog/cnae-risk-suggestions/{suggestion_id}/simulate", headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["changed_companies"] == 1
+    assert body["top_changes"][0]["company_id"] == ids["mercado"]
+    assert body["top_changes"][0]["delta"] == 25
+    assert body["top_changes"][0]["risk_after"] == "HIGH"
+
+    db = SessionLocal()
+    try:
+        db.get(CNAERiskSuggestion, suggestion_id).status = "APPROVED"
+        db.commit()
+    finally:
+        db.close()
+    decided = client.post(f"/api/v1/catalog/cnae-risk-suggestions/{suggestion_id}/simulate", headers=headers)
+    assert decided.status_code == 409
+
+    adhoc = client.post(
+        "/api/v1/catalog/cnae-risk-suggestions/simulate",
+        json={"licence_renewals": [{"licence_type": "cercon", "company_ids": [ids["mercado"]]}]},
+        headers=headers,
+    )
+    assert adhoc.status_code == 200
+    assert adhoc.json()["changed_companies"] == 0
+
+    invalid = client.post(
+        "/api/v1/catalog/cnae-risk-suggestions/simulate",
+        json={"licence_renewals": [{"licence_type": "outra"}]},
+        headers=headers,
+    )
+    assert invalid.status_code == 422
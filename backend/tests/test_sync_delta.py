@@ -0,0 +1,231 @@
+from datetime import datetime, timedelta, timezone
+
+from app.db.session import SessionLocal
+from app.models.certificate_mirror import CertificateMirror
+from app.models.company import Company
+from app.models.company_licence import CompanyLicence
+from app.models.company_profile import CompanyProfile
+from app.models.company_tax import CompanyTax
+from app.models.org import Org
+from app.models.sync_tombstone import SyncTombstone
+from app.services.certificados_mirror import delete_certificates_by_cert_ids
+from app.services.sync_delta import decode_sync_cursor, fetch_sync_delta
+
+
+def _login(client) -> dict[str, str]:
+    response = client.post("/api/v1/auth/login", json={"email": "admin@example.com", "password": "admin123"})
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _seed(count: int = 3) -> tuple[str, list[str]]:
+    db = SessionLocal()
+    try:
+        org = db.query(Org).first()
+        ids = []
+        for position in range(count):
+            company = Company(org_id=org.id, cnpj=f"{position + 1:014d}", razao_social=f"Empresa {position}")
+            db.add(company)
+            db.flush()
+            db.add(CompanyProfile(org_id=org.id, company_id=company.id))
+            db.add(CompanyTax(org_id=org.id, company_id=company.id, status_taxas="em_dia"))
+            db.add(CompanyLicence(org_id=org.id, company_id=company.id))
+            ids.append(company.id)
+        db.commit()
+        return org.id, ids
+    finally:
+        db.close()
+
+
+def _sync(client, headers, path: str, cursor: str, **params) -> dict:
+    response = client.get(path, params={"updated_since": cursor, **params}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_list_without_updated_since_keeps_plain_list(client):
+    headers = _login(client)
+    _seed(2)
+    response = client.get("/api/v1/taxas", headers=headers)
+    assert response.status_code == 200
+    assert isinstance(response.json(), list) and len(response.json()) == 2
+
+
+def test_taxes_delta_returns_only_changes_and_tombstones(client):
+    headers = _login(client)
+    _org_id, company_ids = _seed(3)
+
+    first = _sync(client, headers, "/api/v1/taxas", "0")
+    assert len(first["items"]) == 3 and first["deleted"] == [] and first["has_more"] is False
+
+    idle = _sync(client, headers, "/api/v1/taxas", first["next_cursor"])
+    assert idle["items"] == [] and idle["deleted"] == []
+
+    db = SessionLocal()
+    try:
+        changed = db.query(CompanyTax).filter(CompanyTax.company_id == company_ids[0]).one()
+        changed.status_taxas = "em_aberto"
+        removed = db.query(CompanyTax).filter(CompanyTax.company_id == company_ids[1]).one()
+        removed_id = removed.id
+        db.delete(removed)
+        db.commit()
+        changed_id = changed.id
+    finally:
+        db.close()
+
+    delta = _sync(client, headers, "/api/v1/taxas", idle["next_cursor"])
+    assert [item["id"] for item in delta["items"]] == [changed_id]
+    assert delta["deleted"] == [removed_id]
+
+    after = _sync(client, headers, "/api/v1/taxas", delta["next_cursor"])
+    assert after["items"] == [] and after["deleted"] == []
+
+
+def test_delta_pages_through_rows_sharing_the_same_updated_at(client):
+    headers = _login(client)
+    _seed(5)
+    db = SessionLocal()
+    try:
+        same = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+        db.query(CompanyLicence).update({CompanyLicence.updated_at: same}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+    seen: list[str] = []
+    cursor = "0"
+    for _ in range(5):
+        page = _sync(client, headers, "/api/v1/licencas", cursor, limit=2)
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if not page["has_more"]:
+            break
+    assert len(seen) == 5 and len(set(seen)) == 5
+
+
+def test_companies_delta_follows_profile_changes_deactivation_and_delete(client):
+    headers = _login(client)
+    _org_id, company_ids = _seed(3)
+    start = _sync(client, headers, "/api/v1/companies", "0")
+    assert {item["id"] for item in start["items"]} == set(company_ids)
+
+    db = SessionLocal()
+    try:
+        profile = db.query(CompanyProfile).filter(CompanyProfile.company_id == company_ids[0]).one()
+        profile.email = "contato@example.com"
+        db.get(Company, company_ids[1]).is_active = False
+        db.commit()
+    finally:
+        db.close()
+
+    delta = _sync(client, headers, "/api/v1/companies", start["next_cursor"])
+    assert [item["id"] for item in delta["items"]] == [company_ids[0]]
+    assert delta["items"][0]["email"] == "contato@example.com"
+    assert delta["deleted"] == [company_ids[1]]
+
+    response = client.request(
+        "DELETE", f"/api/v1/companies/{company_ids[2]}", json={"password": "admin123"}, headers=headers
+    )
+    assert response.status_code == 200
+    after_delete = _sync(client, headers, "/api/v1/companies", delta["next_cursor"])
+    assert after_delete["deleted"] == [company_ids[2]]
+    licences = _sync(client, headers, "/api/v1/licencas", start["next_cursor"])
+    assert len(licences["deleted"]) == 1
+
+
+def test_certificate_bulk_delete_records_tombstones(client):
+    headers = _login(client)
+    org_id, _ = _seed(1)
+    db = SessionLocal()
+    try:
+        db.add(CertificateMirror(org_id=org_id, cert_id="c-1", sha1_fingerprint="aa", parse_ok=True))
+        db.add(CertificateMirror(org_id=org_id, cert_id="c-2", sha1_fingerprint="bb", parse_ok=True))
+        db.commit()
+    finally:
+        db.close()
+    start = _sync(client, headers, "/api/v1/certificados", "0")
+    assert len(start["items"]) == 2
+    removed = next(item["id"] for item in start["items"] if item["cert_id"] == "c-1")
+
+    db = SessionLocal()
+    try:
+        assert delete_certificates_by_cert_ids(db, org_id, ["c-1"]) == {"deleted": 1}
+    finally:
+        db.close()
+
+    delta = _sync(client, headers, "/api/v1/certificados", start["next_cursor"])
+    assert delta["items"] == [] and delta["deleted"] == [removed]
+
+
+def test_invalid_updated_since_returns_400(client):
+    headers = _login(client)
+    response = client.get("/api/v1/processos", params={"updated_since": "not-a-cursor"}, headers=headers)
+    assert response.status_code == 400
+
+    by_date = _sync(client, headers, "/api/v1/processos", "2026-01-01T00:00:00Z")
+    assert by_date["items"] == [] and by_date["next_cursor"]
+
+
+def test_delta_waits_safety_lag_for_transactions_committed_out_of_order(client):
+    org_id, company_ids = _seed(3)
+    now = datetime.now(timezone.utc)
+    db = SessionLocal()
+    try:
+        db.query(CompanyTax).update({CompanyTax.updated_at: now - timedelta(minutes=1)}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+    def _delta(cursor: str, at: datetime, lag: float):
+        reader = SessionLocal()
+        try:
+            query = reader.query(CompanyTax).filter(CompanyTax.org_id == org_id)
+            delta = fetch_sync_delta(
+                reader,
+                org_id,
+                "taxes",
+                query,
+                cursor=decode_sync_cursor(cursor),
+                limit=50,
+                safety_lag_seconds=lag,
+                now=at,
+            )
+            return [row.id for row in delta.rows], delta.deleted, delta.next_cursor
+        finally:
+            reader.close()
+
+    _rows, _deleted, start = _delta("0", now, 5)
+
+    # A faz flush primeiro (updated_at mais antigo) e B faz flush depois mas commita antes.
+    first_writer = SessionLocal()
+    second_writer = SessionLocal()
+    try:
+        late = first_writer.query(CompanyTax).filter(CompanyTax.company_id == company_ids[0]).one()
+        early = second_writer.query(CompanyTax).filter(CompanyTax.company_id == company_ids[1]).one()
+        early.status_taxas = "em_aberto"
+        early.updated_at = now - timedelta(seconds=1)
+        second_writer.add(
+            SyncTombstone(org_id=org_id, entity="taxes", entity_id="removida", deleted_at=now - timedelta(seconds=1))
+        )
+        second_writer.commit()
+        early_id = early.id
+
+        # Sem janela o cursor pula para o updated_at de B e A nunca seria entregue.
+        rows_no_lag, _deleted, cursor_no_lag = _delta(start, now, 0)
+        assert rows_no_lag == [early_id]
+        # Com a janela nada dos ultimos segundos sai ainda e o cursor fica parado.
+        rows, deleted, cursor = _delta(start, now, 5)
+        assert rows == [] and deleted == []
+
+        late.status_taxas = "em_aberto"
+        late.updated_at = now - timedelta(seconds=2)
+        first_writer.commit()
+        late_id = late.id
+    finally:
+        first_writer.close()
+        second_writer.close()
+
+    assert _delta(cursor_no_lag, now + timedelta(seconds=10), 0)[0] == []
+    rows, deleted, _cursor = _delta(cursor, now + timedelta(seconds=10), 5)
+    assert rows == [late_id, early_id]
+    assert deleted == ["removida"]
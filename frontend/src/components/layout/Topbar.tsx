@@ -28,6 +28,7 @@ import { cn } from "@/lib/utils";
 import { type AppTabKey, type NavItem } from "@/lib/theme";
 import NotificationPanel from "@/components/notifications/NotificationPanel";
 import {
+  abrirStreamNotificacoes,
   contarNotificacoesNaoLidas,
   listarNotificacoes,
   marcarNotificacaoComoLida,
@@ -96,8 +97,7 @@ export default function Topbar({
   const [notificationsLoadingMore, setNotificationsLoadingMore] = useState(false);
   const [notifications, setNotifications] = useState<any[]>([]);
   const [unreadCount, setUnreadCount] = useState(0);
-  const [totalUnread, setTotalUnread] = useState(0);
-  const [notificationsOffset, setNotificationsOffset] = useState(0);
+  const [notificationsCursor, setNotificationsCursor] = useState<string | null>(null);
   const notificationsRef = useRef<HTMLDivElement | null>(null);
   const activeItem = useMemo(
     () => items.find((item) => item.key === activeTab),
@@ -124,14 +124,13 @@ export default function Topbar({
 
   const loadNotifications = async () => {
     setNotificationsLoading(true);
-    setNotificationsOffset(0);
+    setNotificationsCursor(null);
     try {
-      const payload = await listarNotificacoes({ limit: 100, offset: 0 });
+      const payload = await listarNotificacoes({ limit: 100 });
       setNotifications(Array.isArray(payload?.items) ? payload.items : []);
-      setTotalUnread(Number(payload?.total || 0));
+      setNotificationsCursor(payload?.next_cursor || null);
     } catch {
       setNotifications([]);
-      setTotalUnread(0);
     } finally {
       setNotificationsLoading(false);
     }
@@ -140,11 +139,11 @@ export default function Topbar({
   const loadMoreNotifications = async () => {
     setNotificationsLoadingMore(true);
     try {
-      const nextOffset = notificationsOffset + 100;
-      const payload = await listarNotificacoes({ limit: 100, offset: nextOffset });
+      if (!notificationsCursor) return;
+      const payload = await listarNotificacoes({ limit: 100, cursor: notificationsCursor });
       const newItems = Array.isArray(payload?.items) ? payload.items : [];
       setNotifications((prev) => [...prev, ...newItems]);
-      setNotificationsOffset(nextOffset);
+      setNotificationsCursor(payload?.next_cursor || null);
     } catch {
       // no-op
     } finally {
@@ -154,10 +153,32 @@ export default function Topbar({
 
   useEffect(() => {
     void loadUnreadCount();
-    const interval = window.setInterval(() => {
-      void loadUnreadCount();
-    }, 30000);
-    return () => window.clearInterval(interval);
+    // Push via SSE; o polling so roda enquanto o fluxo nao estiver aberto.
+    let interval: number | null = null;
+    const startPolling = () => {
+      if (interval !== null) return;
+      interval = window.setInterval(() => {
+        void loadUnreadCount();
+      }, 30000);
+    };
+    const stopPolling = () => {
+      if (interval === null) return;
+      window.clearInterval(interval);
+      interval = null;
+    };
+    const closeStream = abrirStreamNotificacoes({
+      onOpen: stopPolling,
+      onUnreadCount: (count: number) => setUnreadCount(count),
+      onNotification: (event: any) =>
+        setNotifications((prev) => (prev.some((entry) => entry.id === event.id) ? prev : [event, ...prev])),
+      onResync: () => void loadUnreadCount(),
+      onError: startPolling,
+    });
+    if (!closeStream) startPolling();
+    return () => {
+      stopPolling();
+      closeStream?.();
+    };
   }, []);
 
   useEffect(() => {
@@ -284,9 +305,9 @@ export default function Topbar({
                   onMarkRead={handleMarkRead}
                   onNavigate={handleOpenNotification}
                   onLoadMore={loadMoreNotifications}
-                  hasMore={notifications.length < totalUnread}
+                  hasMore={Boolean(notificationsCursor)}
                   loadingMore={notificationsLoadingMore}
-                  totalUnread={totalUnread}
+                  totalUnread={unreadCount}
                 />
               </div>
               <Button size="icon" variant="secondary" title="Favoritos" className="border border-slate-200 bg-white text-slate-700 hover:bg-slate-50">
@@ -156,7 +156,7 @@ export default function NotificationPanel({
                 disabled={loadingMore}
                 data-testid="notification-load-more"
               >
-                {loadingMore ? "Carregando..." : `Carregar mais (${totalUnread - visibleItems.length} restantes)`}
+                {loadingMore ? "Carregando..." : `Carregar mais (${Math.max(0, totalUnread - visibleItems.length)} restantes)`}
               </Button>
             </div>
           ) : null}
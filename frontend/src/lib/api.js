@@ -221,7 +221,7 @@ const buildAbsoluteUrl = (endpointPath, query) => {
   return `${url}${hasQuery ? "&" : ""}${suffix}`;
 };
 
-const getAuthToken = () => {
+export const getAuthToken = () => {
   try {
     if (typeof window !== "undefined" && window?.localStorage) {
       const stored = window.localStorage.getItem("access_token");
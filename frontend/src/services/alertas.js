@@ -1,9 +1,9 @@
 import { fetchJson } from "@/lib/api";
 
 export const listarAlertas = async (params = {}) => {
-  const { page, size, sort, tipo_alerta, empresa_id } = params;
+  const { limit, cursor, tipo_alerta, severity, empresa_id, dias } = params;
   return fetchJson("/api/v1/alertas", {
-    query: { page, size, sort, tipo_alerta, empresa_id },
+    query: { limit, cursor, tipo_alerta, severity, empresa_id, dias },
   });
 };
 
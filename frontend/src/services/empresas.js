@@ -19,6 +19,13 @@ export const listarEmpresas = async (params = {}) => {
   });
 };
 
+// Type-ahead: busca aproximada por razao social, nome fantasia, pasta ou fragmento de CNPJ/CPF.
+export const buscarEmpresas = async (q, { limit = 20, includeInactive = false } = {}) => {
+  return fetchJson("/api/v1/companies/search", {
+    query: { q, limit, include_inactive: includeInactive || undefined },
+  });
+};
+
 export const obterEmpresa = async (empresaId) => {
   return fetchJson(`/api/v1/companies/${empresaId}`);
 };
@@ -27,6 +34,15 @@ export const obterEmpresaOverview = async (empresaId) => {
   return fetchJson(`/api/v1/companies/${empresaId}/overview`, { transform: (payload) => payload });
 };
 
+// Ate 500 ids por chamada; ids de outra org ou inexistentes voltam em `missing`.
+export const obterEmpresasOverviewLote = async (empresaIds = []) => {
+  return fetchJson("/api/v1/companies/overview/batch", {
+    method: "POST",
+    body: { company_ids: empresaIds },
+    transform: (payload) => payload,
+  });
+};
+
 export const criarEmpresa = async (payload) => {
   return fetchJson("/api/v1/companies", { method: "POST", body: payload });
 };
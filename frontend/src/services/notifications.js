@@ -1,8 +1,11 @@
-import { fetchJson } from "@/lib/api";
+import { apiUrl, fetchJson, getAuthToken } from "@/lib/api";
 
+// Paginacao por cursor (next_cursor da resposta); sem COUNT total por padrao.
 export const listarNotificacoes = async (params = {}) => {
-  const { limit = 20, offset = 0 } = params;
-  return fetchJson("/api/v1/notificacoes", { query: { limit, offset } });
+  const { limit = 20, cursor, includeTotal = false } = params;
+  return fetchJson("/api/v1/notificacoes", {
+    query: { limit, cursor, include_total: includeTotal },
+  });
 };
 
 export const contarNotificacoesNaoLidas = async () => {
@@ -15,3 +18,74 @@ export const marcarNotificacaoComoLida = async (id) => {
   }
   return fetchJson(`/api/v1/notificacoes/${id}/read`, { method: "POST" });
 };
+
+const parseStreamData = (event) => {
+  try {
+    return JSON.parse(event?.data || "{}");
+  } catch {
+    return {};
+  }
+};
+
+const STREAM_RETRY_MS = 5000;
+
+// Abre o fluxo SSE de notificacoes. Retorna a funcao de fechamento ou null quando
+// o navegador nao suporta EventSource (o chamador mantem o polling nesse caso).
+// O EventSource nao envia cabecalhos: cada conexao usa um ticket curto do stream-ticket,
+// por isso a reconexao pede um ticket novo em vez de reaproveitar a URL antiga.
+export const abrirStreamNotificacoes = (handlers = {}) => {
+  if (typeof window === "undefined" || typeof window.EventSource !== "function") {
+    return null;
+  }
+  if (!getAuthToken()) {
+    return null;
+  }
+  const { onOpen, onUnreadCount, onNotification, onResync, onError } = handlers;
+  let source = null;
+  let retryTimer = null;
+  let closed = false;
+
+  const scheduleRetry = () => {
+    if (closed || retryTimer) return;
+    retryTimer = window.setTimeout(() => {
+      retryTimer = null;
+      void connect();
+    }, STREAM_RETRY_MS);
+  };
+
+  const connect = async () => {
+    let ticket;
+    try {
+      ({ ticket } = await fetchJson("/api/v1/notificacoes/stream-ticket", { method: "POST" }));
+    } catch {
+      onError?.(true);
+      scheduleRetry();
+      return;
+    }
+    if (closed || !ticket) return;
+    source = new window.EventSource(apiUrl("/api/v1/notificacoes/stream", { ticket }));
+    source.onopen = () => onOpen?.();
+    source.onerror = () => {
+      source?.close();
+      source = null;
+      onError?.(true);
+      scheduleRetry();
+    };
+    source.addEventListener("unread_count", (event) => {
+      const payload = parseStreamData(event);
+      onUnreadCount?.(Number(payload?.unread_count || 0));
+    });
+    source.addEventListener("notification", (event) => {
+      const payload = parseStreamData(event);
+      if (payload?.event) onNotification?.(payload.event);
+    });
+    source.addEventListener("resync", () => onResync?.());
+  };
+
+  void connect();
+  return () => {
+    closed = true;
+    if (retryTimer) window.clearTimeout(retryTimer);
+    source?.close();
+  };
+};